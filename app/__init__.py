@@ -11,6 +11,7 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import config
 from .extensions import bcrypt, csrf, db, login_manager, migrate
+from .utils.solicitud import Solicitud
 
 
 def create_app(config_name=None):
@@ -28,6 +29,7 @@ def create_app(config_name=None):
 
     # Crear aplicación
     app = Flask(__name__)
+    app.request_class = Solicitud
 
     # Determinar configuración
     if config_name is None:
@@ -66,6 +68,12 @@ def init_extensions(app):
     bcrypt.init_app(app)
     csrf.init_app(app)
 
+    # Caches por proceso: reportes históricos y árboles de categorías
+    from .utils.cache import CacheLRU
+
+    app.extensions['cache_reportes'] = CacheLRU(app.config['REPORTES_CACHE_MAX_ITEMS'])
+    app.extensions['cache_categorias'] = CacheLRU(app.config['CATEGORIAS_CACHE_MAX_ITEMS'])
+
     # Configurar user_loader para Flask-Login
     from .models.usuario import Usuario
 
@@ -152,6 +160,51 @@ def register_commands(app):
         db.session.commit()
         print(f'Superadmin creado exitosamente: {email}')
 
+    @app.cli.command('cierres-stock')
+    @click.option(
+        '--periodo',
+        type=click.Choice(['diario', 'mensual']),
+        default='mensual',
+        help='Cierres diarios o de fin de mes',
+    )
+    @click.option('--desde', type=click.DateTime(['%Y-%m-%d']), help='Primera fecha a cerrar')
+    @click.option('--hasta', type=click.DateTime(['%Y-%m-%d']), help='Última fecha a cerrar')
+    @click.option('--empresa', 'empresa_id', type=int, help='Solo esta empresa')
+    @click.option('--regenerar', is_flag=True, help='Recalcula los cierres ya generados')
+    def cierres_stock(periodo, desde, hasta, empresa_id, regenerar):
+        """Genera los cierres de stock (por defecto, el último período cerrado)."""
+        from .models import Empresa
+        from .services import cierre_stock_service
+        from .utils.helpers import ahora_argentina
+
+        hasta = hasta.date() if hasta else cierre_stock_service.ultimo_cierre_posible(periodo)
+        desde = desde.date() if desde else hasta
+        if hasta >= ahora_argentina().date():
+            raise click.BadParameter('Solo se pueden cerrar días anteriores a hoy.')
+
+        consulta = Empresa.query.filter_by(activa=True)
+        if empresa_id:
+            consulta = Empresa.query.filter_by(id=empresa_id)
+        for empresa in consulta.order_by(Empresa.id):
+            generados = cierre_stock_service.generar_cierres(
+                empresa.id, periodo, desde, hasta, regenerar=regenerar
+            )
+            print(f'{empresa.nombre}: {len(generados)} cierres generados.')
+
+    @app.cli.command('recalcular-costos')
+    @click.option('--empresa', 'empresa_id', type=int, help='Solo esta empresa')
+    def recalcular_costos(empresa_id):
+        """Recalcula el costo promedio ponderado desde el historial de compras."""
+        from .models import Empresa
+        from .services import costo_service
+
+        consulta = Empresa.query.filter_by(activa=True)
+        if empresa_id:
+            consulta = Empresa.query.filter_by(id=empresa_id)
+        for empresa in consulta.order_by(Empresa.id):
+            modificados = costo_service.recalcular_costos(empresa.id)
+            print(f'{empresa.nombre}: {modificados} productos con costo actualizado.')
+
 
 def register_template_context(app):
     """Registra variables y funciones globales para templates."""
@@ -22,6 +22,13 @@ class Config:
     APP_NAME = os.environ.get('APP_NAME', 'FerrERP')
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE', 20))
 
+    # Reportes: hilos para ejecutar agregados independientes en paralelo
+    REPORTES_MAX_WORKERS = int(os.environ.get('REPORTES_MAX_WORKERS', 4))
+    # Reportes: cantidad máxima de resultados históricos cacheados por proceso
+    REPORTES_CACHE_MAX_ITEMS = int(os.environ.get('REPORTES_CACHE_MAX_ITEMS', 256))
+    # Árboles de categorías cacheados por proceso (uno por empresa)
+    CATEGORIAS_CACHE_MAX_ITEMS = int(os.environ.get('CATEGORIAS_CACHE_MAX_ITEMS', 512))
+
     # WTForms
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = 3600  # 1 hora
@@ -32,6 +39,17 @@ class Config:
         os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'logos'
     )
 
+    # Importación de catálogo: archivos subidos (se conservan para reanudar)
+    IMPORTACIONES_FOLDER = os.environ.get(
+        'IMPORTACIONES_FOLDER',
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'importaciones'
+        ),
+    )
+    IMPORTACION_MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB
+    # Procesar en un hilo aparte (el request responde enseguida y la página consulta el avance)
+    IMPORTACION_EN_SEGUNDO_PLANO = True
+
 
 class DevelopmentConfig(Config):
     """Configuración de desarrollo."""
@@ -53,6 +71,7 @@ class TestingConfig(Config):
     )
     WTF_CSRF_ENABLED = False
     LOGIN_DISABLED = False
+    IMPORTACION_EN_SEGUNDO_PLANO = False
 
 
 class ProductionConfig(Config):
@@ -1,5 +1,6 @@
 """Formularios de presupuestos."""
 
+from flask_login import current_user
 from flask_wtf import FlaskForm
 from wtforms import (
     SelectField, DecimalField, TextAreaField, HiddenField,
@@ -62,8 +63,9 @@ class PresupuestoForm(FlaskForm):
 
     def _cargar_clientes(self):
         """Carga las opciones de clientes."""
-        from ..models import Cliente
-        clientes = Cliente.query_empresa().filter_by(activo=True).order_by(Cliente.nombre).all()
+        from ..services import lectura_service
+
+        clientes = lectura_service.opciones_clientes(current_user.empresa_id)
         self.cliente_id.choices = [(0, 'Sin cliente')] + [
             (c.id, f'{c.nombre} ({c.dni_cuit or "S/D"})') for c in clientes
         ]
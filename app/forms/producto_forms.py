@@ -1,5 +1,6 @@
 """Formularios de productos y categorías."""
 
+from flask_login import current_user
 from flask_wtf import FlaskForm
 from wtforms import BooleanField, DecimalField, SelectField, StringField, SubmitField, TextAreaField
 from wtforms.validators import DataRequired, Length, NumberRange, Optional, ValidationError
@@ -153,38 +154,25 @@ class ProductoForm(FlaskForm):
 
     def _cargar_opciones(self):
         """Carga las opciones de categorías y proveedores filtradas por empresa."""
-        from ..models import Categoria, Proveedor
+        from ..services import lectura_service
+
+        empresa_id = current_user.empresa_id
 
         # Categorías padre
-        categorias_padre = (
-            Categoria.query_empresa()
-            .filter_by(activa=True, padre_id=None)
-            .order_by(Categoria.nombre)
-            .all()
-        )
         self.categoria_padre_id.choices = [(0, 'Sin categoría')] + [
-            (c.id, c.nombre) for c in categorias_padre
+            (c.id, c.nombre) for c in lectura_service.opciones_categorias(empresa_id)
         ]
 
         # Subcategorías (todas para validación WTForms)
-        subcategorias = (
-            Categoria.query_empresa()
-            .filter(
-                Categoria.activa.is_(True),
-                Categoria.padre_id.isnot(None),
-            )
-            .order_by(Categoria.nombre)
-            .all()
-        )
         self.subcategoria_id.choices = [(0, 'Sin subcategoría')] + [
-            (c.id, c.nombre_completo) for c in subcategorias
+            (c.id, c.nombre)
+            for c in lectura_service.opciones_categorias(empresa_id, subcategorias=True)
         ]
 
         # Proveedores
-        proveedores = (
-            Proveedor.query_empresa().filter_by(activo=True).order_by(Proveedor.nombre).all()
-        )
-        self.proveedor_id.choices = [(0, 'Sin proveedor')] + [(p.id, p.nombre) for p in proveedores]
+        self.proveedor_id.choices = [(0, 'Sin proveedor')] + [
+            (p.id, p.nombre) for p in lectura_service.opciones_proveedores(empresa_id)
+        ]
 
 
 class ActualizacionMasivaPreciosForm(FlaskForm):
@@ -252,17 +240,11 @@ class CategoriaForm(FlaskForm):
 
     def _cargar_padres(self):
         """Carga categorías padre disponibles filtradas por empresa."""
-        from ..models import Categoria
-
-        categorias_padre = (
-            Categoria.query_empresa()
-            .filter_by(activa=True, padre_id=None)
-            .order_by(Categoria.nombre)
-            .all()
-        )
+        from ..services import lectura_service
 
         self.padre_id.choices = [(0, '-- Es categoría padre --')] + [
-            (categoria.id, categoria.nombre) for categoria in categorias_padre
+            (categoria.id, categoria.nombre)
+            for categoria in lectura_service.opciones_categorias(current_user.empresa_id)
         ]
 
 
@@ -310,9 +292,9 @@ class AjusteStockForm(FlaskForm):
 
     def _cargar_productos(self):
         """Carga las opciones de productos filtradas por empresa."""
-        from ..models import Producto
+        from ..services import lectura_service
 
-        productos = Producto.query_empresa().filter_by(activo=True).order_by(Producto.nombre).all()
+        productos = lectura_service.opciones_productos(current_user.empresa_id)
         self.producto_id.choices = [(0, 'Seleccionar producto...')] + [
             (p.id, f'{p.codigo} - {p.nombre}') for p in productos
         ]
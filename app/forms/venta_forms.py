@@ -1,5 +1,6 @@
 """Formularios de ventas."""
 
+from flask_login import current_user
 from flask_wtf import FlaskForm
 from wtforms import SelectField, DecimalField, TextAreaField, SubmitField, HiddenField
 from wtforms.validators import Optional, NumberRange, DataRequired
@@ -49,9 +50,9 @@ class VentaForm(FlaskForm):
 
     def _cargar_clientes(self):
         """Carga las opciones de clientes."""
-        from ..models import Cliente
+        from ..services import lectura_service
 
-        clientes = Cliente.query_empresa().filter_by(activo=True).order_by(Cliente.nombre).all()
+        clientes = lectura_service.opciones_clientes(current_user.empresa_id)
         self.cliente_id.choices = [(0, 'Consumidor Final')] + [
             (c.id, f'{c.nombre} ({c.dni_cuit or "S/D"})') for c in clientes
         ]
@@ -3,23 +3,28 @@ Modelos de la aplicación FerrERP.
 Exporta todos los modelos para facilitar su uso.
 """
 
-from .actualizacion_precio import ActualizacionPrecio
+from .actualizacion_precio import ActualizacionPrecio, LoteActualizacionPrecio
 from .caja import Caja, MovimientoCaja
 from .categoria import Categoria
+from .cierre_stock import CierreStock
 from .cliente import Cliente
 from .configuracion import Configuracion
 from .cuenta_corriente import MovimientoCuentaCorriente
 from .devolucion import Devolucion, DevolucionDetalle
 from .empresa import Empresa
+from .importacion_catalogo import ImportacionCatalogo
+from .lista_precio import ListaPrecioItem, ListaPrecioProveedor
 from .movimiento_stock import MovimientoStock
 from .orden_compra import OrdenCompra, OrdenCompraDetalle
 from .presupuesto import Presupuesto, PresupuestoDetalle
 from .producto import Producto
 from .proveedor import Proveedor
+from .toma_inventario import TomaInventario, TomaInventarioItem
 from .usuario import Usuario
 from .venta import Venta
 from .venta_detalle import VentaDetalle
 from .venta_pago import VentaPago
+from .version_datos import VersionDatos
 
 __all__ = [
     'Empresa',
@@ -43,4 +48,12 @@ __all__ = [
     'PresupuestoDetalle',
     'VentaPago',
     'ActualizacionPrecio',
+    'LoteActualizacionPrecio',
+    'VersionDatos',
+    'ImportacionCatalogo',
+    'ListaPrecioProveedor',
+    'ListaPrecioItem',
+    'TomaInventario',
+    'TomaInventarioItem',
+    'CierreStock',
 ]
@@ -1,30 +1,79 @@
-"""Modelo de historial de actualizaciones de precio."""
+"""Modelos del historial de actualizaciones de precio.
+
+Cada operación (actualización masiva, lista de proveedor) es un
+``LoteActualizacionPrecio`` con los datos comunes: usuario, tipo,
+porcentaje, categorías y notas. Por producto solo se guarda una fila
+compacta con los precios anteriores y nuevos y la fecha, indexada por
+(producto_id, fecha) para consultar la línea de tiempo de cada producto.
+"""
+
+import json
 
 from ..extensions import db
 from ..utils.helpers import ahora_argentina
 from .mixins import EmpresaMixin
 
 
-class ActualizacionPrecio(EmpresaMixin, db.Model):
-    """Registro de auditoría para actualizaciones de precio de productos."""
+class LoteActualizacionPrecio(EmpresaMixin, db.Model):
+    """Operación de actualización de precios (encabezado del lote)."""
 
-    __tablename__ = 'actualizaciones_precio'
+    __tablename__ = 'lotes_actualizacion_precio'
 
     id = db.Column(db.Integer, primary_key=True)
-    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False, index=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
-    fecha = db.Column(db.DateTime, nullable=False, default=ahora_argentina)
-    tipo = db.Column(db.String(10), nullable=False, default='masiva')  # 'masiva' o 'manual'
+    fecha = db.Column(db.DateTime, nullable=False, default=ahora_argentina, index=True)
+    tipo = db.Column(db.String(10), nullable=False, default='masiva')  # masiva, manual, proveedor
+    # Porcentaje común del lote; None si varía por producto (listas de proveedor)
     porcentaje = db.Column(db.Numeric(8, 4), nullable=True)
+    actualizo_costo = db.Column(db.Boolean, nullable=False, default=True)
+    categorias_ids = db.Column(db.Text, nullable=True)  # JSON: [id, ...]
+    notas = db.Column(db.Text, nullable=True)
+    cantidad_productos = db.Column(db.Integer, nullable=False, default=0)
+
+    # Relaciones
+    usuario = db.relationship('Usuario')
+    actualizaciones = db.relationship(
+        'ActualizacionPrecio',
+        back_populates='lote',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='write_only',
+    )
+
+    def __repr__(self):
+        return (
+            f'<LoteActualizacionPrecio {self.id} {self.tipo} productos={self.cantidad_productos}>'
+        )
+
+    @property
+    def lista_categorias_ids(self):
+        """IDs de las categorías alcanzadas por el lote."""
+        return json.loads(self.categorias_ids) if self.categorias_ids else []
+
+
+class ActualizacionPrecio(db.Model):
+    """Cambio de precio de un producto dentro de un lote."""
+
+    __tablename__ = 'actualizaciones_precio'
+    __table_args__ = (db.Index('ix_actualizaciones_precio_producto_fecha', 'producto_id', 'fecha'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    lote_id = db.Column(
+        db.Integer,
+        db.ForeignKey('lotes_actualizacion_precio.id', ondelete='CASCADE'),
+        nullable=False,
+        index=True,
+    )
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    # Copia de la fecha del lote, para el índice de la línea de tiempo
+    fecha = db.Column(db.DateTime, nullable=False, default=ahora_argentina)
     precio_costo_anterior = db.Column(db.Numeric(12, 2), nullable=False)
     precio_costo_nuevo = db.Column(db.Numeric(12, 2), nullable=False)
     precio_venta_anterior = db.Column(db.Numeric(12, 2), nullable=False)
     precio_venta_nuevo = db.Column(db.Numeric(12, 2), nullable=False)
-    actualizo_costo = db.Column(db.Boolean, nullable=False, default=True)
-    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), nullable=True)
-    notas = db.Column(db.Text, nullable=True)
 
     # Relaciones
+    lote = db.relationship('LoteActualizacionPrecio', back_populates='actualizaciones')
     producto = db.relationship(
         'Producto',
         backref=db.backref(
@@ -33,8 +82,38 @@ class ActualizacionPrecio(EmpresaMixin, db.Model):
             order_by='ActualizacionPrecio.fecha.desc()',
         ),
     )
-    usuario = db.relationship('Usuario')
-    categoria = db.relationship('Categoria')
 
     def __repr__(self):
-        return f'<ActualizacionPrecio {self.id} ' f'producto={self.producto_id} {self.tipo}>'
+        return f'<ActualizacionPrecio {self.id} producto={self.producto_id} lote={self.lote_id}>'
+
+    # Datos comunes del lote
+
+    @property
+    def usuario(self):
+        return self.lote.usuario
+
+    @property
+    def tipo(self):
+        return self.lote.tipo
+
+    @property
+    def actualizo_costo(self):
+        return self.lote.actualizo_costo
+
+    @property
+    def notas(self):
+        return self.lote.notas
+
+    @property
+    def porcentaje(self):
+        """Porcentaje del lote o, si varía por producto, la variación del costo."""
+        if self.lote.porcentaje is not None:
+            return self.lote.porcentaje
+        if not self.precio_costo_anterior:
+            return None
+        return round(
+            (self.precio_costo_nuevo - self.precio_costo_anterior)
+            * 100
+            / self.precio_costo_anterior,
+            4,
+        )
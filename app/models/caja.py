@@ -46,7 +46,6 @@ class Caja(EmpresaMixin, db.Model):
     movimientos = db.relationship(
         'MovimientoCaja',
         backref='caja',
-        lazy='dynamic',
         cascade='all, delete-orphan'
     )
     ventas = db.relationship('Venta', backref='caja', lazy='dynamic')
@@ -1,6 +1,7 @@
 """Modelo de Categoría."""
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, event, func, literal, select, update
+from sqlalchemy.orm import attributes
 
 from ..extensions import db
 from ..utils.helpers import ahora_argentina
@@ -18,6 +19,13 @@ class Categoria(EmpresaMixin, db.Model):
             'padre_id',
             name='uq_categorias_empresa_nombre_padre_id',
         ),
+        # Subárbol de una categoría: prefijo de la ruta materializada
+        db.Index(
+            'ix_categorias_empresa_ruta',
+            'empresa_id',
+            'ruta',
+            postgresql_ops={'ruta': 'varchar_pattern_ops'},
+        ),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -25,7 +33,11 @@ class Categoria(EmpresaMixin, db.Model):
     descripcion = db.Column(db.String(200))
     padre_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), index=True)
     activa = db.Column(db.Boolean, default=True, nullable=False)
+    # Ruta materializada de ids desde la raíz: '/3/' o '/3/17/'. Se completa
+    # al insertar (necesita el id) y se recalcula si cambia el padre.
+    ruta = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=ahora_argentina)
+    updated_at = db.Column(db.DateTime, default=ahora_argentina, onupdate=ahora_argentina)
 
     # Relaciones
     productos = db.relationship('Producto', backref='categoria', lazy='dynamic')
@@ -64,20 +76,24 @@ class Categoria(EmpresaMixin, db.Model):
 
     @property
     def puede_eliminarse(self):
-        """Indica si la categoría puede eliminarse (sin productos asociados)."""
-        if self.tiene_productos:
-            return False
-        if self.es_padre:
-            return all(sub.puede_eliminarse for sub in self.subcategorias)
-        return True
+        """Indica si la categoría puede eliminarse (sin productos en su subárbol)."""
+        return not db.session.query(self._productos_subarbol().exists()).scalar()
 
     @property
     def cantidad_productos_total(self):
         """Retorna la cantidad de productos activos incluyendo subcategorías."""
-        total = self.cantidad_productos
-        for subcategoria in self.subcategorias:
-            total += subcategoria.cantidad_productos
-        return total
+        return self._productos_subarbol().filter_by(activo=True).count()
+
+    def _productos_subarbol(self):
+        from .producto import Producto
+
+        return Producto.query.filter(Producto.categoria_id.in_(self.ids_subarbol()))
+
+    def ids_subarbol(self):
+        """Select de los ids de la categoría y todos sus descendientes."""
+        return select(Categoria.id).where(
+            Categoria.empresa_id == self.empresa_id, Categoria.ruta.startswith(self.ruta)
+        )
 
     def to_dict(self):
         """Convierte la categoría a diccionario."""
@@ -91,3 +107,31 @@ class Categoria(EmpresaMixin, db.Model):
             'es_padre': self.es_padre,
             'nombre_completo': self.nombre_completo,
         }
+
+
+def _ruta_padre(connection, padre_id):
+    if padre_id is None:
+        return '/'
+    return connection.execute(select(Categoria.ruta).where(Categoria.id == padre_id)).scalar_one()
+
+
+@event.listens_for(Categoria, 'after_insert')
+def _completar_ruta(mapper, connection, categoria):
+    ruta = f'{_ruta_padre(connection, categoria.padre_id)}{categoria.id}/'
+    connection.execute(update(Categoria).where(Categoria.id == categoria.id).values(ruta=ruta))
+    attributes.set_committed_value(categoria, 'ruta', ruta)
+
+
+@event.listens_for(Categoria, 'after_update')
+def _mover_subarbol(mapper, connection, categoria):
+    if not attributes.get_history(categoria, 'padre_id').has_changes():
+        return
+    anterior = categoria.ruta
+    nueva = f'{_ruta_padre(connection, categoria.padre_id)}{categoria.id}/'
+    # La categoría y sus descendientes cambian el prefijo de la ruta
+    connection.execute(
+        update(Categoria)
+        .where(Categoria.empresa_id == categoria.empresa_id, Categoria.ruta.startswith(anterior))
+        .values(ruta=literal(nueva).concat(func.substr(Categoria.ruta, len(anterior) + 1)))
+    )
+    attributes.set_committed_value(categoria, 'ruta', nueva)
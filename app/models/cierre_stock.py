@@ -0,0 +1,38 @@
+"""Modelo de cierre de stock (foto del inventario al final de un día)."""
+
+from ..extensions import db
+from ..utils.helpers import ahora_argentina
+from .mixins import EmpresaMixin
+
+
+class CierreStock(EmpresaMixin, db.Model):
+    """Stock y costo de un producto al cierre de un día.
+
+    Cada cierre tiene una fila por producto existente en esa fecha, aun con
+    stock cero, así que la ausencia de un producto significa que todavía no
+    existía. El stock a cualquier otra fecha se reconstruye desde el cierre
+    más cercano sumando solo los movimientos entre ambas fechas.
+    """
+
+    __tablename__ = 'cierres_stock'
+    __table_args__ = (
+        db.UniqueConstraint('producto_id', 'fecha', name='uq_cierres_stock_producto_fecha'),
+        db.Index('ix_cierres_stock_empresa_fecha', 'empresa_id', 'fecha'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    stock = db.Column(db.Numeric(12, 3), nullable=False)
+    # Costo unitario vigente al cierre (promedio ponderado o historial de precios)
+    precio_costo = db.Column(db.Numeric(12, 2), nullable=False)
+    created_at = db.Column(db.DateTime, default=ahora_argentina)
+
+    producto = db.relationship('Producto')
+
+    def __repr__(self):
+        return f'<CierreStock producto={self.producto_id} {self.fecha}>'
+
+    @property
+    def valor_costo(self):
+        return self.stock * self.precio_costo
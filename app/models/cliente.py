@@ -3,6 +3,8 @@
 from datetime import date
 from decimal import Decimal
 
+from sqlalchemy import Index, case, func, or_, select
+
 from ..extensions import db
 from ..utils.helpers import ahora_argentina
 from .mixins import EmpresaMixin
@@ -12,6 +14,10 @@ class Cliente(EmpresaMixin, db.Model):
     """Modelo de cliente."""
 
     __tablename__ = 'clientes'
+    __table_args__ = (
+        Index('ix_clientes_empresa_total_comprado', 'empresa_id', 'total_comprado'),
+        Index('ix_clientes_empresa_ultima_compra', 'empresa_id', 'fecha_ultima_compra'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
@@ -26,6 +32,11 @@ class Cliente(EmpresaMixin, db.Model):
     activo = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=ahora_argentina)
 
+    # Estadísticas de compra (mantenidas al registrar y anular ventas)
+    total_comprado = db.Column(db.Numeric(14, 2), default=0, nullable=False)
+    cantidad_compras = db.Column(db.Integer, default=0, nullable=False)
+    fecha_ultima_compra = db.Column(db.DateTime, nullable=True)
+
     # Relaciones
     ventas = db.relationship('Venta', backref='cliente', lazy='dynamic')
     movimientos_cuenta = db.relationship('MovimientoCuentaCorriente', backref='cliente', lazy='dynamic')
@@ -54,6 +65,61 @@ class Cliente(EmpresaMixin, db.Model):
             and self.fecha_nacimiento.day == hoy.day
         )
 
+    @property
+    def ticket_promedio(self):
+        """Monto promedio por compra."""
+        if not self.cantidad_compras:
+            return Decimal('0')
+        return self.total_comprado / self.cantidad_compras
+
+    def registrar_compra(self, monto, fecha):
+        """
+        Suma una venta completada a las estadísticas de compra.
+
+        Los incrementos se aplican como expresiones SQL para que dos ventas
+        simultáneas del mismo cliente no pisen sus valores.
+
+        Args:
+            monto: Total de la venta
+            fecha: Fecha de la venta
+        """
+        self.total_comprado = Cliente.total_comprado + Decimal(str(monto))
+        self.cantidad_compras = Cliente.cantidad_compras + 1
+        self.fecha_ultima_compra = case(
+            (
+                or_(
+                    Cliente.fecha_ultima_compra.is_(None),
+                    Cliente.fecha_ultima_compra < fecha,
+                ),
+                fecha,
+            ),
+            else_=Cliente.fecha_ultima_compra,
+        )
+
+    def revertir_compra(self, venta):
+        """
+        Descuenta una venta anulada de las estadísticas de compra.
+
+        La fecha de última compra se recalcula entre las ventas completadas
+        restantes del cliente.
+
+        Args:
+            venta: Venta que se anula
+        """
+        from .venta import Venta
+
+        self.total_comprado = Cliente.total_comprado - Decimal(str(venta.total))
+        self.cantidad_compras = Cliente.cantidad_compras - 1
+        self.fecha_ultima_compra = (
+            select(func.max(Venta.fecha))
+            .where(
+                Venta.cliente_id == self.id,
+                Venta.estado == 'completada',
+                Venta.id != venta.id,
+            )
+            .scalar_subquery()
+        )
+
     def puede_comprar_a_credito(self, monto):
         """
         Verifica si el cliente puede comprar a crédito por un monto dado.
@@ -107,5 +173,7 @@ class Cliente(EmpresaMixin, db.Model):
                 else None
             ),
             'credito_disponible': float(self.credito_disponible),
+            'total_comprado': float(self.total_comprado) if self.total_comprado else 0,
+            'cantidad_compras': self.cantidad_compras or 0,
             'activo': self.activo
         }
@@ -0,0 +1,85 @@
+"""Modelo de importación masiva del catálogo de productos."""
+
+import json
+
+from ..extensions import db
+from ..utils.helpers import ahora_argentina
+from .mixins import EmpresaMixin
+
+
+class ImportacionCatalogo(EmpresaMixin, db.Model):
+    """Importación de productos desde un CSV/XLSX, procesada por lotes.
+
+    Cada lote se confirma junto con ``filas_procesadas``, por lo que una
+    importación interrumpida se reanuda desde la primera fila no confirmada.
+    """
+
+    __tablename__ = 'importaciones_catalogo'
+
+    MAX_ERRORES_GUARDADOS = 200
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    nombre_archivo = db.Column(db.String(255), nullable=False)
+    archivo = db.Column(db.String(500), nullable=False)  # Ruta del archivo subido
+    formato = db.Column(db.String(10), nullable=False)  # 'csv' o 'xlsx'
+    estado = db.Column(
+        db.Enum('pendiente', 'procesando', 'completada', 'fallida', name='estado_importacion'),
+        nullable=False,
+        default='pendiente',
+    )
+    filas_total = db.Column(db.Integer)
+    filas_procesadas = db.Column(db.Integer, nullable=False, default=0)
+    creados = db.Column(db.Integer, nullable=False, default=0)
+    actualizados = db.Column(db.Integer, nullable=False, default=0)
+    con_error = db.Column(db.Integer, nullable=False, default=0)
+    errores = db.Column(db.Text)  # JSON: [[fila, mensaje], ...]
+    mensaje = db.Column(db.Text)  # Error que detuvo la importación
+    created_at = db.Column(db.DateTime, default=ahora_argentina)
+    updated_at = db.Column(db.DateTime, default=ahora_argentina, onupdate=ahora_argentina)
+    finalizada_at = db.Column(db.DateTime)
+
+    # Relaciones
+    usuario = db.relationship('Usuario')
+
+    def __repr__(self):
+        return f'<ImportacionCatalogo {self.id} {self.estado}>'
+
+    @property
+    def estado_display(self):
+        """Retorna el estado en formato legible."""
+        opciones = {
+            'pendiente': 'Pendiente',
+            'procesando': 'Procesando',
+            'completada': 'Completada',
+            'fallida': 'Fallida',
+        }
+        return opciones.get(self.estado, self.estado)
+
+    @property
+    def en_curso(self):
+        """Verifica si la importación todavía no terminó."""
+        return self.estado in ('pendiente', 'procesando')
+
+    @property
+    def porcentaje(self):
+        """Porcentaje de filas procesadas (None si no se conoce el total)."""
+        if not self.filas_total:
+            return None
+        return min(100, int(self.filas_procesadas * 100 / self.filas_total))
+
+    @property
+    def lista_errores(self):
+        """Errores por fila guardados (hasta ``MAX_ERRORES_GUARDADOS``)."""
+        return json.loads(self.errores) if self.errores else []
+
+    def agregar_errores(self, errores):
+        """Suma errores de un lote; guarda el detalle de los primeros."""
+        if not errores:
+            return
+        self.con_error = (self.con_error or 0) + len(errores)
+        guardados = self.lista_errores
+        disponibles = self.MAX_ERRORES_GUARDADOS - len(guardados)
+        if disponibles > 0:
+            guardados.extend(errores[:disponibles])
+            self.errores = json.dumps(guardados, ensure_ascii=False)
@@ -0,0 +1,86 @@
+"""Modelos de listas de precios de proveedores."""
+
+import json
+
+from ..extensions import db
+from ..utils.helpers import ahora_argentina
+from .mixins import EmpresaMixin
+
+
+class ListaPrecioProveedor(EmpresaMixin, db.Model):
+    """Lista de precios de costo enviada por un proveedor.
+
+    Las líneas se guardan tal como vinieron en el archivo; la diferencia con
+    los precios actuales se calcula en SQL al previsualizar y al aplicar.
+    """
+
+    __tablename__ = 'listas_precio_proveedor'
+
+    id = db.Column(db.Integer, primary_key=True)
+    proveedor_id = db.Column(
+        db.Integer, db.ForeignKey('proveedores.id'), nullable=False, index=True
+    )
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    nombre_archivo = db.Column(db.String(255), nullable=False)
+    estado = db.Column(
+        db.Enum('pendiente', 'aplicada', 'descartada', name='estado_lista_precio'),
+        nullable=False,
+        default='pendiente',
+    )
+    cantidad_items = db.Column(db.Integer, nullable=False, default=0)
+    con_error = db.Column(db.Integer, nullable=False, default=0)
+    errores = db.Column(db.Text)  # JSON: [[fila, mensaje], ...]
+    productos_actualizados = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=ahora_argentina)
+    aplicada_at = db.Column(db.DateTime)
+
+    # Relaciones
+    proveedor = db.relationship('Proveedor')
+    usuario = db.relationship('Usuario')
+    items = db.relationship(
+        'ListaPrecioItem',
+        backref='lista',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='write_only',
+    )
+
+    def __repr__(self):
+        return f'<ListaPrecioProveedor {self.id} proveedor={self.proveedor_id}>'
+
+    @property
+    def estado_display(self):
+        """Retorna el estado en formato legible."""
+        opciones = {
+            'pendiente': 'Pendiente',
+            'aplicada': 'Aplicada',
+            'descartada': 'Descartada',
+        }
+        return opciones.get(self.estado, self.estado)
+
+    @property
+    def lista_errores(self):
+        """Líneas descartadas al cargar la lista (las primeras)."""
+        return json.loads(self.errores) if self.errores else []
+
+
+class ListaPrecioItem(db.Model):
+    """Línea de una lista de precios: código del producto y nuevo costo."""
+
+    __tablename__ = 'listas_precio_items'
+    __table_args__ = (
+        db.UniqueConstraint('lista_id', 'codigo', name='uq_listas_precio_items_lista_codigo'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    lista_id = db.Column(
+        db.Integer,
+        db.ForeignKey('listas_precio_proveedor.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    fila = db.Column(db.Integer, nullable=False)
+    codigo = db.Column(db.String(20), nullable=False)
+    precio_costo = db.Column(db.Numeric(12, 2), nullable=False)
+
+    def __repr__(self):
+        return f'<ListaPrecioItem {self.codigo} {self.precio_costo}>'
@@ -19,9 +19,14 @@ class EmpresaMixin:
         return cls.query.filter_by(empresa_id=current_user.empresa_id)
 
     @classmethod
-    def get_o_404(cls, id):
-        """Obtiene un registro por ID verificando que pertenezca a la empresa actual."""
-        registro = cls.query.filter_by(
+    def get_o_404(cls, id, *opciones):
+        """
+        Obtiene un registro por ID verificando que pertenezca a la empresa actual.
+
+        ``opciones`` son opciones de carga (p. ej. ``selectinload``) para
+        precargar las relaciones que usa la vista.
+        """
+        registro = cls.query.options(*opciones).filter_by(
             id=id, empresa_id=current_user.empresa_id
         ).first()
         if registro is None:
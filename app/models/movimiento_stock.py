@@ -10,6 +10,10 @@ class MovimientoStock(EmpresaMixin, db.Model):
     """Modelo de movimiento de stock (historial de cambios de inventario)."""
 
     __tablename__ = 'movimientos_stock'
+    __table_args__ = (
+        # Kardex y saldos por producto en un rango de fechas
+        db.Index('ix_movimientos_stock_producto_created', 'producto_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(
@@ -31,6 +35,10 @@ class MovimientoStock(EmpresaMixin, db.Model):
     referencia_tipo = db.Column(db.String(20))  # 'venta', 'orden_compra', 'ajuste', 'devolucion'
     referencia_id = db.Column(db.Integer)
     motivo = db.Column(db.Text)
+    # Compras: precio unitario recibido y costo promedio del producto después
+    # de la recepción (services/costo_service.py)
+    costo_unitario = db.Column(db.Numeric(12, 2))
+    costo_promedio = db.Column(db.Numeric(12, 2))
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=ahora_argentina, index=True)
 
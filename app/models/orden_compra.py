@@ -46,7 +46,6 @@ class OrdenCompra(EmpresaMixin, db.Model):
     detalles = db.relationship(
         'OrdenCompraDetalle',
         backref='orden_compra',
-        lazy='dynamic',
         cascade='all, delete-orphan'
     )
     usuario = db.relationship('Usuario', backref='ordenes_compra')
@@ -2,7 +2,8 @@
 
 from decimal import Decimal
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import DDL, UniqueConstraint, and_, event, func
+from sqlalchemy.ext.hybrid import hybrid_property
 
 from ..extensions import db
 from ..utils.helpers import ahora_argentina
@@ -15,6 +16,17 @@ class Producto(EmpresaMixin, db.Model):
     __tablename__ = 'productos'
     __table_args__ = (
         UniqueConstraint('empresa_id', 'codigo', name='uq_productos_empresa_codigo'),
+        # Sincronización incremental del catálogo (services/catalogo_service.py)
+        db.Index('ix_productos_empresa_actualizado', 'empresa_id', 'updated_at', 'id'),
+        # Índice parcial: solo contiene los productos activos bajo el mínimo,
+        # así los conteos y listados de stock bajo no recorren el catálogo
+        db.Index(
+            'ix_productos_bajo_minimo',
+            'empresa_id',
+            'stock_actual',
+            postgresql_where=db.text('activo IS true AND stock_actual < stock_minimo'),
+            sqlite_where=db.text('activo IS 1 AND stock_actual < stock_minimo'),
+        ),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -30,6 +42,9 @@ class Producto(EmpresaMixin, db.Model):
     )
     precio_costo = db.Column(db.Numeric(12, 2), nullable=False, default=0)
     precio_venta = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    # Costo promedio ponderado de las compras recibidas (services/costo_service.py);
+    # NULL hasta la primera recepción con precio
+    costo_promedio = db.Column(db.Numeric(12, 2))
     iva_porcentaje = db.Column(db.Numeric(5, 2), nullable=False, default=Decimal('21'))
     stock_actual = db.Column(db.Numeric(12, 3), default=0, nullable=False)
     stock_minimo = db.Column(db.Numeric(12, 3), default=0, nullable=False)
@@ -37,10 +52,13 @@ class Producto(EmpresaMixin, db.Model):
     ubicacion = db.Column(db.String(50))
     activo = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=ahora_argentina)
-    updated_at = db.Column(db.DateTime, default=ahora_argentina, onupdate=ahora_argentina)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=ahora_argentina, onupdate=ahora_argentina
+    )
 
     # Relaciones
-    movimientos_stock = db.relationship('MovimientoStock', backref='producto', lazy='dynamic')
+    # Historial sin límite: nunca se carga entero, se consulta con select() explícito
+    movimientos_stock = db.relationship('MovimientoStock', backref='producto', lazy='write_only')
     detalles_venta = db.relationship('VentaDetalle', backref='producto', lazy='dynamic')
     detalles_orden_compra = db.relationship(
         'OrdenCompraDetalle', backref='producto', lazy='dynamic'
@@ -54,6 +72,27 @@ class Producto(EmpresaMixin, db.Model):
         """Verifica si el stock está por debajo del mínimo."""
         return self.stock_actual < self.stock_minimo
 
+    @classmethod
+    def filtro_bajo_minimo(cls):
+        """Condición de producto activo bajo el mínimo.
+
+        Es el predicado del índice parcial ``ix_productos_bajo_minimo``: las
+        consultas de stock bajo deben usar esta condición para que el motor
+        elija el índice.
+        """
+        return and_(cls.activo.is_(True), cls.stock_actual < cls.stock_minimo)
+
+    @hybrid_property
+    def costo_valuacion(self):
+        """Costo para valuar el inventario: el promedio ponderado si existe."""
+        if self.costo_promedio is not None:
+            return self.costo_promedio
+        return self.precio_costo
+
+    @costo_valuacion.expression
+    def costo_valuacion(cls):
+        return func.coalesce(cls.costo_promedio, cls.precio_costo)
+
     @property
     def margen_ganancia(self):
         """Calcula el margen de ganancia en porcentaje."""
@@ -94,8 +133,16 @@ class Producto(EmpresaMixin, db.Model):
         self.stock_actual = self.stock_actual + Decimal(str(cantidad))
         return stock_anterior, self.stock_actual
 
-    def to_dict(self):
-        """Convierte el producto a diccionario."""
+    def to_dict(self, arbol=None):
+        """Convierte el producto a diccionario.
+
+        Con ``arbol`` (``categoria_service.ArbolCategorias``) el nombre de la
+        categoría sale del árbol cacheado en lugar de cargar la relación.
+        """
+        if arbol is not None:
+            categoria_nombre = arbol.nombre_completo(self.categoria_id)
+        else:
+            categoria_nombre = self.categoria.nombre_completo if self.categoria else None
         return {
             'id': self.id,
             'codigo': self.codigo,
@@ -103,7 +150,7 @@ class Producto(EmpresaMixin, db.Model):
             'nombre': self.nombre,
             'descripcion': self.descripcion,
             'categoria_id': self.categoria_id,
-            'categoria_nombre': self.categoria.nombre_completo if self.categoria else None,
+            'categoria_nombre': categoria_nombre,
             'unidad_medida': self.unidad_medida,
             'unidad_medida_display': self.unidad_medida_display,
             'unidad_medida_abrev': self.unidad_medida_abrev,
@@ -118,3 +165,69 @@ class Producto(EmpresaMixin, db.Model):
             'ubicacion': self.ubicacion,
             'activo': self.activo,
         }
+
+
+# ─── Índice de búsqueda ──────────────────────────────────────────────
+# Ver services/busqueda_service.py. En producción lo crea la migración 0014;
+# estos DDL lo replican para las bases creadas con ``create_all``.
+
+DDL_BUSQUEDA_POSTGRESQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    # unaccent() no es IMMUTABLE; con el diccionario explícito sí puede indexarse
+    """
+    CREATE OR REPLACE FUNCTION productos_busqueda(codigo text, nombre text, codigo_barras text)
+    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT lower(public.unaccent('public.unaccent'::regdictionary,
+            coalesce(codigo, '') || ' ' || coalesce(nombre, '') || ' '
+            || coalesce(codigo_barras, '')))
+    $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_productos_busqueda_trgm ON productos
+    USING gin (productos_busqueda(codigo, nombre, codigo_barras) gin_trgm_ops)
+    """,
+)
+
+DDL_BUSQUEDA_SQLITE = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        codigo, nombre, codigo_barras,
+        content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, codigo, nombre, codigo_barras)
+        VALUES (new.id, new.codigo, new.nombre, new.codigo_barras);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, codigo_barras)
+        VALUES ('delete', old.id, old.codigo, old.nombre, old.codigo_barras);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_au
+    AFTER UPDATE OF codigo, nombre, codigo_barras ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, codigo_barras)
+        VALUES ('delete', old.id, old.codigo, old.nombre, old.codigo_barras);
+        INSERT INTO productos_fts(rowid, codigo, nombre, codigo_barras)
+        VALUES (new.id, new.codigo, new.nombre, new.codigo_barras);
+    END
+    """,
+)
+
+for _sentencia in DDL_BUSQUEDA_POSTGRESQL:
+    event.listen(
+        Producto.__table__, 'after_create', DDL(_sentencia).execute_if(dialect='postgresql')
+    )
+for _sentencia in DDL_BUSQUEDA_SQLITE:
+    event.listen(Producto.__table__, 'after_create', DDL(_sentencia).execute_if(dialect='sqlite'))
+event.listen(
+    Producto.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS productos_fts').execute_if(dialect='sqlite'),
+)
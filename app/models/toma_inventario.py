@@ -0,0 +1,108 @@
+"""Modelos de toma de inventario (conteo físico)."""
+
+import json
+
+from ..extensions import db
+from ..utils.helpers import ahora_argentina
+from .mixins import EmpresaMixin
+
+
+class TomaInventario(EmpresaMixin, db.Model):
+    """Sesión de conteo físico del stock.
+
+    Los conteos se cargan escaneando o subiendo un archivo y cada línea
+    guarda el stock del sistema en el momento de contar. La diferencia
+    (contado - stock al contar) se aplica sobre el stock vigente al cerrar,
+    así las ventas y compras hechas durante el conteo no se pierden.
+
+    La aplicación es por lotes: cada lote se confirma junto con
+    ``ultimo_item_id``, por lo que una aplicación interrumpida se reanuda
+    desde la primera línea no aplicada.
+    """
+
+    __tablename__ = 'tomas_inventario'
+
+    MAX_ERRORES_GUARDADOS = 200
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    descripcion = db.Column(db.String(200))
+    estado = db.Column(
+        db.Enum('abierta', 'aplicando', 'aplicada', 'descartada', name='estado_toma_inventario'),
+        nullable=False,
+        default='abierta',
+    )
+    con_error = db.Column(db.Integer, nullable=False, default=0)
+    errores = db.Column(db.Text)  # JSON: [[fila, mensaje], ...]
+    ultimo_item_id = db.Column(db.Integer, nullable=False, default=0)
+    productos_ajustados = db.Column(db.Integer, nullable=False, default=0)
+    mensaje = db.Column(db.Text)  # Error que interrumpió la aplicación
+    created_at = db.Column(db.DateTime, default=ahora_argentina)
+    updated_at = db.Column(db.DateTime, default=ahora_argentina, onupdate=ahora_argentina)
+    aplicada_at = db.Column(db.DateTime)
+
+    # Relaciones
+    usuario = db.relationship('Usuario')
+    items = db.relationship(
+        'TomaInventarioItem',
+        backref='toma',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='write_only',
+    )
+
+    def __repr__(self):
+        return f'<TomaInventario {self.id} {self.estado}>'
+
+    @property
+    def estado_display(self):
+        """Retorna el estado en formato legible."""
+        opciones = {
+            'abierta': 'Abierta',
+            'aplicando': 'Aplicando',
+            'aplicada': 'Aplicada',
+            'descartada': 'Descartada',
+        }
+        return opciones.get(self.estado, self.estado)
+
+    @property
+    def lista_errores(self):
+        """Errores por fila guardados (hasta ``MAX_ERRORES_GUARDADOS``)."""
+        return json.loads(self.errores) if self.errores else []
+
+    def agregar_errores(self, errores):
+        """Suma errores de una carga; guarda el detalle de los primeros."""
+        if not errores:
+            return
+        self.con_error = (self.con_error or 0) + len(errores)
+        guardados = self.lista_errores
+        disponibles = self.MAX_ERRORES_GUARDADOS - len(guardados)
+        if disponibles > 0:
+            guardados.extend(errores[:disponibles])
+            self.errores = json.dumps(guardados, ensure_ascii=False)
+
+
+class TomaInventarioItem(db.Model):
+    """Cantidad contada de un producto y stock del sistema al contarlo."""
+
+    __tablename__ = 'tomas_inventario_items'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'toma_id', 'producto_id', name='uq_tomas_inventario_items_toma_producto'
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    toma_id = db.Column(
+        db.Integer,
+        db.ForeignKey('tomas_inventario.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
+    cantidad_contada = db.Column(db.Numeric(12, 3), nullable=False)
+    # Base de la diferencia: stock del sistema cuando se contó
+    stock_sistema = db.Column(db.Numeric(12, 3), nullable=False)
+    contado_at = db.Column(db.DateTime, nullable=False, default=ahora_argentina)
+
+    def __repr__(self):
+        return f'<TomaInventarioItem producto={self.producto_id} {self.cantidad_contada}>'
@@ -11,6 +11,25 @@ class Venta(EmpresaMixin, db.Model):
     """Modelo de venta."""
 
     __tablename__ = 'ventas'
+    __table_args__ = (
+        # Historial por empresa en orden cronológico inverso; en PostgreSQL
+        # incluye las columnas del listado para resolverlo solo con el índice
+        db.Index(
+            'ix_ventas_empresa_fecha',
+            'empresa_id',
+            db.text('fecha DESC'),
+            db.text('id DESC'),
+            postgresql_include=[
+                'numero',
+                'cliente_nombre',
+                'cantidad_items',
+                'forma_pago',
+                'formas_pago_resumen',
+                'total',
+                'estado',
+            ],
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     numero = db.Column(db.Integer, nullable=False, index=True)
@@ -40,11 +59,15 @@ class Venta(EmpresaMixin, db.Model):
     presupuesto_id = db.Column(db.Integer, db.ForeignKey('presupuestos.id'), index=True)
     created_at = db.Column(db.DateTime, default=ahora_argentina)
 
-    # Relaciones
+    # Datos de listado guardados al registrar la venta (ver registrar_resumen)
+    cliente_nombre = db.Column(db.String(200))
+    cantidad_items = db.Column(db.Numeric(12, 3), nullable=False, default=0)
+    formas_pago_resumen = db.Column(db.String(200))
+
+    # Relaciones (las vistas de detalle precargan detalles y pagos con selectinload)
     detalles = db.relationship(
         'VentaDetalle',
         backref='venta',
-        lazy='dynamic',
         cascade='all, delete-orphan'
     )
     devoluciones = db.relationship('Devolucion', backref='venta', lazy='dynamic')
@@ -83,11 +106,6 @@ class Venta(EmpresaMixin, db.Model):
         }
         return opciones.get(self.estado, self.estado)
 
-    @property
-    def cantidad_items(self):
-        """Retorna la cantidad total de items."""
-        return sum(d.cantidad for d in self.detalles)
-
     @property
     def es_anulable(self):
         """Verifica si la venta puede ser anulada."""
@@ -102,8 +120,20 @@ class Venta(EmpresaMixin, db.Model):
             self.descuento_monto = self.subtotal * (self.descuento_porcentaje / 100)
 
         self.total = self.subtotal - (self.descuento_monto or 0)
+        self.cantidad_items = sum(d.cantidad for d in self.detalles)
         return self.total
 
+    def registrar_resumen(self):
+        """
+        Guarda cliente, cantidad de items y formas de pago en columnas propias.
+
+        Se llama al registrar la venta, con detalles y pagos ya agregados, para
+        que el historial y las exportaciones no carguen relaciones por fila.
+        """
+        self.cliente_nombre = self.cliente.nombre if self.cliente else None
+        self.cantidad_items = sum(d.cantidad for d in self.detalles)
+        self.formas_pago_resumen = self.forma_pago_display
+
     def to_dict(self):
         """Convierte la venta a diccionario."""
         resultado = {
@@ -112,7 +142,7 @@ class Venta(EmpresaMixin, db.Model):
             'numero_completo': self.numero_completo,
             'fecha': self.fecha.isoformat() if self.fecha else None,
             'cliente_id': self.cliente_id,
-            'cliente_nombre': self.cliente.nombre if self.cliente else 'Consumidor Final',
+            'cliente_nombre': self.cliente_nombre or 'Consumidor Final',
             'usuario_id': self.usuario_id,
             'usuario_nombre': self.usuario.nombre if self.usuario else None,
             'subtotal': float(self.subtotal) if self.subtotal else 0,
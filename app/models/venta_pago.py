@@ -32,7 +32,7 @@ class VentaPago(db.Model):
     # Relacion
     venta = db.relationship(
         'Venta',
-        backref=db.backref('pagos', lazy='joined', cascade='all, delete-orphan'),
+        backref=db.backref('pagos', cascade='all, delete-orphan'),
     )
 
     def __repr__(self):
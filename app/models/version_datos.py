@@ -0,0 +1,73 @@
+"""Modelo de versión de datos por período (invalidación de reportes cacheados)."""
+
+from datetime import date
+
+from sqlalchemy import UniqueConstraint, func
+
+from ..extensions import db
+from .mixins import EmpresaMixin
+
+
+class VersionDatos(EmpresaMixin, db.Model):
+    """Contador de versión por empresa y mes.
+
+    Se incrementa cada vez que una escritura modifica datos de un período
+    ya cerrado (por ejemplo, la anulación de una venta de un mes anterior).
+    Los reportes cacheados incluyen la versión de los meses que cubren en su
+    clave, por lo que cualquier incremento los invalida.
+
+    El período ``PERIODO_CATEGORIAS`` (fuera de cualquier rango de reportes)
+    lleva la versión del árbol de categorías cacheado.
+    """
+
+    __tablename__ = 'versiones_datos'
+    __table_args__ = (
+        UniqueConstraint('empresa_id', 'periodo', name='uq_versiones_datos_empresa_periodo'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    periodo = db.Column(db.Date, nullable=False)  # Primer día del mes
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    PERIODO_CATEGORIAS = date(1, 1, 1)
+
+    def __repr__(self):
+        return f'<VersionDatos {self.empresa_id} {self.periodo} v{self.version}>'
+
+    @staticmethod
+    def periodo_de(fecha):
+        """Retorna el período (primer día del mes) de una fecha o datetime."""
+        if hasattr(fecha, 'date'):
+            fecha = fecha.date()
+        return fecha.replace(day=1)
+
+    @classmethod
+    def incrementar(cls, empresa_id, fecha):
+        """Incrementa la versión del período de ``fecha`` (upsert, sin commit)."""
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(cls).values(empresa_id=empresa_id, periodo=cls.periodo_de(fecha), version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['empresa_id', 'periodo'],
+            set_={'version': cls.version + 1},
+        )
+        db.session.execute(stmt)
+
+    @classmethod
+    def version_rango(cls, empresa_id, inicio, fin):
+        """Retorna una versión agregada para los períodos entre ``inicio`` y ``fin``.
+
+        Como las versiones sólo crecen, la suma cambia ante cualquier incremento.
+        """
+        return (
+            db.session.query(func.coalesce(func.sum(cls.version), 0))
+            .filter(
+                cls.empresa_id == empresa_id,
+                cls.periodo >= cls.periodo_de(inicio),
+                cls.periodo <= cls.periodo_de(fin),
+            )
+            .scalar()
+        )
@@ -4,11 +4,14 @@ from datetime import date
 from decimal import Decimal
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload
 
 from ..extensions import db
 from ..models import Caja, MovimientoCaja, Venta, VentaPago
 from ..forms.caja_forms import AperturaCajaForm, CierreCajaForm, EgresoCajaForm
-from ..utils.helpers import ahora_argentina, paginar_query
+from ..services import lectura_service
+from ..utils.helpers import ahora_argentina, es_peticion_htmx
+from ..utils.paginacion import paginar_keyset
 from ..utils.decorators import admin_required, empresa_aprobada_required
 
 bp = Blueprint('caja', __name__, url_prefix='/caja')
@@ -65,10 +68,20 @@ def _agrupar_movimientos_divididos(movimientos):
     # Para ventas divididas, reemplazar formas_pago con los datos completos
     # de VentaPago (incluye cuenta_corriente que no genera MovimientoCaja).
     # Tambien eliminar filas informativas de CC que ya estan representadas.
+    # Las ventas de los grupos se cargan juntas, con sus pagos, en una query.
+    ventas = {}
+    if venta_grupos:
+        ventas = {
+            venta.id: venta
+            for venta in Venta.query.options(selectinload(Venta.pagos)).filter(
+                Venta.id.in_({vid for vid, _ in venta_grupos})
+            )
+        }
+
     venta_ids_divididas = set()
     for clave, idx in venta_grupos.items():
         vid = clave[0]
-        venta = Venta.query.get(vid)
+        venta = ventas.get(vid)
         if venta and venta.forma_pago == 'dividido':
             venta_ids_divididas.add(vid)
             agrupados[idx]['formas_pago'] = [
@@ -95,11 +108,16 @@ def _agrupar_movimientos_divididos(movimientos):
 def index():
     """Vista principal de caja (caja del día)."""
     # Buscar caja abierta
-    caja = Caja.query_empresa().filter_by(estado='abierta').first()
+    caja = (
+        Caja.query_empresa()
+        .options(selectinload(Caja.movimientos))
+        .filter_by(estado='abierta')
+        .first()
+    )
 
     if caja:
         # Calcular totales
-        movimientos_caja = caja.movimientos.order_by(MovimientoCaja.created_at.desc()).all()
+        movimientos_caja = sorted(caja.movimientos, key=lambda m: m.created_at, reverse=True)
 
         # Ventas CC puras
         ventas_cc = Venta.query.filter_by(
@@ -111,6 +129,7 @@ def index():
         # Ventas divididas con componente CC
         ventas_divididas_cc = (
             Venta.query.join(VentaPago)
+            .options(selectinload(Venta.pagos))
             .filter(
                 Venta.caja_id == caja.id,
                 Venta.forma_pago == 'dividido',
@@ -334,11 +353,17 @@ def egreso():
 @login_required
 def historial():
     """Historial de cajas."""
-    page = request.args.get('page', 1, type=int)
+    cajas = paginar_keyset(
+        lectura_service.consulta_cajas(current_user.empresa_id),
+        Caja.fecha_apertura,
+        Caja.id,
+        despues=request.args.get('despues'),
+        antes=request.args.get('antes'),
+        clase_fila=lectura_service.FilaCaja,
+    )
 
-    cajas = Caja.query_empresa().order_by(
-        Caja.fecha_apertura.desc()
-    ).paginate(page=page, per_page=20)
+    if es_peticion_htmx():
+        return render_template('caja/_tabla_historial.html', cajas=cajas)
 
     return render_template('caja/historial.html', cajas=cajas)
 
@@ -347,9 +372,14 @@ def historial():
 @login_required
 def detalle(id):
     """Ver detalle de una caja."""
-    caja = Caja.get_o_404(id)
+    caja = Caja.get_o_404(
+        id,
+        selectinload(Caja.movimientos),
+        joinedload(Caja.usuario_apertura),
+        joinedload(Caja.usuario_cierre),
+    )
 
-    movimientos_caja = caja.movimientos.order_by(MovimientoCaja.created_at.desc()).all()
+    movimientos_caja = sorted(caja.movimientos, key=lambda m: m.created_at, reverse=True)
 
     # Ventas CC puras
     ventas_cc = Venta.query.filter_by(
@@ -361,6 +391,7 @@ def detalle(id):
     # Ventas divididas con componente CC
     ventas_divididas_cc = (
         Venta.query.join(VentaPago)
+        .options(selectinload(Venta.pagos))
         .filter(
             Venta.caja_id == caja.id,
             Venta.forma_pago == 'dividido',
@@ -9,12 +9,14 @@ from sqlalchemy import func
 from ..extensions import db
 from ..forms.cliente_forms import ClienteForm, PagoCuentaCorrienteForm
 from ..models import Caja, Cliente, MovimientoCaja, MovimientoCuentaCorriente
+from ..services import exportacion_service
 from ..services.cumpleanos_service import (
     contar_cumpleanos_hoy,
     generar_url_whatsapp_cumpleanos,
     obtener_cumpleanos_hoy,
 )
 from ..utils.decorators import empresa_aprobada_required
+from ..utils.exportacion import exportar as exportar_listado
 from ..utils.helpers import es_peticion_htmx, paginar_query
 
 bp = Blueprint('clientes', __name__, url_prefix='/clientes')
@@ -64,6 +66,20 @@ def index():
     )
 
 
+@bp.route('/exportar')
+@login_required
+def exportar():
+    """Exportar el listado de clientes (con los filtros aplicados)."""
+    consulta, columnas = exportacion_service.clientes(
+        current_user.empresa_id,
+        busqueda=request.args.get('q', ''),
+        solo_activos=request.args.get('activos', '1') == '1',
+    )
+    return exportar_listado(
+        consulta, columnas, 'clientes', formato=request.args.get('formato', 'xlsx')
+    )
+
+
 @bp.route('/cumpleanos')
 @login_required
 def cumpleanos():
@@ -181,6 +197,21 @@ def cuenta_corriente(id):
     )
 
 
+@bp.route('/<int:id>/cuenta-corriente/exportar')
+@login_required
+def exportar_cuenta_corriente(id):
+    """Exportar los movimientos de cuenta corriente del cliente."""
+    cliente = Cliente.get_o_404(id)
+    consulta, columnas = exportacion_service.cuenta_corriente(cliente.empresa_id, cliente.id)
+    return exportar_listado(
+        consulta,
+        columnas,
+        f'cuenta_corriente_{cliente.id}',
+        formato=request.args.get('formato', 'xlsx'),
+        titulo='Cuenta Corriente',
+    )
+
+
 @bp.route('/<int:id>/registrar-pago', methods=['POST'])
 @login_required
 @empresa_aprobada_required
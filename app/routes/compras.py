@@ -4,16 +4,26 @@ from datetime import datetime
 from decimal import Decimal
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, make_response
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload
 
 from ..extensions import db
-from ..models import OrdenCompra, OrdenCompraDetalle, Producto, Proveedor, MovimientoStock
-from ..services import orden_compra_service
+from ..models import OrdenCompra, OrdenCompraDetalle, Producto, MovimientoStock
+from ..services import costo_service, lectura_service, orden_compra_service
 from ..utils.decorators import empresa_aprobada_required
 from ..utils.helpers import ahora_argentina, es_peticion_htmx, generar_numero_orden_compra, paginar_query
 
 bp = Blueprint('compras', __name__, url_prefix='/compras')
 
 
+def _carga_orden():
+    """Opciones de carga para mostrar una orden con sus items."""
+    return (
+        selectinload(OrdenCompra.detalles).joinedload(OrdenCompraDetalle.producto),
+        joinedload(OrdenCompra.proveedor),
+        joinedload(OrdenCompra.usuario),
+    )
+
+
 @bp.route('/')
 @login_required
 def index():
@@ -33,7 +43,7 @@ def index():
     query = query.order_by(OrdenCompra.fecha.desc())
     ordenes = paginar_query(query, page)
 
-    proveedores = Proveedor.query_empresa().filter_by(activo=True).order_by(Proveedor.nombre).all()
+    proveedores = lectura_service.opciones_proveedores(current_user.empresa_id)
 
     return render_template(
         'compras/index.html',
@@ -126,22 +136,15 @@ def nueva():
         return redirect(url_for('compras.detalle', id=orden.id))
 
     # GET - Mostrar formulario
-    proveedores = Proveedor.query_empresa().filter_by(activo=True).order_by(Proveedor.nombre).all()
-    productos = Producto.query_empresa().filter_by(activo=True).order_by(Producto.nombre).all()
+    proveedores = lectura_service.opciones_proveedores(current_user.empresa_id)
     productos_data = [
-        {
-            'id': producto.id,
-            'codigo': producto.codigo,
-            'nombre': producto.nombre,
-            'proveedor_id': producto.proveedor_id,
-        }
-        for producto in productos
+        producto._asdict()
+        for producto in lectura_service.opciones_productos(current_user.empresa_id)
     ]
 
     return render_template(
         'compras/orden_form.html',
         proveedores=proveedores,
-        productos=productos,
         productos_data=productos_data
     )
 
@@ -150,7 +153,7 @@ def nueva():
 @login_required
 def detalle(id):
     """Ver detalle de orden de compra."""
-    orden = OrdenCompra.get_o_404(id)
+    orden = OrdenCompra.get_o_404(id, *_carga_orden())
     return render_template('compras/orden_detalle.html', orden=orden)
 
 
@@ -158,7 +161,7 @@ def detalle(id):
 @login_required
 def pdf(id):
     """Descargar PDF de la orden de compra."""
-    orden = OrdenCompra.get_o_404(id)
+    orden = OrdenCompra.get_o_404(id, *_carga_orden())
     sin_precios = request.args.get('sin_precios', '0') == '1'
 
     pdf_bytes = orden_compra_service.generar_pdf(orden, sin_precios=sin_precios)
@@ -176,7 +179,7 @@ def pdf(id):
 @empresa_aprobada_required
 def recibir(id):
     """Recibir mercadería de una orden."""
-    orden = OrdenCompra.get_o_404(id)
+    orden = OrdenCompra.get_o_404(id, *_carga_orden())
 
     if not orden.puede_recibir:
         flash('Esta orden no puede recibir más mercadería.', 'warning')
@@ -238,6 +241,7 @@ def recibir(id):
                     usuario_id=current_user.id,
                     empresa_id=current_user.empresa_id,
                 )
+                costo_service.registrar_compra(producto, movimiento, detalle.precio_unitario)
                 db.session.add(movimiento)
 
         # Actualizar estado de la orden
@@ -274,8 +278,7 @@ def sugerencia():
     """Sugerencia de compra basada en stock mínimo."""
     # Productos bajo stock mínimo
     productos_bajo_stock = Producto.query_empresa().filter(
-        Producto.activo == True,
-        Producto.stock_actual < Producto.stock_minimo,
+        Producto.filtro_bajo_minimo(),
         Producto.proveedor_id.isnot(None)
     ).order_by(Producto.proveedor_id, Producto.nombre).all()
 
@@ -19,6 +19,7 @@ from ..forms.configuracion_forms import ConfiguracionForm
 from ..forms.producto_forms import CategoriaForm
 from ..forms.usuario_forms import UsuarioEditForm, UsuarioForm
 from ..models import Categoria, Configuracion, Usuario
+from ..services import categoria_service
 from ..utils.decorators import admin_required, empresa_aprobada_required
 from ..utils.helpers import es_peticion_htmx
 
@@ -368,16 +369,16 @@ def categorias():
                 empresa_id=current_user.empresa_id,
             )
             db.session.add(categoria)
+            categoria_service.invalidar_arbol(current_user.empresa_id)
             db.session.commit()
             flash(f'Categoría "{categoria.nombre}" creada.', 'success')
             return redirect(url_for('configuracion.categorias'))
 
-    categorias_padre = (
-        Categoria.query_empresa().filter_by(padre_id=None).order_by(Categoria.nombre).all()
-    )
+    # Árbol con cantidades de productos en una consulta agrupada (cacheado)
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
 
     return render_template(
-        'configuracion/categorias.html', form=form, categorias_padre=categorias_padre
+        'configuracion/categorias.html', form=form, categorias_padre=arbol.raices
     )
 
 
@@ -407,6 +408,7 @@ def editar_categoria(id):
         else:
             categoria.nombre = nombre
             categoria.descripcion = descripcion
+            categoria_service.invalidar_arbol(current_user.empresa_id)
             db.session.commit()
             flash(f'Categoría "{categoria.nombre}" actualizada.', 'success')
 
@@ -425,6 +427,7 @@ def toggle_categoria(id):
         for subcategoria in categoria.subcategorias:
             subcategoria.activa = False
 
+    categoria_service.invalidar_arbol(current_user.empresa_id)
     db.session.commit()
 
     estado = 'activada' if categoria.activa else 'desactivada'
@@ -452,6 +455,7 @@ def eliminar_categoria(id):
 
     nombre = categoria.nombre
     db.session.delete(categoria)
+    categoria_service.invalidar_arbol(current_user.empresa_id)
     db.session.commit()
     flash(f'Categoría "{nombre}" eliminada.', 'success')
     return redirect(url_for('configuracion.categorias'))
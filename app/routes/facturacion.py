@@ -1,13 +1,58 @@
-"""Rutas de facturación."""
+"""Rutas de facturación: libro IVA ventas y compras."""
 
-from flask import Blueprint, render_template
-from flask_login import login_required
+from flask import Blueprint, render_template, request
+from flask_login import current_user, login_required
+
+from ..services import iva_service
+from ..utils.decorators import admin_required
+from ..utils.exportacion import respuesta_exportacion
+from ..utils.helpers import ahora_argentina
 
 bp = Blueprint('facturacion', __name__, url_prefix='/facturacion')
 
 
+def _periodo_solicitado():
+    """Período 'AAAA-MM' de la query string (por defecto, el mes actual)."""
+    periodo = request.args.get('periodo', '')
+    try:
+        inicio, fin = iva_service.rango_del_mes(periodo)
+    except ValueError:
+        periodo = ahora_argentina().strftime('%Y-%m')
+        inicio, fin = iva_service.rango_del_mes(periodo)
+    return periodo, inicio, fin
+
+
 @bp.route('/')
 @login_required
+@admin_required
 def index():
-    """Página placeholder de facturación."""
-    return render_template('facturacion/proximamente.html')
+    """Libro IVA del período: neto, IVA y total por alícuota."""
+    periodo, inicio, fin = _periodo_solicitado()
+    libro = iva_service.libro_iva(current_user.empresa_id, inicio, fin)
+
+    return render_template(
+        'facturacion/libro_iva.html',
+        periodo=periodo,
+        incluye_iva=iva_service.precios_incluyen_iva(current_user.empresa_id),
+        **libro,
+    )
+
+
+@bp.route('/libro-iva/exportar')
+@login_required
+@admin_required
+def exportar_libro_iva():
+    """Exporta el libro IVA por comprobante y alícuota (CSV o Excel)."""
+    periodo, inicio, fin = _periodo_solicitado()
+    libro = request.args.get('libro', 'ventas')
+    if libro not in ('ventas', 'compras'):
+        libro = 'ventas'
+
+    filas = iva_service.iterar_comprobantes(current_user.empresa_id, libro, inicio, fin)
+    return respuesta_exportacion(
+        iva_service.COLUMNAS_EXPORTACION,
+        filas,
+        f'libro_iva_{libro}_{periodo}',
+        formato=request.args.get('formato', 'csv'),
+        titulo=f'IVA {libro.capitalize()}',
+    )
@@ -1,5 +1,6 @@
 """Rutas de inventario."""
 
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 from flask import Blueprint, flash, redirect, render_template, request, url_for
@@ -7,9 +8,18 @@ from flask_login import current_user, login_required
 
 from ..extensions import db
 from ..forms.producto_forms import AjusteStockForm
-from ..models import MovimientoStock, Producto
-from ..utils.decorators import empresa_aprobada_required
-from ..utils.helpers import es_peticion_htmx, paginar_query
+from ..models import MovimientoStock, Producto, TomaInventario
+from ..services import (
+    busqueda_service,
+    exportacion_service,
+    kardex_service,
+    lectura_service,
+    toma_inventario_service,
+)
+from ..utils.decorators import admin_required, empresa_aprobada_required, subida_importacion
+from ..utils.exportacion import exportar
+from ..utils.helpers import ahora_argentina, es_peticion_htmx, paginar_query
+from ..utils.paginacion import paginar_keyset
 
 bp = Blueprint('inventario', __name__, url_prefix='/inventario')
 
@@ -22,26 +32,22 @@ def index():
     busqueda = request.args.get('q', '')
     solo_bajo_minimo = request.args.get('bajo_minimo', '0') == '1'
 
-    query = Producto.query_empresa().filter(Producto.activo.is_(True))
+    if solo_bajo_minimo:
+        query = Producto.query_empresa().filter(Producto.filtro_bajo_minimo())
+    else:
+        query = Producto.query_empresa().filter(Producto.activo.is_(True))
 
     if busqueda:
-        query = query.filter(
-            db.or_(Producto.codigo.ilike(f'%{busqueda}%'), Producto.nombre.ilike(f'%{busqueda}%'))
-        )
-
-    if solo_bajo_minimo:
-        query = query.filter(Producto.stock_actual < Producto.stock_minimo)
+        query = query.filter(busqueda_service.filtro_productos(busqueda))
 
+    if busqueda:
+        query = query.order_by(busqueda_service.orden_productos(busqueda))
     query = query.order_by(Producto.nombre)
     productos = paginar_query(query, page)
 
     # Estadísticas
     total_productos = Producto.query_empresa().filter_by(activo=True).count()
-    productos_bajo_minimo = (
-        Producto.query_empresa()
-        .filter(Producto.activo.is_(True), Producto.stock_actual < Producto.stock_minimo)
-        .count()
-    )
+    productos_bajo_minimo = Producto.query_empresa().filter(Producto.filtro_bajo_minimo()).count()
 
     if es_peticion_htmx():
         return render_template(
@@ -66,7 +72,7 @@ def bajo_minimo():
 
     productos = (
         Producto.query_empresa()
-        .filter(Producto.activo.is_(True), Producto.stock_actual < Producto.stock_minimo)
+        .filter(Producto.filtro_bajo_minimo())
         .order_by(Producto.stock_actual)
         .paginate(page=page, per_page=20)
     )
@@ -139,15 +145,26 @@ def ajuste():
     return render_template('inventario/ajuste.html', form=form)
 
 
+def _paginar_movimientos(query):
+    """Página de movimientos de stock según los cursores de la URL."""
+    return paginar_keyset(
+        query,
+        MovimientoStock.created_at,
+        MovimientoStock.id,
+        despues=request.args.get('despues'),
+        antes=request.args.get('antes'),
+        clase_fila=lectura_service.FilaMovimientoStock,
+    )
+
+
 @bp.route('/movimientos')
 @login_required
 def movimientos():
     """Historial de movimientos de stock."""
-    page = request.args.get('page', 1, type=int)
     producto_id = request.args.get('producto_id', type=int)
     tipo = request.args.get('tipo', '')
 
-    query = MovimientoStock.query_empresa()
+    query = lectura_service.consulta_movimientos_stock(current_user.empresa_id)
 
     if producto_id:
         query = query.filter(MovimientoStock.producto_id == producto_id)
@@ -155,8 +172,10 @@ def movimientos():
     if tipo:
         query = query.filter(MovimientoStock.tipo == tipo)
 
-    query = query.order_by(MovimientoStock.created_at.desc())
-    movimientos = paginar_query(query, page)
+    movimientos = _paginar_movimientos(query)
+
+    if es_peticion_htmx():
+        return render_template('inventario/_tabla_movimientos.html', movimientos=movimientos)
 
     # Obtener producto si se filtró
     producto = None
@@ -168,20 +187,232 @@ def movimientos():
     )
 
 
+@bp.route('/movimientos/exportar')
+@login_required
+def exportar_movimientos():
+    """Exportar el historial de movimientos de stock (con los filtros aplicados)."""
+    producto_id = request.args.get('producto_id', type=int)
+    if producto_id:
+        Producto.get_o_404(producto_id)
+
+    consulta, columnas = exportacion_service.movimientos_stock(
+        current_user.empresa_id,
+        producto_id=producto_id,
+        tipo=request.args.get('tipo', ''),
+    )
+    return exportar(
+        consulta,
+        columnas,
+        'movimientos_stock',
+        formato=request.args.get('formato', 'xlsx'),
+        titulo='Movimientos de Stock',
+    )
+
+
 @bp.route('/movimientos/<int:producto_id>')
 @login_required
 def movimientos_producto(producto_id):
     """Movimientos de un producto específico."""
     producto = Producto.get_o_404(producto_id)
-    page = request.args.get('page', 1, type=int)
 
-    movimientos = (
-        MovimientoStock.query_empresa()
-        .filter_by(producto_id=producto_id)
-        .order_by(MovimientoStock.created_at.desc())
-        .paginate(page=page, per_page=20)
+    movimientos = _paginar_movimientos(
+        lectura_service.consulta_movimientos_stock(current_user.empresa_id).filter(
+            MovimientoStock.producto_id == producto_id
+        )
     )
 
+    if es_peticion_htmx():
+        return render_template('inventario/_tabla_movimientos.html', movimientos=movimientos)
+
     return render_template(
         'inventario/movimientos.html', movimientos=movimientos, producto=producto
     )
+
+
+def _rango_kardex():
+    """Fechas del kardex según la URL; por defecto los últimos 30 días."""
+    fechas = {}
+    for clave in ('desde', 'hasta'):
+        try:
+            fechas[clave] = datetime.strptime(request.args.get(clave, ''), '%Y-%m-%d').date()
+        except ValueError:
+            fechas[clave] = None
+    hasta = fechas['hasta'] or ahora_argentina().date()
+    desde = fechas['desde'] or hasta - timedelta(days=30)
+    return min(desde, hasta), max(desde, hasta)
+
+
+@bp.route('/kardex/<int:producto_id>')
+@login_required
+def kardex(producto_id):
+    """Kardex del producto: saldo acumulado, totales por período y valores al costo."""
+    producto = Producto.get_o_404(producto_id)
+    desde, hasta = _rango_kardex()
+    periodo = request.args.get('periodo', 'mes')
+    if periodo not in kardex_service.PERIODOS:
+        periodo = 'mes'
+
+    reporte = kardex_service.kardex(
+        current_user.empresa_id,
+        producto.id,
+        desde,
+        hasta,
+        periodo=periodo,
+        despues=request.args.get('despues'),
+    )
+
+    return render_template(
+        'inventario/kardex.html',
+        producto=producto,
+        desde=desde,
+        hasta=hasta,
+        periodo=periodo,
+        es_primera_pagina=not request.args.get('despues'),
+        **reporte,
+    )
+
+
+@bp.route('/kardex/<int:producto_id>/exportar')
+@login_required
+def exportar_kardex(producto_id):
+    """Exportar el kardex del producto en el rango de fechas, en streaming."""
+    producto = Producto.get_o_404(producto_id)
+    desde, hasta = _rango_kardex()
+
+    consulta, columnas = exportacion_service.kardex(
+        current_user.empresa_id, producto.id, desde, hasta
+    )
+    return exportar(
+        consulta,
+        columnas,
+        f'kardex_{producto.id}_{desde:%Y%m%d}_{hasta:%Y%m%d}',
+        formato=request.args.get('formato', 'xlsx'),
+        titulo='Kardex',
+    )
+
+
+# ─── Toma de inventario ──────────────────────────────────────────────
+
+
+@bp.route('/tomas', methods=['GET', 'POST'])
+@login_required
+@empresa_aprobada_required
+def tomas():
+    """Tomas de inventario: abrir una nueva y ver las últimas."""
+    if request.method == 'POST':
+        try:
+            toma = toma_inventario_service.crear_toma(
+                current_user.empresa_id,
+                current_user.id,
+                descripcion=(request.form.get('descripcion') or '').strip()[:200] or None,
+            )
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('inventario.tomas'))
+        return redirect(url_for('inventario.toma_detalle', toma_id=toma.id))
+
+    tomas = (
+        TomaInventario.query_empresa().order_by(TomaInventario.created_at.desc()).limit(10).all()
+    )
+    return render_template('inventario/tomas.html', tomas=tomas)
+
+
+@bp.route('/tomas/<int:toma_id>')
+@login_required
+@empresa_aprobada_required
+def toma_detalle(toma_id):
+    """Conteo, resumen y diferencias de una toma de inventario."""
+    toma = TomaInventario.get_o_404(toma_id)
+    pendiente = toma.estado in ('abierta', 'aplicando')
+    return render_template(
+        'inventario/toma_detalle.html',
+        toma=toma,
+        resumen=toma_inventario_service.resumen(toma) if pendiente else None,
+        muestra=toma_inventario_service.muestra(toma) if pendiente else [],
+    )
+
+
+@bp.route('/tomas/<int:toma_id>/escanear', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+def escanear_toma(toma_id):
+    """Sumar un escaneo al conteo (HTMX)."""
+    toma = TomaInventario.get_o_404(toma_id)
+    codigo = (request.form.get('codigo') or '').strip()
+    error = None
+    tarjeta = contado = None
+    try:
+        cantidad = Decimal(request.form.get('cantidad') or '1')
+        if cantidad <= 0:
+            raise ValueError('La cantidad debe ser mayor a cero.')
+        tarjeta, contado = toma_inventario_service.escanear(toma, codigo, cantidad)
+    except ArithmeticError:
+        error = 'La cantidad no es válida.'
+    except ValueError as e:
+        error = str(e)
+
+    if es_peticion_htmx():
+        return render_template(
+            'inventario/_toma_escaneo.html',
+            toma=toma,
+            codigo=codigo,
+            error=error,
+            tarjeta=tarjeta,
+            contado=contado,
+        )
+
+    if error:
+        flash(error, 'danger')
+    else:
+        flash(f'{tarjeta["nombre"]}: {contado} contados.', 'success')
+    return redirect(url_for('inventario.toma_detalle', toma_id=toma_id))
+
+
+@bp.route('/tomas/<int:toma_id>/cargar', methods=['POST'])
+@subida_importacion
+@login_required
+@empresa_aprobada_required
+def cargar_toma(toma_id):
+    """Cargar un archivo de conteo (CSV/XLSX con código y cantidad)."""
+    toma = TomaInventario.get_o_404(toma_id)
+    archivo = request.files.get('archivo')
+    if not archivo or not archivo.filename:
+        flash('Seleccioná un archivo CSV o XLSX.', 'danger')
+        return redirect(url_for('inventario.toma_detalle', toma_id=toma_id))
+
+    try:
+        registrados = toma_inventario_service.cargar_conteos(toma, archivo)
+        flash(f'Se registraron los conteos de {registrados} productos.', 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('inventario.toma_detalle', toma_id=toma_id))
+
+
+@bp.route('/tomas/<int:toma_id>/aplicar', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def aplicar_toma(toma_id):
+    """Ajustar el stock de todos los productos con diferencia."""
+    toma = TomaInventario.get_o_404(toma_id)
+    try:
+        cantidad = toma_inventario_service.aplicar_toma(toma, current_user.id)
+        flash(f'Toma aplicada: se ajustó el stock de {cantidad} productos.', 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('inventario.toma_detalle', toma_id=toma_id))
+
+
+@bp.route('/tomas/<int:toma_id>/descartar', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def descartar_toma(toma_id):
+    """Descartar una toma abierta sin ajustar el stock."""
+    toma = TomaInventario.get_o_404(toma_id)
+    try:
+        toma_inventario_service.descartar_toma(toma)
+        flash('Toma de inventario descartada.', 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('inventario.tomas'))
@@ -14,7 +14,7 @@ from ..models import Presupuesto, Producto, Cliente, Caja, Configuracion
 from ..forms.presupuesto_forms import PresupuestoForm, ConvertirPresupuestoForm
 from ..utils.helpers import paginar_query, es_peticion_htmx
 from ..utils.decorators import admin_required, caja_abierta_required, empresa_aprobada_required
-from ..services import presupuesto_service
+from ..services import busqueda_service, presupuesto_service
 
 bp = Blueprint('presupuestos', __name__, url_prefix='/presupuestos')
 
@@ -436,14 +436,8 @@ def buscar_producto():
     if len(q) < 2:
         return render_template('presupuestos/_resultados_busqueda.html', productos=[])
 
-    productos = Producto.query_empresa().filter(
-        Producto.activo == True,
-        db.or_(
-            Producto.codigo.ilike(f'%{q}%'),
-            Producto.nombre.ilike(f'%{q}%'),
-            Producto.codigo_barras.ilike(f'%{q}%')
-        )
-    ).limit(10).all()
+    query = Producto.query_empresa().filter(Producto.activo == True)
+    productos = busqueda_service.buscar_productos(query, q).limit(10).all()
 
     return render_template('presupuestos/_resultados_busqueda.html', productos=productos)
 
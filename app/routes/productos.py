@@ -1,16 +1,42 @@
 """Rutas de productos."""
 
 import json
+from datetime import date
 from decimal import Decimal
 
-from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    abort,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload
 
 from ..extensions import db
 from ..forms.producto_forms import ActualizacionMasivaPreciosForm, ProductoForm
-from ..models import Categoria, Producto
-from ..services import actualizacion_precio_service
-from ..utils.decorators import admin_required, empresa_aprobada_required
+from ..models import (
+    ActualizacionPrecio,
+    Categoria,
+    ImportacionCatalogo,
+    LoteActualizacionPrecio,
+    Producto,
+)
+from ..services import (
+    actualizacion_precio_service,
+    busqueda_service,
+    catalogo_service,
+    categoria_service,
+    exportacion_service,
+    historial_precio_service,
+    importacion_service,
+)
+from ..utils.decorators import admin_required, empresa_aprobada_required, subida_importacion
+from ..utils.exportacion import exportar as exportar_listado
 from ..utils.helpers import es_peticion_htmx, paginar_query
 
 bp = Blueprint('productos', __name__, url_prefix='/productos')
@@ -40,23 +66,11 @@ def index():
 
     # Filtros
     if busqueda:
-        query = query.filter(
-            db.or_(
-                Producto.codigo.ilike(f'%{busqueda}%'),
-                Producto.nombre.ilike(f'%{busqueda}%'),
-                Producto.codigo_barras.ilike(f'%{busqueda}%'),
-            )
-        )
+        query = query.filter(busqueda_service.filtro_productos(busqueda))
 
     if categoria_id:
         categoria = Categoria.get_o_404(categoria_id)
-        if categoria.es_padre:
-            categoria_ids = [categoria.id] + [
-                subcategoria.id for subcategoria in categoria.subcategorias
-            ]
-            query = query.filter(Producto.categoria_id.in_(categoria_ids))
-        else:
-            query = query.filter(Producto.categoria_id == categoria_id)
+        query = query.filter(Producto.categoria_id.in_(categoria.ids_subarbol()))
 
     if solo_activos:
         query = query.filter(Producto.activo.is_(True))
@@ -64,26 +78,26 @@ def index():
     if solo_bajo_stock:
         query = query.filter(Producto.stock_actual < Producto.stock_minimo)
 
-    # Ordenar y paginar
+    # Ordenar y paginar (con búsqueda, primero por relevancia)
+    if busqueda:
+        query = query.order_by(busqueda_service.orden_productos(busqueda))
     query = query.order_by(Producto.nombre)
     productos = paginar_query(query, page)
 
-    # Categorías para el filtro
-    categorias_padre = (
-        Categoria.query_empresa()
-        .filter_by(activa=True, padre_id=None)
-        .order_by(Categoria.nombre)
-        .all()
-    )
+    # Árbol de categorías (cacheado) para el filtro y los nombres de la tabla
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
 
     # Si es petición HTMX, devolver solo la tabla
     if es_peticion_htmx():
-        return render_template('productos/_tabla.html', productos=productos, busqueda=busqueda)
+        return render_template(
+            'productos/_tabla.html', productos=productos, busqueda=busqueda, arbol=arbol
+        )
 
     return render_template(
         'productos/index.html',
         productos=productos,
-        categorias_padre=categorias_padre,
+        arbol=arbol,
+        categorias_padre=arbol.raices_activas,
         busqueda=busqueda,
         categoria_id=categoria_id,
         solo_activos=solo_activos,
@@ -91,6 +105,31 @@ def index():
     )
 
 
+@bp.route('/exportar')
+@login_required
+def exportar():
+    """Exportar el listado de productos (con los filtros aplicados)."""
+    categoria_id = request.args.get('categoria', 0, type=int)
+    categoria_ids = None
+    if categoria_id:
+        categoria_ids = categoria_service.arbol_categorias(current_user.empresa_id).ids_subarbol(
+            categoria_id
+        )
+        if not categoria_ids:
+            abort(404)
+
+    consulta, columnas = exportacion_service.productos(
+        current_user.empresa_id,
+        busqueda=request.args.get('q', ''),
+        categoria_ids=categoria_ids,
+        solo_activos=request.args.get('activos', '1') == '1',
+        solo_bajo_stock=request.args.get('bajo_stock', '0') == '1',
+    )
+    return exportar_listado(
+        consulta, columnas, 'productos', formato=request.args.get('formato', 'xlsx')
+    )
+
+
 @bp.route('/actualizacion-masiva')
 @login_required
 @empresa_aprobada_required
@@ -100,17 +139,11 @@ def actualizacion_masiva():
     form = ActualizacionMasivaPreciosForm()
 
     # Construir árbol de categorías para el template
-    categorias_padre = (
-        Categoria.query_empresa()
-        .filter_by(activa=True, padre_id=None)
-        .order_by(Categoria.nombre)
-        .all()
-    )
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
 
     arbol_categorias = []
-    for padre in categorias_padre:
-        hijos = sorted(padre.subcategorias, key=lambda c: c.nombre)
-        hijos_activos = [h for h in hijos if h.activa]
+    for padre in arbol.raices_activas:
+        hijos_activos = [h for h in padre.subcategorias if h.activa]
         arbol_categorias.append(
             {
                 'id': padre.id,
@@ -126,84 +159,97 @@ def actualizacion_masiva():
     )
 
 
-@bp.route('/actualizacion-masiva/preview', methods=['POST'])
-@login_required
-@empresa_aprobada_required
-@admin_required
-def actualizacion_masiva_preview():
-    """Preview HTMX de actualización masiva de precios."""
-    try:
-        categorias_ids_raw = request.form.get('categorias_ids', '[]')
-        categorias_ids = json.loads(categorias_ids_raw)
-        categorias_ids = [int(cid) for cid in categorias_ids if cid]
-    except (json.JSONDecodeError, ValueError):
-        return render_template(
-            'productos/_preview_actualizacion.html',
-            error='Seleccioná al menos una categoría.',
-            preview=None,
-        )
+def _parametros_actualizacion():
+    """Lee y valida categorías, porcentaje y opción de costo del formulario.
 
+    Raises:
+        ValueError: con el mensaje para el usuario si algún dato es inválido.
+    """
+    try:
+        categorias_ids = json.loads(request.form.get('categorias_ids', '[]'))
+        categorias_ids = list(dict.fromkeys(int(cid) for cid in categorias_ids if cid))
+    except (json.JSONDecodeError, TypeError, ValueError):
+        categorias_ids = []
     if not categorias_ids:
-        return render_template(
-            'productos/_preview_actualizacion.html',
-            error='Seleccioná al menos una categoría.',
-            preview=None,
-        )
+        raise ValueError('Seleccioná al menos una categoría.')
 
     try:
         porcentaje = Decimal(str(request.form.get('porcentaje', '0')))
     except Exception:
-        return render_template(
-            'productos/_preview_actualizacion.html',
-            error='El porcentaje ingresado no es válido.',
-            preview=None,
-        )
-
-    actualizar_costo = request.form.get('actualizar_costo') == 'y'
+        raise ValueError('El porcentaje ingresado no es válido.')
 
     # Validar que las categorías pertenezcan a la empresa
-    for cid in categorias_ids:
-        cat = Categoria.query.filter_by(id=cid, empresa_id=current_user.empresa_id).first()
-        if not cat:
-            return render_template(
-                'productos/_preview_actualizacion.html',
-                error=f'La categoría con ID {cid} no existe o no pertenece a tu empresa.',
-                preview=None,
-            )
+    propias = Categoria.query_empresa().filter(Categoria.id.in_(categorias_ids)).count()
+    if propias != len(categorias_ids):
+        raise ValueError('Alguna categoría seleccionada no existe o no pertenece a tu empresa.')
 
-    productos = actualizacion_precio_service.obtener_productos_por_categorias(categorias_ids)
+    return categorias_ids, porcentaje, request.form.get('actualizar_costo') == 'y'
 
-    if not productos:
-        return render_template(
-            'productos/_preview_actualizacion.html',
-            error='No hay productos activos en las categorías seleccionadas.',
-            preview=None,
-        )
 
+@bp.route('/actualizacion-masiva/preview', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def actualizacion_masiva_preview():
+    """Preview HTMX de actualización masiva: resumen en SQL y primera página."""
     try:
-        preview = actualizacion_precio_service.previsualizar_actualizacion(
-            productos, porcentaje, actualizar_costo
-        )
+        categorias_ids, porcentaje, actualizar_costo = _parametros_actualizacion()
     except ValueError as e:
+        return render_template('productos/_preview_actualizacion.html', error=str(e))
+
+    resumen = actualizacion_precio_service.resumen_actualizacion(
+        categorias_ids, porcentaje, actualizar_costo
+    )
+    if not resumen['cantidad']:
         return render_template(
             'productos/_preview_actualizacion.html',
-            error=str(e),
-            preview=None,
+            error='No hay productos activos en las categorías seleccionadas.',
         )
 
-    porcentaje_cero = porcentaje == 0
+    errores = []
+    if resumen['invalidos']:
+        errores = actualizacion_precio_service.productos_invalidos(
+            categorias_ids, porcentaje, actualizar_costo
+        )
 
     return render_template(
         'productos/_preview_actualizacion.html',
-        preview=preview,
+        resumen=resumen,
+        errores=errores,
+        pagina=actualizacion_precio_service.pagina_actualizacion(
+            categorias_ids, porcentaje, actualizar_costo
+        ),
         porcentaje=porcentaje,
         actualizar_costo=actualizar_costo,
         categorias_ids=categorias_ids,
-        porcentaje_cero=porcentaje_cero,
+        porcentaje_cero=porcentaje == 0,
         error=None,
     )
 
 
+@bp.route('/actualizacion-masiva/preview/productos', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def actualizacion_masiva_preview_productos():
+    """Página siguiente de la muestra del preview (HTMX, se agrega a la tabla)."""
+    try:
+        categorias_ids, porcentaje, actualizar_costo = _parametros_actualizacion()
+    except ValueError:
+        return '', 400
+
+    return render_template(
+        'productos/_preview_actualizacion_filas.html',
+        pagina=actualizacion_precio_service.pagina_actualizacion(
+            categorias_ids,
+            porcentaje,
+            actualizar_costo,
+            despues_id=request.args.get('despues', type=int),
+        ),
+        actualizar_costo=actualizar_costo,
+    )
+
+
 @bp.route('/actualizacion-masiva/aplicar', methods=['POST'])
 @login_required
 @empresa_aprobada_required
@@ -245,6 +291,65 @@ def actualizacion_masiva_aplicar():
     return redirect(url_for('productos.actualizacion_masiva'))
 
 
+@bp.route('/importar', methods=['GET', 'POST'])
+@subida_importacion
+@login_required
+@empresa_aprobada_required
+@admin_required
+def importar():
+    """Importación masiva del catálogo desde CSV o XLSX."""
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Seleccioná un archivo CSV o XLSX.', 'danger')
+            return redirect(url_for('productos.importar'))
+
+        try:
+            importacion = importacion_service.crear_importacion(
+                archivo, current_user.empresa_id, current_user.id
+            )
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('productos.importar'))
+
+        importacion_service.iniciar_importacion(importacion.id)
+        return redirect(url_for('productos.importacion', id=importacion.id))
+
+    importaciones = (
+        ImportacionCatalogo.query_empresa()
+        .order_by(ImportacionCatalogo.created_at.desc())
+        .limit(10)
+        .all()
+    )
+    return render_template('productos/importar.html', importaciones=importaciones)
+
+
+@bp.route('/importar/<int:id>')
+@login_required
+@empresa_aprobada_required
+@admin_required
+def importacion(id):
+    """Avance de una importación (el parcial se refresca por HTMX)."""
+    importacion = ImportacionCatalogo.get_o_404(id)
+    if es_peticion_htmx():
+        return render_template('productos/_importacion.html', importacion=importacion)
+    return render_template('productos/importacion.html', importacion=importacion)
+
+
+@bp.route('/importar/<int:id>/reanudar', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def reanudar_importacion(id):
+    """Reanuda una importación fallida desde la última fila confirmada."""
+    importacion = ImportacionCatalogo.get_o_404(id)
+    if importacion.estado != 'fallida':
+        flash('Solo se pueden reanudar importaciones fallidas.', 'warning')
+    else:
+        importacion_service.iniciar_importacion(importacion.id)
+    return redirect(url_for('productos.importacion', id=importacion.id))
+
+
 @bp.route('/nuevo', methods=['GET', 'POST'])
 @login_required
 @empresa_aprobada_required
@@ -294,6 +399,8 @@ def nuevo():
         )
 
         db.session.add(producto)
+        if categoria_id:
+            categoria_service.invalidar_arbol(current_user.empresa_id)
         db.session.commit()
 
         flash(f'Producto "{producto.nombre}" creado correctamente.', 'success')
@@ -319,7 +426,13 @@ def nuevo():
 def detalle(id):
     """Ver detalle de producto."""
     producto = Producto.get_o_404(id)
-    actualizaciones_precio = producto.actualizaciones_precio.limit(20).all()
+    actualizaciones_precio = (
+        producto.actualizaciones_precio.options(
+            joinedload(ActualizacionPrecio.lote).joinedload(LoteActualizacionPrecio.usuario)
+        )
+        .limit(20)
+        .all()
+    )
     return render_template(
         'productos/detalle.html',
         producto=producto,
@@ -381,6 +494,11 @@ def editar(id):
             form.subcategoria_id.data,
         )
 
+        busqueda_service.olvidar_codigos(
+            producto.empresa_id, producto.codigo, producto.codigo_barras
+        )
+        costo_anterior, venta_anterior = producto.precio_costo, producto.precio_venta
+        cambia_arbol = producto.categoria_id != categoria_id or producto.activo != form.activo.data
         producto.codigo = form.codigo.data
         producto.codigo_barras = form.codigo_barras.data or None
         producto.nombre = form.nombre.data
@@ -394,6 +512,11 @@ def editar(id):
         producto.proveedor_id = form.proveedor_id.data if form.proveedor_id.data else None
         producto.ubicacion = form.ubicacion.data
         producto.activo = form.activo.data
+        historial_precio_service.registrar_cambio_manual(
+            producto, costo_anterior, venta_anterior, current_user.id
+        )
+        if cambia_arbol:
+            categoria_service.invalidar_arbol(producto.empresa_id)
 
         db.session.commit()
 
@@ -418,6 +541,7 @@ def toggle_activo(id):
     """Activar/desactivar producto."""
     producto = Producto.get_o_404(id)
     producto.activo = not producto.activo
+    categoria_service.invalidar_arbol(producto.empresa_id)
     db.session.commit()
 
     estado = 'activado' if producto.activo else 'desactivado'
@@ -439,21 +563,47 @@ def buscar():
     if len(q) < 2:
         return jsonify([])
 
-    productos = (
-        Producto.query_empresa()
-        .filter(
-            Producto.activo.is_(True),
-            db.or_(
-                Producto.codigo.ilike(f'%{q}%'),
-                Producto.nombre.ilike(f'%{q}%'),
-                Producto.codigo_barras.ilike(f'%{q}%'),
-            ),
-        )
-        .limit(limit)
-        .all()
+    query = Producto.query_empresa().filter(Producto.activo.is_(True))
+    productos = busqueda_service.buscar_productos(query, q).limit(limit).all()
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
+
+    return jsonify([p.to_dict(arbol) for p in productos])
+
+
+@bp.route('/api/sync')
+@login_required
+def api_sync():
+    """Cambios del catálogo desde un cursor, para la copia local del POS."""
+    cambios = catalogo_service.cambios_catalogo(
+        current_user.empresa_id,
+        desde=request.args.get('desde'),
+        limite=request.args.get('limite', catalogo_service.LIMITE_POR_DEFECTO, type=int),
     )
+    response = jsonify(cambios)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
-    return jsonify([p.to_dict() for p in productos])
+
+@bp.route('/api/<int:id>/precio')
+@login_required
+def api_precio_a_fecha(id):
+    """Costo y precio de venta de un producto a una fecha (``?fecha=AAAA-MM-DD``)."""
+    try:
+        fecha = date.fromisoformat(request.args.get('fecha', ''))
+    except ValueError:
+        return jsonify({'error': 'Indicá la fecha con formato AAAA-MM-DD.'}), 400
+
+    precio = historial_precio_service.precio_a_fecha(current_user.empresa_id, id, fecha)
+    if precio is None:
+        abort(404)
+    return jsonify(
+        {
+            'producto_id': precio.producto_id,
+            'fecha': fecha.isoformat(),
+            'precio_costo': float(precio.precio_costo),
+            'precio_venta': float(precio.precio_venta),
+        }
+    )
 
 
 @bp.route('/tabla')
@@ -469,23 +619,11 @@ def tabla():
     query = Producto.query_empresa()
 
     if busqueda:
-        query = query.filter(
-            db.or_(
-                Producto.codigo.ilike(f'%{busqueda}%'),
-                Producto.nombre.ilike(f'%{busqueda}%'),
-                Producto.codigo_barras.ilike(f'%{busqueda}%'),
-            )
-        )
+        query = query.filter(busqueda_service.filtro_productos(busqueda))
 
     if categoria_id:
         categoria = Categoria.get_o_404(categoria_id)
-        if categoria.es_padre:
-            categoria_ids = [categoria.id] + [
-                subcategoria.id for subcategoria in categoria.subcategorias
-            ]
-            query = query.filter(Producto.categoria_id.in_(categoria_ids))
-        else:
-            query = query.filter(Producto.categoria_id == categoria_id)
+        query = query.filter(Producto.categoria_id.in_(categoria.ids_subarbol()))
 
     if solo_activos:
         query = query.filter(Producto.activo.is_(True))
@@ -493,7 +631,14 @@ def tabla():
     if solo_bajo_stock:
         query = query.filter(Producto.stock_actual < Producto.stock_minimo)
 
+    if busqueda:
+        query = query.order_by(busqueda_service.orden_productos(busqueda))
     query = query.order_by(Producto.nombre)
     productos = paginar_query(query, page)
 
-    return render_template('productos/_tabla.html', productos=productos, busqueda=busqueda)
+    return render_template(
+        'productos/_tabla.html',
+        productos=productos,
+        busqueda=busqueda,
+        arbol=categoria_service.arbol_categorias(current_user.empresa_id),
+    )
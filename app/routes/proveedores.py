@@ -5,8 +5,9 @@ from flask_login import current_user, login_required
 
 from ..extensions import db
 from ..forms.proveedor_forms import ProveedorForm
-from ..models import OrdenCompra, Proveedor
-from ..utils.decorators import empresa_aprobada_required
+from ..models import ListaPrecioProveedor, OrdenCompra, Proveedor
+from ..services import lista_precio_service
+from ..utils.decorators import admin_required, empresa_aprobada_required, subida_importacion
 from ..utils.helpers import es_peticion_htmx, paginar_query
 
 bp = Blueprint('proveedores', __name__, url_prefix='/proveedores')
@@ -149,3 +150,83 @@ def toggle_activo(id):
         return '', 204
 
     return redirect(url_for('proveedores.index'))
+
+
+@bp.route('/<int:id>/lista-precios', methods=['GET', 'POST'])
+@subida_importacion
+@login_required
+@empresa_aprobada_required
+@admin_required
+def lista_precios(id):
+    """Cargar una lista de precios del proveedor."""
+    proveedor = Proveedor.get_o_404(id)
+
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Seleccioná un archivo CSV o XLSX.', 'danger')
+            return redirect(url_for('proveedores.lista_precios', id=id))
+
+        try:
+            lista = lista_precio_service.cargar_lista(
+                archivo, proveedor.id, current_user.empresa_id, current_user.id
+            )
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('proveedores.lista_precios', id=id))
+
+        return redirect(url_for('proveedores.lista_precios_detalle', lista_id=lista.id))
+
+    listas = (
+        ListaPrecioProveedor.query_empresa()
+        .filter_by(proveedor_id=id)
+        .order_by(ListaPrecioProveedor.created_at.desc())
+        .limit(10)
+        .all()
+    )
+    return render_template('proveedores/lista_precios.html', proveedor=proveedor, listas=listas)
+
+
+@bp.route('/listas/<int:lista_id>')
+@login_required
+@empresa_aprobada_required
+@admin_required
+def lista_precios_detalle(lista_id):
+    """Resumen y muestra de los cambios de una lista de precios."""
+    lista = ListaPrecioProveedor.get_o_404(lista_id)
+    return render_template(
+        'proveedores/lista_precios_detalle.html',
+        lista=lista,
+        resumen=lista_precio_service.resumen(lista) if lista.estado == 'pendiente' else None,
+        muestra=lista_precio_service.muestra(lista) if lista.estado == 'pendiente' else [],
+    )
+
+
+@bp.route('/listas/<int:lista_id>/aplicar', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def aplicar_lista_precios(lista_id):
+    """Aplicar una lista de precios pendiente."""
+    lista = ListaPrecioProveedor.get_o_404(lista_id)
+    try:
+        cantidad = lista_precio_service.aplicar_lista(lista, current_user.id)
+        flash(f'Se actualizaron los precios de {cantidad} productos.', 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('proveedores.lista_precios_detalle', lista_id=lista_id))
+
+
+@bp.route('/listas/<int:lista_id>/descartar', methods=['POST'])
+@login_required
+@empresa_aprobada_required
+@admin_required
+def descartar_lista_precios(lista_id):
+    """Descartar una lista de precios pendiente."""
+    lista = ListaPrecioProveedor.get_o_404(lista_id)
+    try:
+        lista_precio_service.descartar_lista(lista)
+        flash('Lista de precios descartada.', 'success')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    return redirect(url_for('proveedores.lista_precios', id=lista.proveedor_id))
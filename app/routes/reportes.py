@@ -3,13 +3,20 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from flask import Blueprint, make_response, render_template, request
+from flask import Blueprint, abort, render_template, request
 from flask_login import current_user, login_required
 from sqlalchemy import func
 
 from ..extensions import db
-from ..models import Categoria, Cliente, Producto, Venta, VentaDetalle, VentaPago
+from ..models import Categoria, Producto, Venta, VentaDetalle
+from ..services import (
+    categoria_service,
+    cierre_stock_service,
+    exportacion_service,
+    reporte_service,
+)
 from ..utils.decorators import admin_required
+from ..utils.exportacion import exportar
 from ..utils.helpers import ahora_argentina
 
 bp = Blueprint('reportes', __name__, url_prefix='/reportes')
@@ -46,139 +53,14 @@ def ventas():
     inicio = datetime.combine(fecha_desde, datetime.min.time())
     fin = datetime.combine(fecha_hasta, datetime.max.time())
 
-    empresa_id = current_user.empresa_id
-
-    # Total de ventas
-    total_ventas = (
-        db.session.query(func.coalesce(func.sum(Venta.total), 0))
-        .filter(
-            Venta.empresa_id == empresa_id,
-            Venta.fecha >= inicio,
-            Venta.fecha <= fin,
-            Venta.estado == 'completada',
-        )
-        .scalar()
-    )
-
-    # Cantidad de ventas
-    cantidad_ventas = Venta.query.filter(
-        Venta.empresa_id == empresa_id,
-        Venta.fecha >= inicio,
-        Venta.fecha <= fin,
-        Venta.estado == 'completada',
-    ).count()
-
-    # Ticket promedio
-    ticket_promedio = total_ventas / cantidad_ventas if cantidad_ventas > 0 else 0
-
-    # Ventas por día para gráfico
-    ventas_por_dia_query = (
-        db.session.query(
-            func.date(Venta.fecha).label('fecha'),
-            func.sum(Venta.total).label('total'),
-            func.count(Venta.id).label('cantidad'),
-        )
-        .filter(
-            Venta.empresa_id == empresa_id,
-            Venta.fecha >= inicio,
-            Venta.fecha <= fin,
-            Venta.estado == 'completada',
-        )
-        .group_by(func.date(Venta.fecha))
-        .order_by(func.date(Venta.fecha))
-        .all()
-    )
-
-    # Convertir a lista de diccionarios para JSON
-    ventas_por_dia = [
-        {
-            'fecha': str(row.fecha),
-            'total': float(row.total) if row.total else 0,
-            'cantidad': row.cantidad,
-        }
-        for row in ventas_por_dia_query
-    ]
-
-    # Ventas por forma de pago (usando VentaPago para distribuir divididos)
-    ventas_por_forma_pago_query = (
-        db.session.query(
-            VentaPago.forma_pago,
-            func.sum(VentaPago.monto).label('total'),
-            func.count(func.distinct(VentaPago.venta_id)).label('cantidad'),
-        )
-        .join(Venta, VentaPago.venta_id == Venta.id)
-        .filter(
-            Venta.empresa_id == empresa_id,
-            Venta.fecha >= inicio,
-            Venta.fecha <= fin,
-            Venta.estado == 'completada',
-        )
-        .group_by(VentaPago.forma_pago)
-        .all()
-    )
-
-    # Convertir a lista de diccionarios
-    forma_pago_labels = {
-        'efectivo': 'Efectivo',
-        'tarjeta_debito': 'Tarjeta Debito',
-        'tarjeta_credito': 'Tarjeta Credito',
-        'transferencia': 'Transferencia',
-        'qr': 'QR',
-        'cuenta_corriente': 'Cuenta Corriente',
-    }
-    ventas_por_forma_pago = [
-        {
-            'forma_pago': row.forma_pago,
-            'forma_pago_label': forma_pago_labels.get(row.forma_pago, row.forma_pago),
-            'total': float(row.total) if row.total else 0,
-            'cantidad': row.cantidad,
-        }
-        for row in ventas_por_forma_pago_query
-    ]
-
-    # Top 10 productos más vendidos (filtrar por empresa via Producto)
-    productos_mas_vendidos_query = (
-        db.session.query(
-            Producto.nombre,
-            Producto.unidad_medida,
-            func.sum(VentaDetalle.cantidad).label('cantidad'),
-            func.sum(VentaDetalle.subtotal).label('total'),
-        )
-        .join(VentaDetalle, Producto.id == VentaDetalle.producto_id)
-        .join(Venta, VentaDetalle.venta_id == Venta.id)
-        .filter(
-            Producto.empresa_id == current_user.empresa_id,
-            Venta.fecha >= inicio,
-            Venta.fecha <= fin,
-            Venta.estado == 'completada',
-        )
-        .group_by(Producto.id)
-        .order_by(func.sum(VentaDetalle.subtotal).desc())
-        .limit(10)
-        .all()
-    )
-
-    # Convertir a lista de diccionarios
-    productos_mas_vendidos = [
-        {
-            'nombre': row.nombre,
-            'unidad_medida': row.unidad_medida,
-            'cantidad': float(row.cantidad) if row.cantidad else 0,
-            'total': float(row.total) if row.total else 0,
-        }
-        for row in productos_mas_vendidos_query
-    ]
+    # Agregados independientes: se ejecutan en paralelo sobre un mismo snapshot
+    reporte = reporte_service.reporte_ventas(current_user.empresa_id, inicio, fin)
 
     return render_template(
         'reportes/ventas.html',
         fecha_desde=fecha_desde,
         fecha_hasta=fecha_hasta,
-        total_ventas=total_ventas,
-        cantidad_ventas=cantidad_ventas,
-        ticket_promedio=ticket_promedio,
-        ventas_por_dia=ventas_por_dia,
-        ventas_por_forma_pago=ventas_por_forma_pago,
-        productos_mas_vendidos=productos_mas_vendidos,
+        **reporte,
     )
 
 
@@ -189,91 +71,84 @@ def stock():
     # Parámetros
     categoria_id = request.args.get('categoria', 0, type=int)
     solo_bajo_minimo = request.args.get('bajo_minimo', '0') == '1'
+    despues_id = request.args.get('despues', None, type=int)
 
-    query = Producto.query_empresa().filter(Producto.activo.is_(True))
-
+    # Árbol de categorías (cacheado): filtro y subárbol de la elegida
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
+    categoria_ids = None
     if categoria_id:
-        categoria = Categoria.get_o_404(categoria_id)
-        if categoria.es_padre:
-            categoria_ids = [categoria.id] + [
-                subcategoria.id for subcategoria in categoria.subcategorias
-            ]
-            query = query.filter(Producto.categoria_id.in_(categoria_ids))
-        else:
-            query = query.filter(Producto.categoria_id == categoria_id)
-
-    if solo_bajo_minimo:
-        query = query.filter(Producto.stock_actual < Producto.stock_minimo)
-
-    productos = query.order_by(Producto.nombre).all()
-
-    # Valor total del inventario
-    valor_costo = sum(p.stock_actual * p.precio_costo for p in productos)
-    valor_venta = sum(p.stock_actual * p.precio_venta for p in productos)
-
-    # Productos bajo mínimo
-    bajo_minimo = [p for p in productos if p.stock_bajo]
-
-    # Categorías para filtro
-    categorias_padre = (
-        Categoria.query_empresa()
-        .filter_by(activa=True, padre_id=None)
-        .order_by(Categoria.nombre)
-        .all()
+        categoria_ids = arbol.ids_subarbol(categoria_id)
+        if not categoria_ids:
+            abort(404)
+
+    # Totales agregados en SQL y página del listado por keyset
+    reporte = reporte_service.reporte_stock(
+        current_user.empresa_id,
+        categoria_ids=categoria_ids,
+        solo_bajo_minimo=solo_bajo_minimo,
+        despues_id=despues_id,
     )
 
+    categorias_padre = arbol.raices_activas
+
     return render_template(
         'reportes/stock.html',
-        productos=productos,
         categorias=categorias_padre,
         categorias_padre=categorias_padre,
         categoria_id=categoria_id,
         solo_bajo_minimo=solo_bajo_minimo,
-        valor_costo=valor_costo,
-        valor_venta=valor_venta,
-        bajo_minimo=bajo_minimo,
+        es_primera_pagina=not despues_id,
+        **reporte,
     )
 
 
-@bp.route('/clientes')
+@bp.route('/stock/valuacion')
 @login_required
-def clientes():
-    """Reporte de clientes."""
-    # Clientes con mayor deuda
-    clientes_deudores = (
-        Cliente.query_empresa()
-        .filter(Cliente.activo.is_(True), Cliente.saldo_cuenta_corriente > 0)
-        .order_by(Cliente.saldo_cuenta_corriente.desc())
-        .limit(20)
-        .all()
-    )
+def valuacion_stock():
+    """Valuación del inventario a una fecha y serie de fines de mes."""
+    hoy = ahora_argentina().date()
+    fecha = cierre_stock_service.ultimo_cierre_posible('mensual', hoy)
+    if request.args.get('fecha'):
+        try:
+            fecha = datetime.strptime(request.args.get('fecha'), '%Y-%m-%d').date()
+        except ValueError:
+            abort(400)
+    categoria_id = request.args.get('categoria', 0, type=int)
 
-    # Total de deudas
-    total_deudas = sum(c.saldo_cuenta_corriente for c in clientes_deudores)
+    arbol = categoria_service.arbol_categorias(current_user.empresa_id)
+    categoria_ids = None
+    if categoria_id:
+        categoria_ids = arbol.ids_subarbol(categoria_id)
+        if not categoria_ids:
+            abort(404)
 
-    # Top clientes por ventas
-    top_clientes = (
-        db.session.query(
-            Cliente.nombre,
-            func.sum(Venta.total).label('total_compras'),
-            func.count(Venta.id).label('cantidad_compras'),
-        )
-        .join(Venta, Cliente.id == Venta.cliente_id)
-        .filter(
-            Cliente.empresa_id == current_user.empresa_id,
-            Venta.estado == 'completada',
-        )
-        .group_by(Cliente.id)
-        .order_by(func.sum(Venta.total).desc())
-        .limit(20)
-        .all()
+    # Desde el cierre más cercano: no recorre el historial completo
+    valuacion = cierre_stock_service.valuacion_a_fecha(
+        current_user.empresa_id, min(fecha, hoy), categoria_ids=categoria_ids
     )
+    mensuales = cierre_stock_service.valuaciones_mensuales(current_user.empresa_id, hoy)
+
+    return render_template(
+        'reportes/valuacion.html',
+        fecha=fecha,
+        categorias_padre=arbol.raices_activas,
+        categoria_id=categoria_id,
+        valuacion=valuacion,
+        mensuales=mensuales,
+    )
+
+
+@bp.route('/clientes')
+@login_required
+def clientes():
+    """Reporte de clientes."""
+    # Ranking y segmentos sobre las estadísticas de compra de cada cliente
+    reporte = reporte_service.reporte_clientes(current_user.empresa_id, ahora_argentina().date())
 
     return render_template(
         'reportes/clientes.html',
-        clientes_deudores=clientes_deudores,
-        total_deudas=total_deudas,
-        top_clientes=top_clientes,
+        segmentos_labels=reporte_service.SEGMENTOS_CLIENTES,
+        **reporte,
     )
 
 
@@ -348,11 +223,7 @@ def rentabilidad():
 @bp.route('/ventas/exportar')
 @login_required
 def exportar_ventas():
-    """Exportar reporte de ventas a Excel."""
-    from io import BytesIO
-
-    from openpyxl import Workbook
-
+    """Exportar reporte de ventas a Excel o CSV."""
     # Fechas
     fecha_hasta = ahora_argentina().date()
     fecha_desde = fecha_hasta - timedelta(days=30)
@@ -365,59 +236,11 @@ def exportar_ventas():
     inicio = datetime.combine(fecha_desde, datetime.min.time())
     fin = datetime.combine(fecha_hasta, datetime.max.time())
 
-    # Obtener ventas
-    ventas = (
-        Venta.query_empresa()
-        .filter(Venta.fecha >= inicio, Venta.fecha <= fin)
-        .order_by(Venta.fecha)
-        .all()
-    )
-
-    # Crear Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Ventas'
-
-    # Encabezados
-    headers = [
-        'Número',
-        'Fecha',
-        'Cliente',
-        'Forma de Pago',
-        'Subtotal',
-        'Descuento',
-        'Total',
-        'Estado',
-    ]
-    ws.append(headers)
-
-    # Datos
-    for venta in ventas:
-        ws.append(
-            [
-                venta.numero_completo,
-                venta.fecha.strftime('%d/%m/%Y %H:%M'),
-                venta.cliente.nombre if venta.cliente else 'Consumidor Final',
-                venta.forma_pago_display,
-                float(venta.subtotal),
-                float(venta.descuento_monto),
-                float(venta.total),
-                venta.estado_display,
-            ]
-        )
-
-    # Guardar a buffer
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    # Respuesta
-    response = make_response(output.getvalue())
-    response.headers['Content-Type'] = (
-        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    consulta, columnas = exportacion_service.ventas(current_user.empresa_id, inicio, fin)
+    return exportar(
+        consulta,
+        columnas,
+        f'ventas_{fecha_desde}_{fecha_hasta}',
+        formato=request.args.get('formato', 'xlsx'),
+        titulo='Ventas',
     )
-    response.headers['Content-Disposition'] = (
-        f'attachment; filename=ventas_{fecha_desde}_{fecha_hasta}.xlsx'
-    )
-
-    return response
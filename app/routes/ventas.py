@@ -16,6 +16,7 @@ from flask import (
     url_for,
 )
 from flask_login import current_user, login_required
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.exceptions import HTTPException
 
 from ..extensions import db
@@ -31,13 +32,24 @@ from ..models import (
     VentaDetalle,
     VentaPago,
 )
-from ..services import venta_service
+from ..services import busqueda_service, lectura_service, reporte_service, venta_service
 from ..utils.decorators import admin_required, caja_abierta_required, empresa_aprobada_required
-from ..utils.helpers import ahora_argentina, generar_numero_venta, paginar_query
+from ..utils.helpers import ahora_argentina, es_peticion_htmx, generar_numero_venta
+from ..utils.paginacion import paginar_keyset
 
 bp = Blueprint('ventas', __name__, url_prefix='/ventas')
 
 
+def _carga_comprobante():
+    """Opciones de carga para mostrar una venta completa (detalle, ticket, PDF)."""
+    return (
+        selectinload(Venta.detalles).joinedload(VentaDetalle.producto),
+        selectinload(Venta.pagos),
+        joinedload(Venta.cliente),
+        joinedload(Venta.usuario),
+    )
+
+
 def _decimal_seguro(valor, default=Decimal('0')):
     """Convierte un valor a Decimal de forma segura.
 
@@ -395,6 +407,11 @@ def punto_de_venta():
                 )
                 db.session.add(venta_pago)
 
+            # Estadísticas de compra del cliente
+            if venta.cliente:
+                venta.cliente.registrar_compra(venta.total, venta.fecha)
+
+            venta.registrar_resumen()
             db.session.commit()
 
             flash(f'Venta #{venta.numero_completo} registrada. Total: ${venta.total:.2f}', 'success')
@@ -428,13 +445,12 @@ def punto_de_venta():
 @login_required
 def historial():
     """Historial de ventas."""
-    page = request.args.get('page', 1, type=int)
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     estado = request.args.get('estado', '')
     cliente_id = request.args.get('cliente', 0, type=int)
 
-    query = Venta.query_empresa()
+    query = lectura_service.consulta_ventas(current_user.empresa_id)
 
     if fecha_desde:
         fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d')
@@ -451,8 +467,18 @@ def historial():
     if cliente_id:
         query = query.filter(Venta.cliente_id == cliente_id)
 
-    query = query.order_by(Venta.fecha.desc())
-    ventas = paginar_query(query, page)
+    ventas = paginar_keyset(
+        query,
+        Venta.fecha,
+        Venta.id,
+        despues=request.args.get('despues'),
+        antes=request.args.get('antes'),
+        estimar=True,
+        clase_fila=lectura_service.FilaVenta,
+    )
+
+    if es_peticion_htmx():
+        return render_template('ventas/_tabla_historial.html', ventas=ventas)
 
     # Obtener nombre del cliente seleccionado (para el autocomplete)
     cliente_nombre = ''
@@ -476,7 +502,7 @@ def historial():
 @login_required
 def detalle(id):
     """Ver detalle de venta."""
-    venta = Venta.get_o_404(id)
+    venta = Venta.get_o_404(id, *_carga_comprobante())
     return render_template('ventas/detalle.html', venta=venta)
 
 
@@ -595,6 +621,12 @@ def anular(id):
         venta.estado = 'anulada'
         venta.motivo_anulacion = form.motivo.data
 
+        if venta.cliente:
+            venta.cliente.revertir_compra(venta)
+
+        # Invalidar reportes cacheados del período de la venta
+        reporte_service.invalidar_reportes(venta.empresa_id, venta.fecha)
+
         db.session.commit()
 
         flash(f'Venta #{venta.numero_completo} anulada correctamente.', 'success')
@@ -607,7 +639,7 @@ def anular(id):
 @login_required
 def ticket(id):
     """Ver/imprimir ticket de venta."""
-    venta = Venta.get_o_404(id)
+    venta = Venta.get_o_404(id, *_carga_comprobante())
     return render_template('ventas/ticket.html', venta=venta)
 
 
@@ -615,7 +647,7 @@ def ticket(id):
 @login_required
 def pdf(id):
     """Descargar PDF de comprobante de venta."""
-    venta = Venta.get_o_404(id)
+    venta = Venta.get_o_404(id, *_carga_comprobante())
     sin_precios = request.args.get('sin_precios', '0') == '1'
 
     pdf_bytes = venta_service.generar_pdf(venta, sin_precios=sin_precios)
@@ -637,19 +669,27 @@ def buscar_producto():
     if len(q) < 2:
         return render_template('ventas/_resultados_busqueda.html', productos=[])
 
-    productos = Producto.query_empresa().filter(
+    query = Producto.query_empresa().filter(
         Producto.activo == True,
         Producto.stock_actual > 0,
-        db.or_(
-            Producto.codigo.ilike(f'%{q}%'),
-            Producto.nombre.ilike(f'%{q}%'),
-            Producto.codigo_barras.ilike(f'%{q}%')
-        )
-    ).limit(10).all()
+    )
+    productos = busqueda_service.buscar_productos(query, q).limit(10).all()
 
     return render_template('ventas/_resultados_busqueda.html', productos=productos)
 
 
+@bp.route('/api/escanear')
+@login_required
+def api_escanear():
+    """Resuelve un código o código de barras escaneado en el POS (una sola query)."""
+    producto = busqueda_service.resolver_codigo(
+        current_user.empresa_id, request.args.get('codigo', '')
+    )
+    if producto is None:
+        return jsonify({'error': 'Producto no encontrado'}), 404
+    return jsonify(producto)
+
+
 @bp.route('/api/producto/<int:id>')
 @login_required
 def api_producto(id):
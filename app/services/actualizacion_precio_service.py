@@ -1,108 +1,240 @@
-"""Servicio de actualización masiva de precios."""
+"""Servicio de actualización masiva de precios.
 
-from decimal import ROUND_HALF_UP, Decimal
+Los precios nuevos se calculan en SQL (``round(precio * factor, 2)``) con las
+mismas expresiones para la previsualización y la aplicación: la
+previsualización devuelve estadísticas agregadas y una muestra paginada por
+(nombre, id), y la aplicación escribe auditoría y precios con sentencias en
+bloque. En ningún caso se cargan los productos como objetos ORM.
+
+La auditoría es un ``LoteActualizacionPrecio`` por operación (usuario,
+porcentaje, categorías, notas) y una fila compacta por producto con los
+precios anteriores y nuevos.
+"""
+
+import json
+from decimal import Decimal
 
 from flask_login import current_user
+from sqlalchemy import case, cast, func, insert, literal, or_, select, tuple_, update
 
 from ..extensions import db
-from ..models import ActualizacionPrecio, Producto
+from ..models import ActualizacionPrecio, LoteActualizacionPrecio, Producto
+from ..utils.helpers import ahora_argentina
+from .lectura_service import FilaLectura
+
+# Productos con precio inválido listados en el mensaje de error
+MAX_ERRORES_MOSTRADOS = 20
+
+MUESTRA_POR_PAGINA = 50
+
+# Rangos de margen (venta sobre costo) para la distribución de la
+# previsualización: (etiqueta, límite superior como múltiplo del costo)
+RANGOS_MARGEN = (
+    ('Negativo', Decimal('1')),
+    ('0% a 20%', Decimal('1.2')),
+    ('20% a 40%', Decimal('1.4')),
+    ('40% a 60%', Decimal('1.6')),
+    ('60% o más', None),
+)
+SIN_COSTO = 'Sin costo'
+
+
+class FilaPrevisualizacion(FilaLectura):
+    """Producto de la muestra de la previsualización."""
+
+    __slots__ = (
+        'id',
+        'codigo',
+        'nombre',
+        'precio_costo_anterior',
+        'precio_costo_nuevo',
+        'precio_venta_anterior',
+        'precio_venta_nuevo',
+    )
 
+    @property
+    def diferencia_costo(self):
+        return self.precio_costo_nuevo - self.precio_costo_anterior
 
-def obtener_productos_por_categorias(categorias_ids):
-    """Retorna productos activos de la empresa filtrados por múltiples categorías.
+    @property
+    def diferencia_venta(self):
+        return self.precio_venta_nuevo - self.precio_venta_anterior
 
-    Args:
-        categorias_ids: lista de IDs de categorías seleccionadas.
 
-    Returns:
-        Lista de Producto activos que pertenecen a cualquiera de las categorías.
-    """
-    if not categorias_ids:
-        return []
-
-    query = (
-        Producto.query_empresa()
-        .filter(
-            Producto.activo.is_(True),
-            Producto.categoria_id.in_(categorias_ids),
-        )
-        .order_by(Producto.nombre)
-    )
-    return query.all()
+def _precio_ajustado(columna, factor):
+    """Expresión SQL del precio ajustado, redondeado a 2 decimales."""
+    return cast(func.round(columna * factor, 2), columna.type)
+
+
+def _ajuste(porcentaje, actualizar_costo):
+    """Expresiones SQL de venta nueva, costo nuevo y condición de precio inválido."""
+    factor = literal(Decimal('1') + Decimal(str(porcentaje)) / Decimal('100'), db.Numeric(12, 6))
+    venta_nueva = _precio_ajustado(Producto.precio_venta, factor)
+    if actualizar_costo:
+        costo_nuevo = _precio_ajustado(Producto.precio_costo, factor)
+        invalido = or_(venta_nueva <= 0, costo_nuevo < 0)
+    else:
+        costo_nuevo = Producto.precio_costo
+        invalido = venta_nueva <= 0
+    return venta_nueva, costo_nuevo, invalido
+
+
+def _filtro(categorias_ids):
+    return [
+        Producto.empresa_id == current_user.empresa_id,
+        Producto.activo.is_(True),
+        Producto.categoria_id.in_(categorias_ids),
+    ]
+
 
+def _decimal(valor):
+    # AVG devuelve float en SQLite y Decimal con muchos decimales en PostgreSQL
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(Decimal('0.01'))
 
-def previsualizar_actualizacion(productos, porcentaje, actualizar_costo=True):
-    """Calcula precios nuevos sin aplicar cambios.
+
+def resumen_actualizacion(categorias_ids, porcentaje, actualizar_costo=True):
+    """Estadísticas de la actualización calculadas en SQL, sin aplicar cambios.
 
     Args:
-        productos: lista de objetos Producto.
+        categorias_ids: lista de IDs de categorías seleccionadas.
         porcentaje: porcentaje de ajuste (positivo=aumento, negativo=descuento).
         actualizar_costo: si True, también se ajusta precio_costo.
 
     Returns:
-        Lista de dicts con datos de previsualización.
-
-    Raises:
-        ValueError: si algún precio resultante queda <= 0.
+        Dict con ``cantidad``, ``invalidos``, ``venta`` y ``costo`` (dicts
+        con min/promedio/max anterior y nuevo) y ``margenes`` (lista de
+        (rango, cantidad) del margen resultante).
     """
-    porcentaje_decimal = Decimal(str(porcentaje))
-    factor = Decimal('1') + porcentaje_decimal / Decimal('100')
-    dos_decimales = Decimal('0.01')
+    venta_nueva, costo_nuevo, invalido = _ajuste(porcentaje, actualizar_costo)
+    filtro = _filtro(categorias_ids)
+
+    fila = db.session.execute(
+        select(
+            func.count().label('cantidad'),
+            func.coalesce(func.sum(case((invalido, 1))), 0).label('invalidos'),
+            func.min(Producto.precio_venta).label('venta_min'),
+            func.avg(Producto.precio_venta).label('venta_promedio'),
+            func.max(Producto.precio_venta).label('venta_max'),
+            func.min(venta_nueva).label('venta_nueva_min'),
+            func.avg(venta_nueva).label('venta_nueva_promedio'),
+            func.max(venta_nueva).label('venta_nueva_max'),
+            func.min(Producto.precio_costo).label('costo_min'),
+            func.avg(Producto.precio_costo).label('costo_promedio'),
+            func.max(Producto.precio_costo).label('costo_max'),
+            func.min(costo_nuevo).label('costo_nuevo_min'),
+            func.avg(costo_nuevo).label('costo_nuevo_promedio'),
+            func.max(costo_nuevo).label('costo_nuevo_max'),
+        ).where(*filtro)
+    ).one()
+
+    # Margen resultante por rangos, comparando venta contra costo * límite
+    condiciones = [(costo_nuevo <= 0, SIN_COSTO)]
+    for etiqueta, limite in RANGOS_MARGEN[:-1]:
+        condiciones.append(
+            (venta_nueva < costo_nuevo * literal(limite, db.Numeric(4, 2)), etiqueta)
+        )
+    rango = case(*condiciones, else_=RANGOS_MARGEN[-1][0])
+    por_rango = dict(
+        db.session.execute(select(rango, func.count()).where(*filtro).group_by(rango)).all()
+    )
 
-    resultado = []
-    errores = []
+    def _estadisticas(prefijo, prefijo_nuevo):
+        return {
+            clave: (
+                _decimal(getattr(fila, f'{prefijo}_{clave}')),
+                _decimal(getattr(fila, f'{prefijo_nuevo}_{clave}')),
+            )
+            for clave in ('min', 'promedio', 'max')
+        }
 
-    for producto in productos:
-        precio_costo_anterior = producto.precio_costo or Decimal('0')
-        precio_venta_anterior = producto.precio_venta or Decimal('0')
+    return {
+        'cantidad': fila.cantidad,
+        'invalidos': fila.invalidos,
+        'venta': _estadisticas('venta', 'venta_nueva'),
+        'costo': _estadisticas('costo', 'costo_nuevo'),
+        'margenes': [
+            (etiqueta, por_rango.get(etiqueta, 0))
+            for etiqueta in (*(e for e, _ in RANGOS_MARGEN), SIN_COSTO)
+        ],
+    }
 
-        if actualizar_costo:
-            precio_costo_nuevo = (precio_costo_anterior * factor).quantize(
-                dos_decimales, rounding=ROUND_HALF_UP
-            )
-        else:
-            precio_costo_nuevo = precio_costo_anterior
 
-        precio_venta_nuevo = (precio_venta_anterior * factor).quantize(
-            dos_decimales, rounding=ROUND_HALF_UP
+def pagina_actualizacion(
+    categorias_ids, porcentaje, actualizar_costo=True, despues_id=None, limite=MUESTRA_POR_PAGINA
+):
+    """Página de la muestra de precios nuevos, ordenada por (nombre, id).
+
+    Usa paginación por clave: ``despues_id`` es el id del último producto
+    de la página anterior.
+
+    Returns:
+        Dict con 'productos' (FilaPrevisualizacion) y 'siguiente' (id para
+        la próxima página o None si es la última).
+    """
+    venta_nueva, costo_nuevo, _ = _ajuste(porcentaje, actualizar_costo)
+    filtro = _filtro(categorias_ids)
+    if despues_id:
+        nombre_ultimo = db.session.execute(
+            select(Producto.nombre).where(
+                Producto.id == despues_id, Producto.empresa_id == current_user.empresa_id
+            )
+        ).scalar()
+        if nombre_ultimo is not None:
+            filtro.append(tuple_(Producto.nombre, Producto.id) > (nombre_ultimo, despues_id))
+
+    filas = db.session.execute(
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Producto.precio_costo.label('precio_costo_anterior'),
+            costo_nuevo.label('precio_costo_nuevo'),
+            Producto.precio_venta.label('precio_venta_anterior'),
+            venta_nueva.label('precio_venta_nuevo'),
         )
+        .where(*filtro)
+        .order_by(Producto.nombre, Producto.id)
+        .limit(limite + 1)
+    ).all()
+
+    siguiente = filas[limite - 1].id if len(filas) > limite else None
+    return {
+        'productos': [FilaPrevisualizacion.desde_fila(fila) for fila in filas[:limite]],
+        'siguiente': siguiente,
+    }
 
-        # Validar que los precios no queden negativos o cero
-        if precio_venta_nuevo <= 0:
+
+def productos_invalidos(categorias_ids, porcentaje, actualizar_costo=True):
+    """Mensajes de los primeros productos que quedarían con precio inválido."""
+    venta_nueva, costo_nuevo, invalido = _ajuste(porcentaje, actualizar_costo)
+    errores = []
+    for nombre, codigo, venta, costo in db.session.execute(
+        select(Producto.nombre, Producto.codigo, venta_nueva, costo_nuevo)
+        .where(*_filtro(categorias_ids), invalido)
+        .order_by(Producto.nombre)
+        .limit(MAX_ERRORES_MOSTRADOS)
+    ):
+        if venta <= 0:
             errores.append(
-                f'El producto "{producto.nombre}" ({producto.codigo}) '
-                f'quedaría con precio de venta ${precio_venta_nuevo}.'
+                f'El producto "{nombre}" ({codigo}) quedaría con precio de venta ${venta}.'
             )
-        if actualizar_costo and precio_costo_nuevo < 0:
+        else:
             errores.append(
-                f'El producto "{producto.nombre}" ({producto.codigo}) '
-                f'quedaría con precio de costo ${precio_costo_nuevo}.'
+                f'El producto "{nombre}" ({codigo}) quedaría con precio de costo ${costo}.'
             )
-
-        resultado.append(
-            {
-                'producto': producto,
-                'precio_costo_anterior': precio_costo_anterior,
-                'precio_costo_nuevo': precio_costo_nuevo,
-                'precio_venta_anterior': precio_venta_anterior,
-                'precio_venta_nuevo': precio_venta_nuevo,
-                'diferencia_costo': precio_costo_nuevo - precio_costo_anterior,
-                'diferencia_venta': precio_venta_nuevo - precio_venta_anterior,
-            }
-        )
-
-    if errores:
-        raise ValueError(
-            'No se puede aplicar el porcentaje porque algunos productos '
-            'quedarían con precios inválidos:\n' + '\n'.join(errores)
-        )
-
-    return resultado
+    return errores
 
 
 def aplicar_actualizacion(categorias_ids, porcentaje, actualizar_costo=True, notas=None):
     """Aplica actualización masiva de precios.
 
+    Se ejecuta en SQL, por categoría: un ``INSERT ... SELECT`` con la
+    auditoría (precios anteriores y nuevos, asociados al lote de la
+    operación) y un ``UPDATE`` de los precios, todo en una transacción. Los
+    productos no se cargan en memoria.
+
     Args:
         categorias_ids: lista de IDs de categorías seleccionadas.
         porcentaje: porcentaje de ajuste.
@@ -115,41 +247,83 @@ def aplicar_actualizacion(categorias_ids, porcentaje, actualizar_costo=True, not
     Raises:
         ValueError: si no hay productos o si precios quedarían inválidos.
     """
-    productos = obtener_productos_por_categorias(categorias_ids)
-
-    if not productos:
-        raise ValueError('No hay productos activos en las categorías seleccionadas.')
+    categorias_ids = list(dict.fromkeys(categorias_ids or []))
+    porcentaje_decimal = Decimal(str(porcentaje))
+    empresa_id = current_user.empresa_id
+    venta_nueva, costo_nuevo, invalido = _ajuste(porcentaje_decimal, actualizar_costo)
+    filtro = [Producto.empresa_id == empresa_id, Producto.activo.is_(True)]
 
     # Validar precios antes de aplicar
-    preview = previsualizar_actualizacion(productos, porcentaje, actualizar_costo)
-
-    porcentaje_decimal = Decimal(str(porcentaje))
+    total, invalidos = db.session.execute(
+        select(func.count(), func.coalesce(func.sum(case((invalido, 1))), 0)).where(
+            *filtro, Producto.categoria_id.in_(categorias_ids)
+        )
+    ).one()
+    if not total:
+        raise ValueError('No hay productos activos en las categorías seleccionadas.')
+    if invalidos:
+        errores = productos_invalidos(categorias_ids, porcentaje, actualizar_costo)
+        if invalidos > len(errores):
+            errores.append(f'Y {invalidos - len(errores)} productos más.')
+        raise ValueError(
+            'No se puede aplicar el porcentaje porque algunos productos '
+            'quedarían con precios inválidos:\n' + '\n'.join(errores)
+        )
 
-    # Aplicar en transacción
-    for item in preview:
-        producto = item['producto']
-
-        # Registrar auditoría
-        registro = ActualizacionPrecio(
-            producto_id=producto.id,
-            usuario_id=current_user.id,
-            tipo='masiva',
-            porcentaje=porcentaje_decimal,
-            precio_costo_anterior=item['precio_costo_anterior'],
-            precio_costo_nuevo=item['precio_costo_nuevo'],
-            precio_venta_anterior=item['precio_venta_anterior'],
-            precio_venta_nuevo=item['precio_venta_nuevo'],
-            actualizo_costo=actualizar_costo,
-            categoria_id=categorias_ids[0] if categorias_ids else None,
-            notas=notas,
-            empresa_id=current_user.empresa_id,
+    ahora = ahora_argentina()
+    valores = {'precio_venta': venta_nueva, 'updated_at': ahora}
+    if actualizar_costo:
+        valores['precio_costo'] = costo_nuevo
+
+    lote = LoteActualizacionPrecio(
+        empresa_id=empresa_id,
+        usuario_id=current_user.id,
+        fecha=ahora,
+        tipo='masiva',
+        porcentaje=porcentaje_decimal,
+        actualizo_costo=actualizar_costo,
+        categorias_ids=json.dumps(categorias_ids),
+        notas=notas,
+    )
+    db.session.add(lote)
+    db.session.flush()
+
+    actualizados = 0
+    for categoria_id in categorias_ids:
+        filtro_categoria = [*filtro, Producto.categoria_id == categoria_id]
+
+        # Auditoría antes del UPDATE: el SELECT lee los precios anteriores
+        db.session.execute(
+            insert(ActualizacionPrecio).from_select(
+                [
+                    'lote_id',
+                    'producto_id',
+                    'fecha',
+                    'precio_costo_anterior',
+                    'precio_costo_nuevo',
+                    'precio_venta_anterior',
+                    'precio_venta_nuevo',
+                ],
+                select(
+                    literal(lote.id),
+                    Producto.id,
+                    literal(ahora),
+                    Producto.precio_costo,
+                    costo_nuevo,
+                    Producto.precio_venta,
+                    venta_nueva,
+                ).where(*filtro_categoria),
+            )
         )
-        db.session.add(registro)
 
-        # Actualizar precios del producto
-        producto.precio_venta = item['precio_venta_nuevo']
-        if actualizar_costo:
-            producto.precio_costo = item['precio_costo_nuevo']
+        resultado = db.session.execute(
+            update(Producto)
+            .where(*filtro_categoria)
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        actualizados += resultado.rowcount
 
+    lote.cantidad_productos = actualizados
     db.session.commit()
-    return len(preview)
+    return actualizados
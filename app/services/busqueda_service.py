@@ -0,0 +1,239 @@
+"""Búsqueda de productos por código, nombre y código de barras.
+
+Reemplaza los ``ILIKE '%q%'`` (un recorrido secuencial por empresa en cada
+tecla del POS) por un índice de texto:
+
+- PostgreSQL: índice GIN ``pg_trgm`` sobre ``productos_busqueda(codigo,
+  nombre, codigo_barras)``, una función IMMUTABLE que concatena, pasa a
+  minúsculas y quita acentos. Cada palabra de la búsqueda se filtra con
+  ``LIKE '%palabra%'``, que el índice de trigramas resuelve.
+- SQLite: tabla FTS5 ``productos_fts`` sincronizada por triggers, con
+  tokenizador ``unicode61 remove_diacritics 2``. Cada palabra se busca por
+  prefijo de palabra (``"palabra"*``), no como subcadena.
+
+En ambos casos la búsqueda ignora mayúsculas y acentos, y los resultados se
+ordenan con el código o código de barras exacto primero, luego los códigos
+que empiezan con la búsqueda, luego los nombres que empiezan con ella.
+
+El índice se crea en la migración 0014 y, para ``create_all``, con los DDL
+de ``models/producto.py``.
+
+Para el escaneo en el POS, ``resolver_codigo`` resuelve un código o código
+de barras exacto a una tarjeta compacta del producto en una sola query.
+"""
+
+import re
+import unicodedata
+
+from sqlalchemy import case, column, func, or_, select, text
+
+from ..extensions import db
+from ..models import Producto
+from ..utils.cache import CacheLRU
+from .lectura_service import FilaLectura
+
+# (empresa_id, código escaneado) -> id de producto
+_ids_por_codigo = CacheLRU(max_items=50000)
+
+
+def normalizar(texto):
+    """Pasa a minúsculas y quita acentos y diéresis ('Térmica' -> 'termica')."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _es_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _coincidencia_postgresql(normalizada):
+    expresion = func.productos_busqueda(Producto.codigo, Producto.nombre, Producto.codigo_barras)
+    return db.and_(
+        *(
+            expresion.like(f'%{_escapar_like(palabra)}%', escape='\\')
+            for palabra in normalizada.split()
+        )
+    )
+
+
+def _coincidencia_sqlite(normalizada):
+    palabras = re.findall(r'\w+', normalizada)
+    if not palabras:
+        return None
+    consulta_fts = ' '.join(f'"{palabra}"*' for palabra in palabras)
+    ids = (
+        text('SELECT rowid FROM productos_fts WHERE productos_fts MATCH :consulta_fts')
+        .bindparams(consulta_fts=consulta_fts)
+        .columns(column('rowid'))
+    )
+    return Producto.id.in_(ids)
+
+
+def filtro_productos(busqueda):
+    """
+    Condición de búsqueda para usar en ``filter()`` sobre ``Producto``.
+
+    Args:
+        busqueda: Texto ingresado por el usuario
+
+    Returns:
+        Expresión booleana de SQLAlchemy
+    """
+    busqueda = (busqueda or '').strip()
+    normalizada = normalizar(busqueda)
+    if _es_postgresql():
+        coincidencia = _coincidencia_postgresql(normalizada)
+    else:
+        coincidencia = _coincidencia_sqlite(normalizada)
+
+    # Código y código de barras exactos siempre coinciden (índices B-tree)
+    exactos = [Producto.codigo == busqueda, Producto.codigo_barras == busqueda]
+    if coincidencia is None:
+        return or_(*exactos)
+    return or_(coincidencia, *exactos)
+
+
+def orden_productos(busqueda):
+    """
+    Expresión de ranking para ``order_by()``: menor es más relevante.
+
+    0: código o código de barras exacto; 1: código que empieza con la
+    búsqueda; 2: nombre que empieza con la búsqueda; 3: el resto.
+    """
+    busqueda = (busqueda or '').strip()
+    normalizada = normalizar(busqueda)
+    prefijo = f'{_escapar_like(normalizada)}%'
+    if _es_postgresql():
+        nombre = func.lower(func.unaccent(Producto.nombre))
+    else:
+        nombre = func.lower(Producto.nombre)
+
+    return case(
+        (
+            or_(func.lower(Producto.codigo) == normalizada, Producto.codigo_barras == busqueda),
+            0,
+        ),
+        (func.lower(Producto.codigo).like(prefijo, escape='\\'), 1),
+        (nombre.like(prefijo, escape='\\'), 2),
+        else_=3,
+    )
+
+
+def buscar_productos(query, busqueda):
+    """
+    Aplica filtro y orden de relevancia a una query de ``Producto``.
+
+    Args:
+        query: Query de productos (ya filtrada por empresa)
+        busqueda: Texto ingresado por el usuario
+
+    Returns:
+        Query filtrada y ordenada por relevancia y nombre
+    """
+    return query.filter(filtro_productos(busqueda)).order_by(
+        orden_productos(busqueda), Producto.nombre
+    )
+
+
+# ─── Escaneo ─────────────────────────────────────────────────────────
+
+
+class FilaEscaneo(FilaLectura):
+    """Producto escaneado en el POS."""
+
+    __slots__ = (
+        'id',
+        'codigo',
+        'codigo_barras',
+        'nombre',
+        'unidad_medida',
+        'precio_venta',
+        'iva_porcentaje',
+        'stock_actual',
+    )
+
+    unidad_medida_display = Producto.unidad_medida_display
+
+    def tarjeta(self):
+        """Datos que usa el POS para agregar la línea."""
+        return {
+            'id': self.id,
+            'codigo': self.codigo,
+            'codigo_barras': self.codigo_barras,
+            'nombre': self.nombre,
+            'unidad_medida': self.unidad_medida,
+            'unidad_medida_display': self.unidad_medida_display,
+            'precio_venta': float(self.precio_venta or 0),
+            'iva_porcentaje': float(self.iva_porcentaje or 21),
+            'stock_actual': float(self.stock_actual or 0),
+        }
+
+
+def _fila_escaneo(empresa_id, condicion, orden=None):
+    fila = db.session.execute(
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.codigo_barras,
+            Producto.nombre,
+            Producto.unidad_medida,
+            Producto.precio_venta,
+            Producto.iva_porcentaje,
+            Producto.stock_actual,
+        )
+        .where(Producto.empresa_id == empresa_id, Producto.activo.is_(True), condicion)
+        .order_by(orden)
+        .limit(1)
+    ).first()
+    return FilaEscaneo.desde_fila(fila) if fila is not None else None
+
+
+def resolver_codigo(empresa_id, codigo):
+    """
+    Resuelve un código o código de barras escaneado a la tarjeta del producto.
+
+    El cache guarda solo código -> id; precio y stock se leen siempre por
+    clave primaria. Una entrada vieja (el código pasó a otro producto o el
+    producto se desactivó) se detecta al leer y se vuelve a resolver, por lo
+    que el cache de cada proceso es correcto aunque otro proceso edite.
+
+    Args:
+        empresa_id: ID de la empresa
+        codigo: Código o código de barras exacto
+
+    Returns:
+        Dict con id, código, nombre, unidad, precio, IVA y stock, o None
+    """
+    codigo = (codigo or '').strip()
+    if not codigo:
+        return None
+
+    clave = (empresa_id, codigo)
+    producto_id = _ids_por_codigo.get(clave)
+    if producto_id is not None:
+        fila = _fila_escaneo(empresa_id, Producto.id == producto_id)
+        if fila is not None and codigo in (fila.codigo, fila.codigo_barras):
+            return fila.tarjeta()
+        _ids_por_codigo.descartar(clave)
+
+    fila = _fila_escaneo(
+        empresa_id,
+        or_(Producto.codigo_barras == codigo, Producto.codigo == codigo),
+        # Si el código de un producto es el código de barras de otro, gana el de barras
+        orden=case((Producto.codigo_barras == codigo, 0), else_=1),
+    )
+    if fila is None:
+        return None
+    _ids_por_codigo.set(clave, fila.id)
+    return fila.tarjeta()
+
+
+def olvidar_codigos(empresa_id, *codigos):
+    """Descarta del cache de escaneo los códigos de un producto editado."""
+    for codigo in codigos:
+        if codigo:
+            _ids_por_codigo.descartar((empresa_id, codigo))
@@ -0,0 +1,100 @@
+"""Sincronización incremental del catálogo de productos para el POS.
+
+El POS guarda una copia local del catálogo (IndexedDB, ver
+``static/js/app.js``) y busca sobre ella sin ir al servidor en cada tecla.
+Para mantenerla al día pide solo los productos modificados desde su último
+cursor ``(updated_at, id)``, en páginas, con el índice
+``ix_productos_empresa_actualizado``.
+
+Toda escritura de precio o stock debe actualizar ``updated_at``: el
+``onupdate`` del modelo lo hace en los flushes del ORM, pero los UPDATE en
+bloque (Core) tienen que setearlo explícitamente.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import select, tuple_
+
+from ..extensions import db
+from ..models import Producto
+from ..utils.helpers import ahora_argentina
+from ..utils.paginacion import codificar_cursor, decodificar_cursor
+from .busqueda_service import FilaEscaneo
+
+LIMITE_POR_DEFECTO = 1000
+LIMITE_MAXIMO = 5000
+
+# Una transacción puede confirmar filas con un updated_at anterior al último
+# visto por el cliente. El cursor final nunca pasa de ``ahora - margen``: las
+# filas modificadas en ese margen se reenvían (el upsert es idempotente).
+MARGEN_SOLAPAMIENTO = timedelta(minutes=2)
+
+
+class FilaCatalogo(FilaEscaneo):
+    """Producto de la copia local del catálogo."""
+
+    __slots__ = ('activo', 'updated_at')
+
+    def tarjeta(self):
+        return {**super().tarjeta(), 'activo': self.activo}
+
+
+def cambios_catalogo(empresa_id, desde=None, limite=LIMITE_POR_DEFECTO):
+    """
+    Productos modificados después del cursor ``desde``.
+
+    Incluye los productos desactivados (``activo: false``) para que el
+    cliente los borre de su copia.
+
+    Args:
+        empresa_id: ID de la empresa
+        desde: Cursor de la sincronización anterior (None: catálogo completo)
+        limite: Cantidad máxima de productos por página
+
+    Returns:
+        Dict con ``productos`` (tarjetas), ``cursor`` para el próximo pedido
+        y ``completo`` (False si quedan páginas por pedir)
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    posicion = decodificar_cursor(desde) if desde else None
+
+    consulta = select(
+        Producto.id,
+        Producto.codigo,
+        Producto.codigo_barras,
+        Producto.nombre,
+        Producto.unidad_medida,
+        Producto.precio_venta,
+        Producto.iva_porcentaje,
+        Producto.stock_actual,
+        Producto.activo,
+        Producto.updated_at,
+    ).where(Producto.empresa_id == empresa_id)
+    if posicion is not None:
+        consulta = consulta.where(tuple_(Producto.updated_at, Producto.id) > tuple_(*posicion))
+
+    filas = [
+        FilaCatalogo.desde_fila(fila)
+        for fila in db.session.execute(
+            consulta.order_by(Producto.updated_at, Producto.id).limit(limite + 1)
+        )
+    ]
+    completo = len(filas) <= limite
+    filas = filas[:limite]
+
+    if not filas:
+        cursor = desde if posicion is not None else None
+    elif not completo:
+        cursor = codificar_cursor(filas[-1].updated_at, filas[-1].id)
+    else:
+        limite_seguro = ahora_argentina() - MARGEN_SOLAPAMIENTO
+        if filas[-1].updated_at <= limite_seguro:
+            cursor = codificar_cursor(filas[-1].updated_at, filas[-1].id)
+        else:
+            cursor = codificar_cursor(limite_seguro, 0)
+
+    return {
+        'productos': [fila.tarjeta() for fila in filas],
+        'cursor': cursor,
+        'completo': completo,
+    }
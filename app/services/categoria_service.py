@@ -0,0 +1,163 @@
+"""Árbol de categorías de la empresa con cantidades de productos.
+
+El árbol completo se arma con dos consultas (categorías y un conteo de
+productos agrupado por categoría) y se cachea por empresa en memoria del
+proceso. La clave incluye la versión de categorías de ``VersionDatos``, que
+incrementan solo las escrituras que cambian el árbol o sus cantidades (altas
+de productos, cambios de categoría o de estado activo y el ABM de
+categorías): los movimientos de stock y los cambios de precio no lo
+invalidan. Como la versión vive en la base, el incremento invalida el árbol
+en todos los procesos.
+"""
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from ..extensions import db
+from ..models import Categoria, Producto, VersionDatos
+
+
+class NodoCategoria:
+    """Categoría del árbol cacheado, con la misma interfaz que usan las vistas."""
+
+    __slots__ = (
+        'id',
+        'nombre',
+        'descripcion',
+        'padre_id',
+        'activa',
+        'ruta',
+        'padre',
+        'subcategorias',
+        'cantidad_productos',
+        'cantidad_productos_propios',
+    )
+
+    def __init__(self, fila, activos, total):
+        self.id = fila.id
+        self.nombre = fila.nombre
+        self.descripcion = fila.descripcion
+        self.padre_id = fila.padre_id
+        self.activa = fila.activa
+        self.ruta = fila.ruta
+        self.padre = None
+        self.subcategorias = []
+        # Productos activos de la categoría (sin subcategorías)
+        self.cantidad_productos = activos
+        # Productos de la categoría, activos o no
+        self.cantidad_productos_propios = total
+
+    def __repr__(self):
+        return f'<NodoCategoria {self.nombre}>'
+
+    @property
+    def es_padre(self):
+        return self.padre_id is None
+
+    @property
+    def nombre_completo(self):
+        if self.padre:
+            return f'{self.padre.nombre} > {self.nombre}'
+        return self.nombre
+
+    def descendientes(self):
+        """La categoría y todo su subárbol."""
+        nodos = [self]
+        for subcategoria in self.subcategorias:
+            nodos.extend(subcategoria.descendientes())
+        return nodos
+
+    @property
+    def cantidad_productos_total(self):
+        """Productos activos incluyendo subcategorías."""
+        return sum(nodo.cantidad_productos for nodo in self.descendientes())
+
+    @property
+    def tiene_productos(self):
+        return self.cantidad_productos_propios > 0
+
+    @property
+    def puede_eliminarse(self):
+        return not any(nodo.tiene_productos for nodo in self.descendientes())
+
+
+class ArbolCategorias:
+    """Categorías de una empresa indexadas por id, con las raíces ordenadas."""
+
+    def __init__(self, nodos):
+        self.nodos = {nodo.id: nodo for nodo in nodos}
+        self.raices = []
+        for nodo in nodos:
+            padre = self.nodos.get(nodo.padre_id)
+            if padre is None:
+                self.raices.append(nodo)
+            else:
+                nodo.padre = padre
+                padre.subcategorias.append(nodo)
+
+    @property
+    def raices_activas(self):
+        return [raiz for raiz in self.raices if raiz.activa]
+
+    def get(self, categoria_id):
+        return self.nodos.get(categoria_id)
+
+    def nombre_completo(self, categoria_id):
+        nodo = self.nodos.get(categoria_id)
+        return nodo.nombre_completo if nodo else None
+
+    def ids_subarbol(self, categoria_id):
+        """Ids de la categoría y sus descendientes (lista vacía si no existe)."""
+        nodo = self.nodos.get(categoria_id)
+        return [n.id for n in nodo.descendientes()] if nodo else []
+
+
+def invalidar_arbol(empresa_id):
+    """Incrementa la versión del árbol de categorías de la empresa (sin commit)."""
+    VersionDatos.incrementar(empresa_id, VersionDatos.PERIODO_CATEGORIAS)
+
+
+def _version(empresa_id):
+    periodo = VersionDatos.PERIODO_CATEGORIAS
+    return VersionDatos.version_rango(empresa_id, periodo, periodo)
+
+
+def _calcular_arbol(empresa_id):
+    conteos = {
+        fila.categoria_id: (fila.activos, fila.total)
+        for fila in db.session.execute(
+            select(
+                Producto.categoria_id,
+                func.coalesce(func.sum(case((Producto.activo.is_(True), 1))), 0).label('activos'),
+                func.count().label('total'),
+            )
+            .where(Producto.empresa_id == empresa_id, Producto.categoria_id.isnot(None))
+            .group_by(Producto.categoria_id)
+        )
+    }
+    filas = db.session.execute(
+        select(
+            Categoria.id,
+            Categoria.nombre,
+            Categoria.descripcion,
+            Categoria.padre_id,
+            Categoria.activa,
+            Categoria.ruta,
+        )
+        .where(Categoria.empresa_id == empresa_id)
+        .order_by(Categoria.nombre)
+    )
+    return ArbolCategorias([NodoCategoria(fila, *conteos.get(fila.id, (0, 0))) for fila in filas])
+
+
+def arbol_categorias(empresa_id):
+    """
+    Árbol de categorías de la empresa, servido desde cache mientras no cambie.
+
+    Returns:
+        ArbolCategorias (compartido entre requests: no modificar)
+    """
+    clave = ('categorias', empresa_id, _version(empresa_id))
+    return current_app.extensions['cache_categorias'].obtener_o_calcular(
+        clave, lambda: _calcular_arbol(empresa_id)
+    )
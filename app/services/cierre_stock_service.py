@@ -0,0 +1,407 @@
+"""Cierres de stock: stock y costo de cada producto al final de un día.
+
+Un cierre es una foto del inventario (una fila por producto, con el costo
+vigente ese día) que se genera en bloque con un ``INSERT ... SELECT``. El
+stock a una fecha cualquiera se reconstruye desde la base más cercana:
+
+- un cierre anterior, sumando los movimientos posteriores al cierre;
+- un cierre posterior, restando los movimientos posteriores a la fecha;
+- el stock actual, restando los movimientos posteriores a la fecha.
+
+Cada camino suma solo los movimientos entre la base y la fecha (por el
+índice de ``movimientos_stock.created_at``), así que el costo de la
+consulta depende de la distancia al cierre más cercano y no del largo del
+historial. Los productos dados de alta después de un cierre anterior no
+figuran en él: para esos se parte del stock actual (el stock inicial del
+alta no genera movimiento).
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    case,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+
+from ..extensions import db
+from ..models import CierreStock, MovimientoStock, Producto
+from ..utils.helpers import ahora_argentina
+from .costo_service import costo_inventario_a_fecha
+from .lectura_service import FilaLectura
+
+PERIODOS = ('diario', 'mensual')
+
+# Meses que muestra la serie de valuaciones de fin de mes
+MESES_POR_DEFECTO = 12
+
+
+class ValuacionCierre(FilaLectura):
+    """Valuación del inventario a una fecha."""
+
+    __slots__ = ('fecha', 'cantidad_productos', 'unidades', 'valor_costo')
+
+
+def _fin_del_dia(fecha):
+    return datetime.combine(fecha, time.max)
+
+
+def _fin_de_mes(fecha):
+    siguiente = (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return siguiente - timedelta(days=1)
+
+
+def fechas_de_cierre(periodo, desde, hasta):
+    """
+    Fechas de cierre de un período entre ``desde`` y ``hasta`` inclusive.
+
+    Args:
+        periodo: 'diario' (todos los días) o 'mensual' (fines de mes)
+
+    Returns:
+        Lista de ``date`` en orden ascendente
+    """
+    if periodo not in PERIODOS:
+        raise ValueError('El período de cierre no es válido.')
+
+    fechas = []
+    fecha = desde if periodo == 'diario' else _fin_de_mes(desde)
+    while fecha <= hasta:
+        fechas.append(fecha)
+        if periodo == 'diario':
+            fecha += timedelta(days=1)
+        else:
+            fecha = _fin_de_mes(fecha + timedelta(days=1))
+    return fechas
+
+
+def ultimo_cierre_posible(periodo, hoy=None):
+    """Última fecha cerrada del período: ayer o el fin del mes anterior."""
+    hoy = hoy or ahora_argentina().date()
+    if periodo == 'diario':
+        return hoy - timedelta(days=1)
+    return hoy.replace(day=1) - timedelta(days=1)
+
+
+def _existe(fin):
+    """Productos dados de alta hasta ``fin``."""
+    return or_(Producto.created_at.is_(None), Producto.created_at <= fin)
+
+
+def _suma_movimientos(empresa_id, desde=None, hasta=None):
+    """Cantidad neta movida por producto en el intervalo (desde, hasta]."""
+    filtros = [MovimientoStock.empresa_id == empresa_id]
+    if desde is not None:
+        filtros.append(MovimientoStock.created_at > desde)
+    if hasta is not None:
+        filtros.append(MovimientoStock.created_at <= hasta)
+    return (
+        select(
+            MovimientoStock.producto_id,
+            func.sum(MovimientoStock.cantidad).label('cantidad'),
+        )
+        .where(*filtros)
+        .group_by(MovimientoStock.producto_id)
+        .subquery()
+    )
+
+
+def _stock(expresion):
+    # SQLite acumula en punto flotante: se redondea a la escala de la columna
+    return func.round(expresion, 3).label('stock')
+
+
+def _desde_actual(empresa_id, fin):
+    """Stock actual menos lo movido después de ``fin``."""
+    movimientos = _suma_movimientos(empresa_id, desde=fin)
+    return (
+        select(
+            Producto.id.label('producto_id'),
+            _stock(Producto.stock_actual - func.coalesce(movimientos.c.cantidad, 0)),
+        )
+        .outerjoin(movimientos, movimientos.c.producto_id == Producto.id)
+        .where(Producto.empresa_id == empresa_id, _existe(fin))
+    )
+
+
+def _desde_cierre_anterior(empresa_id, cierre, fin):
+    """Cierre anterior más lo movido entre el cierre y ``fin``."""
+    movimientos = _suma_movimientos(empresa_id, _fin_del_dia(cierre), fin)
+    desde_cierre = (
+        select(
+            CierreStock.producto_id,
+            _stock(CierreStock.stock + func.coalesce(movimientos.c.cantidad, 0)),
+        )
+        .outerjoin(movimientos, movimientos.c.producto_id == CierreStock.producto_id)
+        .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha == cierre)
+    )
+
+    # Altas posteriores al cierre: pocos productos y pocos movimientos cada
+    # uno, por el índice de producto_id
+    posteriores = (
+        select(func.sum(MovimientoStock.cantidad))
+        .where(MovimientoStock.producto_id == Producto.id, MovimientoStock.created_at > fin)
+        .scalar_subquery()
+    )
+    altas = select(
+        Producto.id.label('producto_id'),
+        _stock(Producto.stock_actual - func.coalesce(posteriores, 0)),
+    ).where(
+        Producto.empresa_id == empresa_id,
+        _existe(fin),
+        ~exists().where(CierreStock.producto_id == Producto.id, CierreStock.fecha == cierre),
+    )
+    return union_all(desde_cierre, altas)
+
+
+def _desde_cierre_posterior(empresa_id, cierre, fin):
+    """Cierre posterior menos lo movido entre ``fin`` y el cierre."""
+    movimientos = _suma_movimientos(empresa_id, fin, _fin_del_dia(cierre))
+    return (
+        select(
+            CierreStock.producto_id,
+            _stock(CierreStock.stock - func.coalesce(movimientos.c.cantidad, 0)),
+        )
+        .join(Producto, Producto.id == CierreStock.producto_id)
+        .outerjoin(movimientos, movimientos.c.producto_id == CierreStock.producto_id)
+        .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha == cierre, _existe(fin))
+    )
+
+
+def _cierres_vecinos(empresa_id, fecha):
+    """Fechas del último cierre hasta ``fecha`` y del primero posterior."""
+    return db.session.execute(
+        select(
+            select(func.max(CierreStock.fecha))
+            .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha <= fecha)
+            .scalar_subquery(),
+            select(func.min(CierreStock.fecha))
+            .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha > fecha)
+            .scalar_subquery(),
+        )
+    ).one()
+
+
+def consulta_stock_a_fecha(empresa_id, fecha, hoy=None):
+    """
+    Consulta de (producto_id, stock) al final del día ``fecha``.
+
+    Elige como base el cierre o el stock actual más cercano en días, así
+    que solo recorre los movimientos entre la base y la fecha.
+
+    Returns:
+        Select con una fila por producto existente a esa fecha
+    """
+    anterior, posterior = _cierres_vecinos(empresa_id, fecha)
+    return _consulta_stock(empresa_id, fecha, anterior, posterior, hoy)
+
+
+def _consulta_stock(empresa_id, fecha, anterior, posterior, hoy=None):
+    hoy = hoy or ahora_argentina().date()
+    fin = _fin_del_dia(fecha)
+    # (distancia en días, preferencia, consulta)
+    opciones = [((hoy - fecha).days, 2, lambda: _desde_actual(empresa_id, fin))]
+    if anterior is not None:
+        opciones.append(
+            ((fecha - anterior).days, 0, lambda: _desde_cierre_anterior(empresa_id, anterior, fin))
+        )
+    if posterior is not None:
+        opciones.append(
+            (
+                (posterior - fecha).days,
+                1,
+                lambda: _desde_cierre_posterior(empresa_id, posterior, fin),
+            )
+        )
+    return min(opciones, key=lambda opcion: opcion[:2])[2]()
+
+
+def stock_a_fecha(empresa_id, fecha, producto_ids=None):
+    """
+    Stock de los productos al final del día ``fecha``.
+
+    Args:
+        producto_ids: ids a consultar (todos los productos si es None)
+
+    Returns:
+        Dict {producto_id: stock}; los productos que aún no existían se omiten
+    """
+    stock = consulta_stock_a_fecha(empresa_id, fecha).subquery('stock')
+    consulta = select(stock.c.producto_id, stock.c.stock)
+    if producto_ids is not None:
+        consulta = consulta.where(stock.c.producto_id.in_(producto_ids))
+    return {fila.producto_id: fila.stock for fila in db.session.execute(consulta)}
+
+
+def _filas_a_fecha(empresa_id, fecha):
+    """(producto_id, stock, precio_costo) a la fecha: del cierre si existe."""
+    anterior, posterior = _cierres_vecinos(empresa_id, fecha)
+    if anterior == fecha:
+        return (
+            select(
+                CierreStock.producto_id,
+                CierreStock.stock,
+                CierreStock.precio_costo,
+            )
+            .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha == fecha)
+            .subquery('filas')
+        )
+
+    stock = _consulta_stock(empresa_id, fecha, anterior, posterior).subquery('stock')
+    return (
+        select(
+            stock.c.producto_id,
+            stock.c.stock,
+            costo_inventario_a_fecha(fecha).label('precio_costo'),
+        )
+        .join(Producto, Producto.id == stock.c.producto_id)
+        .subquery('filas')
+    )
+
+
+def generar_cierre(empresa_id, fecha):
+    """
+    Genera (o regenera) el cierre de stock de un día, en una transacción.
+
+    Returns:
+        Cantidad de productos del cierre
+
+    Raises:
+        ValueError: si la fecha no es anterior a hoy
+    """
+    if not isinstance(fecha, date) or isinstance(fecha, datetime):
+        raise ValueError('La fecha no es válida.')
+    if fecha >= ahora_argentina().date():
+        raise ValueError('Solo se pueden cerrar días anteriores a hoy.')
+
+    try:
+        db.session.execute(
+            delete(CierreStock).where(
+                CierreStock.empresa_id == empresa_id, CierreStock.fecha == fecha
+            )
+        )
+        filas = _filas_a_fecha(empresa_id, fecha)
+        db.session.execute(
+            insert(CierreStock).from_select(
+                ['empresa_id', 'producto_id', 'fecha', 'stock', 'precio_costo', 'created_at'],
+                select(
+                    literal(empresa_id),
+                    filas.c.producto_id,
+                    literal(fecha, Date),
+                    filas.c.stock,
+                    filas.c.precio_costo,
+                    literal(ahora_argentina(), DateTime),
+                ),
+            )
+        )
+        cantidad = db.session.scalar(
+            select(func.count(CierreStock.id)).where(
+                CierreStock.empresa_id == empresa_id, CierreStock.fecha == fecha
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return cantidad
+
+
+def generar_cierres(empresa_id, periodo, desde, hasta, regenerar=False):
+    """
+    Genera los cierres de un período en orden ascendente.
+
+    Cada cierre parte del anterior recién generado, así que solo el primero
+    recorre movimientos más allá de un período. Sin ``regenerar``, las
+    fechas que ya tienen cierre se saltean.
+
+    Returns:
+        Lista de (fecha, cantidad de productos) de los cierres generados
+    """
+    existentes = set()
+    if not regenerar:
+        existentes = set(
+            db.session.scalars(
+                select(CierreStock.fecha)
+                .where(
+                    CierreStock.empresa_id == empresa_id,
+                    CierreStock.fecha >= desde,
+                    CierreStock.fecha <= hasta,
+                )
+                .distinct()
+            )
+        )
+    return [
+        (fecha, generar_cierre(empresa_id, fecha))
+        for fecha in fechas_de_cierre(periodo, desde, hasta)
+        if fecha not in existentes
+    ]
+
+
+def valuacion_a_fecha(empresa_id, fecha, categoria_ids=None):
+    """
+    Valuación a costo del inventario al final del día ``fecha``.
+
+    Lee el cierre de esa fecha si existe; si no, reconstruye el stock desde
+    la base más cercana y lo valúa con el costo histórico.
+
+    Returns:
+        ValuacionCierre
+    """
+    filas = _filas_a_fecha(empresa_id, fecha)
+    consulta = select(
+        func.count(case((filas.c.stock != 0, 1))),
+        func.coalesce(func.sum(filas.c.stock), 0),
+        func.coalesce(func.sum(filas.c.stock * filas.c.precio_costo), 0),
+    )
+    if categoria_ids:
+        consulta = consulta.join(Producto, Producto.id == filas.c.producto_id).where(
+            Producto.categoria_id.in_(categoria_ids)
+        )
+    else:
+        consulta = consulta.select_from(filas)
+    cantidad, unidades, valor = db.session.execute(consulta).one()
+    return ValuacionCierre(
+        fecha=fecha, cantidad_productos=cantidad, unidades=unidades, valor_costo=valor
+    )
+
+
+def valuaciones_mensuales(empresa_id, hasta, meses=MESES_POR_DEFECTO):
+    """
+    Valuación de fin de mes de los últimos ``meses`` hasta ``hasta``.
+
+    Solo lee cierres: un agregado por fecha sobre ``cierres_stock``.
+
+    Returns:
+        Lista de (fecha, ValuacionCierre o None si el mes no tiene cierre),
+        del mes más reciente al más antiguo
+    """
+    fechas = []
+    fecha = _fin_de_mes(hasta)
+    if fecha > hasta:
+        fecha = hasta.replace(day=1) - timedelta(days=1)
+    for _ in range(meses):
+        fechas.append(fecha)
+        fecha = fecha.replace(day=1) - timedelta(days=1)
+
+    valuaciones = {
+        fila.fecha: ValuacionCierre.desde_fila(fila)
+        for fila in db.session.execute(
+            select(
+                CierreStock.fecha,
+                func.count(case((CierreStock.stock != 0, 1))).label('cantidad_productos'),
+                func.sum(CierreStock.stock).label('unidades'),
+                func.sum(CierreStock.stock * CierreStock.precio_costo).label('valor_costo'),
+            )
+            .where(CierreStock.empresa_id == empresa_id, CierreStock.fecha.in_(fechas))
+            .group_by(CierreStock.fecha)
+        )
+    }
+    return [(fecha, valuaciones.get(fecha)) for fecha in fechas]
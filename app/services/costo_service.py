@@ -0,0 +1,192 @@
+"""Costo promedio ponderado de los productos.
+
+Cada recepción de mercadería recalcula el costo promedio del producto con el
+precio unitario de la orden de compra::
+
+    (stock anterior × promedio anterior + cantidad × precio) / (stock anterior + cantidad)
+
+El promedio resultante se guarda en el producto y en el movimiento de
+compra. Como solo las compras lo modifican, el costo promedio a una fecha es
+el del último movimiento de compra hasta esa fecha. ``precio_costo`` sigue
+siendo el costo de reposición (márgenes, listas de precios) y la valuación
+del inventario usa el promedio cuando existe.
+
+``recalcular_costos`` reconstruye los promedios reproduciendo el historial de
+compras por lotes de productos: una consulta por lote, el cálculo en memoria
+y las escrituras con ``executemany`` por clave primaria.
+"""
+
+from datetime import date, datetime, time
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import aliased
+
+from ..extensions import db
+from ..models import MovimientoStock, Producto
+from ..utils.helpers import ahora_argentina
+from . import historial_precio_service
+
+CENTAVOS = Decimal('0.01')
+
+# Productos por lote del recálculo (cada lote se confirma por separado)
+PRODUCTOS_POR_LOTE = 500
+
+
+def promedio_ponderado(stock_anterior, costo_anterior, cantidad, costo_unitario):
+    """
+    Costo promedio después de recibir ``cantidad`` a ``costo_unitario``.
+
+    El stock negativo no aporta costo: si no había stock (o no había
+    costo, vacío o cero), el promedio es el precio de la compra.
+    """
+    base = max(Decimal(str(stock_anterior or 0)), Decimal('0'))
+    cantidad = Decimal(str(cantidad))
+    costo_unitario = Decimal(str(costo_unitario))
+    if costo_anterior is None or costo_anterior <= 0 or base == 0:
+        return costo_unitario.quantize(CENTAVOS, ROUND_HALF_UP)
+    total = base * Decimal(str(costo_anterior)) + cantidad * costo_unitario
+    return (total / (base + cantidad)).quantize(CENTAVOS, ROUND_HALF_UP)
+
+
+def registrar_compra(producto, movimiento, costo_unitario):
+    """
+    Actualiza el costo promedio con una recepción (sin commit).
+
+    Las líneas sin precio (vacío o cero) no modifican el promedio.
+
+    Returns:
+        El nuevo costo promedio, o None si no se actualizó
+    """
+    if not costo_unitario or costo_unitario <= 0:
+        return None
+    producto.costo_promedio = promedio_ponderado(
+        movimiento.stock_anterior,
+        producto.costo_valuacion,
+        movimiento.cantidad,
+        costo_unitario,
+    )
+    movimiento.costo_unitario = costo_unitario
+    movimiento.costo_promedio = producto.costo_promedio
+    return producto.costo_promedio
+
+
+def costo_promedio_a_fecha(fecha, producto_id=Producto.id):
+    """Expresión del costo promedio a una fecha: el de la última compra hasta entonces."""
+    if isinstance(fecha, date) and not isinstance(fecha, datetime):
+        fecha = datetime.combine(fecha, time.max)
+    compra = aliased(MovimientoStock)
+    return (
+        select(compra.costo_promedio)
+        .where(
+            compra.producto_id == producto_id,
+            compra.created_at <= fecha,
+            compra.costo_promedio.isnot(None),
+        )
+        .order_by(compra.created_at.desc(), compra.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def costo_inventario_a_fecha(fecha, producto_id=Producto.id):
+    """
+    Expresión del costo de valuación a una fecha.
+
+    El costo promedio si el producto ya tenía compras; si no, el costo del
+    historial de precios. ``fecha`` puede ser un valor o una columna y la
+    consulta externa debe incluir ``productos``.
+    """
+    return func.coalesce(
+        costo_promedio_a_fecha(fecha, producto_id),
+        historial_precio_service.costo_a_fecha(fecha, producto_id),
+    )
+
+
+def _recalcular_lote(empresa_id, producto_ids):
+    """Reproduce las compras de un lote de productos; retorna los productos modificados."""
+    compras = db.session.execute(
+        select(
+            MovimientoStock.id,
+            MovimientoStock.producto_id,
+            MovimientoStock.created_at,
+            MovimientoStock.cantidad,
+            MovimientoStock.stock_anterior,
+            MovimientoStock.costo_unitario,
+            MovimientoStock.costo_promedio,
+        )
+        .where(
+            MovimientoStock.empresa_id == empresa_id,
+            MovimientoStock.producto_id.in_(producto_ids),
+            MovimientoStock.tipo == 'compra',
+            MovimientoStock.costo_unitario > 0,
+        )
+        .order_by(MovimientoStock.producto_id, MovimientoStock.created_at, MovimientoStock.id)
+    ).all()
+
+    # Costo de cada producto antes de su primera compra, del historial de precios
+    primeras = {}
+    for compra in compras:
+        primeras.setdefault(compra.producto_id, compra.created_at)
+    iniciales = historial_precio_service.precios_a_fecha(empresa_id, primeras.items())
+
+    promedios = {}
+    movimientos = []
+    for compra in compras:
+        if compra.producto_id in promedios:
+            anterior = promedios[compra.producto_id]
+        else:
+            inicial = iniciales.get((compra.producto_id, compra.created_at))
+            anterior = inicial.precio_costo if inicial else None
+        promedio = promedio_ponderado(
+            compra.stock_anterior, anterior, compra.cantidad, compra.costo_unitario
+        )
+        promedios[compra.producto_id] = promedio
+        if compra.costo_promedio != promedio:
+            movimientos.append({'id': compra.id, 'costo_promedio': promedio})
+
+    ahora = ahora_argentina()
+    productos = [
+        {'id': fila.id, 'costo_promedio': promedios.get(fila.id), 'updated_at': ahora}
+        for fila in db.session.execute(
+            select(Producto.id, Producto.costo_promedio).where(Producto.id.in_(producto_ids))
+        )
+        if fila.costo_promedio != promedios.get(fila.id)
+    ]
+
+    if movimientos:
+        db.session.execute(update(MovimientoStock), movimientos)
+    if productos:
+        db.session.execute(update(Producto), productos)
+    return len(productos)
+
+
+def recalcular_costos(empresa_id, tamanio_lote=PRODUCTOS_POR_LOTE):
+    """
+    Recalcula el costo promedio de todos los productos desde el historial de compras.
+
+    Recorre los productos por id en lotes de ``tamanio_lote``; cada lote se
+    confirma en su propia transacción, así una corrida interrumpida deja los
+    lotes anteriores completos.
+
+    Returns:
+        Cantidad de productos cuyo costo promedio cambió
+    """
+    modificados = 0
+    ultimo_id = 0
+    while True:
+        producto_ids = db.session.scalars(
+            select(Producto.id)
+            .where(Producto.empresa_id == empresa_id, Producto.id > ultimo_id)
+            .order_by(Producto.id)
+            .limit(tamanio_lote)
+        ).all()
+        if not producto_ids:
+            return modificados
+        ultimo_id = producto_ids[-1]
+        try:
+            modificados += _recalcular_lote(empresa_id, producto_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,260 @@
+"""Definiciones de exportación: consulta proyectada y columnas por listado.
+
+Cada función retorna ``(consulta, columnas)`` para ``utils.exportacion.exportar``.
+Las consultas traen solo las columnas necesarias, con los datos relacionados
+resueltos por JOIN, para no cargar entidades ORM ni disparar lazy loads por fila.
+"""
+
+from sqlalchemy import func, literal, select
+
+from ..extensions import db
+from ..models import (
+    Categoria,
+    Cliente,
+    MovimientoCuentaCorriente,
+    MovimientoStock,
+    Producto,
+    Proveedor,
+    Usuario,
+    Venta,
+)
+from . import busqueda_service, kardex_service
+
+ESTADO_VENTA_LABELS = {'completada': 'Completada', 'anulada': 'Anulada'}
+
+TIPO_MOVIMIENTO_STOCK_LABELS = {
+    'venta': 'Venta',
+    'compra': 'Compra',
+    'ajuste_positivo': 'Ajuste (+)',
+    'ajuste_negativo': 'Ajuste (-)',
+    'devolucion': 'Devolución',
+}
+
+TIPO_MOVIMIENTO_CC_LABELS = {'cargo': 'Cargo', 'pago': 'Pago'}
+
+UNIDAD_MEDIDA_LABELS = {
+    'unidad': 'Unidad',
+    'metro': 'Metro',
+    'kilo': 'Kilo',
+    'litro': 'Litro',
+    'par': 'Par',
+}
+
+
+def ventas(empresa_id, inicio, fin):
+    """Ventas del período con cliente, cantidad de items y formas de pago."""
+    consulta = (
+        select(
+            Venta.numero,
+            Venta.fecha,
+            func.coalesce(Venta.cliente_nombre, literal('Consumidor Final')).label('cliente'),
+            Venta.cantidad_items,
+            Venta.formas_pago_resumen,
+            Venta.subtotal,
+            Venta.descuento_monto,
+            Venta.total,
+            Venta.estado,
+        )
+        .where(Venta.empresa_id == empresa_id, Venta.fecha >= inicio, Venta.fecha <= fin)
+        .order_by(Venta.fecha, Venta.id)
+    )
+    columnas = [
+        ('Número', lambda fila: f'{fila.fecha.year}-{fila.numero:06d}'),
+        ('Fecha', 'fecha'),
+        ('Cliente', 'cliente'),
+        ('Items', 'cantidad_items'),
+        ('Forma de Pago', 'formas_pago_resumen'),
+        ('Subtotal', 'subtotal'),
+        ('Descuento', 'descuento_monto'),
+        ('Total', 'total'),
+        ('Estado', lambda fila: ESTADO_VENTA_LABELS.get(fila.estado, fila.estado)),
+    ]
+    return consulta, columnas
+
+
+def productos(
+    empresa_id, busqueda='', categoria_ids=None, solo_activos=True, solo_bajo_stock=False
+):
+    """Catálogo de productos con categoría y proveedor."""
+    filtros = [Producto.empresa_id == empresa_id]
+    if busqueda:
+        filtros.append(busqueda_service.filtro_productos(busqueda))
+    if categoria_ids:
+        filtros.append(Producto.categoria_id.in_(categoria_ids))
+    if solo_activos:
+        filtros.append(Producto.activo.is_(True))
+    if solo_bajo_stock:
+        filtros.append(Producto.stock_actual < Producto.stock_minimo)
+
+    consulta = (
+        select(
+            Producto.codigo,
+            Producto.codigo_barras,
+            Producto.nombre,
+            Categoria.nombre.label('categoria'),
+            Proveedor.nombre.label('proveedor'),
+            Producto.unidad_medida,
+            Producto.precio_costo,
+            Producto.precio_venta,
+            Producto.iva_porcentaje,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.ubicacion,
+            Producto.activo,
+        )
+        .outerjoin(Categoria, Producto.categoria_id == Categoria.id)
+        .outerjoin(Proveedor, Producto.proveedor_id == Proveedor.id)
+        .where(*filtros)
+        .order_by(Producto.nombre, Producto.id)
+    )
+    columnas = [
+        ('Código', 'codigo'),
+        ('Código de Barras', 'codigo_barras'),
+        ('Nombre', 'nombre'),
+        ('Categoría', 'categoria'),
+        ('Proveedor', 'proveedor'),
+        ('Unidad', lambda fila: UNIDAD_MEDIDA_LABELS.get(fila.unidad_medida, fila.unidad_medida)),
+        ('Precio Costo', 'precio_costo'),
+        ('Precio Venta', 'precio_venta'),
+        ('IVA %', 'iva_porcentaje'),
+        ('Stock', 'stock_actual'),
+        ('Stock Mínimo', 'stock_minimo'),
+        ('Ubicación', 'ubicacion'),
+        ('Activo', 'activo'),
+    ]
+    return consulta, columnas
+
+
+def clientes(empresa_id, busqueda='', solo_activos=True):
+    """Clientes con saldo de cuenta corriente y estadísticas de compra."""
+    filtros = [Cliente.empresa_id == empresa_id]
+    if busqueda:
+        filtros.append(
+            db.or_(
+                Cliente.nombre.ilike(f'%{busqueda}%'),
+                Cliente.dni_cuit.ilike(f'%{busqueda}%'),
+                Cliente.email.ilike(f'%{busqueda}%'),
+            )
+        )
+    if solo_activos:
+        filtros.append(Cliente.activo.is_(True))
+
+    consulta = (
+        select(
+            Cliente.nombre,
+            Cliente.dni_cuit,
+            Cliente.telefono,
+            Cliente.email,
+            Cliente.direccion,
+            Cliente.limite_credito,
+            Cliente.saldo_cuenta_corriente,
+            Cliente.total_comprado,
+            Cliente.cantidad_compras,
+            Cliente.fecha_ultima_compra,
+            Cliente.activo,
+        )
+        .where(*filtros)
+        .order_by(Cliente.nombre, Cliente.id)
+    )
+    columnas = [
+        ('Nombre', 'nombre'),
+        ('DNI/CUIT', 'dni_cuit'),
+        ('Teléfono', 'telefono'),
+        ('Email', 'email'),
+        ('Dirección', 'direccion'),
+        ('Límite de Crédito', 'limite_credito'),
+        ('Saldo Cuenta Corriente', 'saldo_cuenta_corriente'),
+        ('Total Comprado', 'total_comprado'),
+        ('Compras', 'cantidad_compras'),
+        ('Última Compra', 'fecha_ultima_compra'),
+        ('Activo', 'activo'),
+    ]
+    return consulta, columnas
+
+
+def movimientos_stock(empresa_id, producto_id=None, tipo=None):
+    """Historial de movimientos de stock con producto y usuario."""
+    filtros = [MovimientoStock.empresa_id == empresa_id]
+    if producto_id:
+        filtros.append(MovimientoStock.producto_id == producto_id)
+    if tipo:
+        filtros.append(MovimientoStock.tipo == tipo)
+
+    consulta = (
+        select(
+            MovimientoStock.created_at,
+            Producto.codigo,
+            Producto.nombre.label('producto'),
+            MovimientoStock.tipo,
+            MovimientoStock.cantidad,
+            MovimientoStock.stock_anterior,
+            MovimientoStock.stock_posterior,
+            MovimientoStock.motivo,
+            Usuario.nombre.label('usuario'),
+        )
+        .join(Producto, MovimientoStock.producto_id == Producto.id)
+        .outerjoin(Usuario, MovimientoStock.usuario_id == Usuario.id)
+        .where(*filtros)
+        .order_by(MovimientoStock.created_at.desc(), MovimientoStock.id.desc())
+    )
+    columnas = [
+        ('Fecha', 'created_at'),
+        ('Código', 'codigo'),
+        ('Producto', 'producto'),
+        ('Tipo', lambda fila: TIPO_MOVIMIENTO_STOCK_LABELS.get(fila.tipo, fila.tipo)),
+        ('Cantidad', 'cantidad'),
+        ('Stock Anterior', 'stock_anterior'),
+        ('Stock Posterior', 'stock_posterior'),
+        ('Motivo', 'motivo'),
+        ('Usuario', 'usuario'),
+    ]
+    return consulta, columnas
+
+
+def kardex(empresa_id, producto_id, desde, hasta):
+    """Kardex de un producto en un rango de fechas, con saldo y valores al costo."""
+    consulta = kardex_service.consulta_kardex(empresa_id, producto_id, desde, hasta)
+    columnas = [
+        ('Fecha', 'created_at'),
+        ('Tipo', lambda fila: TIPO_MOVIMIENTO_STOCK_LABELS.get(fila.tipo, fila.tipo)),
+        ('Motivo', 'motivo'),
+        ('Entrada', 'entrada'),
+        ('Salida', 'salida'),
+        ('Saldo', 'saldo'),
+        ('Costo Unitario', 'costo_unitario'),
+        ('Valor Movimiento', 'valor_movimiento'),
+        ('Saldo Valorizado', 'saldo_valorizado'),
+        ('Usuario', 'usuario_nombre'),
+    ]
+    return consulta, columnas
+
+
+def cuenta_corriente(empresa_id, cliente_id):
+    """Movimientos de cuenta corriente de un cliente."""
+    consulta = (
+        select(
+            MovimientoCuentaCorriente.created_at,
+            MovimientoCuentaCorriente.tipo,
+            MovimientoCuentaCorriente.descripcion,
+            MovimientoCuentaCorriente.monto,
+            MovimientoCuentaCorriente.saldo_anterior,
+            MovimientoCuentaCorriente.saldo_posterior,
+            Usuario.nombre.label('usuario'),
+        )
+        .outerjoin(Usuario, MovimientoCuentaCorriente.usuario_id == Usuario.id)
+        .where(
+            MovimientoCuentaCorriente.empresa_id == empresa_id,
+            MovimientoCuentaCorriente.cliente_id == cliente_id,
+        )
+        .order_by(MovimientoCuentaCorriente.created_at, MovimientoCuentaCorriente.id)
+    )
+    columnas = [
+        ('Fecha', 'created_at'),
+        ('Tipo', lambda fila: TIPO_MOVIMIENTO_CC_LABELS.get(fila.tipo, fila.tipo)),
+        ('Descripción', 'descripcion'),
+        ('Monto', 'monto'),
+        ('Saldo Anterior', 'saldo_anterior'),
+        ('Saldo Posterior', 'saldo_posterior'),
+        ('Usuario', 'usuario'),
+    ]
+    return consulta, columnas
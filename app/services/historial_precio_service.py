@@ -0,0 +1,185 @@
+"""Precios históricos: qué costo y precio de venta tenía un producto en una fecha.
+
+El historial está en ``actualizaciones_precio`` (una fila por cambio, con
+precios anteriores y nuevos) e indexado por (producto_id, fecha). El precio
+a una fecha es el ``nuevo`` del último cambio hasta esa fecha; si no hubo
+cambios antes, el ``anterior`` del primer cambio posterior; y si el producto
+nunca cambió, su precio actual.
+
+Solo se reconstruyen los cambios que dejan auditoría: actualizaciones
+masivas, listas de proveedor y ediciones manuales del producto.
+"""
+
+from datetime import date, datetime, time
+
+from sqlalchemy import DateTime, Integer, column, func, select, values
+from sqlalchemy.orm import aliased
+
+from ..extensions import db
+from ..models import ActualizacionPrecio, LoteActualizacionPrecio, Producto
+from ..utils.helpers import ahora_argentina
+from .lectura_service import FilaLectura
+
+# Pares (producto, fecha) por consulta: dos parámetros por par, lejos del
+# límite de variables de SQLite
+PARES_POR_CONSULTA = 5000
+
+
+class PrecioHistorico(FilaLectura):
+    """Costo y precio de venta de un producto a una fecha."""
+
+    __slots__ = ('producto_id', 'fecha', 'precio_costo', 'precio_venta')
+
+
+def _hasta(fecha):
+    """Un ``date`` incluye todo el día."""
+    if isinstance(fecha, datetime):
+        return fecha
+    if isinstance(fecha, date):
+        return datetime.combine(fecha, time.max)
+    raise ValueError('La fecha no es válida.')
+
+
+def _cambio(producto_id, fecha, anterior, columna=ActualizacionPrecio.id):
+    """``columna`` del último cambio hasta ``fecha``, o del primero posterior."""
+    if anterior:
+        condicion = ActualizacionPrecio.fecha <= fecha
+        orden = (ActualizacionPrecio.fecha.desc(), ActualizacionPrecio.id.desc())
+    else:
+        condicion = ActualizacionPrecio.fecha > fecha
+        orden = (ActualizacionPrecio.fecha, ActualizacionPrecio.id)
+    return (
+        select(columna)
+        .where(ActualizacionPrecio.producto_id == producto_id, condicion)
+        .order_by(*orden)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _consulta_precios(empresa_id, pares):
+    """Precios a fecha de una lista de (producto_id, fecha), en una sola query.
+
+    Cada par busca su cambio por el índice (producto_id, fecha) con una
+    subconsulta correlacionada con ``LIMIT 1``, el equivalente portable de
+    un ``JOIN LATERAL``.
+    """
+    tabla = (
+        values(column('producto_id', Integer), column('fecha', DateTime), name='pares')
+        .data(pares)
+        .cte('pares')
+    )
+    hasta = aliased(ActualizacionPrecio)
+    despues = aliased(ActualizacionPrecio)
+    return (
+        select(
+            tabla.c.producto_id,
+            tabla.c.fecha,
+            func.coalesce(
+                hasta.precio_costo_nuevo, despues.precio_costo_anterior, Producto.precio_costo
+            ).label('precio_costo'),
+            func.coalesce(
+                hasta.precio_venta_nuevo, despues.precio_venta_anterior, Producto.precio_venta
+            ).label('precio_venta'),
+        )
+        .select_from(tabla)
+        .join(
+            Producto,
+            (Producto.id == tabla.c.producto_id) & (Producto.empresa_id == empresa_id),
+        )
+        .outerjoin(hasta, hasta.id == _cambio(tabla.c.producto_id, tabla.c.fecha, anterior=True))
+        .outerjoin(
+            despues, despues.id == _cambio(tabla.c.producto_id, tabla.c.fecha, anterior=False)
+        )
+    )
+
+
+def costo_a_fecha(fecha, producto_id=Producto.id):
+    """Expresión del costo de ``Producto`` a una fecha, para consultas sobre productos.
+
+    Misma regla que ``precios_a_fecha`` pero correlacionada con la consulta
+    externa, para valuar muchos productos sin armar los pares. ``fecha``
+    puede ser un valor o una columna (p. ej. la fecha de cada movimiento);
+    la consulta externa debe incluir ``productos``.
+    """
+    hasta = _hasta(fecha) if isinstance(fecha, date) else fecha
+    return func.coalesce(
+        _cambio(producto_id, hasta, True, ActualizacionPrecio.precio_costo_nuevo),
+        _cambio(producto_id, hasta, False, ActualizacionPrecio.precio_costo_anterior),
+        Producto.precio_costo,
+    )
+
+
+def precios_a_fecha(empresa_id, pares):
+    """
+    Precios de muchos (producto, fecha) a la vez.
+
+    Args:
+        empresa_id: ID de la empresa (los productos de otras empresas se omiten)
+        pares: iterable de (producto_id, fecha); la fecha puede ser
+            ``datetime`` o ``date`` (se toma el final del día)
+
+    Returns:
+        Dict {(producto_id, fecha): PrecioHistorico}, con las fechas tal
+        como se recibieron
+    """
+    pendientes = {}
+    for producto_id, fecha in pares:
+        pendientes.setdefault((producto_id, _hasta(fecha)), []).append((producto_id, fecha))
+
+    claves = list(pendientes)
+    resultado = {}
+    for inicio in range(0, len(claves), PARES_POR_CONSULTA):
+        lote = claves[inicio : inicio + PARES_POR_CONSULTA]
+        for fila in db.session.execute(_consulta_precios(empresa_id, lote)):
+            for clave in pendientes[(fila.producto_id, fila.fecha)]:
+                resultado[clave] = PrecioHistorico(
+                    producto_id=fila.producto_id,
+                    fecha=clave[1],
+                    precio_costo=fila.precio_costo,
+                    precio_venta=fila.precio_venta,
+                )
+    return resultado
+
+
+def precio_a_fecha(empresa_id, producto_id, fecha):
+    """
+    Costo y precio de venta de un producto a una fecha.
+
+    Returns:
+        PrecioHistorico, o None si el producto no es de la empresa
+    """
+    return precios_a_fecha(empresa_id, [(producto_id, fecha)]).get((producto_id, fecha))
+
+
+def registrar_cambio_manual(producto, costo_anterior, venta_anterior, usuario_id):
+    """
+    Audita la edición manual de precios de un producto (sin commit).
+
+    No registra nada si los precios no cambiaron.
+    """
+    if costo_anterior == producto.precio_costo and venta_anterior == producto.precio_venta:
+        return None
+
+    ahora = ahora_argentina()
+    lote = LoteActualizacionPrecio(
+        empresa_id=producto.empresa_id,
+        usuario_id=usuario_id,
+        fecha=ahora,
+        tipo='manual',
+        actualizo_costo=costo_anterior != producto.precio_costo,
+        cantidad_productos=1,
+    )
+    db.session.add(lote)
+    db.session.add(
+        ActualizacionPrecio(
+            lote=lote,
+            producto_id=producto.id,
+            fecha=ahora,
+            precio_costo_anterior=costo_anterior,
+            precio_costo_nuevo=producto.precio_costo,
+            precio_venta_anterior=venta_anterior,
+            precio_venta_nuevo=producto.precio_venta,
+        )
+    )
+    return lote
@@ -0,0 +1,484 @@
+"""Importación masiva del catálogo de productos desde CSV o XLSX.
+
+El archivo se recorre en streaming (``csv`` o openpyxl en modo
+``read_only``) y se procesa en lotes de ``TAMANIO_LOTE`` filas. Cada lote:
+
+1. Busca cuáles de sus códigos ya existen (una query).
+2. Valida las filas; las inválidas se registran con su número de fila.
+3. Hace upsert por (empresa_id, codigo) con ``INSERT ... ON CONFLICT DO
+   UPDATE``. En productos existentes solo se actualizan las celdas con
+   valor, nunca el stock.
+4. Crea en bloque los movimientos de stock inicial de los productos nuevos.
+5. Confirma junto con el avance de la importación.
+
+Como el avance se confirma con cada lote, una importación interrumpida
+(error, reinicio del worker) se reanuda desde la primera fila no confirmada.
+"""
+
+import csv
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from werkzeug.utils import secure_filename
+
+from ..extensions import db
+from ..models import ImportacionCatalogo, MovimientoStock, Producto
+from ..utils.helpers import ahora_argentina
+from . import categoria_service
+from .busqueda_service import normalizar
+
+FORMATOS = ('csv', 'xlsx')
+
+TAMANIO_LOTE = 1000
+
+# Una importación 'procesando' sin avances en este tiempo se considera interrumpida
+TIEMPO_SIN_AVANCE = timedelta(minutes=5)
+
+UNIDADES_MEDIDA = ('unidad', 'metro', 'kilo', 'litro', 'par')
+
+# Encabezado normalizado (sin acentos, minúsculas, '_' por espacios) -> campo
+COLUMNAS = {
+    'codigo': 'codigo',
+    'nombre': 'nombre',
+    'descripcion': 'descripcion',
+    'codigo_barras': 'codigo_barras',
+    'codigo_de_barras': 'codigo_barras',
+    'ean': 'codigo_barras',
+    'unidad': 'unidad_medida',
+    'unidad_medida': 'unidad_medida',
+    'costo': 'precio_costo',
+    'precio_costo': 'precio_costo',
+    'precio': 'precio_venta',
+    'precio_venta': 'precio_venta',
+    'iva': 'iva_porcentaje',
+    'iva_porcentaje': 'iva_porcentaje',
+    'stock': 'stock_actual',
+    'stock_inicial': 'stock_actual',
+    'stock_actual': 'stock_actual',
+    'stock_minimo': 'stock_minimo',
+    'ubicacion': 'ubicacion',
+}
+
+LARGO_MAXIMO = {'codigo': 20, 'codigo_barras': 50, 'nombre': 100, 'ubicacion': 50}
+
+PRECISION = {
+    'precio_costo': Decimal('0.01'),
+    'precio_venta': Decimal('0.01'),
+    'iva_porcentaje': Decimal('0.01'),
+    'stock_actual': Decimal('0.001'),
+    'stock_minimo': Decimal('0.001'),
+}
+
+# Valores de los productos nuevos para las columnas que el archivo no trae
+VALORES_NUEVO = {
+    'codigo_barras': None,
+    'descripcion': None,
+    'unidad_medida': 'unidad',
+    'precio_costo': Decimal('0'),
+    'precio_venta': Decimal('0'),
+    'iva_porcentaje': Decimal('21'),
+    'stock_actual': Decimal('0'),
+    'stock_minimo': Decimal('0'),
+    'ubicacion': None,
+}
+
+
+# ─── Lectura ─────────────────────────────────────────────────────────
+
+
+def _filas_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        try:
+            dialecto = csv.Sniffer().sniff(archivo.read(4096), delimiters=';,\t')
+        except csv.Error:
+            dialecto = csv.excel
+        archivo.seek(0)
+        yield from csv.reader(archivo, dialecto)
+
+
+def _filas_xlsx(ruta):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def abrir_archivo(ruta, formato, columnas=COLUMNAS):
+    """
+    Abre un archivo de catálogo y lee su encabezado.
+
+    Args:
+        ruta: Ruta del archivo
+        formato: 'csv' o 'xlsx'
+        columnas: Encabezado normalizado -> campo (por defecto ``COLUMNAS``)
+
+    Returns:
+        Tupla (campos, filas): los campos presentes en el archivo y un
+        iterador de (número de fila, dict campo -> valor crudo)
+
+    Raises:
+        ValueError: Si el archivo está vacío o no tiene columna de código
+    """
+    filas = _filas_xlsx(ruta) if formato == 'xlsx' else _filas_csv(ruta)
+    encabezado = next(filas, None)
+    if encabezado is None:
+        raise ValueError('El archivo está vacío.')
+
+    campos = [
+        columnas.get(normalizar(str(titulo or '')).replace(' ', '_')) for titulo in encabezado
+    ]
+    if 'codigo' not in campos:
+        filas.close()
+        raise ValueError('El archivo debe tener una columna "codigo".')
+
+    def _datos():
+        for numero, fila in enumerate(filas, start=2):
+            yield numero, {campo: valor for campo, valor in zip(campos, fila) if campo}
+
+    return [campo for campo in campos if campo], _datos()
+
+
+def contar_filas(ruta, formato):
+    """Cantidad de filas de datos (sin encabezado); None si no se puede saber barato."""
+    if formato == 'xlsx':
+        from openpyxl import load_workbook
+
+        libro = load_workbook(ruta, read_only=True)
+        try:
+            total = libro.active.max_row
+        finally:
+            libro.close()
+        return total - 1 if total else None
+
+    with open(ruta, 'rb') as archivo:
+        lineas = sum(bloque.count(b'\n') for bloque in iter(lambda: archivo.read(1 << 20), b''))
+    return max(lineas - 1, 0)
+
+
+# ─── Validación ──────────────────────────────────────────────────────
+
+
+def leer_texto(valor):
+    """Valor de una celda como texto (los números enteros de Excel sin '.0')."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def leer_decimal(valor, campo):
+    """
+    Valor de una celda como Decimal no negativo, con la precisión del campo.
+
+    Acepta números de Excel y texto con formato local ('$ 1.234,50').
+
+    Returns:
+        Decimal, o None si la celda está vacía
+
+    Raises:
+        ValueError: Si no es un número o es negativo
+    """
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, (int, float, Decimal)):
+        texto = str(valor)
+    else:
+        texto = str(valor).strip().replace('$', '').replace(' ', '')
+        # Formato local: 1.234,50
+        if ',' in texto:
+            texto = texto.replace('.', '').replace(',', '.')
+    try:
+        numero = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f'{campo}: "{valor}" no es un número válido')
+    if numero < 0:
+        raise ValueError(f'{campo}: no puede ser negativo')
+    return numero.quantize(PRECISION[campo])
+
+
+def validar_fila(datos, existente):
+    """
+    Valida y convierte una fila del archivo.
+
+    Args:
+        datos: Dict campo -> valor crudo
+        existente: Si el código ya existe (el nombre solo es obligatorio
+            para productos nuevos)
+
+    Returns:
+        Dict campo -> valor con los campos presentes en la fila
+
+    Raises:
+        ValueError: Con el motivo si la fila es inválida
+    """
+    valores = {}
+    for campo, crudo in datos.items():
+        if campo in PRECISION:
+            numero = leer_decimal(crudo, campo)
+            if numero is not None:
+                valores[campo] = numero
+            continue
+
+        texto = leer_texto(crudo)
+        if campo == 'unidad_medida':
+            texto = normalizar(texto)
+            if texto and texto not in UNIDADES_MEDIDA:
+                raise ValueError(f'unidad_medida: "{crudo}" no es válida')
+        if campo in LARGO_MAXIMO and len(texto) > LARGO_MAXIMO[campo]:
+            raise ValueError(f'{campo}: supera {LARGO_MAXIMO[campo]} caracteres')
+        if texto:
+            valores[campo] = texto
+
+    if not valores.get('codigo'):
+        raise ValueError('codigo: es requerido')
+    if not existente and not valores.get('nombre'):
+        raise ValueError('nombre: es requerido para productos nuevos')
+    return valores
+
+
+# ─── Procesamiento ───────────────────────────────────────────────────
+
+
+def _insert():
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Producto.__table__)
+
+
+def _procesar_lote(importacion, lote):
+    """Valida, hace upsert y registra stock inicial de un lote (sin commit)."""
+    empresa_id = importacion.empresa_id
+    codigos = {leer_texto(datos.get('codigo')) for _, datos in lote} - {''}
+    existentes = set(
+        db.session.execute(
+            select(Producto.codigo).where(
+                Producto.empresa_id == empresa_id, Producto.codigo.in_(codigos)
+            )
+        ).scalars()
+    )
+
+    validas = {}  # codigo -> valores; si un código se repite, gana la última fila
+    errores = []
+    for numero, datos in lote:
+        try:
+            valores = validar_fila(datos, existente=leer_texto(datos.get('codigo')) in existentes)
+        except ValueError as e:
+            errores.append([numero, str(e)])
+            continue
+        validas[valores['codigo']] = valores
+
+    creados = [codigo for codigo in validas if codigo not in existentes]
+    ids = {}
+    if validas:
+        ahora = ahora_argentina()
+        # Una celda vacía no pisa el valor de un producto existente: las filas se
+        # agrupan por columnas informadas y cada grupo actualiza solo esas.
+        grupos = defaultdict(list)
+        for valores in validas.values():
+            grupos[frozenset(valores) - {'codigo', 'stock_actual'}].append(
+                {
+                    **VALORES_NUEVO,
+                    'nombre': '',  # Solo en existentes, cuyo nombre no se actualiza
+                    **valores,
+                    'empresa_id': empresa_id,
+                    'activo': True,
+                    'created_at': ahora,
+                    'updated_at': ahora,
+                }
+            )
+        for actualizables, filas in grupos.items():
+            insert = _insert()
+            stmt = insert.on_conflict_do_update(
+                index_elements=['empresa_id', 'codigo'],
+                set_={
+                    **{campo: insert.excluded[campo] for campo in sorted(actualizables)},
+                    'updated_at': insert.excluded.updated_at,
+                },
+            ).returning(insert.table.c.id, insert.table.c.codigo)
+            ids.update((codigo, id) for id, codigo in db.session.execute(stmt, filas))
+
+        movimientos = [
+            {
+                'empresa_id': empresa_id,
+                'producto_id': ids[codigo],
+                'tipo': 'ajuste_positivo',
+                'cantidad': validas[codigo]['stock_actual'],
+                'stock_anterior': Decimal('0'),
+                'stock_posterior': validas[codigo]['stock_actual'],
+                'referencia_tipo': 'importacion',
+                'referencia_id': importacion.id,
+                'motivo': 'Stock inicial (importación de catálogo)',
+                'usuario_id': importacion.usuario_id,
+                'created_at': ahora,
+            }
+            for codigo in creados
+            if validas[codigo].get('stock_actual')
+        ]
+        if movimientos:
+            db.session.execute(db.insert(MovimientoStock.__table__), movimientos)
+        if creados:
+            categoria_service.invalidar_arbol(empresa_id)
+
+    importacion.creados += len(creados)
+    importacion.actualizados += len(validas) - len(creados)
+    importacion.agregar_errores(errores)
+    importacion.filas_procesadas = lote[-1][0] - 1
+
+
+def _tomar(importacion_id):
+    """Marca la importación como 'procesando' si nadie la está procesando."""
+    resultado = db.session.execute(
+        update(ImportacionCatalogo)
+        .where(
+            ImportacionCatalogo.id == importacion_id,
+            or_(
+                ImportacionCatalogo.estado.in_(['pendiente', 'fallida']),
+                and_(
+                    ImportacionCatalogo.estado == 'procesando',
+                    ImportacionCatalogo.updated_at < ahora_argentina() - TIEMPO_SIN_AVANCE,
+                ),
+            ),
+        )
+        .values(estado='procesando', mensaje=None, updated_at=ahora_argentina())
+    )
+    db.session.commit()
+    return resultado.rowcount == 1
+
+
+def procesar_importacion(importacion_id, tamanio_lote=TAMANIO_LOTE):
+    """
+    Procesa (o reanuda) una importación desde la primera fila no confirmada.
+
+    Args:
+        importacion_id: ID de la importación
+        tamanio_lote: Filas por lote (un commit por lote)
+
+    Returns:
+        La ImportacionCatalogo, o None si otro proceso la está procesando
+    """
+    if not _tomar(importacion_id):
+        return None
+    importacion = db.session.get(ImportacionCatalogo, importacion_id)
+
+    try:
+        _, filas = abrir_archivo(importacion.archivo, importacion.formato)
+        lote = []
+        for numero, datos in filas:
+            if numero - 1 <= importacion.filas_procesadas:
+                continue
+            lote.append((numero, datos))
+            if len(lote) >= tamanio_lote:
+                _procesar_lote(importacion, lote)
+                db.session.commit()
+                lote = []
+        if lote:
+            _procesar_lote(importacion, lote)
+
+        importacion.estado = 'completada'
+        importacion.finalizada_at = ahora_argentina()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Error en importación de catálogo %s', importacion_id)
+        importacion.estado = 'fallida'
+        if isinstance(e, (ValueError, OSError)):
+            importacion.mensaje = str(e)
+        else:
+            importacion.mensaje = 'Error inesperado. Podés reanudar la importación.'
+        db.session.commit()
+        return importacion
+
+    try:
+        os.remove(importacion.archivo)
+    except OSError:
+        pass
+    return importacion
+
+
+def guardar_archivo(archivo):
+    """
+    Guarda un archivo subido en ``IMPORTACIONES_FOLDER`` con nombre único.
+
+    Returns:
+        Tupla (ruta, formato)
+
+    Raises:
+        ValueError: Si el formato no es CSV/XLSX
+    """
+    nombre = secure_filename(archivo.filename or '')
+    formato = nombre.rsplit('.', 1)[-1].lower() if '.' in nombre else ''
+    if formato not in FORMATOS:
+        raise ValueError('Formato no permitido. Use CSV o XLSX.')
+
+    directorio = current_app.config['IMPORTACIONES_FOLDER']
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f'{uuid.uuid4().hex}.{formato}')
+    archivo.save(ruta)
+    return ruta, formato
+
+
+def crear_importacion(archivo, empresa_id, usuario_id):
+    """
+    Guarda el archivo subido y registra la importación pendiente.
+
+    Args:
+        archivo: FileStorage del formulario
+        empresa_id: ID de la empresa
+        usuario_id: ID del usuario que importa
+
+    Returns:
+        ImportacionCatalogo creada (con commit)
+
+    Raises:
+        ValueError: Si el formato no es CSV/XLSX o el encabezado es inválido
+    """
+    ruta, formato = guardar_archivo(archivo)
+
+    try:
+        _, filas = abrir_archivo(ruta, formato)
+        filas.close()
+        filas_total = contar_filas(ruta, formato)
+    except Exception as e:
+        os.remove(ruta)
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError('No se pudo leer el archivo. Verificá que sea un CSV o XLSX válido.')
+
+    importacion = ImportacionCatalogo(
+        empresa_id=empresa_id,
+        usuario_id=usuario_id,
+        nombre_archivo=archivo.filename,
+        archivo=ruta,
+        formato=formato,
+        filas_total=filas_total,
+    )
+    db.session.add(importacion)
+    db.session.commit()
+    return importacion
+
+
+def iniciar_importacion(importacion_id):
+    """Procesa la importación en un hilo aparte o en el request, según config."""
+    if not current_app.config.get('IMPORTACION_EN_SEGUNDO_PLANO', True):
+        procesar_importacion(importacion_id)
+        return
+
+    app = current_app._get_current_object()
+
+    def _ejecutar():
+        with app.app_context():
+            procesar_importacion(importacion_id)
+
+    threading.Thread(target=_ejecutar, name=f'importacion-{importacion_id}', daemon=True).start()
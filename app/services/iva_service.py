@@ -0,0 +1,297 @@
+"""Servicio de IVA: libro IVA ventas y compras agregado por alícuota y período.
+
+Los importes se agregan en SQL por alícuota (y por mes o comprobante); el
+desglose neto/IVA se aplica sobre cada grupo, que es lineal en el importe,
+con el mismo criterio que el detalle de presupuestos:
+
+- Ventas: el importe de cada línea es su subtotal prorrateado al total de
+  la venta (incluye el descuento general). Si la empresa carga precios con
+  IVA, el importe es el total y se desglosa el neto; si no, el importe es
+  el neto y el IVA se suma.
+- Compras: el importe es lo recibido valuado al costo de la orden, que se
+  considera neto; la alícuota es la del producto.
+"""
+
+import calendar
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import func, literal, select
+
+from ..extensions import db
+from ..models import (
+    Cliente,
+    Configuracion,
+    OrdenCompra,
+    OrdenCompraDetalle,
+    Producto,
+    Proveedor,
+    Venta,
+    VentaDetalle,
+)
+from ..utils.exportacion import iterar_filas
+
+CENTAVOS = Decimal('0.01')
+
+ESTADOS_COMPRA_RECIBIDA = ('recibida_parcial', 'recibida_completa')
+
+COLUMNAS_EXPORTACION = [
+    'Fecha',
+    'Comprobante',
+    'Contraparte',
+    'CUIT/DNI',
+    'Alícuota',
+    'Neto',
+    'IVA',
+    'Total',
+]
+
+
+def rango_del_mes(periodo):
+    """Retorna (inicio, fin) del mes ``periodo`` ('AAAA-MM')."""
+    anio, mes = (int(parte) for parte in periodo.split('-'))
+    ultimo_dia = calendar.monthrange(anio, mes)[1]
+    inicio = datetime(anio, mes, 1)
+    fin = datetime.combine(inicio.replace(day=ultimo_dia), datetime.max.time())
+    return inicio, fin
+
+
+def _expresion_mes(columna):
+    """Expresión SQL 'AAAA-MM' para agrupar por mes según el motor."""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(columna, 'YYYY-MM')
+    return func.strftime('%Y-%m', columna)
+
+
+def _importe_venta():
+    """Subtotal de la línea prorrateado al total de la venta."""
+    return VentaDetalle.subtotal * Venta.total / func.nullif(Venta.subtotal, 0)
+
+
+def _importe_compra():
+    return OrdenCompraDetalle.cantidad_recibida * OrdenCompraDetalle.precio_unitario
+
+
+def _filtros_ventas(empresa_id, inicio, fin):
+    return (
+        Venta.empresa_id == empresa_id,
+        Venta.estado == 'completada',
+        Venta.fecha >= inicio,
+        Venta.fecha <= fin,
+    )
+
+
+def _filtros_compras(empresa_id, inicio, fin):
+    return (
+        OrdenCompra.empresa_id == empresa_id,
+        OrdenCompra.estado.in_(ESTADOS_COMPRA_RECIBIDA),
+        OrdenCompra.fecha >= inicio,
+        OrdenCompra.fecha <= fin,
+        OrdenCompraDetalle.cantidad_recibida > 0,
+    )
+
+
+def desglosar(importe, alicuota, incluye_iva):
+    """
+    Desglosa un importe en neto, IVA y total para una alícuota.
+
+    Args:
+        importe: Importe agregado de la alícuota
+        alicuota: Porcentaje de IVA
+        incluye_iva: True si el importe ya incluye IVA
+
+    Returns:
+        Tuple (neto, iva, total) redondeados a centavos
+    """
+    importe = Decimal(str(importe or 0))
+    tasa = Decimal(str(alicuota)) / Decimal('100')
+    if incluye_iva:
+        total = importe
+        neto = importe / (1 + tasa)
+    else:
+        neto = importe
+        total = importe * (1 + tasa)
+    neto = neto.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    total = total.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    return neto, total - neto, total
+
+
+def _consulta_por_alicuota(importe, alicuota, fecha, desde, filtros):
+    mes = _expresion_mes(fecha)
+    return (
+        select(
+            mes.label('periodo'),
+            alicuota.label('alicuota'),
+            func.sum(importe).label('importe'),
+        )
+        .select_from(desde)
+        .where(*filtros)
+        .group_by(mes, alicuota)
+        .order_by(mes, alicuota)
+    )
+
+
+def _consulta_ventas_por_alicuota(empresa_id, inicio, fin):
+    return _consulta_por_alicuota(
+        _importe_venta(),
+        VentaDetalle.iva_porcentaje,
+        Venta.fecha,
+        VentaDetalle.__table__.join(Venta.__table__, VentaDetalle.venta_id == Venta.id),
+        _filtros_ventas(empresa_id, inicio, fin),
+    )
+
+
+def _consulta_compras_por_alicuota(empresa_id, inicio, fin):
+    return _consulta_por_alicuota(
+        _importe_compra(),
+        Producto.iva_porcentaje,
+        OrdenCompra.fecha,
+        OrdenCompraDetalle.__table__.join(
+            OrdenCompra.__table__, OrdenCompraDetalle.orden_compra_id == OrdenCompra.id
+        ).join(Producto.__table__, OrdenCompraDetalle.producto_id == Producto.id),
+        _filtros_compras(empresa_id, inicio, fin),
+    )
+
+
+def _resumir(filas, incluye_iva):
+    """Convierte filas (periodo, alicuota, importe) en el resumen del libro."""
+    por_alicuota = []
+    totales = {'neto': Decimal('0'), 'iva': Decimal('0'), 'total': Decimal('0')}
+    for fila in filas:
+        neto, iva, total = desglosar(fila.importe, fila.alicuota, incluye_iva)
+        por_alicuota.append(
+            {
+                'periodo': fila.periodo,
+                'alicuota': Decimal(str(fila.alicuota)),
+                'neto': neto,
+                'iva': iva,
+                'total': total,
+            }
+        )
+        totales['neto'] += neto
+        totales['iva'] += iva
+        totales['total'] += total
+    return {'por_alicuota': por_alicuota, **totales}
+
+
+def precios_incluyen_iva(empresa_id):
+    """Configuración de la empresa: los precios de venta incluyen IVA."""
+    return bool(Configuracion.get('precios_con_iva', False, empresa_id=empresa_id))
+
+
+def libro_iva(empresa_id, inicio, fin):
+    """
+    Resume el libro IVA ventas y compras por período mensual y alícuota.
+
+    Returns:
+        dict con 'ventas' y 'compras' (cada uno con por_alicuota, neto, iva y
+        total) y 'saldo' (IVA débito fiscal menos crédito fiscal).
+    """
+    incluye_iva = precios_incluyen_iva(empresa_id)
+    ventas = _resumir(
+        db.session.execute(_consulta_ventas_por_alicuota(empresa_id, inicio, fin)).all(),
+        incluye_iva,
+    )
+    compras = _resumir(
+        db.session.execute(_consulta_compras_por_alicuota(empresa_id, inicio, fin)).all(),
+        incluye_iva=False,
+    )
+    return {'ventas': ventas, 'compras': compras, 'saldo': ventas['iva'] - compras['iva']}
+
+
+def _consulta_comprobantes_ventas(empresa_id, inicio, fin):
+    """Importe por venta y alícuota, ordenado por fecha."""
+    return (
+        select(
+            Venta.fecha,
+            Venta.numero,
+            func.coalesce(Cliente.nombre, literal('Consumidor Final')).label('contraparte'),
+            Cliente.dni_cuit.label('documento'),
+            VentaDetalle.iva_porcentaje.label('alicuota'),
+            func.sum(_importe_venta()).label('importe'),
+        )
+        .select_from(VentaDetalle)
+        .join(Venta, VentaDetalle.venta_id == Venta.id)
+        .outerjoin(Cliente, Venta.cliente_id == Cliente.id)
+        .where(*_filtros_ventas(empresa_id, inicio, fin))
+        .group_by(
+            Venta.id,
+            Venta.fecha,
+            Venta.numero,
+            Cliente.nombre,
+            Cliente.dni_cuit,
+            VentaDetalle.iva_porcentaje,
+        )
+        .order_by(Venta.fecha, Venta.id, VentaDetalle.iva_porcentaje)
+    )
+
+
+def _consulta_comprobantes_compras(empresa_id, inicio, fin):
+    """Importe recibido por orden de compra y alícuota, ordenado por fecha."""
+    return (
+        select(
+            OrdenCompra.fecha,
+            OrdenCompra.numero,
+            func.coalesce(Proveedor.razon_social, Proveedor.nombre).label('contraparte'),
+            Proveedor.cuit.label('documento'),
+            Producto.iva_porcentaje.label('alicuota'),
+            func.sum(_importe_compra()).label('importe'),
+        )
+        .select_from(OrdenCompraDetalle)
+        .join(OrdenCompra, OrdenCompraDetalle.orden_compra_id == OrdenCompra.id)
+        .join(Producto, OrdenCompraDetalle.producto_id == Producto.id)
+        .join(Proveedor, OrdenCompra.proveedor_id == Proveedor.id)
+        .where(*_filtros_compras(empresa_id, inicio, fin))
+        .group_by(
+            OrdenCompra.id,
+            OrdenCompra.fecha,
+            OrdenCompra.numero,
+            Proveedor.razon_social,
+            Proveedor.nombre,
+            Proveedor.cuit,
+            Producto.iva_porcentaje,
+        )
+        .order_by(OrdenCompra.fecha, OrdenCompra.id, Producto.iva_porcentaje)
+    )
+
+
+def _numero_comprobante(libro, fecha, numero):
+    if libro == 'ventas':
+        return f'Venta {fecha.year}-{numero:06d}'
+    return f'OC #{numero}'
+
+
+def iterar_comprobantes(empresa_id, libro, inicio, fin, lote=1000):
+    """
+    Itera las filas del libro IVA por comprobante y alícuota.
+
+    Las filas se leen del cursor en lotes de ``lote`` para no cargar el
+    período completo en memoria.
+
+    Args:
+        libro: 'ventas' o 'compras'
+
+    Yields:
+        Listas con los valores de COLUMNAS_EXPORTACION
+    """
+    if libro == 'ventas':
+        consulta = _consulta_comprobantes_ventas(empresa_id, inicio, fin)
+        incluye_iva = precios_incluyen_iva(empresa_id)
+    elif libro == 'compras':
+        consulta = _consulta_comprobantes_compras(empresa_id, inicio, fin)
+        incluye_iva = False
+    else:
+        raise ValueError(f'Libro IVA inválido: {libro}')
+
+    for fila in iterar_filas(consulta, lote):
+        neto, iva, total = desglosar(fila.importe, fila.alicuota, incluye_iva)
+        yield [
+            fila.fecha.date(),
+            _numero_comprobante(libro, fila.fecha, fila.numero),
+            fila.contraparte,
+            fila.documento or '',
+            Decimal(str(fila.alicuota)),
+            neto,
+            iva,
+            total,
+        ]
@@ -0,0 +1,260 @@
+"""Kardex de un producto: entradas, salidas y saldo acumulado valuados al costo.
+
+El saldo de cada movimiento es el saldo inicial del rango más la suma
+acumulada de las cantidades, calculada en SQL con una función de ventana
+(``SUM(cantidad) OVER (ORDER BY created_at, id)``); el resumen por período
+acumula con otra ventana sobre los totales agrupados. El saldo inicial sale
+del último movimiento anterior al rango, así que ninguna consulta recorre
+movimientos fuera de las fechas pedidas: todas usan el índice
+(producto_id, created_at) de ``movimientos_stock``.
+
+Cada movimiento se valúa con el costo vigente a su fecha: el costo promedio
+ponderado si el producto ya tenía compras, si no el del historial de precios.
+"""
+
+from datetime import datetime, time
+
+from sqlalchemy import case, func, literal, select, tuple_
+
+from ..extensions import db
+from ..models import MovimientoStock, Producto, Usuario
+from ..utils.paginacion import codificar_cursor, decodificar_cursor
+from .costo_service import costo_inventario_a_fecha
+from .lectura_service import FilaLectura
+
+KARDEX_POR_PAGINA = 50
+
+# Formato del período según el motor
+PERIODOS = {
+    'dia': ('YYYY-MM-DD', '%Y-%m-%d'),
+    'mes': ('YYYY-MM', '%Y-%m'),
+}
+
+
+class FilaKardex(FilaLectura):
+    """Movimiento del kardex con su saldo acumulado."""
+
+    __slots__ = (
+        'id',
+        'created_at',
+        'tipo',
+        'referencia_tipo',
+        'referencia_id',
+        'motivo',
+        'usuario_nombre',
+        'entrada',
+        'salida',
+        'saldo',
+        'costo_unitario',
+        'valor_movimiento',
+        'saldo_valorizado',
+    )
+
+    # Las propiedades del modelo solo usan columnas proyectadas
+    tipo_display = MovimientoStock.tipo_display
+    es_entrada = MovimientoStock.es_entrada
+
+
+class FilaPeriodoKardex(FilaLectura):
+    """Entradas, salidas y saldo al cierre de un período."""
+
+    __slots__ = ('periodo', 'entradas', 'salidas', 'valor_entradas', 'valor_salidas', 'saldo')
+
+
+def _rango(desde, hasta):
+    return datetime.combine(desde, time.min), datetime.combine(hasta, time.max)
+
+
+def _expresion_periodo(columna, periodo):
+    """Período del movimiento como texto ordenable ('AAAA-MM' o 'AAAA-MM-DD')."""
+    if periodo not in PERIODOS:
+        raise ValueError('El período no es válido.')
+    formato_pg, formato_sqlite = PERIODOS[periodo]
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(columna, formato_pg)
+    return func.strftime(formato_sqlite, columna)
+
+
+def _filtros(empresa_id, producto_id, inicio, fin):
+    return [
+        MovimientoStock.producto_id == producto_id,
+        MovimientoStock.empresa_id == empresa_id,
+        MovimientoStock.created_at >= inicio,
+        MovimientoStock.created_at <= fin,
+    ]
+
+
+def saldo_inicial(empresa_id, producto_id, desde):
+    """
+    Stock del producto al comenzar el día ``desde``.
+
+    Es el stock posterior del último movimiento anterior; si no hay, el
+    stock anterior del primero desde esa fecha; y si el producto nunca se
+    movió, su stock actual. Cada caso es una lectura puntual por índice.
+    """
+    inicio = datetime.combine(desde, time.min)
+    anterior = (
+        select(MovimientoStock.stock_posterior)
+        .where(MovimientoStock.producto_id == Producto.id, MovimientoStock.created_at < inicio)
+        .order_by(MovimientoStock.created_at.desc(), MovimientoStock.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    posterior = (
+        select(MovimientoStock.stock_anterior)
+        .where(MovimientoStock.producto_id == Producto.id, MovimientoStock.created_at >= inicio)
+        .order_by(MovimientoStock.created_at, MovimientoStock.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    return db.session.scalar(
+        select(func.coalesce(anterior, posterior, Producto.stock_actual)).where(
+            Producto.id == producto_id, Producto.empresa_id == empresa_id
+        )
+    )
+
+
+def _kardex(empresa_id, producto_id, desde, hasta, inicial):
+    """Subconsulta de movimientos del rango con saldo y costo a su fecha."""
+    inicio, fin = _rango(desde, hasta)
+    acumulado = func.sum(MovimientoStock.cantidad).over(
+        order_by=(MovimientoStock.created_at, MovimientoStock.id), rows=(None, 0)
+    )
+    return (
+        select(
+            MovimientoStock.id,
+            MovimientoStock.created_at,
+            MovimientoStock.tipo,
+            MovimientoStock.referencia_tipo,
+            MovimientoStock.referencia_id,
+            MovimientoStock.motivo,
+            Usuario.nombre.label('usuario_nombre'),
+            MovimientoStock.cantidad,
+            # SQLite acumula en punto flotante: se redondea a la escala de la columna
+            func.round(literal(inicial) + acumulado, 3).label('saldo'),
+            costo_inventario_a_fecha(MovimientoStock.created_at, MovimientoStock.producto_id).label(
+                'costo'
+            ),
+        )
+        .join(Producto, Producto.id == MovimientoStock.producto_id)
+        .outerjoin(Usuario, Usuario.id == MovimientoStock.usuario_id)
+        .where(*_filtros(empresa_id, producto_id, inicio, fin))
+        .subquery('kardex')
+    )
+
+
+def consulta_kardex(empresa_id, producto_id, desde, hasta, inicial=None):
+    """
+    Movimientos del producto entre ``desde`` y ``hasta`` (fechas inclusive).
+
+    Returns:
+        Select en orden cronológico con entrada, salida, saldo, costo
+        unitario y valores; apto para recorrer en streaming
+    """
+    if inicial is None:
+        inicial = saldo_inicial(empresa_id, producto_id, desde) or 0
+    kardex = _kardex(empresa_id, producto_id, desde, hasta, inicial)
+    return select(
+        kardex.c.id,
+        kardex.c.created_at,
+        kardex.c.tipo,
+        kardex.c.referencia_tipo,
+        kardex.c.referencia_id,
+        kardex.c.motivo,
+        kardex.c.usuario_nombre,
+        case((kardex.c.cantidad > 0, kardex.c.cantidad), else_=0).label('entrada'),
+        case((kardex.c.cantidad < 0, -kardex.c.cantidad), else_=0).label('salida'),
+        kardex.c.saldo,
+        kardex.c.costo.label('costo_unitario'),
+        (kardex.c.cantidad * kardex.c.costo).label('valor_movimiento'),
+        (kardex.c.saldo * kardex.c.costo).label('saldo_valorizado'),
+    ).order_by(kardex.c.created_at, kardex.c.id)
+
+
+def resumen_por_periodo(empresa_id, producto_id, desde, hasta, periodo='mes', inicial=0):
+    """
+    Entradas, salidas (en cantidad y al costo) y saldo de cierre por período.
+
+    Returns:
+        Lista de FilaPeriodoKardex en orden cronológico
+    """
+    inicio, fin = _rango(desde, hasta)
+    movimientos = (
+        select(
+            _expresion_periodo(MovimientoStock.created_at, periodo).label('periodo'),
+            MovimientoStock.cantidad,
+            costo_inventario_a_fecha(MovimientoStock.created_at, MovimientoStock.producto_id).label(
+                'costo'
+            ),
+        )
+        .join(Producto, Producto.id == MovimientoStock.producto_id)
+        .where(*_filtros(empresa_id, producto_id, inicio, fin))
+        .subquery('movimientos')
+    )
+    cantidad = movimientos.c.cantidad
+    entradas = case((cantidad > 0, cantidad), else_=0)
+    salidas = case((cantidad < 0, -cantidad), else_=0)
+    consulta = (
+        select(
+            movimientos.c.periodo,
+            func.sum(entradas).label('entradas'),
+            func.sum(salidas).label('salidas'),
+            func.sum(entradas * movimientos.c.costo).label('valor_entradas'),
+            func.sum(salidas * movimientos.c.costo).label('valor_salidas'),
+            func.round(
+                literal(inicial)
+                + func.sum(func.sum(cantidad)).over(order_by=movimientos.c.periodo),
+                3,
+            ).label('saldo'),
+        )
+        .group_by(movimientos.c.periodo)
+        .order_by(movimientos.c.periodo)
+    )
+    return [FilaPeriodoKardex.desde_fila(fila) for fila in db.session.execute(consulta)]
+
+
+def kardex(
+    empresa_id,
+    producto_id,
+    desde,
+    hasta,
+    periodo='mes',
+    despues=None,
+    limite=KARDEX_POR_PAGINA,
+):
+    """
+    Kardex del producto: totales, resumen por período y una página de movimientos.
+
+    La página sigue el orden cronológico por keyset: ``despues`` es el
+    cursor del último movimiento de la página anterior.
+
+    Returns:
+        dict con saldo_inicial, saldo_final, entradas, salidas,
+        valor_entradas, valor_salidas, periodos, movimientos y siguiente
+    """
+    inicial = saldo_inicial(empresa_id, producto_id, desde) or 0
+    periodos = resumen_por_periodo(empresa_id, producto_id, desde, hasta, periodo, inicial)
+
+    kardex_sub = consulta_kardex(empresa_id, producto_id, desde, hasta, inicial).subquery()
+    consulta = select(kardex_sub).order_by(kardex_sub.c.created_at, kardex_sub.c.id)
+    cursor = decodificar_cursor(despues)
+    if cursor:
+        consulta = consulta.where(tuple_(kardex_sub.c.created_at, kardex_sub.c.id) > cursor)
+    filas = [FilaKardex.desde_fila(fila) for fila in db.session.execute(consulta.limit(limite + 1))]
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1].created_at, filas[-1].id)
+
+    return {
+        'saldo_inicial': inicial,
+        'saldo_final': periodos[-1].saldo if periodos else inicial,
+        'entradas': sum(p.entradas for p in periodos),
+        'salidas': sum(p.salidas for p in periodos),
+        'valor_entradas': sum(p.valor_entradas for p in periodos),
+        'valor_salidas': sum(p.valor_salidas for p in periodos),
+        'periodos': periodos,
+        'movimientos': filas,
+        'siguiente': siguiente,
+    }
@@ -0,0 +1,228 @@
+"""Modelos de lectura para listados y selectores.
+
+Los listados y desplegables solo muestran unas pocas columnas; cargar
+entidades ORM completas (con identity map, estado de sesión y relaciones
+perezosas que disparan una query por fila) es innecesario. Estas funciones
+proyectan solo las columnas usadas, con los datos relacionados resueltos por
+JOIN o subconsulta, en tuplas con nombre o clases con ``__slots__``.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models import (
+    Caja,
+    Categoria,
+    Cliente,
+    MovimientoCaja,
+    MovimientoStock,
+    Producto,
+    Proveedor,
+    Usuario,
+    Venta,
+)
+
+OpcionProducto = namedtuple('OpcionProducto', 'id codigo nombre proveedor_id')
+OpcionCliente = namedtuple('OpcionCliente', 'id nombre dni_cuit')
+Opcion = namedtuple('Opcion', 'id nombre')
+
+
+class FilaLectura:
+    """Fila de solo lectura construida a partir de una fila de consulta."""
+
+    __slots__ = ()
+
+    def __init__(self, **valores):
+        for nombre, valor in valores.items():
+            setattr(self, nombre, valor)
+
+    @classmethod
+    def desde_fila(cls, fila):
+        return cls(**fila._mapping)
+
+
+class FilaVenta(FilaLectura):
+    """Venta del historial."""
+
+    __slots__ = (
+        'id',
+        'numero',
+        'fecha',
+        'cliente_nombre',
+        'cantidad_items',
+        'forma_pago',
+        'formas_pago_resumen',
+        'total',
+        'estado',
+    )
+
+    # Las propiedades del modelo solo usan columnas proyectadas
+    numero_completo = Venta.numero_completo
+    es_anulable = Venta.es_anulable
+
+
+class FilaMovimientoStock(FilaLectura):
+    """Movimiento de stock del historial."""
+
+    __slots__ = (
+        'id',
+        'created_at',
+        'tipo',
+        'cantidad',
+        'stock_anterior',
+        'stock_posterior',
+        'motivo',
+        'referencia_tipo',
+        'referencia_id',
+        'producto_codigo',
+        'producto_nombre',
+        'unidad_medida',
+        'usuario_nombre',
+    )
+
+    tipo_display = MovimientoStock.tipo_display
+    es_entrada = MovimientoStock.es_entrada
+
+
+class FilaCaja(FilaLectura):
+    """Caja del historial con sus totales en efectivo."""
+
+    __slots__ = (
+        'id',
+        'fecha_apertura',
+        'fecha_cierre',
+        'usuario_nombre',
+        'monto_inicial',
+        'total_ingresos',
+        'total_egresos',
+        'estado',
+    )
+
+
+def opciones_productos(empresa_id):
+    """Productos activos para selectores: id, código, nombre y proveedor."""
+    filas = db.session.execute(
+        select(Producto.id, Producto.codigo, Producto.nombre, Producto.proveedor_id)
+        .where(Producto.empresa_id == empresa_id, Producto.activo.is_(True))
+        .order_by(Producto.nombre)
+    )
+    return [OpcionProducto(*fila) for fila in filas]
+
+
+def opciones_clientes(empresa_id):
+    """Clientes activos para selectores."""
+    filas = db.session.execute(
+        select(Cliente.id, Cliente.nombre, Cliente.dni_cuit)
+        .where(Cliente.empresa_id == empresa_id, Cliente.activo.is_(True))
+        .order_by(Cliente.nombre)
+    )
+    return [OpcionCliente(*fila) for fila in filas]
+
+
+def opciones_proveedores(empresa_id):
+    """Proveedores activos para selectores."""
+    filas = db.session.execute(
+        select(Proveedor.id, Proveedor.nombre)
+        .where(Proveedor.empresa_id == empresa_id, Proveedor.activo.is_(True))
+        .order_by(Proveedor.nombre)
+    )
+    return [Opcion(*fila) for fila in filas]
+
+
+def opciones_categorias(empresa_id, subcategorias=False):
+    """
+    Categorías activas para selectores.
+
+    Con ``subcategorias=True`` retorna las subcategorías con el nombre en
+    formato 'Padre > Hija' (como ``Categoria.nombre_completo``).
+    """
+    if not subcategorias:
+        consulta = select(Categoria.id, Categoria.nombre).where(Categoria.padre_id.is_(None))
+    else:
+        padre = db.aliased(Categoria)
+        consulta = select(
+            Categoria.id, (padre.nombre + ' > ' + Categoria.nombre).label('nombre')
+        ).join(padre, Categoria.padre_id == padre.id)
+    filas = db.session.execute(
+        consulta.where(Categoria.empresa_id == empresa_id, Categoria.activa.is_(True)).order_by(
+            Categoria.nombre
+        )
+    )
+    return [Opcion(*fila) for fila in filas]
+
+
+def consulta_ventas(empresa_id):
+    """
+    Consulta de ventas para el historial (se pagina con ``FilaVenta``).
+
+    Solo lee columnas de ``ventas`` (cliente, items y formas de pago están
+    guardados en la venta), por lo que se resuelve con ``ix_ventas_empresa_fecha``.
+    """
+    return db.session.query(
+        Venta.id,
+        Venta.numero,
+        Venta.fecha,
+        Venta.cliente_nombre,
+        Venta.cantidad_items,
+        Venta.forma_pago,
+        Venta.formas_pago_resumen,
+        Venta.total,
+        Venta.estado,
+    ).filter(Venta.empresa_id == empresa_id)
+
+
+def consulta_movimientos_stock(empresa_id):
+    """Consulta de movimientos de stock (se pagina con ``FilaMovimientoStock``)."""
+    return (
+        db.session.query(
+            MovimientoStock.id,
+            MovimientoStock.created_at,
+            MovimientoStock.tipo,
+            MovimientoStock.cantidad,
+            MovimientoStock.stock_anterior,
+            MovimientoStock.stock_posterior,
+            MovimientoStock.motivo,
+            MovimientoStock.referencia_tipo,
+            MovimientoStock.referencia_id,
+            Producto.codigo.label('producto_codigo'),
+            Producto.nombre.label('producto_nombre'),
+            Producto.unidad_medida,
+            Usuario.nombre.label('usuario_nombre'),
+        )
+        .join(Producto, MovimientoStock.producto_id == Producto.id)
+        .outerjoin(Usuario, MovimientoStock.usuario_id == Usuario.id)
+        .filter(MovimientoStock.empresa_id == empresa_id)
+    )
+
+
+def _total_efectivo_caja(tipo):
+    return (
+        select(func.coalesce(func.sum(MovimientoCaja.monto), 0))
+        .where(
+            MovimientoCaja.caja_id == Caja.id,
+            MovimientoCaja.tipo == tipo,
+            MovimientoCaja.forma_pago == 'efectivo',
+        )
+        .correlate(Caja)
+        .scalar_subquery()
+    )
+
+
+def consulta_cajas(empresa_id):
+    """Consulta de cajas con totales en efectivo (se pagina con ``FilaCaja``)."""
+    return (
+        db.session.query(
+            Caja.id,
+            Caja.fecha_apertura,
+            Caja.fecha_cierre,
+            Usuario.nombre.label('usuario_nombre'),
+            Caja.monto_inicial,
+            _total_efectivo_caja('ingreso').label('total_ingresos'),
+            _total_efectivo_caja('egreso').label('total_egresos'),
+            Caja.estado,
+        )
+        .join(Usuario, Caja.usuario_apertura_id == Usuario.id)
+        .filter(Caja.empresa_id == empresa_id)
+    )
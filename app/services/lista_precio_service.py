@@ -0,0 +1,368 @@
+"""Listas de precios de proveedores: carga, diferencias y aplicación.
+
+El proveedor envía un archivo (CSV/XLSX) con código y nuevo precio de
+costo. Las líneas se guardan en ``listas_precio_items`` y la diferencia con
+los precios actuales se calcula en SQL con un JOIN contra ``productos``
+(productos activos del proveedor, por código): el resumen, la muestra y la
+aplicación son una query cada uno, sin cargar productos en Python.
+
+Al aplicar, el precio de venta se recalcula para conservar el margen de
+cada producto (``venta * costo_nuevo / costo_anterior``); los productos con
+costo anterior cero solo actualizan el costo. Solo se escriben las filas
+cuyo costo cambia, con un ``INSERT ... SELECT`` de auditoría en
+``actualizaciones_precio`` (un lote por lista) y un ``UPDATE ... FROM``
+sobre productos.
+"""
+
+import json
+import os
+
+from sqlalchemy import Float, and_, case, cast, func, insert, literal, select, update
+
+from ..extensions import db
+from ..models import (
+    ActualizacionPrecio,
+    ListaPrecioItem,
+    ListaPrecioProveedor,
+    LoteActualizacionPrecio,
+    Producto,
+)
+from ..utils.helpers import ahora_argentina
+from . import importacion_service
+from .lectura_service import FilaLectura
+
+# Encabezado normalizado -> campo. En la lista del proveedor el "precio" es
+# nuestro costo.
+COLUMNAS = {
+    'codigo': 'codigo',
+    'codigo_proveedor': 'codigo',
+    'costo': 'precio_costo',
+    'precio_costo': 'precio_costo',
+    'precio': 'precio_costo',
+    'precio_lista': 'precio_costo',
+    'precio_neto': 'precio_costo',
+}
+
+MAX_ERRORES_GUARDADOS = 200
+
+MUESTRA_POR_DEFECTO = 100
+
+
+def _es_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def _dividir(dividendo, divisor):
+    # SQLite guarda los Numeric enteros como INTEGER y dividiría sin decimales
+    if _es_postgresql():
+        return dividendo / divisor
+    return cast(dividendo, Float) / divisor
+
+
+# ─── Carga ───────────────────────────────────────────────────────────
+
+
+def cargar_lista(archivo, proveedor_id, empresa_id, usuario_id):
+    """
+    Lee la lista de precios subida y guarda sus líneas.
+
+    Si un código se repite, gana la última línea.
+
+    Args:
+        archivo: FileStorage del formulario
+        proveedor_id: ID del proveedor (ya validado contra la empresa)
+        empresa_id: ID de la empresa
+        usuario_id: ID del usuario que carga la lista
+
+    Returns:
+        ListaPrecioProveedor pendiente (con commit)
+
+    Raises:
+        ValueError: Si el formato o el encabezado son inválidos, o si no
+            hay ninguna línea válida
+    """
+    ruta, formato = importacion_service.guardar_archivo(archivo)
+    items = {}
+    errores = []
+    try:
+        campos, filas = importacion_service.abrir_archivo(ruta, formato, COLUMNAS)
+        if 'precio_costo' not in campos:
+            filas.close()
+            raise ValueError('El archivo debe tener una columna "costo" o "precio".')
+
+        for numero, datos in filas:
+            codigo = importacion_service.leer_texto(datos.get('codigo'))
+            try:
+                costo = importacion_service.leer_decimal(datos.get('precio_costo'), 'precio_costo')
+                if not codigo:
+                    raise ValueError('codigo: es requerido')
+                if len(codigo) > 20:
+                    raise ValueError('codigo: supera 20 caracteres')
+                if costo is None:
+                    raise ValueError('precio_costo: es requerido')
+            except ValueError as e:
+                errores.append([numero, str(e)])
+                continue
+            items[codigo] = (numero, costo)
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError('No se pudo leer el archivo. Verificá que sea un CSV o XLSX válido.')
+    finally:
+        os.remove(ruta)
+
+    if not items:
+        raise ValueError('El archivo no tiene líneas válidas.')
+
+    lista = ListaPrecioProveedor(
+        empresa_id=empresa_id,
+        proveedor_id=proveedor_id,
+        usuario_id=usuario_id,
+        nombre_archivo=archivo.filename,
+        cantidad_items=len(items),
+        con_error=len(errores),
+        errores=json.dumps(errores[:MAX_ERRORES_GUARDADOS], ensure_ascii=False)
+        if errores
+        else None,
+    )
+    db.session.add(lista)
+    db.session.flush()
+    db.session.execute(
+        insert(ListaPrecioItem),
+        [
+            {'lista_id': lista.id, 'fila': numero, 'codigo': codigo, 'precio_costo': costo}
+            for codigo, (numero, costo) in items.items()
+        ],
+    )
+    db.session.commit()
+    return lista
+
+
+# ─── Diferencias ─────────────────────────────────────────────────────
+
+
+class FilaDiferencia(FilaLectura):
+    """Producto cuyo costo cambia con la lista."""
+
+    __slots__ = (
+        'producto_id',
+        'codigo',
+        'nombre',
+        'costo_anterior',
+        'costo_nuevo',
+        'venta_anterior',
+        'venta_nueva',
+    )
+
+    @property
+    def variacion(self):
+        """Variación del costo en porcentaje (None si el costo anterior es cero)."""
+        if not self.costo_anterior:
+            return None
+        return (self.costo_nuevo - self.costo_anterior) * 100 / self.costo_anterior
+
+
+def _coincidencias(lista):
+    """JOIN de las líneas de la lista con los productos activos del proveedor."""
+    return (
+        select()
+        .select_from(ListaPrecioItem)
+        .join(
+            Producto,
+            and_(
+                Producto.empresa_id == lista.empresa_id,
+                Producto.codigo == ListaPrecioItem.codigo,
+                Producto.proveedor_id == lista.proveedor_id,
+                Producto.activo.is_(True),
+            ),
+        )
+        .where(ListaPrecioItem.lista_id == lista.id)
+    )
+
+
+def _diferencias(lista):
+    """Select de los productos cuyo costo cambia, con precios anteriores y nuevos."""
+    venta_nueva = case(
+        (
+            Producto.precio_costo > 0,
+            func.round(
+                _dividir(
+                    Producto.precio_venta * ListaPrecioItem.precio_costo, Producto.precio_costo
+                ),
+                2,
+            ),
+        ),
+        else_=Producto.precio_venta,
+    )
+    return (
+        _coincidencias(lista)
+        .add_columns(
+            Producto.id.label('producto_id'),
+            Producto.codigo,
+            Producto.nombre,
+            Producto.precio_costo.label('costo_anterior'),
+            ListaPrecioItem.precio_costo.label('costo_nuevo'),
+            Producto.precio_venta.label('venta_anterior'),
+            cast(venta_nueva, Producto.precio_venta.type).label('venta_nueva'),
+        )
+        .where(ListaPrecioItem.precio_costo != Producto.precio_costo)
+    )
+
+
+def resumen(lista):
+    """
+    Resumen de la lista contra los precios actuales, calculado en SQL.
+
+    Returns:
+        Dict con ``items``, ``sin_producto`` (códigos que no son productos
+        activos del proveedor), ``sin_cambio``, ``cambios``, ``suben``,
+        ``bajan``, ``sin_margen`` (costo anterior cero: solo cambia el
+        costo) y ``variacion_promedio`` (% de costo, o None)
+    """
+    coinciden = db.session.execute(_coincidencias(lista).add_columns(func.count())).scalar_one()
+
+    diferencias = _diferencias(lista).subquery()
+    variacion = case(
+        (
+            diferencias.c.costo_anterior > 0,
+            _dividir(
+                (diferencias.c.costo_nuevo - diferencias.c.costo_anterior) * 100,
+                diferencias.c.costo_anterior,
+            ),
+        ),
+    )
+    fila = db.session.execute(
+        select(
+            func.count().label('cambios'),
+            func.coalesce(
+                func.sum(case((diferencias.c.costo_nuevo > diferencias.c.costo_anterior, 1))), 0
+            ).label('suben'),
+            func.coalesce(
+                func.sum(case((diferencias.c.costo_nuevo < diferencias.c.costo_anterior, 1))), 0
+            ).label('bajan'),
+            func.coalesce(func.sum(case((diferencias.c.costo_anterior == 0, 1))), 0).label(
+                'sin_margen'
+            ),
+            func.avg(variacion).label('variacion_promedio'),
+        ).select_from(diferencias)
+    ).one()
+
+    return {
+        'items': lista.cantidad_items,
+        'sin_producto': lista.cantidad_items - coinciden,
+        'sin_cambio': coinciden - fila.cambios,
+        'cambios': fila.cambios,
+        'suben': fila.suben,
+        'bajan': fila.bajan,
+        'sin_margen': fila.sin_margen,
+        'variacion_promedio': (
+            round(float(fila.variacion_promedio), 2)
+            if fila.variacion_promedio is not None
+            else None
+        ),
+    }
+
+
+def muestra(lista, limite=MUESTRA_POR_DEFECTO):
+    """Primeros ``limite`` productos que cambian, por nombre."""
+    consulta = _diferencias(lista).order_by(Producto.nombre, Producto.id).limit(limite)
+    return [FilaDiferencia.desde_fila(fila) for fila in db.session.execute(consulta)]
+
+
+# ─── Aplicación ──────────────────────────────────────────────────────
+
+
+def aplicar_lista(lista, usuario_id):
+    """
+    Aplica la lista: actualiza solo los productos cuyo costo cambia.
+
+    La diferencia se recalcula al aplicar, contra los precios de ese
+    momento. La lista genera un lote de auditoría (tipo 'proveedor', sin
+    porcentaje común: la variación es la del costo de cada producto) con
+    un registro por producto actualizado.
+
+    Args:
+        lista: ListaPrecioProveedor pendiente
+        usuario_id: ID del usuario que aplica
+
+    Returns:
+        Cantidad de productos actualizados
+
+    Raises:
+        ValueError: Si la lista ya fue aplicada o descartada
+    """
+    tomada = db.session.execute(
+        update(ListaPrecioProveedor)
+        .where(ListaPrecioProveedor.id == lista.id, ListaPrecioProveedor.estado == 'pendiente')
+        .values(estado='aplicada', aplicada_at=ahora_argentina())
+    )
+    if tomada.rowcount != 1:
+        db.session.rollback()
+        raise ValueError('La lista ya fue aplicada o descartada.')
+
+    ahora = ahora_argentina()
+    diferencias = _diferencias(lista).subquery()
+    notas = f'Lista de precios {lista.proveedor.nombre}: {lista.nombre_archivo}'
+
+    lote = LoteActualizacionPrecio(
+        empresa_id=lista.empresa_id,
+        usuario_id=usuario_id,
+        fecha=ahora,
+        tipo='proveedor',
+        actualizo_costo=True,
+        notas=notas,
+    )
+    db.session.add(lote)
+    db.session.flush()
+
+    # Auditoría antes del UPDATE: la subconsulta lee los precios anteriores
+    db.session.execute(
+        insert(ActualizacionPrecio).from_select(
+            [
+                'lote_id',
+                'producto_id',
+                'fecha',
+                'precio_costo_anterior',
+                'precio_costo_nuevo',
+                'precio_venta_anterior',
+                'precio_venta_nuevo',
+            ],
+            select(
+                literal(lote.id),
+                diferencias.c.producto_id,
+                literal(ahora),
+                diferencias.c.costo_anterior,
+                diferencias.c.costo_nuevo,
+                diferencias.c.venta_anterior,
+                diferencias.c.venta_nueva,
+            ),
+        )
+    )
+
+    resultado = db.session.execute(
+        update(Producto)
+        .where(Producto.id == diferencias.c.producto_id)
+        .values(
+            precio_costo=diferencias.c.costo_nuevo,
+            precio_venta=diferencias.c.venta_nueva,
+            updated_at=ahora,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    lista.productos_actualizados = resultado.rowcount
+    lote.cantidad_productos = resultado.rowcount
+    db.session.commit()
+    return resultado.rowcount
+
+
+def descartar_lista(lista):
+    """
+    Descarta una lista pendiente sin aplicarla.
+
+    Raises:
+        ValueError: Si la lista ya fue aplicada
+    """
+    if lista.estado != 'pendiente':
+        raise ValueError('Solo se pueden descartar listas pendientes.')
+    lista.estado = 'descartada'
+    db.session.commit()
@@ -501,6 +501,11 @@ def convertir_a_venta(
     # Marcar presupuesto como convertido
     presupuesto.estado = 'convertido'
 
+    # Estadísticas de compra del cliente
+    if presupuesto.cliente:
+        presupuesto.cliente.registrar_compra(venta.total, venta.fecha)
+
+    venta.registrar_resumen()
     db.session.commit()
     return venta
 
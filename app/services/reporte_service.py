@@ -0,0 +1,574 @@
+"""Servicio de reportes: agregados de ventas y stock, y ejecución concurrente de consultas."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+
+from flask import current_app
+from sqlalchemy import case, func, select, text, tuple_
+
+from ..extensions import db
+from ..models import Categoria, Cliente, Producto, Venta, VentaDetalle, VentaPago, VersionDatos
+from ..utils.helpers import ahora_argentina
+
+FORMA_PAGO_LABELS = {
+    'efectivo': 'Efectivo',
+    'tarjeta_debito': 'Tarjeta Debito',
+    'tarjeta_credito': 'Tarjeta Credito',
+    'transferencia': 'Transferencia',
+    'qr': 'QR',
+    'cuenta_corriente': 'Cuenta Corriente',
+}
+
+SEGMENTOS_CLIENTES = {
+    'activos': 'Activos (últimos 30 días)',
+    'en_riesgo': 'En riesgo (31 a 90 días)',
+    'inactivos': 'Inactivos (más de 90 días)',
+    'sin_compras': 'Sin compras',
+}
+
+STOCK_POR_PAGINA = 50
+
+
+def ejecutar_consultas(consultas, max_workers=None):
+    """Ejecuta consultas de reporte independientes entre sí.
+
+    En PostgreSQL cada consulta corre en su propia conexión del pool, en
+    paralelo, y todas comparten el mismo snapshot de solo lectura
+    (``pg_export_snapshot``), por lo que los resultados son consistentes
+    entre sí aunque entren ventas mientras se calcula el reporte.
+    En otros motores (SQLite en tests) se ejecutan en serie sobre la
+    conexión de la sesión actual.
+
+    Args:
+        consultas: dict {nombre: callable(conn)} donde cada callable recibe
+            una ``Connection`` de SQLAlchemy y retorna un resultado Python.
+        max_workers: cantidad máxima de hilos (default ``REPORTES_MAX_WORKERS``).
+
+    Returns:
+        dict {nombre: resultado}
+    """
+    if max_workers is None:
+        max_workers = current_app.config.get('REPORTES_MAX_WORKERS', 4)
+
+    engine = db.engine
+    if engine.dialect.name != 'postgresql' or max_workers < 2 or len(consultas) < 2:
+        conn = db.session.connection()
+        return {nombre: consulta(conn) for nombre, consulta in consultas.items()}
+
+    opciones = {'isolation_level': 'REPEATABLE READ', 'postgresql_readonly': True}
+
+    with engine.connect().execution_options(**opciones) as coordinador:
+        # El snapshot exportado vive mientras la transacción del coordinador siga abierta
+        snapshot = coordinador.execute(text('SELECT pg_export_snapshot()')).scalar()
+
+        def _ejecutar(consulta):
+            with engine.connect().execution_options(**opciones) as conn:
+                conn.execute(text('SET TRANSACTION SNAPSHOT :snapshot'), {'snapshot': snapshot})
+                return consulta(conn)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(consultas))) as executor:
+            futuros = {
+                nombre: executor.submit(_ejecutar, consulta)
+                for nombre, consulta in consultas.items()
+            }
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+
+def rango_del_dia(dia):
+    """Retorna (inicio, fin) datetime que cubren el día completo."""
+    return (
+        datetime.combine(dia, datetime.min.time()),
+        datetime.combine(dia, datetime.max.time()),
+    )
+
+
+def _filtros_ventas(empresa_id, inicio, fin):
+    """Filtros comunes para ventas completadas de una empresa en un rango."""
+    return (
+        Venta.empresa_id == empresa_id,
+        Venta.fecha >= inicio,
+        Venta.fecha <= fin,
+        Venta.estado == 'completada',
+    )
+
+
+# ---------------------------------------------------------------------------
+# Consultas individuales (reciben una Connection)
+# ---------------------------------------------------------------------------
+
+
+def consulta_resumen_ventas(conn, empresa_id, inicio, fin):
+    """Total y cantidad de ventas completadas en el rango."""
+    fila = conn.execute(
+        select(
+            func.coalesce(func.sum(Venta.total), 0).label('total'),
+            func.count(Venta.id).label('cantidad'),
+        ).where(*_filtros_ventas(empresa_id, inicio, fin))
+    ).one()
+    return {'total': fila.total, 'cantidad': fila.cantidad}
+
+
+def consulta_ventas_por_dia(conn, empresa_id, inicio, fin):
+    """Total y cantidad de ventas agrupadas por día."""
+    dia = func.date(Venta.fecha)
+    filas = conn.execute(
+        select(
+            dia.label('fecha'),
+            func.sum(Venta.total).label('total'),
+            func.count(Venta.id).label('cantidad'),
+        )
+        .where(*_filtros_ventas(empresa_id, inicio, fin))
+        .group_by(dia)
+        .order_by(dia)
+    ).all()
+    return [
+        {
+            'fecha': str(fila.fecha),
+            'total': float(fila.total) if fila.total else 0,
+            'cantidad': fila.cantidad,
+        }
+        for fila in filas
+    ]
+
+
+def consulta_ventas_por_forma_pago(conn, empresa_id, inicio, fin):
+    """Ventas agrupadas por forma de pago (VentaPago distribuye los divididos)."""
+    filas = conn.execute(
+        select(
+            VentaPago.forma_pago,
+            func.sum(VentaPago.monto).label('total'),
+            func.count(func.distinct(VentaPago.venta_id)).label('cantidad'),
+        )
+        .join(Venta, VentaPago.venta_id == Venta.id)
+        .where(*_filtros_ventas(empresa_id, inicio, fin))
+        .group_by(VentaPago.forma_pago)
+    ).all()
+    return [
+        {
+            'forma_pago': fila.forma_pago,
+            'forma_pago_label': FORMA_PAGO_LABELS.get(fila.forma_pago, fila.forma_pago),
+            'total': float(fila.total) if fila.total else 0,
+            'cantidad': fila.cantidad,
+        }
+        for fila in filas
+    ]
+
+
+def consulta_productos_mas_vendidos(conn, empresa_id, inicio, fin, limite=10):
+    """Productos por monto vendido en el rango (todos si ``limite`` es None)."""
+    stmt = (
+        select(
+            Producto.id,
+            Producto.nombre,
+            Producto.unidad_medida,
+            func.sum(VentaDetalle.cantidad).label('cantidad'),
+            func.sum(VentaDetalle.subtotal).label('total'),
+        )
+        .join(VentaDetalle, Producto.id == VentaDetalle.producto_id)
+        .join(Venta, VentaDetalle.venta_id == Venta.id)
+        .where(*_filtros_ventas(empresa_id, inicio, fin))
+        .group_by(Producto.id, Producto.nombre, Producto.unidad_medida)
+        .order_by(func.sum(VentaDetalle.subtotal).desc())
+    )
+    if limite is not None:
+        stmt = stmt.limit(limite)
+    return [
+        {
+            'producto_id': fila.id,
+            'nombre': fila.nombre,
+            'unidad_medida': fila.unidad_medida,
+            'cantidad': float(fila.cantidad) if fila.cantidad else 0,
+            'total': float(fila.total) if fila.total else 0,
+        }
+        for fila in conn.execute(stmt).all()
+    ]
+
+
+def consulta_stock_bajo(conn, empresa_id, limite=5):
+    """Cantidad de productos bajo mínimo y los más críticos.
+
+    Una sola lectura del índice parcial ``ix_productos_bajo_minimo``: el
+    total sale de ``COUNT(*) OVER ()``, que se evalúa antes del LIMIT.
+    """
+    alertas = conn.execute(
+        select(
+            Producto.id,
+            Producto.nombre,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.unidad_medida,
+            func.count().over().label('total'),
+        )
+        .where(Producto.empresa_id == empresa_id, Producto.filtro_bajo_minimo())
+        .order_by(Producto.stock_actual)
+        .limit(limite)
+    ).all()
+    return {'cantidad': alertas[0].total if alertas else 0, 'alertas': alertas}
+
+
+def consulta_cuentas_por_cobrar(conn, empresa_id):
+    """Suma de saldos deudores y cantidad de clientes con deuda."""
+    fila = conn.execute(
+        select(
+            func.coalesce(func.sum(Cliente.saldo_cuenta_corriente), 0).label('total'),
+            func.count(Cliente.id).label('clientes'),
+        ).where(
+            Cliente.empresa_id == empresa_id,
+            Cliente.saldo_cuenta_corriente > 0,
+            Cliente.activo.is_(True),
+        )
+    ).one()
+    return {'total': fila.total, 'clientes': fila.clientes}
+
+
+def consulta_top_clientes(conn, empresa_id, limite=20):
+    """Clientes con mayor total comprado (usa las estadísticas mantenidas)."""
+    return conn.execute(
+        select(
+            Cliente.id,
+            Cliente.nombre,
+            Cliente.total_comprado,
+            Cliente.cantidad_compras,
+            Cliente.fecha_ultima_compra,
+        )
+        .where(
+            Cliente.empresa_id == empresa_id,
+            Cliente.activo.is_(True),
+            Cliente.cantidad_compras > 0,
+        )
+        .order_by(Cliente.total_comprado.desc(), Cliente.id)
+        .limit(limite)
+    ).all()
+
+
+def consulta_clientes_deudores(conn, empresa_id, limite=20):
+    """Clientes activos con mayor saldo de cuenta corriente."""
+    return conn.execute(
+        select(
+            Cliente.id,
+            Cliente.nombre,
+            Cliente.telefono,
+            Cliente.saldo_cuenta_corriente,
+            Cliente.limite_credito,
+        )
+        .where(
+            Cliente.empresa_id == empresa_id,
+            Cliente.activo.is_(True),
+            Cliente.saldo_cuenta_corriente > 0,
+        )
+        .order_by(Cliente.saldo_cuenta_corriente.desc())
+        .limit(limite)
+    ).all()
+
+
+def consulta_segmentos_clientes(conn, empresa_id, hoy):
+    """Cantidad de clientes por antigüedad de su última compra.
+
+    Segmentos: activos (hasta 30 días), en riesgo (31 a 90 días),
+    inactivos (más de 90 días) y sin compras.
+    """
+    inicio_hoy, _ = rango_del_dia(hoy)
+    hace_30 = inicio_hoy - timedelta(days=30)
+    hace_90 = inicio_hoy - timedelta(days=90)
+    ultima = Cliente.fecha_ultima_compra
+    segmento = case(
+        (ultima.is_(None), 'sin_compras'),
+        (ultima >= hace_30, 'activos'),
+        (ultima >= hace_90, 'en_riesgo'),
+        else_='inactivos',
+    ).label('segmento')
+    filas = conn.execute(
+        select(segmento, func.count(Cliente.id))
+        .where(Cliente.empresa_id == empresa_id, Cliente.activo.is_(True))
+        .group_by(segmento)
+    ).all()
+    resultado = dict.fromkeys(SEGMENTOS_CLIENTES, 0)
+    resultado.update({fila[0]: fila[1] for fila in filas})
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Reportes compuestos
+# ---------------------------------------------------------------------------
+
+
+def _calcular_agregados_ventas(empresa_id, inicio, fin):
+    """Calcula los agregados combinables del reporte de ventas para un rango."""
+    return ejecutar_consultas(
+        {
+            'resumen': partial(
+                consulta_resumen_ventas, empresa_id=empresa_id, inicio=inicio, fin=fin
+            ),
+            'por_dia': partial(
+                consulta_ventas_por_dia, empresa_id=empresa_id, inicio=inicio, fin=fin
+            ),
+            'por_forma_pago': partial(
+                consulta_ventas_por_forma_pago, empresa_id=empresa_id, inicio=inicio, fin=fin
+            ),
+            'productos': partial(
+                consulta_productos_mas_vendidos,
+                empresa_id=empresa_id,
+                inicio=inicio,
+                fin=fin,
+                limite=None,
+            ),
+        }
+    )
+
+
+def _agregados_ventas_cacheados(empresa_id, inicio, fin):
+    """Agregados de un rango histórico, servidos desde cache mientras no cambie su versión."""
+    version = VersionDatos.version_rango(empresa_id, inicio, fin)
+    clave = ('ventas', empresa_id, inicio, fin, version)
+    return current_app.extensions['cache_reportes'].obtener_o_calcular(
+        clave, lambda: _calcular_agregados_ventas(empresa_id, inicio, fin)
+    )
+
+
+def _sumar_por_clave(filas_a, filas_b, clave):
+    """Combina dos listas de dicts sumando ``total`` y ``cantidad`` por ``clave``."""
+    combinadas = {fila[clave]: dict(fila) for fila in filas_a}
+    for fila in filas_b:
+        if fila[clave] in combinadas:
+            combinadas[fila[clave]]['total'] += fila['total']
+            combinadas[fila[clave]]['cantidad'] += fila['cantidad']
+        else:
+            combinadas[fila[clave]] = dict(fila)
+    return sorted(combinadas.values(), key=lambda fila: fila['total'], reverse=True)
+
+
+def _combinar_agregados_ventas(anterior, posterior):
+    """Combina agregados de dos rangos consecutivos y disjuntos (sin mutarlos)."""
+    return {
+        'resumen': {
+            'total': anterior['resumen']['total'] + posterior['resumen']['total'],
+            'cantidad': anterior['resumen']['cantidad'] + posterior['resumen']['cantidad'],
+        },
+        'por_dia': anterior['por_dia'] + posterior['por_dia'],
+        'por_forma_pago': _sumar_por_clave(
+            anterior['por_forma_pago'], posterior['por_forma_pago'], 'forma_pago'
+        ),
+        'productos': _sumar_por_clave(anterior['productos'], posterior['productos'], 'producto_id'),
+    }
+
+
+def reporte_ventas(empresa_id, inicio, fin, limite_productos=10):
+    """Calcula el reporte de ventas para un rango.
+
+    La porción del rango anterior a hoy se sirve desde el cache de reportes
+    (clave: empresa, rango y versión de datos de los meses cubiertos) y sólo
+    se recalcula el día de hoy, que se combina con el resultado cacheado.
+
+    Returns:
+        dict con total_ventas, cantidad_ventas, ticket_promedio,
+        ventas_por_dia, ventas_por_forma_pago y productos_mas_vendidos.
+    """
+    inicio_hoy, _ = rango_del_dia(ahora_argentina().date())
+
+    if inicio >= inicio_hoy:
+        agregados = _calcular_agregados_ventas(empresa_id, inicio, fin)
+    else:
+        fin_historico = min(fin, inicio_hoy - timedelta(microseconds=1))
+        agregados = _agregados_ventas_cacheados(empresa_id, inicio, fin_historico)
+        if fin >= inicio_hoy:
+            agregados = _combinar_agregados_ventas(
+                agregados, _calcular_agregados_ventas(empresa_id, inicio_hoy, fin)
+            )
+
+    total_ventas = agregados['resumen']['total']
+    cantidad_ventas = agregados['resumen']['cantidad']
+
+    return {
+        'total_ventas': total_ventas,
+        'cantidad_ventas': cantidad_ventas,
+        'ticket_promedio': total_ventas / cantidad_ventas if cantidad_ventas > 0 else 0,
+        'ventas_por_dia': agregados['por_dia'],
+        'ventas_por_forma_pago': agregados['por_forma_pago'],
+        'productos_mas_vendidos': agregados['productos'][:limite_productos],
+    }
+
+
+def invalidar_reportes(empresa_id, fecha):
+    """Invalida los reportes cacheados que cubren ``fecha``.
+
+    Debe llamarse desde toda escritura que modifique ventas de días
+    anteriores a hoy (el día actual nunca se cachea). No hace commit.
+    """
+    fecha_dia = fecha.date() if hasattr(fecha, 'date') else fecha
+    if fecha_dia < ahora_argentina().date():
+        VersionDatos.incrementar(empresa_id, fecha_dia)
+
+
+def resumen_dashboard(empresa_id, hoy):
+    """Calcula las métricas del dashboard para el día indicado.
+
+    Returns:
+        dict con ventas_hoy, operaciones_hoy, ventas_ayer, productos_bajo_stock,
+        alertas, cuentas_por_cobrar, clientes_con_deuda y ventas_diarias
+        (lista de los últimos 7 días).
+    """
+    inicio_dia, fin_dia = rango_del_dia(hoy)
+    inicio_ayer, fin_ayer = rango_del_dia(hoy - timedelta(days=1))
+    inicio_semana, _ = rango_del_dia(hoy - timedelta(days=6))
+
+    resultados = ejecutar_consultas(
+        {
+            'hoy': partial(
+                consulta_resumen_ventas, empresa_id=empresa_id, inicio=inicio_dia, fin=fin_dia
+            ),
+            'ayer': partial(
+                consulta_resumen_ventas, empresa_id=empresa_id, inicio=inicio_ayer, fin=fin_ayer
+            ),
+            'semana': partial(
+                consulta_ventas_por_dia, empresa_id=empresa_id, inicio=inicio_semana, fin=fin_dia
+            ),
+            'stock_bajo': partial(consulta_stock_bajo, empresa_id=empresa_id),
+            'cuentas': partial(consulta_cuentas_por_cobrar, empresa_id=empresa_id),
+        }
+    )
+
+    return {
+        'ventas_hoy': resultados['hoy']['total'],
+        'operaciones_hoy': resultados['hoy']['cantidad'],
+        'ventas_ayer': resultados['ayer']['total'],
+        'productos_bajo_stock': resultados['stock_bajo']['cantidad'],
+        'alertas': resultados['stock_bajo']['alertas'],
+        'cuentas_por_cobrar': resultados['cuentas']['total'],
+        'clientes_con_deuda': resultados['cuentas']['clientes'],
+        'ventas_diarias': resultados['semana'],
+    }
+
+
+def _filtros_stock(empresa_id, categoria_ids=None, solo_bajo_minimo=False):
+    """Condiciones comunes del reporte de stock."""
+    filtros = [
+        Producto.empresa_id == empresa_id,
+        Producto.filtro_bajo_minimo() if solo_bajo_minimo else Producto.activo.is_(True),
+    ]
+    if categoria_ids:
+        filtros.append(Producto.categoria_id.in_(categoria_ids))
+    return filtros
+
+
+def consulta_valuacion_stock(conn, empresa_id, categoria_ids=None, solo_bajo_minimo=False):
+    """Valor del inventario a costo y a precio de venta en un único agregado."""
+    bajo_minimo = case((Producto.stock_actual < Producto.stock_minimo, 1), else_=0)
+    fila = conn.execute(
+        select(
+            func.coalesce(func.sum(Producto.stock_actual * Producto.costo_valuacion), 0),
+            func.coalesce(func.sum(Producto.stock_actual * Producto.precio_venta), 0),
+            func.count(Producto.id),
+            func.coalesce(func.sum(bajo_minimo), 0),
+        ).where(*_filtros_stock(empresa_id, categoria_ids, solo_bajo_minimo))
+    ).one()
+    return {
+        'valor_costo': fila[0],
+        'valor_venta': fila[1],
+        'cantidad_productos': fila[2],
+        'cantidad_bajo_minimo': fila[3],
+    }
+
+
+def consulta_pagina_stock(
+    conn,
+    empresa_id,
+    categoria_ids=None,
+    solo_bajo_minimo=False,
+    despues_id=None,
+    limite=STOCK_POR_PAGINA,
+):
+    """Página del listado de stock ordenada por (nombre, id).
+
+    Usa paginación por clave (keyset): ``despues_id`` es el id del último
+    producto de la página anterior y la consulta continúa a partir de su
+    (nombre, id), sin OFFSET. Las filas se proyectan a tuplas livianas.
+
+    Returns:
+        dict con 'productos' (filas) y 'siguiente' (id para la próxima
+        página o None si es la última).
+    """
+    filtros = _filtros_stock(empresa_id, categoria_ids, solo_bajo_minimo)
+    if despues_id:
+        nombre_ultimo = conn.execute(
+            select(Producto.nombre).where(
+                Producto.id == despues_id, Producto.empresa_id == empresa_id
+            )
+        ).scalar()
+        if nombre_ultimo is not None:
+            filtros.append(tuple_(Producto.nombre, Producto.id) > (nombre_ultimo, despues_id))
+
+    filas = conn.execute(
+        select(
+            Producto.id,
+            Producto.codigo,
+            Producto.nombre,
+            Categoria.nombre.label('categoria'),
+            Producto.unidad_medida,
+            Producto.stock_actual,
+            Producto.stock_minimo,
+            Producto.costo_valuacion.label('costo'),
+            (Producto.stock_actual * Producto.costo_valuacion).label('valor_costo'),
+            (Producto.stock_actual < Producto.stock_minimo).label('bajo_minimo'),
+        )
+        .outerjoin(Categoria, Producto.categoria_id == Categoria.id)
+        .where(*filtros)
+        .order_by(Producto.nombre, Producto.id)
+        .limit(limite + 1)
+    ).all()
+
+    siguiente = filas[limite - 1].id if len(filas) > limite else None
+    return {'productos': filas[:limite], 'siguiente': siguiente}
+
+
+def reporte_stock(
+    empresa_id,
+    categoria_ids=None,
+    solo_bajo_minimo=False,
+    despues_id=None,
+    limite=STOCK_POR_PAGINA,
+):
+    """Reporte de stock: totales de valuación y una página del listado.
+
+    Returns:
+        dict con valor_costo, valor_venta, cantidad_productos,
+        cantidad_bajo_minimo, productos y siguiente.
+    """
+    filtros = {
+        'empresa_id': empresa_id,
+        'categoria_ids': categoria_ids,
+        'solo_bajo_minimo': solo_bajo_minimo,
+    }
+    resultados = ejecutar_consultas(
+        {
+            'valuacion': partial(consulta_valuacion_stock, **filtros),
+            'pagina': partial(
+                consulta_pagina_stock, despues_id=despues_id, limite=limite, **filtros
+            ),
+        }
+    )
+    return {**resultados['valuacion'], **resultados['pagina']}
+
+
+def reporte_clientes(empresa_id, hoy, limite=20):
+    """Reporte de clientes: ranking, deudores y segmentos por recencia.
+
+    Returns:
+        dict con top_clientes, clientes_deudores, total_deudas,
+        clientes_con_deuda y segmentos.
+    """
+    resultados = ejecutar_consultas(
+        {
+            'top': partial(consulta_top_clientes, empresa_id=empresa_id, limite=limite),
+            'deudores': partial(consulta_clientes_deudores, empresa_id=empresa_id, limite=limite),
+            'cuentas': partial(consulta_cuentas_por_cobrar, empresa_id=empresa_id),
+            'segmentos': partial(consulta_segmentos_clientes, empresa_id=empresa_id, hoy=hoy),
+        }
+    )
+    return {
+        'top_clientes': resultados['top'],
+        'clientes_deudores': resultados['deudores'],
+        'total_deudas': resultados['cuentas']['total'],
+        'clientes_con_deuda': resultados['cuentas']['clientes'],
+        'segmentos': resultados['segmentos'],
+    }
@@ -0,0 +1,536 @@
+"""Toma de inventario: conteo físico del stock y ajuste masivo.
+
+Los conteos se registran escaneando códigos (cada escaneo suma) o subiendo
+un archivo CSV/XLSX con código y cantidad (la cantidad reemplaza el conteo
+anterior del producto). Cada carga es un ``INSERT ... SELECT ... ON
+CONFLICT`` contra ``productos``: la línea guarda la cantidad contada y, como
+base de la diferencia, el stock del sistema en ese momento.
+
+Las diferencias, el resumen y la muestra se calculan en SQL. Al aplicar,
+cada producto con diferencia se ajusta en ``stock vigente + (contado -
+stock al contar)``: los movimientos hechos durante el conteo (ventas,
+compras) se conservan. El ajuste se hace por lotes de líneas, cada uno con
+un ``INSERT ... SELECT`` de movimientos de stock y un ``UPDATE ... FROM``
+de productos en su propia transacción.
+"""
+
+import os
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import (
+    Numeric,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+
+from ..extensions import db
+from ..models import MovimientoStock, Producto, TomaInventario, TomaInventarioItem
+from ..utils.helpers import ahora_argentina
+from . import busqueda_service, importacion_service
+from .lectura_service import FilaLectura
+
+# Encabezado normalizado -> campo del archivo de conteo
+COLUMNAS = {
+    'codigo': 'codigo',
+    'cantidad': 'stock_actual',
+    'cantidad_contada': 'stock_actual',
+    'conteo': 'stock_actual',
+    'contado': 'stock_actual',
+    'stock': 'stock_actual',
+}
+
+# Conteos por INSERT: dos parámetros por conteo, lejos del límite de SQLite
+CONTEOS_POR_CONSULTA = 5000
+
+# Líneas por transacción al aplicar
+TAMANIO_LOTE = 1000
+
+# Una aplicación 'aplicando' sin avance por este tiempo se considera caída
+TIEMPO_SIN_AVANCE = timedelta(minutes=5)
+
+MUESTRA_POR_DEFECTO = 100
+
+
+# ─── Sesión ──────────────────────────────────────────────────────────
+
+
+def crear_toma(empresa_id, usuario_id, descripcion=None):
+    """
+    Abre una toma de inventario.
+
+    Raises:
+        ValueError: Si la empresa ya tiene una toma sin cerrar
+    """
+    en_curso = (
+        TomaInventario.query.filter(
+            TomaInventario.empresa_id == empresa_id,
+            TomaInventario.estado.in_(['abierta', 'aplicando']),
+        )
+        .with_entities(TomaInventario.id)
+        .first()
+    )
+    if en_curso:
+        raise ValueError('Ya hay una toma de inventario abierta.')
+
+    toma = TomaInventario(empresa_id=empresa_id, usuario_id=usuario_id, descripcion=descripcion)
+    db.session.add(toma)
+    db.session.commit()
+    return toma
+
+
+def descartar_toma(toma):
+    """
+    Descarta una toma abierta sin ajustar el stock.
+
+    Raises:
+        ValueError: Si la toma no está abierta
+    """
+    if toma.estado != 'abierta':
+        raise ValueError('Solo se pueden descartar tomas abiertas.')
+    toma.estado = 'descartada'
+    db.session.commit()
+
+
+def _validar_abierta(toma):
+    if toma.estado != 'abierta':
+        raise ValueError('La toma de inventario ya no admite conteos.')
+
+
+# ─── Conteos ─────────────────────────────────────────────────────────
+
+
+def _insert():
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(TomaInventarioItem.__table__)
+
+
+def registrar_conteos(toma, conteos, sumar=False):
+    """
+    Registra cantidades contadas por código de producto (sin commit).
+
+    Args:
+        toma: TomaInventario abierta
+        conteos: lista de (código, cantidad) sin códigos repetidos
+        sumar: si True la cantidad se suma al conteo previo del producto
+            (escaneo); si no, lo reemplaza junto con el stock base
+
+    Los códigos que no son productos de la empresa se omiten.
+    """
+    ahora = ahora_argentina()
+    for inicio in range(0, len(conteos), CONTEOS_POR_CONSULTA):
+        tabla = (
+            values(column('codigo', String), column('cantidad', Numeric(12, 3)), name='conteos')
+            .data(conteos[inicio : inicio + CONTEOS_POR_CONSULTA])
+            .cte('conteos')
+        )
+        stmt = _insert()
+        stmt = stmt.from_select(
+            ['toma_id', 'producto_id', 'cantidad_contada', 'stock_sistema', 'contado_at'],
+            select(
+                literal(toma.id),
+                Producto.id,
+                tabla.c.cantidad,
+                Producto.stock_actual,
+                literal(ahora),
+            )
+            .select_from(tabla)
+            .join(Producto, Producto.codigo == tabla.c.codigo)
+            # SQLite exige un WHERE en el SELECT de un upsert
+            .where(Producto.empresa_id == toma.empresa_id),
+        )
+        if sumar:
+            cambios = {
+                'cantidad_contada': stmt.table.c.cantidad_contada + stmt.excluded.cantidad_contada,
+            }
+        else:
+            cambios = {
+                'cantidad_contada': stmt.excluded.cantidad_contada,
+                'stock_sistema': stmt.excluded.stock_sistema,
+                'contado_at': stmt.excluded.contado_at,
+            }
+        stmt = stmt.on_conflict_do_update(index_elements=['toma_id', 'producto_id'], set_=cambios)
+        db.session.execute(stmt)
+
+
+def escanear(toma, codigo, cantidad=1):
+    """
+    Suma un escaneo al conteo del producto.
+
+    Returns:
+        Tupla (tarjeta del producto, cantidad contada acumulada)
+
+    Raises:
+        ValueError: Si la toma no está abierta o el código no es de un
+            producto activo
+    """
+    _validar_abierta(toma)
+    tarjeta = busqueda_service.resolver_codigo(toma.empresa_id, codigo)
+    if tarjeta is None:
+        raise ValueError(f'No hay un producto activo con el código "{codigo}".')
+
+    registrar_conteos(toma, [(tarjeta['codigo'], cantidad)], sumar=True)
+    db.session.commit()
+    contado = db.session.execute(
+        select(TomaInventarioItem.cantidad_contada).where(
+            TomaInventarioItem.toma_id == toma.id,
+            TomaInventarioItem.producto_id == tarjeta['id'],
+        )
+    ).scalar_one()
+    return tarjeta, contado
+
+
+def _codigos_existentes(empresa_id, codigos):
+    existentes = set()
+    for inicio in range(0, len(codigos), CONTEOS_POR_CONSULTA):
+        existentes.update(
+            db.session.execute(
+                select(Producto.codigo).where(
+                    Producto.empresa_id == empresa_id,
+                    Producto.codigo.in_(codigos[inicio : inicio + CONTEOS_POR_CONSULTA]),
+                )
+            ).scalars()
+        )
+    return existentes
+
+
+def cargar_conteos(toma, archivo):
+    """
+    Lee un archivo de conteo (código y cantidad) y registra sus líneas.
+
+    Si un código se repite, gana la última línea. La cantidad reemplaza el
+    conteo previo del producto.
+
+    Args:
+        toma: TomaInventario abierta
+        archivo: FileStorage del formulario
+
+    Returns:
+        Cantidad de productos registrados (con commit)
+
+    Raises:
+        ValueError: Si la toma no está abierta, el formato o el encabezado
+            son inválidos, o si no hay ninguna línea válida
+    """
+    _validar_abierta(toma)
+    ruta, formato = importacion_service.guardar_archivo(archivo)
+    conteos = {}
+    errores = []
+    try:
+        campos, filas = importacion_service.abrir_archivo(ruta, formato, COLUMNAS)
+        if 'stock_actual' not in campos:
+            filas.close()
+            raise ValueError('El archivo debe tener una columna "cantidad".')
+
+        for numero, datos in filas:
+            codigo = importacion_service.leer_texto(datos.get('codigo'))
+            try:
+                cantidad = importacion_service.leer_decimal(
+                    datos.get('stock_actual'), 'stock_actual'
+                )
+                if not codigo:
+                    raise ValueError('codigo: es requerido')
+                if cantidad is None:
+                    raise ValueError('cantidad: es requerida')
+            except ValueError as e:
+                errores.append([numero, str(e)])
+                continue
+            conteos[codigo] = (numero, cantidad)
+    except ValueError:
+        raise
+    except Exception:
+        raise ValueError('No se pudo leer el archivo. Verificá que sea un CSV o XLSX válido.')
+    finally:
+        os.remove(ruta)
+
+    existentes = _codigos_existentes(toma.empresa_id, list(conteos))
+    for codigo, (numero, _) in conteos.items():
+        if codigo not in existentes:
+            errores.append([numero, f'codigo: no hay un producto con el código "{codigo}"'])
+    if not existentes:
+        raise ValueError('El archivo no tiene líneas con productos válidos.')
+
+    validos = [
+        (codigo, cantidad) for codigo, (_, cantidad) in conteos.items() if codigo in existentes
+    ]
+    registrar_conteos(toma, validos)
+    toma.agregar_errores(sorted(errores))
+    db.session.commit()
+    return len(validos)
+
+
+# ─── Diferencias ─────────────────────────────────────────────────────
+
+
+class FilaDiferenciaConteo(FilaLectura):
+    """Producto cuyo conteo difiere del stock al contarlo."""
+
+    __slots__ = (
+        'producto_id',
+        'codigo',
+        'nombre',
+        'unidad_medida',
+        'precio_costo',
+        'stock_sistema',
+        'cantidad_contada',
+        'diferencia',
+        'stock_actual',
+    )
+
+    @property
+    def valor(self):
+        """Diferencia valuada al costo actual."""
+        return self.diferencia * (self.precio_costo or 0)
+
+    @property
+    def stock_resultante(self):
+        """Stock que queda al aplicar (sin bajar de cero)."""
+        return max(self.stock_actual + self.diferencia, 0)
+
+
+def _diferencia():
+    return TomaInventarioItem.cantidad_contada - TomaInventarioItem.stock_sistema
+
+
+def _diferencias(toma):
+    """Select de las líneas con diferencia, con los datos del producto."""
+    return (
+        select(
+            Producto.id.label('producto_id'),
+            Producto.codigo,
+            Producto.nombre,
+            Producto.unidad_medida,
+            Producto.precio_costo,
+            TomaInventarioItem.stock_sistema,
+            TomaInventarioItem.cantidad_contada,
+            _diferencia().label('diferencia'),
+            Producto.stock_actual,
+        )
+        .join(Producto, Producto.id == TomaInventarioItem.producto_id)
+        .where(
+            TomaInventarioItem.toma_id == toma.id,
+            TomaInventarioItem.cantidad_contada != TomaInventarioItem.stock_sistema,
+        )
+    )
+
+
+def resumen(toma):
+    """
+    Resumen de la toma contra el stock del sistema, calculado en SQL.
+
+    Returns:
+        Dict con ``contados``, ``con_diferencia``, ``sobrantes`` y
+        ``faltantes`` (productos), ``unidades_sobrantes`` y
+        ``unidades_faltantes``, ``valor_sobrantes``, ``valor_faltantes`` y
+        ``valor_neto`` (al costo actual) y ``movidos`` (productos con
+        movimientos de stock después de contarlos)
+    """
+    diferencia = _diferencia()
+    valor = diferencia * Producto.precio_costo
+    sobra = diferencia > 0
+    falta = diferencia < 0
+    fila = db.session.execute(
+        select(
+            func.count().label('contados'),
+            func.coalesce(func.sum(case((diferencia != 0, 1))), 0).label('con_diferencia'),
+            func.coalesce(func.sum(case((sobra, 1))), 0).label('sobrantes'),
+            func.coalesce(func.sum(case((falta, 1))), 0).label('faltantes'),
+            func.coalesce(func.sum(case((sobra, diferencia))), 0).label('unidades_sobrantes'),
+            func.coalesce(func.sum(case((falta, -diferencia))), 0).label('unidades_faltantes'),
+            func.coalesce(func.sum(case((sobra, valor))), 0).label('valor_sobrantes'),
+            func.coalesce(func.sum(case((falta, -valor))), 0).label('valor_faltantes'),
+            func.coalesce(
+                func.sum(case((Producto.stock_actual != TomaInventarioItem.stock_sistema, 1))), 0
+            ).label('movidos'),
+        )
+        .select_from(TomaInventarioItem)
+        .join(Producto, Producto.id == TomaInventarioItem.producto_id)
+        .where(TomaInventarioItem.toma_id == toma.id)
+    ).one()
+
+    datos = dict(fila._mapping)
+    datos['valor_neto'] = datos['valor_sobrantes'] - datos['valor_faltantes']
+    return datos
+
+
+def muestra(toma, limite=MUESTRA_POR_DEFECTO):
+    """Primeras ``limite`` diferencias, de mayor a menor valor absoluto."""
+    consulta = (
+        _diferencias(toma)
+        .order_by(
+            func.abs(_diferencia() * Producto.precio_costo).desc(),
+            Producto.nombre,
+            Producto.id,
+        )
+        .limit(limite)
+    )
+    return [FilaDiferenciaConteo.desde_fila(fila) for fila in db.session.execute(consulta)]
+
+
+# ─── Aplicación ──────────────────────────────────────────────────────
+
+
+def _tomar(toma_id):
+    """Marca la toma como 'aplicando' si está abierta o su aplicación quedó caída."""
+    ahora = ahora_argentina()
+    resultado = db.session.execute(
+        update(TomaInventario)
+        .where(
+            TomaInventario.id == toma_id,
+            or_(
+                TomaInventario.estado == 'abierta',
+                and_(
+                    TomaInventario.estado == 'aplicando',
+                    or_(
+                        TomaInventario.mensaje.isnot(None),
+                        TomaInventario.updated_at < ahora - TIEMPO_SIN_AVANCE,
+                    ),
+                ),
+            ),
+        )
+        .values(estado='aplicando', mensaje=None, updated_at=ahora)
+    )
+    db.session.commit()
+    return resultado.rowcount == 1
+
+
+def _aplicar_lote(toma, desde, hasta, usuario_id):
+    """Ajusta el stock de las líneas con id en (desde, hasta] (sin commit)."""
+    en_lote = and_(
+        TomaInventarioItem.toma_id == toma.id,
+        TomaInventarioItem.id > desde,
+        TomaInventarioItem.id <= hasta,
+        TomaInventarioItem.cantidad_contada != TomaInventarioItem.stock_sistema,
+    )
+    # Bloquea los productos del lote: el stock leído es el que se actualiza
+    db.session.execute(
+        select(Producto.id)
+        .where(Producto.id.in_(select(TomaInventarioItem.producto_id).where(en_lote)))
+        .with_for_update()
+    )
+
+    nuevo = func.round(Producto.stock_actual + _diferencia(), 3)
+    ajustes = (
+        select(
+            Producto.id.label('producto_id'),
+            Producto.stock_actual.label('anterior'),
+            case((nuevo < 0, 0), else_=nuevo).label('posterior'),
+        )
+        .join(TomaInventarioItem, TomaInventarioItem.producto_id == Producto.id)
+        .where(en_lote)
+        .subquery()
+    )
+    cambios = select(ajustes).where(ajustes.c.posterior != ajustes.c.anterior).subquery()
+
+    ahora = ahora_argentina()
+    db.session.execute(
+        insert(MovimientoStock).from_select(
+            [
+                'producto_id',
+                'tipo',
+                'cantidad',
+                'stock_anterior',
+                'stock_posterior',
+                'referencia_tipo',
+                'referencia_id',
+                'motivo',
+                'usuario_id',
+                'empresa_id',
+                'created_at',
+            ],
+            select(
+                cambios.c.producto_id,
+                cast(
+                    case(
+                        (cambios.c.posterior > cambios.c.anterior, 'ajuste_positivo'),
+                        else_='ajuste_negativo',
+                    ),
+                    MovimientoStock.tipo.type,
+                ),
+                cambios.c.posterior - cambios.c.anterior,
+                cambios.c.anterior,
+                cambios.c.posterior,
+                literal('toma_inventario'),
+                literal(toma.id),
+                literal(f'Toma de inventario #{toma.id}'),
+                literal(usuario_id),
+                literal(toma.empresa_id),
+                literal(ahora),
+            ),
+        )
+    )
+    resultado = db.session.execute(
+        update(Producto)
+        .where(Producto.id == cambios.c.producto_id)
+        .values(stock_actual=cambios.c.posterior, updated_at=ahora)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def aplicar_toma(toma, usuario_id, tamanio_lote=TAMANIO_LOTE):
+    """
+    Aplica (o reanuda) la toma: ajusta el stock de los productos con diferencia.
+
+    Cada producto queda en ``stock vigente + (contado - stock al contar)``,
+    sin bajar de cero, con un movimiento de ajuste por producto. Cada lote
+    de líneas se confirma por separado junto con el avance.
+
+    Args:
+        toma: TomaInventario abierta (o con la aplicación interrumpida)
+        usuario_id: ID del usuario que aplica
+        tamanio_lote: Líneas por lote (un commit por lote)
+
+    Returns:
+        Cantidad de productos ajustados en total
+
+    Raises:
+        ValueError: Si la toma ya fue aplicada, descartada o se está
+            aplicando, o si la aplicación se interrumpe (lo aplicado hasta
+            el último lote queda confirmado)
+    """
+    if not _tomar(toma.id):
+        raise ValueError('La toma de inventario ya fue aplicada o se está aplicando.')
+
+    try:
+        while True:
+            lote = (
+                select(TomaInventarioItem.id)
+                .where(
+                    TomaInventarioItem.toma_id == toma.id,
+                    TomaInventarioItem.id > toma.ultimo_item_id,
+                )
+                .order_by(TomaInventarioItem.id)
+                .limit(tamanio_lote)
+                .subquery()
+            )
+            hasta = db.session.execute(select(func.max(lote.c.id))).scalar()
+            if hasta is None:
+                break
+            toma.productos_ajustados += _aplicar_lote(toma, toma.ultimo_item_id, hasta, usuario_id)
+            toma.ultimo_item_id = hasta
+            db.session.commit()
+
+        toma.estado = 'aplicada'
+        toma.aplicada_at = ahora_argentina()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Error al aplicar la toma de inventario %s', toma.id)
+        toma.mensaje = 'La aplicación se interrumpió. Podés reanudarla.'
+        db.session.commit()
+        raise ValueError(toma.mensaje)
+    return toma.productos_ajustados
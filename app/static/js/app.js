@@ -302,6 +302,175 @@ function debounce(func, wait) {
     };
 }
 
+// Copia local del catálogo (IndexedDB) para buscar productos sin ir al servidor.
+// Se mantiene al día pidiendo solo los cambios a /productos/api/sync
+// (ver services/catalogo_service.py). Mientras no terminó la primera
+// sincronización, buscar() retorna null y el llamador usa el servidor.
+const CatalogoLocal = {
+    db: null,
+    url: null,
+    productos: new Map(),   // id -> producto
+    porCodigo: new Map(),   // código o código de barras -> id
+    listo: false,
+    sincronizando: false,
+
+    normalizar(texto) {
+        return (texto || '').normalize('NFD').replace(/[̀-ͯ]/g, '').toLowerCase().trim();
+    },
+
+    async iniciar(empresaId, url, intervaloMs = 60000) {
+        if (!('indexedDB' in window)) {
+            return;
+        }
+        try {
+            this.url = url;
+            this.db = await this._abrir(`ferrerp-catalogo-${empresaId}`);
+            const guardados = await this._esperar(
+                this.db.transaction('productos').objectStore('productos').getAll()
+            );
+            guardados.forEach((producto) => this._agregar(producto));
+            await this.sincronizar();
+            setInterval(() => this.sincronizar(), intervaloMs);
+        } catch (error) {
+            console.error('Catálogo local no disponible:', error);
+            this.listo = false;
+        }
+    },
+
+    async sincronizar() {
+        if (this.sincronizando || !this.db) {
+            return;
+        }
+        this.sincronizando = true;
+        try {
+            let cursor = await this._esperar(
+                this.db.transaction('meta').objectStore('meta').get('cursor')
+            );
+            let completo = false;
+            while (!completo) {
+                const params = new URLSearchParams();
+                if (cursor) {
+                    params.set('desde', cursor);
+                }
+                const response = await fetch(`${this.url}?${params}`);
+                if (!response.ok) {
+                    return;
+                }
+                const datos = await response.json();
+
+                const tx = this.db.transaction(['productos', 'meta'], 'readwrite');
+                const store = tx.objectStore('productos');
+                datos.productos.forEach((producto) => {
+                    this._quitar(producto.id);
+                    if (producto.activo) {
+                        this._agregar(producto);
+                        store.put(producto);
+                    } else {
+                        store.delete(producto.id);
+                    }
+                });
+                tx.objectStore('meta').put(datos.cursor, 'cursor');
+                await new Promise((resolve, reject) => {
+                    tx.oncomplete = resolve;
+                    tx.onerror = () => reject(tx.error);
+                });
+
+                cursor = datos.cursor;
+                completo = datos.completo;
+            }
+            this.listo = true;
+        } catch (error) {
+            console.error('Error sincronizando catálogo:', error);
+        } finally {
+            this.sincronizando = false;
+        }
+    },
+
+    // Mismo criterio que busqueda_service: todas las palabras, sin acentos ni
+    // mayúsculas; primero código/código de barras exacto, luego prefijo de
+    // código, luego prefijo de nombre.
+    buscar(q, limite = 10) {
+        if (!this.listo) {
+            return null;
+        }
+        const exacto = (q || '').trim();
+        const texto = this.normalizar(exacto);
+        const palabras = texto.split(/\s+/).filter(Boolean);
+        if (!palabras.length) {
+            return [];
+        }
+        const resultados = [];
+        this.productos.forEach((producto) => {
+            const esExacto = producto.codigo === exacto || producto.codigo_barras === exacto;
+            if (esExacto || palabras.every((palabra) => producto._texto.includes(palabra))) {
+                resultados.push([this._rango(producto, texto, exacto), producto]);
+            }
+        });
+        resultados.sort((a, b) => a[0] - b[0] || a[1].nombre.localeCompare(b[1].nombre));
+        return resultados.slice(0, limite).map(([, producto]) => producto);
+    },
+
+    // Producto por código o código de barras exacto (null si no está)
+    porCodigoExacto(codigo) {
+        if (!this.listo) {
+            return null;
+        }
+        const id = this.porCodigo.get((codigo || '').trim());
+        return id !== undefined ? this.productos.get(id) : null;
+    },
+
+    _rango(producto, texto, exacto) {
+        const codigo = producto.codigo.toLowerCase();
+        if (codigo === texto || producto.codigo_barras === exacto) return 0;
+        if (codigo.startsWith(texto)) return 1;
+        if (producto._texto.startsWith(texto, codigo.length + 1)) return 2;
+        return 3;
+    },
+
+    _agregar(producto) {
+        producto._texto = this.normalizar(
+            `${producto.codigo} ${producto.nombre} ${producto.codigo_barras || ''}`
+        );
+        this.productos.set(producto.id, producto);
+        this.porCodigo.set(producto.codigo, producto.id);
+        if (producto.codigo_barras) {
+            this.porCodigo.set(producto.codigo_barras, producto.id);
+        }
+    },
+
+    _quitar(id) {
+        const anterior = this.productos.get(id);
+        if (!anterior) {
+            return;
+        }
+        this.productos.delete(id);
+        [anterior.codigo, anterior.codigo_barras].forEach((codigo) => {
+            if (codigo && this.porCodigo.get(codigo) === id) {
+                this.porCodigo.delete(codigo);
+            }
+        });
+    },
+
+    _abrir(nombre) {
+        return new Promise((resolve, reject) => {
+            const pedido = indexedDB.open(nombre, 1);
+            pedido.onupgradeneeded = () => {
+                pedido.result.createObjectStore('productos', { keyPath: 'id' });
+                pedido.result.createObjectStore('meta');
+            };
+            pedido.onsuccess = () => resolve(pedido.result);
+            pedido.onerror = () => reject(pedido.error);
+        });
+    },
+
+    _esperar(pedido) {
+        return new Promise((resolve, reject) => {
+            pedido.onsuccess = () => resolve(pedido.result);
+            pedido.onerror = () => reject(pedido.error);
+        });
+    }
+};
+
 // Toggle sidebar en móvil
 function toggleSidebar() {
     const sidebar = document.querySelector('.sidebar');
@@ -0,0 +1,57 @@
+"""Cache en memoria para resultados calculados."""
+
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Cache LRU acotado y seguro entre hilos.
+
+    Vive en memoria de cada proceso; la validez de las entradas se garantiza
+    incluyendo en la clave una versión persistida en la base de datos.
+    """
+
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, default=None):
+        """Retorna el valor cacheado o ``default``."""
+        with self._lock:
+            if clave not in self._datos:
+                return default
+            self._datos.move_to_end(clave)
+            return self._datos[clave]
+
+    def set(self, clave, valor):
+        """Guarda un valor, descartando el menos usado si se supera el límite."""
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+
+    def descartar(self, clave):
+        """Elimina una entrada si existe."""
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def obtener_o_calcular(self, clave, calcular):
+        """Retorna el valor cacheado o lo calcula con ``calcular()`` y lo guarda."""
+        valor = self.get(clave, _FALTANTE)
+        if valor is _FALTANTE:
+            valor = calcular()
+            self.set(clave, valor)
+        return valor
+
+    def limpiar(self):
+        """Elimina todas las entradas."""
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+_FALTANTE = object()
@@ -108,3 +108,15 @@ def empresa_aprobada_required(f):
 
         return f(*args, **kwargs)
     return decorated_function
+
+
+def subida_importacion(f):
+    """
+    Marca la vista para aceptar archivos hasta IMPORTACION_MAX_CONTENT_LENGTH.
+
+    El límite lo aplica la clase de request de la aplicación al leer el
+    cuerpo, antes que cualquier ``before_request`` (la validación CSRF ya
+    parsea el formulario). Debe usarse inmediatamente debajo de @bp.route.
+    """
+    f.subida_importacion = True
+    return f
@@ -0,0 +1,143 @@
+"""Exportación de listados a CSV o Excel en streaming.
+
+Las filas se leen con ``yield_per`` (cursor del lado del servidor en
+PostgreSQL) y se escriben a medida que llegan: el CSV se envía en bloques y
+el Excel se arma con openpyxl en modo ``write_only`` sobre un archivo
+temporal en disco, que luego se transmite por partes. La memoria del worker
+no crece con la cantidad de filas.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+
+from flask import Response, stream_with_context
+
+from ..extensions import db
+
+FORMATOS = ('xlsx', 'csv')
+
+TAMANIO_LOTE = 1000
+
+FILAS_POR_BLOQUE_CSV = 500
+
+TAMANIO_BLOQUE_ARCHIVO = 64 * 1024
+
+MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def iterar_filas(consulta, lote=TAMANIO_LOTE):
+    """Ejecuta ``consulta`` y recorre sus filas en lotes sin materializarlas."""
+    return db.session.execute(consulta, execution_options={'yield_per': lote})
+
+
+def proyectar(filas, columnas):
+    """
+    Convierte filas de una consulta en listas de valores por columna.
+
+    Args:
+        filas: Iterable de filas (Row)
+        columnas: Lista de (encabezado, clave) donde clave es el nombre de la
+            columna en la fila o una función que recibe la fila
+
+    Yields:
+        Listas de valores en el orden de ``columnas``
+    """
+    extractores = [clave if callable(clave) else attrgetter(clave) for _, clave in columnas]
+    for fila in filas:
+        yield [extraer(fila) for extraer in extractores]
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    return valor
+
+
+def _valor_xlsx(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    return valor
+
+
+def generar_csv(encabezados, filas):
+    """Genera el CSV (separado por ';') en bloques de texto."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=';')
+    escritor.writerow(encabezados)
+
+    for indice, fila in enumerate(filas, start=1):
+        escritor.writerow([_valor_csv(valor) for valor in fila])
+        if indice % FILAS_POR_BLOQUE_CSV == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def generar_xlsx(encabezados, filas, titulo='Datos'):
+    """Genera el XLSX en modo write-only y lo transmite en bloques."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=titulo[:31])
+    ws.append(encabezados)
+    for fila in filas:
+        ws.append([_valor_xlsx(valor) for valor in fila])
+
+    with tempfile.TemporaryFile() as archivo:
+        wb.save(archivo)
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(TAMANIO_BLOQUE_ARCHIVO)
+            if not bloque:
+                break
+            yield bloque
+
+
+def respuesta_exportacion(encabezados, filas, nombre, formato='xlsx', titulo=None):
+    """
+    Arma la respuesta HTTP en streaming con el archivo exportado.
+
+    Args:
+        encabezados: Títulos de las columnas
+        filas: Iterable de listas de valores
+        nombre: Nombre del archivo sin extensión
+        formato: 'xlsx' o 'csv' (cualquier otro valor usa 'xlsx')
+        titulo: Título de la hoja de Excel
+    """
+    if formato not in FORMATOS:
+        formato = 'xlsx'
+
+    if formato == 'csv':
+        contenido = generar_csv(encabezados, filas)
+    else:
+        contenido = generar_xlsx(encabezados, filas, titulo=titulo or nombre)
+
+    return Response(
+        stream_with_context(contenido),
+        mimetype=MIMETYPES[formato],
+        headers={'Content-Disposition': f'attachment; filename={nombre}.{formato}'},
+    )
+
+
+def exportar(consulta, columnas, nombre, formato='xlsx', titulo=None):
+    """Exporta el resultado de ``consulta`` con las ``columnas`` indicadas."""
+    encabezados = [encabezado for encabezado, _ in columnas]
+    filas = proyectar(iterar_filas(consulta), columnas)
+    return respuesta_exportacion(encabezados, filas, nombre, formato, titulo)
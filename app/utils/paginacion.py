@@ -0,0 +1,140 @@
+"""Paginación por clave (keyset) para listados ordenados por fecha.
+
+A diferencia de ``paginar_query`` (OFFSET + COUNT), cada página continúa
+desde la (fecha, id) del último registro mostrado, por lo que el costo no
+crece con la profundidad de la página y no hace falta contar el total. Los
+cursores viajan en la URL como ``despues`` (página siguiente) o ``antes``
+(página anterior).
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from ..extensions import db
+
+
+def codificar_cursor(fecha, id):
+    """Codifica (fecha, id) como texto apto para la URL."""
+    crudo = json.dumps([fecha.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Decodifica un cursor; retorna None si es inválido."""
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fecha, id = json.loads(crudo)
+        return datetime.fromisoformat(fecha), int(id)
+    except (ValueError, TypeError):
+        return None
+
+
+def estimar_total(query):
+    """
+    Cantidad aproximada de filas de la consulta.
+
+    En PostgreSQL usa la estimación del planificador (EXPLAIN), que no
+    recorre la tabla; en otros motores hace un COUNT.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return query.order_by(None).count()
+
+    sentencia = query.order_by(None).statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}
+    )
+    plan = db.session.execute(db.text(f'EXPLAIN (FORMAT JSON) {sentencia}')).scalar()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class PaginaKeyset:
+    """Página de resultados con cursores a la página siguiente y anterior."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total_estimado=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total_estimado = total_estimado
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def paginar_keyset(
+    query,
+    columna_fecha,
+    columna_id,
+    despues=None,
+    antes=None,
+    per_page=20,
+    estimar=False,
+    clase_fila=None,
+):
+    """
+    Pagina una consulta en orden descendente por (columna_fecha, columna_id).
+
+    Args:
+        query: Consulta SQLAlchemy sin ORDER BY
+        columna_fecha: Columna de fecha del orden (p. ej. Venta.fecha)
+        columna_id: Clave primaria, desempata registros con la misma fecha
+        despues: Cursor del último registro de la página anterior
+        antes: Cursor del primer registro de la página siguiente
+        per_page: Items por página
+        estimar: Si es True, calcula ``total_estimado`` con ``estimar_total``
+        clase_fila: Clase con ``desde_fila`` a la que se convierten las filas
+            de una consulta por columnas (ver ``services.lectura_service``)
+
+    Returns:
+        PaginaKeyset
+    """
+    clave = tuple_(columna_fecha, columna_id)
+    cursor_despues = decodificar_cursor(despues)
+    cursor_antes = None if cursor_despues else decodificar_cursor(antes)
+    total_estimado = estimar_total(query) if estimar else None
+
+    if cursor_antes:
+        # Retroceder: recorrer en orden ascendente desde el cursor e invertir
+        filas = (
+            query.filter(clave > cursor_antes)
+            .order_by(columna_fecha.asc(), columna_id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        hay_mas_atras = len(filas) > per_page
+        items = list(reversed(filas[:per_page]))
+        hay_mas_adelante = True
+    else:
+        if cursor_despues:
+            query = query.filter(clave < cursor_despues)
+        filas = query.order_by(columna_fecha.desc(), columna_id.desc()).limit(per_page + 1).all()
+        items = filas[:per_page]
+        hay_mas_adelante = len(filas) > per_page
+        hay_mas_atras = cursor_despues is not None
+
+    if clase_fila is not None:
+        items = [clase_fila.desde_fila(fila) for fila in items]
+
+    nombre_fecha = columna_fecha.key
+    nombre_id = columna_id.key
+
+    def cursor_de(item):
+        return codificar_cursor(getattr(item, nombre_fecha), getattr(item, nombre_id))
+
+    return PaginaKeyset(
+        items,
+        next_cursor=cursor_de(items[-1]) if items and hay_mas_adelante else None,
+        prev_cursor=cursor_de(items[0]) if items and hay_mas_atras else None,
+        total_estimado=total_estimado,
+    )
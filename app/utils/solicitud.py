@@ -0,0 +1,26 @@
+"""Clase de request de la aplicación."""
+
+from flask import Request, current_app
+
+
+class Solicitud(Request):
+    """
+    Request con límite de subida por vista.
+
+    Las vistas marcadas con ``@subida_importacion`` aceptan archivos hasta
+    IMPORTACION_MAX_CONTENT_LENGTH; el resto usa MAX_CONTENT_LENGTH. El
+    límite se resuelve al leer el cuerpo, así que vale también para el
+    formulario que parsea la validación CSRF antes de la vista.
+    """
+
+    @property
+    def max_content_length(self):
+        if current_app and self.endpoint:
+            vista = current_app.view_functions.get(self.endpoint)
+            if getattr(vista, 'subida_importacion', False):
+                return current_app.config['IMPORTACION_MAX_CONTENT_LENGTH']
+        return Request.max_content_length.fget(self)
+
+    @max_content_length.setter
+    def max_content_length(self, valor):
+        Request.max_content_length.fset(self, valor)
@@ -0,0 +1 @@
+"""Benchmarks de rendimiento de FerrERP (se ejecutan contra PostgreSQL)."""
@@ -0,0 +1,75 @@
+"""Benchmark de la búsqueda de productos: ILIKE vs índice de búsqueda.
+
+Uso:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_busqueda --productos 100000
+"""
+
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.extensions import db
+from app.models import Producto
+from app.services import busqueda_service
+
+from .datos import crear_empresa, crear_productos
+
+BUSQUEDAS = {
+    'código exacto': 'B0042424',
+    'código de barras': '7790000042424',
+    'nombre': 'benchmark 4242',
+}
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def _ilike(empresa_id, q):
+    return lambda: (
+        Producto.query.filter(
+            Producto.empresa_id == empresa_id,
+            db.or_(
+                Producto.codigo.ilike(f'%{q}%'),
+                Producto.nombre.ilike(f'%{q}%'),
+                Producto.codigo_barras.ilike(f'%{q}%'),
+            ),
+        )
+        .limit(10)
+        .all()
+    )
+
+
+def _indice(empresa_id, q):
+    query = Producto.query.filter(Producto.empresa_id == empresa_id)
+    return lambda: busqueda_service.buscar_productos(query, q).limit(10).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--productos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app('development')
+    with app.app_context():
+        empresa, _, _ = crear_empresa('Benchmark búsqueda')
+        crear_productos(empresa.id, args.productos)
+        db.session.execute(db.text('ANALYZE'))
+
+        print(f'búsqueda de productos ({args.productos} productos, mediana de {args.repeticiones})')
+        for nombre, q in BUSQUEDAS.items():
+            ilike = _medir(_ilike(empresa.id, q), args.repeticiones)
+            indice = _medir(_indice(empresa.id, q), args.repeticiones)
+            print(f'  {nombre:17} ILIKE {ilike:8.1f} ms  índice {indice:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
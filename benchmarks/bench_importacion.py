@@ -0,0 +1,69 @@
+"""Benchmark de la importación masiva del catálogo.
+
+Genera un CSV con ``--filas`` productos nuevos, lo importa y luego lo vuelve
+a importar con otros precios (todas las filas son actualizaciones).
+
+Uso:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_importacion --filas 100000
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from werkzeug.datastructures import FileStorage
+
+from app import create_app
+from app.services import importacion_service
+
+from .datos import crear_empresa
+
+
+def _generar_csv(ruta, filas, precio):
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo, delimiter=';')
+        escritor.writerow(['codigo', 'nombre', 'codigo_barras', 'costo', 'precio', 'stock'])
+        for i in range(filas):
+            escritor.writerow(
+                [f'I{i:07d}', f'Importado {i}', f'779{i:010d}', precio / 2, precio, i % 50]
+            )
+
+
+def _importar(ruta, empresa_id, usuario_id, tamanio_lote):
+    inicio = time.perf_counter()
+    with open(ruta, 'rb') as archivo:
+        importacion = importacion_service.crear_importacion(
+            FileStorage(archivo, filename='catalogo.csv'), empresa_id, usuario_id
+        )
+    importacion = importacion_service.procesar_importacion(importacion.id, tamanio_lote)
+    return importacion, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--lote', type=int, default=importacion_service.TAMANIO_LOTE)
+    args = parser.parse_args()
+
+    app = create_app('development')
+    with app.app_context(), tempfile.TemporaryDirectory() as directorio:
+        app.config['IMPORTACIONES_FOLDER'] = directorio
+        empresa, usuario, _ = crear_empresa('Benchmark importación')
+        ruta = os.path.join(directorio, 'origen.csv')
+
+        print(f'importación de catálogo ({args.filas} filas, lotes de {args.lote})')
+        for etapa, precio in (('alta', 100), ('actualización', 120)):
+            _generar_csv(ruta, args.filas, precio)
+            importacion, segundos = _importar(ruta, empresa.id, usuario.id, args.lote)
+            print(
+                f'  {etapa:14} {segundos:6.1f} s  {args.filas / segundos:8.0f} filas/s  '
+                f'(nuevos {importacion.creados}, actualizados {importacion.actualizados}, '
+                f'errores {importacion.con_error})'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark del reporte de ventas: ejecución serial vs concurrente.
+
+Uso (requiere PostgreSQL):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_reportes --ventas 200000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.services import reporte_service
+
+from .datos import crear_empresa, crear_productos, crear_ventas
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--productos', type=int, default=5000)
+    parser.add_argument('--ventas', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app('development')
+    with app.app_context():
+        empresa, usuario, caja = crear_empresa('Benchmark reportes')
+        producto_ids = crear_productos(empresa.id, args.productos)
+        crear_ventas(empresa.id, usuario.id, caja.id, producto_ids, args.ventas)
+
+        fin = datetime.now()
+        inicio = fin - timedelta(days=365)
+
+        def _reporte(workers):
+            app.config['REPORTES_MAX_WORKERS'] = workers
+            return lambda: reporte_service.reporte_ventas(empresa.id, inicio, fin)
+
+        serial = _medir(_reporte(1), args.repeticiones)
+        concurrente = _medir(_reporte(4), args.repeticiones)
+
+        print(f'reporte_ventas ({args.ventas} ventas, mediana de {args.repeticiones})')
+        print(f'  serial:      {serial:8.1f} ms')
+        print(f'  concurrente: {concurrente:8.1f} ms  ({serial / concurrente:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Generación de datos sintéticos para benchmarks.
+
+Inserta en bloque (Core ``insert``) para poder generar volúmenes grandes
+en pocos segundos. Cada llamada crea una empresa nueva y aislada.
+"""
+
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import (
+    Caja,
+    Empresa,
+    Producto,
+    Usuario,
+    Venta,
+    VentaDetalle,
+    VentaPago,
+)
+
+FORMAS_PAGO = ['efectivo', 'tarjeta_debito', 'tarjeta_credito', 'transferencia', 'qr']
+
+
+def crear_empresa(nombre='Benchmark'):
+    """Crea una empresa aprobada con un usuario administrador y una caja abierta."""
+    empresa = Empresa(nombre=nombre, activa=True, aprobada=True)
+    db.session.add(empresa)
+    db.session.flush()
+
+    usuario = Usuario(
+        email=f'bench-{empresa.id}@ferrerp.test',
+        nombre='Benchmark',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('benchmark')
+    db.session.add(usuario)
+    db.session.flush()
+
+    caja = Caja(
+        usuario_apertura_id=usuario.id,
+        monto_inicial=Decimal('0'),
+        estado='abierta',
+        empresa_id=empresa.id,
+    )
+    db.session.add(caja)
+    db.session.commit()
+    return empresa, usuario, caja
+
+
+def crear_productos(empresa_id, cantidad, lote=5000):
+    """Inserta ``cantidad`` productos y retorna sus IDs."""
+    for inicio in range(0, cantidad, lote):
+        filas = []
+        for i in range(inicio, min(inicio + lote, cantidad)):
+            costo = Decimal(random.randint(100, 100000)) / 100
+            filas.append(
+                {
+                    'empresa_id': empresa_id,
+                    'codigo': f'B{i:07d}',
+                    'codigo_barras': f'779{i:010d}',
+                    'nombre': f'Producto benchmark {i}',
+                    'unidad_medida': 'unidad',
+                    'precio_costo': costo,
+                    'precio_venta': (costo * Decimal('1.4')).quantize(Decimal('0.01')),
+                    'iva_porcentaje': Decimal('21'),
+                    'stock_actual': Decimal(random.randint(0, 200)),
+                    'stock_minimo': Decimal(random.randint(0, 20)),
+                    'activo': True,
+                }
+            )
+        db.session.execute(db.insert(Producto), filas)
+    db.session.commit()
+    return [
+        pid
+        for (pid,) in db.session.execute(
+            db.select(Producto.id).where(Producto.empresa_id == empresa_id)
+        )
+    ]
+
+
+def crear_ventas(empresa_id, usuario_id, caja_id, producto_ids, cantidad, dias=365, lote=2000):
+    """Inserta ``cantidad`` ventas con 1-5 líneas y un pago cada una."""
+    hasta = datetime.now()
+    numero = 0
+    for inicio in range(0, cantidad, lote):
+        ventas = []
+        for _ in range(inicio, min(inicio + lote, cantidad)):
+            numero += 1
+            ventas.append(
+                {
+                    'empresa_id': empresa_id,
+                    'numero': numero,
+                    'fecha': hasta - timedelta(minutes=random.randint(0, dias * 24 * 60)),
+                    'usuario_id': usuario_id,
+                    'caja_id': caja_id,
+                    'subtotal': Decimal('0'),
+                    'descuento_monto': Decimal('0'),
+                    'total': Decimal('0'),
+                    'forma_pago': random.choice(FORMAS_PAGO),
+                    'estado': 'completada',
+                }
+            )
+        ids = (
+            db.session.execute(
+                db.insert(Venta).returning(Venta.id, sort_by_parameter_order=True), ventas
+            )
+            .scalars()
+            .all()
+        )
+
+        detalles = []
+        pagos = []
+        for venta_id, venta in zip(ids, ventas, strict=True):
+            total = Decimal('0')
+            for producto_id in random.sample(producto_ids, random.randint(1, 5)):
+                cant = Decimal(random.randint(1, 4))
+                precio = Decimal(random.randint(100, 50000)) / 100
+                subtotal = cant * precio
+                total += subtotal
+                detalles.append(
+                    {
+                        'venta_id': venta_id,
+                        'producto_id': producto_id,
+                        'cantidad': cant,
+                        'precio_unitario': precio,
+                        'iva_porcentaje': Decimal('21'),
+                        'descuento_porcentaje': Decimal('0'),
+                        'subtotal': subtotal,
+                    }
+                )
+            venta['id'] = venta_id
+            venta['total'] = venta['subtotal'] = total
+            pagos.append({'venta_id': venta_id, 'forma_pago': venta['forma_pago'], 'monto': total})
+
+        db.session.execute(db.insert(VentaDetalle), detalles)
+        db.session.execute(db.insert(VentaPago), pagos)
+        db.session.execute(
+            db.update(Venta),
+            [{'id': v['id'], 'total': v['total'], 'subtotal': v['subtotal']} for v in ventas],
+        )
+        db.session.commit()
@@ -0,0 +1,38 @@
+"""Crear tabla versiones_datos para invalidar reportes cacheados.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'versiones_datos',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column('periodo', sa.Date, nullable=False),
+        sa.Column('version', sa.Integer, nullable=False, server_default='0'),
+        sa.UniqueConstraint(
+            'empresa_id', 'periodo', name='uq_versiones_datos_empresa_periodo'
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table('versiones_datos')
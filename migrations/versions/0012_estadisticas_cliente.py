@@ -0,0 +1,60 @@
+"""Agregar estadísticas de compra a clientes.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clientes') as batch_op:
+        batch_op.add_column(
+            sa.Column('total_comprado', sa.Numeric(14, 2), nullable=False, server_default='0')
+        )
+        batch_op.add_column(
+            sa.Column('cantidad_compras', sa.Integer, nullable=False, server_default='0')
+        )
+        batch_op.add_column(sa.Column('fecha_ultima_compra', sa.DateTime, nullable=True))
+        batch_op.create_index(
+            'ix_clientes_empresa_total_comprado', ['empresa_id', 'total_comprado']
+        )
+        batch_op.create_index(
+            'ix_clientes_empresa_ultima_compra', ['empresa_id', 'fecha_ultima_compra']
+        )
+
+    # Backfill desde las ventas completadas existentes
+    op.execute(
+        """
+        UPDATE clientes SET
+            total_comprado = COALESCE((
+                SELECT SUM(v.total) FROM ventas v
+                WHERE v.cliente_id = clientes.id AND v.estado = 'completada'
+            ), 0),
+            cantidad_compras = (
+                SELECT COUNT(v.id) FROM ventas v
+                WHERE v.cliente_id = clientes.id AND v.estado = 'completada'
+            ),
+            fecha_ultima_compra = (
+                SELECT MAX(v.fecha) FROM ventas v
+                WHERE v.cliente_id = clientes.id AND v.estado = 'completada'
+            )
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('clientes') as batch_op:
+        batch_op.drop_index('ix_clientes_empresa_ultima_compra')
+        batch_op.drop_index('ix_clientes_empresa_total_comprado')
+        batch_op.drop_column('fecha_ultima_compra')
+        batch_op.drop_column('cantidad_compras')
+        batch_op.drop_column('total_comprado')
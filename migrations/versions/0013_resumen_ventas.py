@@ -0,0 +1,94 @@
+"""Agregar columnas de listado a ventas e índice del historial.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+FORMA_PAGO_LABELS = {
+    'efectivo': 'Efectivo',
+    'tarjeta_debito': 'Tarjeta Debito',
+    'tarjeta_credito': 'Tarjeta Credito',
+    'transferencia': 'Transferencia',
+    'qr': 'QR',
+    'cuenta_corriente': 'Cuenta Corriente',
+}
+
+
+def _label_forma_pago(columna, postgresql):
+    # En PostgreSQL la columna es un enum: como texto, el CASE y string_agg operan sobre text
+    if postgresql:
+        columna = f'{columna}::text'
+    casos = ' '.join(f"WHEN '{clave}' THEN '{label}'" for clave, label in FORMA_PAGO_LABELS.items())
+    return f'CASE {columna} {casos} ELSE {columna} END'
+
+
+def upgrade():
+    with op.batch_alter_table('ventas') as batch_op:
+        batch_op.add_column(sa.Column('cliente_nombre', sa.String(200), nullable=True))
+        batch_op.add_column(
+            sa.Column('cantidad_items', sa.Numeric(12, 3), nullable=False, server_default='0')
+        )
+        batch_op.add_column(sa.Column('formas_pago_resumen', sa.String(200), nullable=True))
+
+    op.create_index(
+        'ix_ventas_empresa_fecha',
+        'ventas',
+        ['empresa_id', sa.text('fecha DESC'), sa.text('id DESC')],
+        postgresql_include=[
+            'numero',
+            'cliente_nombre',
+            'cantidad_items',
+            'forma_pago',
+            'formas_pago_resumen',
+            'total',
+            'estado',
+        ],
+    )
+
+    # Backfill desde clientes, detalles y pagos de las ventas existentes
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    label_pago = _label_forma_pago('vp.forma_pago', postgresql)
+    if postgresql:
+        pagos_divididos = (
+            f"SELECT string_agg({label_pago}, ' + ' ORDER BY vp.id) "
+            'FROM venta_pagos vp WHERE vp.venta_id = ventas.id'
+        )
+    else:
+        pagos_divididos = (
+            f"SELECT group_concat({label_pago}, ' + ') "
+            'FROM venta_pagos vp WHERE vp.venta_id = ventas.id'
+        )
+
+    op.execute(
+        f"""
+        UPDATE ventas SET
+            cliente_nombre = (
+                SELECT c.nombre FROM clientes c WHERE c.id = ventas.cliente_id
+            ),
+            cantidad_items = COALESCE((
+                SELECT SUM(d.cantidad) FROM venta_detalles d WHERE d.venta_id = ventas.id
+            ), 0),
+            formas_pago_resumen = CASE
+                WHEN forma_pago = 'dividido' THEN ({pagos_divididos})
+                ELSE {_label_forma_pago('forma_pago', postgresql)}
+            END
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ventas_empresa_fecha', table_name='ventas')
+    with op.batch_alter_table('ventas') as batch_op:
+        batch_op.drop_column('formas_pago_resumen')
+        batch_op.drop_column('cantidad_items')
+        batch_op.drop_column('cliente_nombre')
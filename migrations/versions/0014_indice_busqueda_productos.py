@@ -0,0 +1,85 @@
+"""Índice de búsqueda de productos (pg_trgm en PostgreSQL, FTS5 en SQLite).
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+POSTGRESQL_UPGRADE = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    # unaccent() no es IMMUTABLE; con el diccionario explícito sí puede indexarse
+    """
+    CREATE OR REPLACE FUNCTION productos_busqueda(codigo text, nombre text, codigo_barras text)
+    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT lower(public.unaccent('public.unaccent'::regdictionary,
+            coalesce(codigo, '') || ' ' || coalesce(nombre, '') || ' '
+            || coalesce(codigo_barras, '')))
+    $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_productos_busqueda_trgm ON productos
+    USING gin (productos_busqueda(codigo, nombre, codigo_barras) gin_trgm_ops)
+    """,
+)
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        codigo, nombre, codigo_barras,
+        content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, codigo, nombre, codigo_barras)
+        VALUES (new.id, new.codigo, new.nombre, new.codigo_barras);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, codigo_barras)
+        VALUES ('delete', old.id, old.codigo, old.nombre, old.codigo_barras);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_au
+    AFTER UPDATE OF codigo, nombre, codigo_barras ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, codigo, nombre, codigo_barras)
+        VALUES ('delete', old.id, old.codigo, old.nombre, old.codigo_barras);
+        INSERT INTO productos_fts(rowid, codigo, nombre, codigo_barras)
+        VALUES (new.id, new.codigo, new.nombre, new.codigo_barras);
+    END
+    """,
+    # Indexar los productos existentes
+    "INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        sentencias = POSTGRESQL_UPGRADE
+    else:
+        sentencias = SQLITE_UPGRADE
+    for sentencia in sentencias:
+        op.execute(sentencia)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_productos_busqueda_trgm')
+        op.execute('DROP FUNCTION IF EXISTS productos_busqueda(text, text, text)')
+    else:
+        for trigger in ('productos_fts_ai', 'productos_fts_ad', 'productos_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS productos_fts')
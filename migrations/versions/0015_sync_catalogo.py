@@ -0,0 +1,34 @@
+"""Índice para la sincronización incremental del catálogo.
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # El cursor de sincronización es (updated_at, id): no puede quedar en NULL
+    op.execute(
+        'UPDATE productos SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) '
+        'WHERE updated_at IS NULL'
+    )
+    with op.batch_alter_table('productos') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index(
+            'ix_productos_empresa_actualizado', ['empresa_id', 'updated_at', 'id']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('productos') as batch_op:
+        batch_op.drop_index('ix_productos_empresa_actualizado')
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,55 @@
+"""Crear tabla importaciones_catalogo para la importación masiva de productos.
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'importaciones_catalogo',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id'), nullable=False),
+        sa.Column('nombre_archivo', sa.String(255), nullable=False),
+        sa.Column('archivo', sa.String(500), nullable=False),
+        sa.Column('formato', sa.String(10), nullable=False),
+        sa.Column(
+            'estado',
+            sa.Enum('pendiente', 'procesando', 'completada', 'fallida', name='estado_importacion'),
+            nullable=False,
+        ),
+        sa.Column('filas_total', sa.Integer, nullable=True),
+        sa.Column('filas_procesadas', sa.Integer, nullable=False),
+        sa.Column('creados', sa.Integer, nullable=False),
+        sa.Column('actualizados', sa.Integer, nullable=False),
+        sa.Column('con_error', sa.Integer, nullable=False),
+        sa.Column('errores', sa.Text, nullable=True),
+        sa.Column('mensaje', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+        sa.Column('finalizada_at', sa.DateTime, nullable=True),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table('importaciones_catalogo')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS estado_importacion')
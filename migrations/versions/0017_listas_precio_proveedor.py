@@ -0,0 +1,72 @@
+"""Crear tablas de listas de precios de proveedores.
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'listas_precio_proveedor',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'proveedor_id',
+            sa.Integer,
+            sa.ForeignKey('proveedores.id'),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id'), nullable=False),
+        sa.Column('nombre_archivo', sa.String(255), nullable=False),
+        sa.Column(
+            'estado',
+            sa.Enum('pendiente', 'aplicada', 'descartada', name='estado_lista_precio'),
+            nullable=False,
+        ),
+        sa.Column('cantidad_items', sa.Integer, nullable=False),
+        sa.Column('con_error', sa.Integer, nullable=False),
+        sa.Column('errores', sa.Text, nullable=True),
+        sa.Column('productos_actualizados', sa.Integer, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('aplicada_at', sa.DateTime, nullable=True),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    op.create_table(
+        'listas_precio_items',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'lista_id',
+            sa.Integer,
+            sa.ForeignKey('listas_precio_proveedor.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('fila', sa.Integer, nullable=False),
+        sa.Column('codigo', sa.String(20), nullable=False),
+        sa.Column('precio_costo', sa.Numeric(12, 2), nullable=False),
+        sa.UniqueConstraint('lista_id', 'codigo', name='uq_listas_precio_items_lista_codigo'),
+    )
+
+
+def downgrade():
+    op.drop_table('listas_precio_items')
+    op.drop_table('listas_precio_proveedor')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS estado_lista_precio')
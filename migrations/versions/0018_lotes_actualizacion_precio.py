@@ -0,0 +1,252 @@
+"""Agrupar el historial de precios en lotes con filas compactas por producto.
+
+Los datos comunes de cada operación (usuario, tipo, porcentaje, categorías,
+notas) pasan a ``lotes_actualizacion_precio``; ``actualizaciones_precio``
+conserva solo el lote, el producto, la fecha y los precios.
+
+Las filas existentes se agrupan en lotes por orden de id: una operación
+escribió sus filas seguidas, con los mismos datos comunes y fechas a lo
+sumo segundos de diferencia.
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-19
+"""
+
+import json
+from datetime import timedelta
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+# Separación máxima entre filas consecutivas de una misma operación
+SEPARACION_MAXIMA = timedelta(minutes=1)
+
+lotes = sa.table(
+    'lotes_actualizacion_precio',
+    sa.column('id', sa.Integer),
+    sa.column('usuario_id', sa.Integer),
+    sa.column('fecha', sa.DateTime),
+    sa.column('tipo', sa.String),
+    sa.column('porcentaje', sa.Numeric(8, 4)),
+    sa.column('actualizo_costo', sa.Boolean),
+    sa.column('categorias_ids', sa.Text),
+    sa.column('notas', sa.Text),
+    sa.column('cantidad_productos', sa.Integer),
+    sa.column('empresa_id', sa.Integer),
+)
+
+actualizaciones = sa.table(
+    'actualizaciones_precio',
+    sa.column('id', sa.Integer),
+    sa.column('lote_id', sa.Integer),
+    sa.column('producto_id', sa.Integer),
+    sa.column('usuario_id', sa.Integer),
+    sa.column('fecha', sa.DateTime),
+    sa.column('tipo', sa.String),
+    sa.column('porcentaje', sa.Numeric(8, 4)),
+    sa.column('precio_costo_anterior', sa.Numeric(12, 2)),
+    sa.column('precio_costo_nuevo', sa.Numeric(12, 2)),
+    sa.column('actualizo_costo', sa.Boolean),
+    sa.column('categoria_id', sa.Integer),
+    sa.column('notas', sa.Text),
+    sa.column('empresa_id', sa.Integer),
+)
+
+productos = sa.table(
+    'productos',
+    sa.column('id', sa.Integer),
+    sa.column('categoria_id', sa.Integer),
+)
+
+COLUMNAS_LOTE = ('empresa_id', 'usuario_id', 'tipo', 'porcentaje', 'actualizo_costo', 'notas')
+
+
+def _agrupar_filas(conexion):
+    """Recorre las filas por id y las agrupa en lotes (datos comunes y rango de ids)."""
+    consulta = sa.select(
+        actualizaciones.c.id,
+        actualizaciones.c.fecha,
+        actualizaciones.c.categoria_id,
+        *(actualizaciones.c[columna] for columna in COLUMNAS_LOTE),
+    ).order_by(actualizaciones.c.id)
+
+    grupos = []
+    actual = None
+    for fila in conexion.execution_options(stream_results=True).execute(consulta):
+        datos = {columna: getattr(fila, columna) for columna in COLUMNAS_LOTE}
+        # En las listas de proveedor el porcentaje es la variación de cada producto
+        if datos['tipo'] == 'proveedor':
+            datos['porcentaje'] = None
+        if (
+            actual is None
+            or actual['datos'] != datos
+            or fila.fecha - actual['ultima_fecha'] > SEPARACION_MAXIMA
+        ):
+            actual = {
+                'datos': datos,
+                'fecha': fila.fecha,
+                'categorias': [],
+                'desde': fila.id,
+                'cantidad': 0,
+            }
+            grupos.append(actual)
+        actual['hasta'] = fila.id
+        actual['ultima_fecha'] = fila.fecha
+        actual['cantidad'] += 1
+        if fila.categoria_id is not None and fila.categoria_id not in actual['categorias']:
+            actual['categorias'].append(fila.categoria_id)
+    return grupos
+
+
+def upgrade():
+    op.create_table(
+        'lotes_actualizacion_precio',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id'), nullable=False),
+        sa.Column('fecha', sa.DateTime, nullable=False, index=True),
+        sa.Column('tipo', sa.String(10), nullable=False),
+        sa.Column('porcentaje', sa.Numeric(8, 4), nullable=True),
+        sa.Column('actualizo_costo', sa.Boolean, nullable=False),
+        sa.Column('categorias_ids', sa.Text, nullable=True),
+        sa.Column('notas', sa.Text, nullable=True),
+        sa.Column('cantidad_productos', sa.Integer, nullable=False),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+    )
+    op.add_column('actualizaciones_precio', sa.Column('lote_id', sa.Integer, nullable=True))
+
+    conexion = op.get_bind()
+    for grupo in _agrupar_filas(conexion):
+        lote_id = conexion.execute(
+            lotes.insert()
+            .values(
+                **grupo['datos'],
+                fecha=grupo['fecha'],
+                categorias_ids=json.dumps(grupo['categorias']) if grupo['categorias'] else None,
+                cantidad_productos=grupo['cantidad'],
+            )
+            .returning(lotes.c.id)
+        ).scalar_one()
+        conexion.execute(
+            actualizaciones.update()
+            .where(actualizaciones.c.id.between(grupo['desde'], grupo['hasta']))
+            .values(lote_id=lote_id)
+        )
+
+    with op.batch_alter_table('actualizaciones_precio', schema=None) as batch_op:
+        batch_op.alter_column('lote_id', existing_type=sa.Integer, nullable=False)
+        batch_op.create_foreign_key(
+            'fk_actualizaciones_precio_lote_id',
+            'lotes_actualizacion_precio',
+            ['lote_id'],
+            ['id'],
+            ondelete='CASCADE',
+        )
+        batch_op.drop_index('ix_actualizaciones_precio_fecha')
+        batch_op.drop_index('ix_actualizaciones_precio_producto_id')
+        batch_op.drop_index('ix_actualizaciones_precio_empresa_id')
+        for columna in (
+            'usuario_id',
+            'tipo',
+            'porcentaje',
+            'actualizo_costo',
+            'categoria_id',
+            'notas',
+            'empresa_id',
+        ):
+            batch_op.drop_column(columna)
+        batch_op.create_index('ix_actualizaciones_precio_lote_id', ['lote_id'])
+        batch_op.create_index('ix_actualizaciones_precio_producto_fecha', ['producto_id', 'fecha'])
+
+
+def downgrade():
+    with op.batch_alter_table('actualizaciones_precio', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('usuario_id', sa.Integer, nullable=True))
+        batch_op.add_column(sa.Column('tipo', sa.String(10), nullable=True))
+        batch_op.add_column(sa.Column('porcentaje', sa.Numeric(8, 4), nullable=True))
+        batch_op.add_column(sa.Column('actualizo_costo', sa.Boolean, nullable=True))
+        batch_op.add_column(sa.Column('categoria_id', sa.Integer, nullable=True))
+        batch_op.add_column(sa.Column('notas', sa.Text, nullable=True))
+        batch_op.add_column(sa.Column('empresa_id', sa.Integer, nullable=True))
+
+    conexion = op.get_bind()
+    variacion_costo = sa.case(
+        (
+            actualizaciones.c.precio_costo_anterior > 0,
+            sa.func.round(
+                (actualizaciones.c.precio_costo_nuevo - actualizaciones.c.precio_costo_anterior)
+                * sa.literal_column('100.0')
+                / actualizaciones.c.precio_costo_anterior,
+                4,
+            ),
+        ),
+    )
+    # Cada fila recupera la categoría de su producto si es una de las del lote
+    categoria_producto = (
+        sa.select(productos.c.categoria_id)
+        .where(productos.c.id == actualizaciones.c.producto_id)
+        .scalar_subquery()
+    )
+    for lote in conexion.execute(sa.select(lotes)).all():
+        categorias = json.loads(lote.categorias_ids) if lote.categorias_ids else []
+        categoria_id = None
+        if categorias:
+            categoria_id = sa.case(
+                (categoria_producto.in_(categorias), categoria_producto), else_=categorias[0]
+            )
+        conexion.execute(
+            actualizaciones.update()
+            .where(actualizaciones.c.lote_id == lote.id)
+            .values(
+                usuario_id=lote.usuario_id,
+                tipo=lote.tipo,
+                porcentaje=(
+                    lote.porcentaje
+                    if lote.porcentaje is not None or lote.tipo != 'proveedor'
+                    else variacion_costo
+                ),
+                actualizo_costo=lote.actualizo_costo,
+                categoria_id=categoria_id,
+                notas=lote.notas,
+                empresa_id=lote.empresa_id,
+            )
+        )
+
+    with op.batch_alter_table('actualizaciones_precio', schema=None) as batch_op:
+        batch_op.drop_index('ix_actualizaciones_precio_producto_fecha')
+        batch_op.drop_index('ix_actualizaciones_precio_lote_id')
+        batch_op.drop_constraint('fk_actualizaciones_precio_lote_id', type_='foreignkey')
+        batch_op.drop_column('lote_id')
+        for columna, tipo in (
+            ('usuario_id', sa.Integer),
+            ('tipo', sa.String(10)),
+            ('actualizo_costo', sa.Boolean),
+            ('empresa_id', sa.Integer),
+        ):
+            batch_op.alter_column(columna, existing_type=tipo, nullable=False)
+        batch_op.create_foreign_key(
+            'fk_actualizaciones_precio_usuario_id', 'usuarios', ['usuario_id'], ['id']
+        )
+        batch_op.create_foreign_key(
+            'fk_actualizaciones_precio_categoria_id', 'categorias', ['categoria_id'], ['id']
+        )
+        batch_op.create_foreign_key(
+            'fk_actualizaciones_precio_empresa_id', 'empresas', ['empresa_id'], ['id']
+        )
+        batch_op.create_index('ix_actualizaciones_precio_producto_id', ['producto_id'])
+        batch_op.create_index('ix_actualizaciones_precio_empresa_id', ['empresa_id'])
+        batch_op.create_index('ix_actualizaciones_precio_fecha', ['fecha'])
+
+    op.drop_table('lotes_actualizacion_precio')
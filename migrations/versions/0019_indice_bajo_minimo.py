@@ -0,0 +1,30 @@
+"""Índice parcial de productos activos bajo el stock mínimo.
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mismo predicado que Producto.filtro_bajo_minimo()
+    op.create_index(
+        'ix_productos_bajo_minimo',
+        'productos',
+        ['empresa_id', 'stock_actual'],
+        postgresql_where=sa.text('activo IS true AND stock_actual < stock_minimo'),
+        sqlite_where=sa.text('activo IS 1 AND stock_actual < stock_minimo'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_productos_bajo_minimo', 'productos')
@@ -0,0 +1,73 @@
+"""Ruta materializada y fecha de modificación en categorías.
+
+``ruta`` guarda los ids desde la raíz ('/3/17/'), así que los productos de
+un subárbol se filtran con un prefijo indexado a cualquier profundidad.
+``updated_at`` entra en la huella que invalida el árbol cacheado.
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+categorias = sa.table(
+    'categorias',
+    sa.column('id', sa.Integer),
+    sa.column('padre_id', sa.Integer),
+    sa.column('ruta', sa.String),
+    sa.column('created_at', sa.DateTime),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('categorias', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ruta', sa.String(255), nullable=True))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime, nullable=True))
+
+    conexion = op.get_bind()
+    conexion.execute(categorias.update().values(updated_at=categorias.c.created_at))
+
+    # Raíces primero; después cada nivel a partir de la ruta de su padre
+    conexion.execute(
+        categorias.update()
+        .where(categorias.c.padre_id.is_(None))
+        .values(ruta='/' + sa.cast(categorias.c.id, sa.String) + '/')
+    )
+    padre = categorias.alias('padre')
+    while True:
+        ruta_padre = (
+            sa.select(padre.c.ruta).where(padre.c.id == categorias.c.padre_id).scalar_subquery()
+        )
+        resultado = conexion.execute(
+            categorias.update()
+            .where(
+                categorias.c.ruta.is_(None),
+                categorias.c.padre_id.in_(sa.select(padre.c.id).where(padre.c.ruta.isnot(None))),
+            )
+            .values(ruta=ruta_padre + sa.cast(categorias.c.id, sa.String) + '/')
+        )
+        if not resultado.rowcount:
+            break
+
+    op.create_index(
+        'ix_categorias_empresa_ruta',
+        'categorias',
+        ['empresa_id', 'ruta'],
+        postgresql_ops={'ruta': 'varchar_pattern_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_categorias_empresa_ruta', 'categorias')
+    with op.batch_alter_table('categorias', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('ruta')
@@ -0,0 +1,72 @@
+"""Crear tablas de toma de inventario.
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'tomas_inventario',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id'), nullable=False),
+        sa.Column('descripcion', sa.String(200), nullable=True),
+        sa.Column(
+            'estado',
+            sa.Enum(
+                'abierta', 'aplicando', 'aplicada', 'descartada', name='estado_toma_inventario'
+            ),
+            nullable=False,
+        ),
+        sa.Column('con_error', sa.Integer, nullable=False),
+        sa.Column('errores', sa.Text, nullable=True),
+        sa.Column('ultimo_item_id', sa.Integer, nullable=False),
+        sa.Column('productos_ajustados', sa.Integer, nullable=False),
+        sa.Column('mensaje', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column('updated_at', sa.DateTime, nullable=True),
+        sa.Column('aplicada_at', sa.DateTime, nullable=True),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+    )
+
+    op.create_table(
+        'tomas_inventario_items',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column(
+            'toma_id',
+            sa.Integer,
+            sa.ForeignKey('tomas_inventario.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('producto_id', sa.Integer, sa.ForeignKey('productos.id'), nullable=False),
+        sa.Column('cantidad_contada', sa.Numeric(12, 3), nullable=False),
+        sa.Column('stock_sistema', sa.Numeric(12, 3), nullable=False),
+        sa.Column('contado_at', sa.DateTime, nullable=False),
+        sa.UniqueConstraint(
+            'toma_id', 'producto_id', name='uq_tomas_inventario_items_toma_producto'
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table('tomas_inventario_items')
+    op.drop_table('tomas_inventario')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS estado_toma_inventario')
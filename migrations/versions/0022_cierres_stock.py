@@ -0,0 +1,45 @@
+"""Crear tabla de cierres de stock.
+
+Una fila por producto y fecha de cierre con el stock y el costo al final
+del día; el stock a otras fechas se reconstruye desde el cierre más
+cercano.
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0022'
+down_revision = '0021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cierres_stock',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('producto_id', sa.Integer, sa.ForeignKey('productos.id'), nullable=False),
+        sa.Column('fecha', sa.Date, nullable=False),
+        sa.Column('stock', sa.Numeric(12, 3), nullable=False),
+        sa.Column('precio_costo', sa.Numeric(12, 2), nullable=False),
+        sa.Column('created_at', sa.DateTime, nullable=True),
+        sa.Column(
+            'empresa_id',
+            sa.Integer,
+            sa.ForeignKey('empresas.id'),
+            nullable=False,
+            index=True,
+        ),
+        sa.UniqueConstraint('producto_id', 'fecha', name='uq_cierres_stock_producto_fecha'),
+    )
+    op.create_index('ix_cierres_stock_empresa_fecha', 'cierres_stock', ['empresa_id', 'fecha'])
+
+
+def downgrade():
+    op.drop_index('ix_cierres_stock_empresa_fecha', 'cierres_stock')
+    op.drop_table('cierres_stock')
@@ -0,0 +1,29 @@
+"""Índice (producto_id, created_at) en movimientos de stock.
+
+El kardex recorre los movimientos de un producto en un rango de fechas y
+busca el último movimiento anterior al rango para el saldo inicial.
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0023'
+down_revision = '0022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_movimientos_stock_producto_created',
+        'movimientos_stock',
+        ['producto_id', 'created_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_movimientos_stock_producto_created', 'movimientos_stock')
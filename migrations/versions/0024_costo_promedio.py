@@ -0,0 +1,73 @@
+"""Costo promedio ponderado en productos y movimientos de compra.
+
+``costo_unitario`` de las compras existentes se completa con el precio del
+detalle de la orden recibida. Los promedios se calculan después con
+``flask recalcular-costos``, que reproduce el historial por lotes.
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0024'
+down_revision = '0023'
+branch_labels = None
+depends_on = None
+
+movimientos = sa.table(
+    'movimientos_stock',
+    sa.column('id', sa.Integer),
+    sa.column('producto_id', sa.Integer),
+    sa.column('tipo', sa.String),
+    sa.column('referencia_tipo', sa.String),
+    sa.column('referencia_id', sa.Integer),
+    sa.column('costo_unitario', sa.Numeric),
+)
+
+detalles = sa.table(
+    'orden_compra_detalles',
+    sa.column('id', sa.Integer),
+    sa.column('orden_compra_id', sa.Integer),
+    sa.column('producto_id', sa.Integer),
+    sa.column('precio_unitario', sa.Numeric),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('productos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('costo_promedio', sa.Numeric(12, 2), nullable=True))
+    with op.batch_alter_table('movimientos_stock', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('costo_unitario', sa.Numeric(12, 2), nullable=True))
+        batch_op.add_column(sa.Column('costo_promedio', sa.Numeric(12, 2), nullable=True))
+
+    precio = (
+        sa.select(detalles.c.precio_unitario)
+        .where(
+            detalles.c.orden_compra_id == movimientos.c.referencia_id,
+            detalles.c.producto_id == movimientos.c.producto_id,
+            detalles.c.precio_unitario > 0,
+        )
+        .order_by(detalles.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    op.get_bind().execute(
+        movimientos.update()
+        .where(
+            movimientos.c.tipo == 'compra',
+            movimientos.c.referencia_tipo == 'orden_compra',
+        )
+        .values(costo_unitario=precio)
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('movimientos_stock', schema=None) as batch_op:
+        batch_op.drop_column('costo_promedio')
+        batch_op.drop_column('costo_unitario')
+    with op.batch_alter_table('productos', schema=None) as batch_op:
+        batch_op.drop_column('costo_promedio')
@@ -18,6 +18,7 @@ from app.models import (
     Devolucion,
     DevolucionDetalle,
     Empresa,
+    LoteActualizacionPrecio,
     MovimientoCaja,
     MovimientoCuentaCorriente,
     MovimientoStock,
@@ -58,6 +59,7 @@ def run_seeds():
     Presupuesto.query.delete()
     Caja.query.delete()
     ActualizacionPrecio.query.delete()
+    LoteActualizacionPrecio.query.delete()
     # Maestros
     Producto.query.delete()
     Categoria.query.delete()
@@ -866,6 +868,7 @@ def seed_ventas(empresa_id):
     ventas_pendientes.sort(key=lambda v: v['fecha'])
 
     # Crear las ventas con numero secuencial segun orden cronologico
+    clientes_por_id = {cliente.id: cliente for cliente in clientes}
     for numero, datos in enumerate(ventas_pendientes, start=1):
         venta = Venta(
             numero=numero,
@@ -885,8 +888,19 @@ def seed_ventas(empresa_id):
         for detalle in datos['detalles']:
             venta.detalles.append(detalle)
 
+        cliente = clientes_por_id.get(datos['cliente_id'])
+        venta.cliente_nombre = cliente.nombre if cliente else None
+        venta.cantidad_items = sum(detalle.cantidad for detalle in datos['detalles'])
+        venta.formas_pago_resumen = venta.forma_pago_display
+
         db.session.add(venta)
 
+        # Estadisticas de compra del cliente
+        if cliente:
+            cliente.total_comprado += datos['subtotal']
+            cliente.cantidad_compras += 1
+            cliente.fecha_ultima_compra = datos['fecha']
+
     db.session.flush()
 
 
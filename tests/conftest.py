@@ -1,4 +1,5 @@
 import os
+import re
 
 os.environ.setdefault('TEST_DATABASE_URL', 'sqlite:///:memory:')
 
@@ -40,3 +41,11 @@ def empresa(app):
 def client(app):
     """Cliente de prueba para tests de rutas."""
     return app.test_client()
+
+
+@pytest.fixture
+def csrf_token(app, client):
+    """Habilita CSRF y retorna un token válido para la sesión del cliente."""
+    app.config['WTF_CSRF_ENABLED'] = True
+    login = client.get('/auth/login').get_data(as_text=True)
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', login).group(1)
@@ -0,0 +1,153 @@
+"""Tests de la actualización masiva de precios."""
+
+from decimal import Decimal
+
+import pytest
+from flask_login import login_user
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import ActualizacionPrecio, Categoria, LoteActualizacionPrecio, Producto, Usuario
+from app.services import actualizacion_precio_service
+
+
+@pytest.fixture
+def datos(app, empresa):
+    usuario = Usuario(
+        email='precios@ferrerp.test',
+        nombre='Usuario Precios',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    herramientas = Categoria(nombre='Herramientas', empresa_id=empresa.id)
+    pinturas = Categoria(nombre='Pinturas', empresa_id=empresa.id)
+    db.session.add_all([usuario, herramientas, pinturas])
+    db.session.flush()
+
+    def _producto(codigo, costo, venta, categoria, activo=True):
+        return Producto(
+            codigo=codigo,
+            nombre=f'Producto {codigo}',
+            precio_costo=Decimal(costo),
+            precio_venta=Decimal(venta),
+            categoria_id=categoria.id,
+            activo=activo,
+            empresa_id=empresa.id,
+        )
+
+    db.session.add_all(
+        [
+            _producto('H1', '100', '150', herramientas),
+            _producto('H2', '33.33', '49.99', herramientas),
+            _producto('H3', '10', '20', herramientas, activo=False),
+            _producto('P1', '200', '300', pinturas),
+        ]
+    )
+    db.session.commit()
+
+    with app.test_request_context():
+        login_user(usuario)
+        yield usuario, herramientas, pinturas
+
+
+def _precios():
+    return {
+        p.codigo: (p.precio_costo, p.precio_venta)
+        for p in db.session.execute(select(Producto)).scalars()
+    }
+
+
+def test_aplicar_actualiza_en_sql_y_audita_por_categoria(datos):
+    usuario, herramientas, pinturas = datos
+
+    cantidad = actualizacion_precio_service.aplicar_actualizacion(
+        [herramientas.id, pinturas.id], Decimal('10'), actualizar_costo=True, notas='Inflación'
+    )
+
+    assert cantidad == 3
+    precios = _precios()
+    assert precios['H1'] == (Decimal('110.00'), Decimal('165.00'))
+    assert precios['H2'] == (Decimal('36.66'), Decimal('54.99'))
+    assert precios['H3'] == (Decimal('10.00'), Decimal('20.00'))
+    assert precios['P1'] == (Decimal('220.00'), Decimal('330.00'))
+
+    registros = {
+        r.producto.codigo: r for r in db.session.execute(select(ActualizacionPrecio)).scalars()
+    }
+    assert set(registros) == {'H1', 'H2', 'P1'}
+    assert registros['H2'].precio_venta_anterior == Decimal('49.99')
+    assert registros['H2'].precio_venta_nuevo == Decimal('54.99')
+    # Los datos comunes quedan una sola vez, en el lote de la operación
+    lote = registros['P1'].lote
+    assert {r.lote_id for r in registros.values()} == {lote.id}
+    assert lote.cantidad_productos == 3
+    assert lote.lista_categorias_ids == [herramientas.id, pinturas.id]
+    assert lote.usuario_id == usuario.id
+    assert registros['P1'].porcentaje == Decimal('10')
+    assert registros['P1'].notas == 'Inflación'
+
+
+def test_aplicar_sin_costo_solo_cambia_venta(datos):
+    _, herramientas, _ = datos
+
+    actualizacion_precio_service.aplicar_actualizacion(
+        [herramientas.id], Decimal('-20'), actualizar_costo=False
+    )
+
+    assert _precios()['H1'] == (Decimal('100.00'), Decimal('120.00'))
+
+
+def test_aplicar_rechaza_precios_invalidos_sin_cambiar_nada(datos):
+    _, herramientas, _ = datos
+
+    with pytest.raises(ValueError, match='precio de venta'):
+        actualizacion_precio_service.aplicar_actualizacion([herramientas.id], Decimal('-100'))
+
+    assert _precios()['H1'] == (Decimal('100.00'), Decimal('150.00'))
+    assert db.session.execute(select(ActualizacionPrecio)).first() is None
+    assert db.session.execute(select(LoteActualizacionPrecio)).first() is None
+
+
+def test_resumen_calcula_estadisticas_y_margenes_en_sql(datos):
+    _, herramientas, pinturas = datos
+
+    resumen = actualizacion_precio_service.resumen_actualizacion(
+        [herramientas.id, pinturas.id], Decimal('10'), actualizar_costo=False
+    )
+
+    assert resumen['cantidad'] == 3
+    assert resumen['invalidos'] == 0
+    assert resumen['venta']['min'] == (Decimal('49.99'), Decimal('54.99'))
+    assert resumen['venta']['max'] == (Decimal('300.00'), Decimal('330.00'))
+    assert resumen['costo']['max'] == (Decimal('200.00'), Decimal('200.00'))
+    # Con costo fijo y venta +10%: H1 165/100 y P1 330/200 quedan en 60% o
+    # más, H2 54.99/33.33 también
+    assert dict(resumen['margenes'])['60% o más'] == 3
+    assert sum(cantidad for _, cantidad in resumen['margenes']) == 3
+
+
+def test_resumen_cuenta_invalidos(datos):
+    _, herramientas, _ = datos
+
+    resumen = actualizacion_precio_service.resumen_actualizacion([herramientas.id], Decimal('-100'))
+
+    assert resumen['invalidos'] == 2
+    errores = actualizacion_precio_service.productos_invalidos([herramientas.id], Decimal('-100'))
+    assert len(errores) == 2
+
+
+def test_pagina_recorre_la_muestra_por_clave(datos):
+    _, herramientas, pinturas = datos
+    categorias = [herramientas.id, pinturas.id]
+
+    primera = actualizacion_precio_service.pagina_actualizacion(categorias, Decimal('10'), limite=2)
+    assert [f.codigo for f in primera['productos']] == ['H1', 'H2']
+    assert primera['productos'][1].precio_venta_nuevo == Decimal('54.99')
+
+    segunda = actualizacion_precio_service.pagina_actualizacion(
+        categorias, Decimal('10'), despues_id=primera['siguiente'], limite=2
+    )
+    assert [f.codigo for f in segunda['productos']] == ['P1']
+    assert segunda['siguiente'] is None
@@ -0,0 +1,109 @@
+"""Tests de la búsqueda de productos (FTS5 en SQLite)."""
+
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Producto
+from app.services import busqueda_service
+
+
+def _crear_productos(empresa, *datos):
+    productos = [
+        Producto(
+            codigo=codigo,
+            nombre=nombre,
+            codigo_barras=codigo_barras,
+            precio_costo=Decimal('1'),
+            precio_venta=Decimal('2'),
+            empresa_id=empresa.id,
+        )
+        for codigo, nombre, codigo_barras in datos
+    ]
+    db.session.add_all(productos)
+    db.session.commit()
+    return productos
+
+
+def _buscar(empresa, busqueda):
+    query = Producto.query.filter(Producto.empresa_id == empresa.id)
+    return [p.codigo for p in busqueda_service.buscar_productos(query, busqueda)]
+
+
+def test_normalizar_quita_acentos_y_mayusculas():
+    assert busqueda_service.normalizar('  Llave TÉRMICA Güemes Ñandú ') == (
+        'llave termica guemes nandu'
+    )
+
+
+def test_busqueda_ignora_acentos_y_mayusculas(app, empresa):
+    _crear_productos(
+        empresa,
+        ('LT-1', 'Llave térmica 2x16', None),
+        ('CB-1', 'Cable unipolar', None),
+    )
+
+    assert _buscar(empresa, 'termica') == ['LT-1']
+    assert _buscar(empresa, 'TÉRM') == ['LT-1']
+    assert _buscar(empresa, 'llave 2x16') == ['LT-1']
+    assert _buscar(empresa, 'tornillo') == []
+
+
+def test_codigo_y_codigo_de_barras_exactos_primero(app, empresa):
+    _crear_productos(
+        empresa,
+        ('A1', 'Caño 40 PVC', None),
+        ('400', 'Cupla', None),
+        ('40', 'Codo a 90', None),
+        ('B7', 'Buje', '7790001000404'),
+    )
+
+    assert _buscar(empresa, '40') == ['40', '400', 'A1']
+    assert _buscar(empresa, '7790001000404') == ['B7']
+
+
+def test_indice_se_actualiza_al_editar_y_borrar(app, empresa):
+    (producto,) = _crear_productos(empresa, ('M-1', 'Martillo', None))
+
+    producto.nombre = 'Maza de goma'
+    db.session.commit()
+    assert _buscar(empresa, 'martillo') == []
+    assert _buscar(empresa, 'goma') == ['M-1']
+
+    db.session.execute(db.delete(Producto).where(Producto.id == producto.id))
+    db.session.commit()
+    assert _buscar(empresa, 'goma') == []
+
+
+def test_resolver_codigo_por_codigo_y_codigo_de_barras(app, empresa):
+    _crear_productos(
+        empresa,
+        ('T-8', 'Tarugo 8mm', '7790000000011'),
+        # Su código es el código de barras del tarugo: gana el de barras
+        ('7790000000011', 'Producto mal cargado', None),
+    )
+
+    tarjeta = busqueda_service.resolver_codigo(empresa.id, ' 7790000000011 ')
+    assert tarjeta['codigo'] == 'T-8'
+    assert tarjeta['unidad_medida_display'] == 'Unidad'
+    assert tarjeta['precio_venta'] == 2.0
+    assert busqueda_service.resolver_codigo(empresa.id, 'T-8')['codigo'] == 'T-8'
+    assert busqueda_service.resolver_codigo(empresa.id, 'NO-EXISTE') is None
+
+
+def test_resolver_codigo_detecta_entradas_viejas_del_cache(app, empresa):
+    tarugo, buje = _crear_productos(
+        empresa,
+        ('T-8', 'Tarugo 8mm', '7790000000011'),
+        ('B-1', 'Buje', None),
+    )
+    assert busqueda_service.resolver_codigo(empresa.id, '7790000000011')['id'] == tarugo.id
+
+    # Otro proceso pasa el código de barras al buje (sin invalidar este cache)
+    tarugo.codigo_barras = None
+    buje.codigo_barras = '7790000000011'
+    db.session.commit()
+    assert busqueda_service.resolver_codigo(empresa.id, '7790000000011')['id'] == buje.id
+
+    buje.activo = False
+    db.session.commit()
+    assert busqueda_service.resolver_codigo(empresa.id, '7790000000011') is None
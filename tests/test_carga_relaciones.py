@@ -0,0 +1,252 @@
+"""Tests de cantidad de queries en vistas de detalle y listados.
+
+Cada vista se mide con pocos y con muchos items: la cantidad de queries no
+debe crecer con la cantidad de filas (sin N+1 por relaciones perezosas).
+"""
+
+import os
+
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from flask import Blueprint
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db as _db
+from app.models import (
+    Caja,
+    Cliente,
+    Empresa,
+    MovimientoCaja,
+    OrdenCompra,
+    OrdenCompraDetalle,
+    Producto,
+    Proveedor,
+    Usuario,
+    Venta,
+    VentaDetalle,
+    VentaPago,
+)
+
+# ─── Fixtures ────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def app():
+    """App de prueba con login real."""
+    app = create_app('testing')
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///:memory:',
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        WTF_CSRF_ENABLED=False,
+        TESTING=True,
+        LOGIN_DISABLED=False,
+    )
+
+    test_bp = Blueprint('test_carga_login', __name__)
+
+    @test_bp.route('/test-login/<int:user_id>')
+    def test_login(user_id):
+        login_user(_db.session.get(Usuario, user_id))
+        return 'logged-in'
+
+    with app.app_context():
+        app.register_blueprint(test_bp)
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def datos(app):
+    """Empresa, usuario administrador, cliente, proveedor y caja abierta."""
+    empresa = Empresa(nombre='Ferretería Test', activa=True, aprobada=True)
+    _db.session.add(empresa)
+    _db.session.flush()
+    usuario = Usuario(
+        email='admin@test.com',
+        nombre='Admin Test',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave123')
+    cliente = Cliente(nombre='Juan Pérez', empresa_id=empresa.id)
+    proveedor = Proveedor(nombre='Proveedor Test', empresa_id=empresa.id)
+    _db.session.add_all([usuario, cliente, proveedor])
+    _db.session.flush()
+    caja = Caja(usuario_apertura_id=usuario.id, monto_inicial=Decimal('0'), empresa_id=empresa.id)
+    _db.session.add(caja)
+    _db.session.commit()
+    return {
+        'empresa_id': empresa.id,
+        'usuario_id': usuario.id,
+        'cliente_id': cliente.id,
+        'proveedor_id': proveedor.id,
+        'caja_id': caja.id,
+    }
+
+
+@pytest.fixture
+def logged_client(app, datos):
+    client = app.test_client()
+    client.get(f'/test-login/{datos["usuario_id"]}')
+    return client
+
+
+# ─── Helpers ─────────────────────────────────────────────────────────
+
+
+@contextmanager
+def contar_queries():
+    """Cuenta las sentencias SQL ejecutadas dentro del bloque."""
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(_db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(_db.engine, 'before_cursor_execute', registrar)
+
+
+def _queries_de(client, url):
+    """Cantidad de queries de un GET en un contexto nuevo (sesión sin identity map)."""
+    with client.application.app_context(), contar_queries() as sentencias:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return len(sentencias)
+
+
+def _crear_productos(datos, cantidad, prefijo):
+    productos = [
+        Producto(
+            codigo=f'{prefijo}-{i}',
+            nombre=f'Producto {prefijo} {i}',
+            precio_costo=Decimal('10'),
+            precio_venta=Decimal('15'),
+            empresa_id=datos['empresa_id'],
+        )
+        for i in range(cantidad)
+    ]
+    _db.session.add_all(productos)
+    _db.session.flush()
+    return productos
+
+
+def _crear_venta(datos, numero, items):
+    """Venta dividida (efectivo + cuenta corriente) con ``items`` productos distintos."""
+    venta = Venta(
+        numero=numero,
+        cliente_id=datos['cliente_id'],
+        usuario_id=datos['usuario_id'],
+        caja_id=datos['caja_id'],
+        forma_pago='dividido',
+        subtotal=Decimal('15') * items,
+        total=Decimal('15') * items,
+        estado='completada',
+        empresa_id=datos['empresa_id'],
+    )
+    for producto in _crear_productos(datos, items, f'V{numero}'):
+        venta.detalles.append(
+            VentaDetalle(
+                producto_id=producto.id,
+                cantidad=Decimal('1'),
+                precio_unitario=Decimal('15'),
+                subtotal=Decimal('15'),
+            )
+        )
+    _db.session.add(venta)
+    _db.session.flush()
+    mitad = venta.total / 2
+    _db.session.add_all(
+        [
+            VentaPago(venta_id=venta.id, forma_pago='efectivo', monto=mitad),
+            VentaPago(venta_id=venta.id, forma_pago='cuenta_corriente', monto=mitad),
+            MovimientoCaja(
+                caja_id=datos['caja_id'],
+                tipo='ingreso',
+                concepto='venta',
+                descripcion=f'Venta #{numero} (pago parcial)',
+                monto=mitad,
+                forma_pago='efectivo',
+                referencia_tipo='venta',
+                referencia_id=venta.id,
+                usuario_id=datos['usuario_id'],
+            ),
+        ]
+    )
+    _db.session.commit()
+    return venta.id
+
+
+def _crear_orden(datos, numero, items):
+    orden = OrdenCompra(
+        numero=numero,
+        proveedor_id=datos['proveedor_id'],
+        usuario_id=datos['usuario_id'],
+        empresa_id=datos['empresa_id'],
+    )
+    for producto in _crear_productos(datos, items, f'O{numero}'):
+        orden.detalles.append(
+            OrdenCompraDetalle(
+                producto_id=producto.id,
+                cantidad_pedida=Decimal('2'),
+                precio_unitario=Decimal('10'),
+                subtotal=Decimal('20'),
+            )
+        )
+    _db.session.add(orden)
+    _db.session.commit()
+    return orden.id
+
+
+# ─── Tests ───────────────────────────────────────────────────────────
+
+
+def test_detalle_venta_no_crece_con_los_items(logged_client, datos):
+    chica = _crear_venta(datos, 1, items=1)
+    grande = _crear_venta(datos, 2, items=6)
+
+    assert _queries_de(logged_client, f'/ventas/{chica}') == _queries_de(
+        logged_client, f'/ventas/{grande}'
+    )
+
+
+def test_historial_ventas_no_crece_con_las_filas(logged_client, datos):
+    _crear_venta(datos, 1, items=1)
+    pocas = _queries_de(logged_client, '/ventas/historial')
+
+    for numero in range(2, 8):
+        _crear_venta(datos, numero, items=1)
+    muchas = _queries_de(logged_client, '/ventas/historial')
+
+    assert pocas == muchas
+
+
+def test_detalle_orden_compra_no_crece_con_los_items(logged_client, datos):
+    chica = _crear_orden(datos, 1, items=1)
+    grande = _crear_orden(datos, 2, items=6)
+
+    assert _queries_de(logged_client, f'/compras/{chica}') == _queries_de(
+        logged_client, f'/compras/{grande}'
+    )
+
+
+def test_detalle_caja_no_crece_con_los_movimientos(logged_client, datos):
+    _crear_venta(datos, 1, items=1)
+    pocas = _queries_de(logged_client, f'/caja/{datos["caja_id"]}')
+
+    for numero in range(2, 8):
+        _crear_venta(datos, numero, items=2)
+    muchas = _queries_de(logged_client, f'/caja/{datos["caja_id"]}')
+
+    assert pocas == muchas
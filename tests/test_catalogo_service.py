@@ -0,0 +1,68 @@
+"""Tests de la sincronización incremental del catálogo."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Producto
+from app.services import catalogo_service
+from app.utils.helpers import ahora_argentina
+
+
+def _crear_productos(empresa, cantidad, hace=timedelta(hours=1)):
+    """Productos modificados por última vez hace ``hace`` (fuera del margen)."""
+    productos = [
+        Producto(
+            codigo=f'P{i}',
+            nombre=f'Producto {i}',
+            precio_costo=Decimal('1'),
+            precio_venta=Decimal('2'),
+            empresa_id=empresa.id,
+        )
+        for i in range(cantidad)
+    ]
+    db.session.add_all(productos)
+    db.session.flush()
+    db.session.execute(
+        db.update(Producto)
+        .where(Producto.empresa_id == empresa.id)
+        .values(updated_at=ahora_argentina() - hace)
+    )
+    db.session.commit()
+    return productos
+
+
+def test_sincronizacion_completa_por_paginas(app, empresa):
+    _crear_productos(empresa, 3)
+
+    primera = catalogo_service.cambios_catalogo(empresa.id, limite=2)
+    assert [p['codigo'] for p in primera['productos']] == ['P0', 'P1']
+    assert not primera['completo']
+
+    segunda = catalogo_service.cambios_catalogo(empresa.id, desde=primera['cursor'], limite=2)
+    assert [p['codigo'] for p in segunda['productos']] == ['P2']
+    assert segunda['completo']
+    assert segunda['productos'][0]['activo'] is True
+
+    sin_cambios = catalogo_service.cambios_catalogo(empresa.id, desde=segunda['cursor'])
+    assert sin_cambios['productos'] == []
+    assert sin_cambios['cursor'] == segunda['cursor']
+
+
+def test_delta_trae_modificados_y_desactivados(app, empresa):
+    p0, p1, _ = _crear_productos(empresa, 3)
+    cursor = catalogo_service.cambios_catalogo(empresa.id)['cursor']
+
+    p0.precio_venta = Decimal('5')
+    p1.activo = False
+    db.session.commit()
+
+    delta = catalogo_service.cambios_catalogo(empresa.id, desde=cursor)
+    cambios = {p['codigo']: p for p in delta['productos']}
+    assert set(cambios) == {'P0', 'P1'}
+    assert cambios['P0']['precio_venta'] == 5.0
+    assert cambios['P1']['activo'] is False
+
+    # Los cambios recientes quedan dentro del margen de solapamiento y se reenvían
+    repetido = catalogo_service.cambios_catalogo(empresa.id, desde=delta['cursor'])
+    assert {p['codigo'] for p in repetido['productos']} == {'P0', 'P1'}
@@ -3,7 +3,8 @@
 from decimal import Decimal
 
 from app.extensions import db
-from app.models import Categoria, Empresa, Producto
+from app.models import Categoria, Empresa, Producto, Usuario
+from app.services import categoria_service
 
 
 def _crear_empresa():
@@ -189,3 +190,104 @@ def test_eliminar_subcategoria_no_borra_padre(app):
 
     assert db.session.get(Categoria, sub_id) is None
     assert db.session.get(Categoria, padre_id) is not None
+
+
+# --------------------------------------------------------------------------
+# Tests de ruta materializada y árbol cacheado
+# --------------------------------------------------------------------------
+
+
+def test_ruta_materializada_al_crear_y_mover(app):
+    """La ruta se completa al crear y se recalcula en todo el subárbol al mover."""
+    empresa = _crear_empresa()
+    herramientas = _crear_categoria(empresa, nombre='Herramientas')
+    manuales = _crear_categoria(empresa, nombre='Manuales', padre=herramientas)
+    martillos = _crear_categoria(empresa, nombre='Martillos', padre=manuales)
+    ferreteria = _crear_categoria(empresa, nombre='Ferretería')
+    db.session.commit()
+
+    assert herramientas.ruta == f'/{herramientas.id}/'
+    assert martillos.ruta == f'/{herramientas.id}/{manuales.id}/{martillos.id}/'
+
+    manuales.padre_id = ferreteria.id
+    db.session.commit()
+    db.session.expire_all()
+
+    assert manuales.ruta == f'/{ferreteria.id}/{manuales.id}/'
+    assert martillos.ruta == f'/{ferreteria.id}/{manuales.id}/{martillos.id}/'
+    ids = db.session.scalars(ferreteria.ids_subarbol()).all()
+    assert sorted(ids) == sorted([ferreteria.id, manuales.id, martillos.id])
+
+    producto = _crear_producto(empresa, martillos)
+    db.session.commit()
+    assert ferreteria.cantidad_productos_total == 1
+    assert herramientas.cantidad_productos_total == 0
+    assert ferreteria.puede_eliminarse is False
+    assert Producto.query.filter(Producto.categoria_id.in_(ferreteria.ids_subarbol())).all() == [
+        producto
+    ]
+
+
+def test_arbol_categorias_con_cantidades(app):
+    """El árbol trae cantidades por nodo y de todo el subárbol."""
+    empresa = _crear_empresa()
+    padre = _crear_categoria(empresa, nombre='Padre')
+    sub_activos = _crear_categoria(empresa, nombre='Sub A', padre=padre)
+    sub_inactivos = _crear_categoria(empresa, nombre='Sub B', padre=padre)
+    vacia = _crear_categoria(empresa, nombre='Vacía')
+    _crear_producto(empresa, padre)
+    _crear_producto(empresa, sub_activos)
+    _crear_producto(empresa, sub_inactivos, activo=False)
+    db.session.commit()
+
+    arbol = categoria_service.arbol_categorias(empresa.id)
+
+    assert [raiz.nombre for raiz in arbol.raices] == ['Padre', 'Vacía']
+    nodo_padre = arbol.get(padre.id)
+    assert [sub.nombre for sub in nodo_padre.subcategorias] == ['Sub A', 'Sub B']
+    assert nodo_padre.cantidad_productos == 1
+    assert nodo_padre.cantidad_productos_total == 2
+    assert arbol.get(sub_inactivos.id).cantidad_productos == 0
+    assert arbol.get(sub_inactivos.id).puede_eliminarse is False
+    assert nodo_padre.puede_eliminarse is False
+    assert arbol.get(vacia.id).puede_eliminarse is True
+    assert arbol.nombre_completo(sub_activos.id) == 'Padre > Sub A'
+    assert sorted(arbol.ids_subarbol(padre.id)) == sorted(
+        [padre.id, sub_activos.id, sub_inactivos.id]
+    )
+
+
+def test_arbol_categorias_cache_se_invalida_al_escribir(app):
+    """El árbol sobrevive a los movimientos de stock; categoría y estado activo lo invalidan."""
+    empresa = _crear_empresa()
+    empresa.aprobada = True
+    categoria = _crear_categoria(empresa, nombre='Pinturas')
+    producto = _crear_producto(empresa, categoria)
+    usuario = Usuario(
+        email='categorias@test.com',
+        nombre='Usuario Categorías',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    db.session.add(usuario)
+    db.session.commit()
+    client = app.test_client()
+    client.post('/auth/login', data={'email': usuario.email, 'password': 'clave'})
+
+    arbol = categoria_service.arbol_categorias(empresa.id)
+    assert categoria_service.arbol_categorias(empresa.id) is arbol
+    assert arbol.get(categoria.id).cantidad_productos == 1
+
+    # Una venta solo mueve stock: el árbol sigue cacheado
+    producto.actualizar_stock(Decimal('-1'), 'venta')
+    db.session.commit()
+    assert categoria_service.arbol_categorias(empresa.id) is arbol
+
+    client.post(f'/productos/{producto.id}/toggle-activo')
+    arbol = categoria_service.arbol_categorias(empresa.id)
+    assert arbol.get(categoria.id).cantidad_productos == 0
+
+    client.post(f'/configuracion/categorias/{categoria.id}/editar', data={'nombre': 'Pinturería'})
+    assert categoria_service.arbol_categorias(empresa.id).get(categoria.id).nombre == 'Pinturería'
@@ -0,0 +1,156 @@
+"""Tests de cierres de stock (stock y valuación a una fecha)."""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import (
+    ActualizacionPrecio,
+    CierreStock,
+    LoteActualizacionPrecio,
+    MovimientoStock,
+    Producto,
+    Usuario,
+)
+from app.services import cierre_stock_service
+from app.utils.helpers import ahora_argentina
+
+
+def _a_las(fecha, hora=12):
+    return datetime.combine(fecha, time(hora))
+
+
+@pytest.fixture
+def historial(empresa):
+    """Tres fines de mes cerrados y un producto dado de alta en el medio.
+
+    A: alta antes del primer mes, +10 en el primer mes, -3 en el segundo;
+       costo 8 -> 10 en el segundo mes.
+    B: alta en el tercer mes con stock inicial 4 (sin movimiento), -1 hoy.
+    """
+    mes3 = cierre_stock_service.ultimo_cierre_posible('mensual')
+    mes2 = mes3.replace(day=1) - timedelta(days=1)
+    mes1 = mes2.replace(day=1) - timedelta(days=1)
+
+    usuario = Usuario(
+        email='cierres@ferrerp.test',
+        nombre='Usuario Cierres',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    a = Producto(
+        codigo='A',
+        nombre='Producto A',
+        precio_costo=Decimal('10'),
+        precio_venta=Decimal('20'),
+        stock_actual=Decimal('7'),
+        empresa_id=empresa.id,
+        created_at=_a_las(mes1 - timedelta(days=10)),
+    )
+    b = Producto(
+        codigo='B',
+        nombre='Producto B',
+        precio_costo=Decimal('5'),
+        precio_venta=Decimal('9'),
+        stock_actual=Decimal('3'),
+        empresa_id=empresa.id,
+        created_at=_a_las(mes2 + timedelta(days=3)),
+    )
+    db.session.add_all([usuario, a, b])
+    db.session.flush()
+
+    def _movimiento(producto, cantidad, anterior, fecha):
+        db.session.add(
+            MovimientoStock(
+                producto_id=producto.id,
+                tipo='compra' if cantidad > 0 else 'venta',
+                cantidad=Decimal(cantidad),
+                stock_anterior=Decimal(anterior),
+                stock_posterior=Decimal(anterior) + Decimal(cantidad),
+                usuario_id=usuario.id,
+                empresa_id=empresa.id,
+                created_at=fecha,
+            )
+        )
+
+    _movimiento(a, 10, 0, _a_las(mes1 - timedelta(days=5)))
+    _movimiento(a, -3, 10, _a_las(mes2 - timedelta(days=5)))
+    _movimiento(b, -1, 4, ahora_argentina())
+
+    cambio = _a_las(mes2 - timedelta(days=2))
+    lote = LoteActualizacionPrecio(
+        empresa_id=empresa.id, usuario_id=usuario.id, fecha=cambio, cantidad_productos=1
+    )
+    db.session.add(lote)
+    db.session.add(
+        ActualizacionPrecio(
+            lote=lote,
+            producto_id=a.id,
+            fecha=cambio,
+            precio_costo_anterior=Decimal('8'),
+            precio_costo_nuevo=Decimal('10'),
+            precio_venta_anterior=Decimal('20'),
+            precio_venta_nuevo=Decimal('20'),
+        )
+    )
+    db.session.commit()
+    return a, b, (mes1, mes2, mes3)
+
+
+def _stock(empresa, fecha):
+    return {
+        producto_id: Decimal(str(stock))
+        for producto_id, stock in cierre_stock_service.stock_a_fecha(empresa.id, fecha).items()
+    }
+
+
+def test_stock_a_fecha_sin_cierres_parte_del_stock_actual(historial, empresa):
+    """Sin cierres se resta lo movido después de la fecha; las altas posteriores no figuran."""
+    a, b, (mes1, mes2, mes3) = historial
+
+    assert _stock(empresa, mes1 - timedelta(days=7)) == {a.id: 0}
+    assert _stock(empresa, mes1) == {a.id: 10}
+    assert _stock(empresa, mes2) == {a.id: 7}
+    # El stock inicial del alta no tiene movimiento pero sale del stock actual
+    assert _stock(empresa, mes3) == {a.id: 7, b.id: 4}
+
+
+def test_generar_cierres_y_reconstruir_desde_el_cierre_mas_cercano(historial, empresa):
+    """Los cierres guardan stock y costo histórico; las consultas parten del más cercano."""
+    a, b, (mes1, mes2, mes3) = historial
+
+    generados = cierre_stock_service.generar_cierres(empresa.id, 'mensual', mes1, mes3)
+    assert generados == [(mes1, 1), (mes2, 1), (mes3, 2)]
+    # Las fechas ya cerradas se saltean
+    assert cierre_stock_service.generar_cierres(empresa.id, 'mensual', mes1, mes3) == []
+
+    cierres = {
+        (c.producto_id, c.fecha): c for c in db.session.execute(select(CierreStock)).scalars()
+    }
+    assert cierres[(a.id, mes1)].stock == 10
+    assert cierres[(a.id, mes1)].precio_costo == 8
+    assert cierres[(a.id, mes2)].precio_costo == 10
+    assert cierres[(b.id, mes3)].stock == 4
+    assert (b.id, mes2) not in cierres
+
+    # Cierre posterior: antes del primer movimiento
+    assert _stock(empresa, mes1 - timedelta(days=7)) == {a.id: 0}
+    # Cierre anterior más movimientos; B se dio de alta después del cierre
+    assert _stock(empresa, mes2 + timedelta(days=5)) == {a.id: 7, b.id: 4}
+
+    valuacion = cierre_stock_service.valuacion_a_fecha(empresa.id, mes3)
+    assert valuacion.cantidad_productos == 2
+    assert Decimal(str(valuacion.valor_costo)) == Decimal('90')
+
+    mensuales = dict(cierre_stock_service.valuaciones_mensuales(empresa.id, mes3, meses=4))
+    assert Decimal(str(mensuales[mes1].valor_costo)) == Decimal('80')
+    assert Decimal(str(mensuales[mes2].valor_costo)) == Decimal('70')
+    assert mensuales[mes1 - timedelta(days=mes1.day)] is None
+
+    with pytest.raises(ValueError):
+        cierre_stock_service.generar_cierre(empresa.id, ahora_argentina().date())
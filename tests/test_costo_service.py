@@ -0,0 +1,121 @@
+"""Tests del costo promedio ponderado."""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import MovimientoStock, Producto, Usuario
+from app.services import costo_service, reporte_service
+
+
+@pytest.fixture
+def datos(empresa):
+    usuario = Usuario(
+        email='costos@ferrerp.test',
+        nombre='Usuario Costos',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    producto = Producto(
+        codigo='C1',
+        nombre='Taladro',
+        precio_costo=Decimal('100'),
+        precio_venta=Decimal('150'),
+        stock_actual=Decimal('10'),
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([usuario, producto])
+    db.session.commit()
+    return usuario, producto
+
+
+def _movimiento(producto, usuario, tipo, cantidad, fecha):
+    cantidad = Decimal(cantidad)
+    stock_anterior, stock_posterior = producto.actualizar_stock(cantidad, tipo)
+    movimiento = MovimientoStock(
+        producto_id=producto.id,
+        tipo=tipo,
+        cantidad=cantidad,
+        stock_anterior=stock_anterior,
+        stock_posterior=stock_posterior,
+        usuario_id=usuario.id,
+        empresa_id=producto.empresa_id,
+        created_at=fecha,
+    )
+    db.session.add(movimiento)
+    return movimiento
+
+
+def test_promedio_ponderado():
+    assert costo_service.promedio_ponderado(10, Decimal('100'), 10, Decimal('130')) == 115
+    # Sin stock o sin costo previo, el promedio es el precio de la compra
+    assert costo_service.promedio_ponderado(0, Decimal('100'), 5, Decimal('80')) == 80
+    assert costo_service.promedio_ponderado(-3, Decimal('100'), 5, Decimal('80')) == 80
+    assert costo_service.promedio_ponderado(10, None, 5, Decimal('80')) == 80
+    # Un costo previo en cero (precio_costo por defecto) no diluye el promedio
+    assert costo_service.promedio_ponderado(10, Decimal('0'), 10, Decimal('100')) == 100
+    assert costo_service.promedio_ponderado(2, Decimal('10'), 1, Decimal('11')) == Decimal('10.33')
+
+
+def test_compras_actualizan_el_promedio_y_el_recalculo_lo_reproduce(datos, empresa):
+    """Las recepciones mantienen el promedio; el recálculo por lotes llega al mismo valor."""
+    usuario, producto = datos
+
+    compra = _movimiento(producto, usuario, 'compra', '10', datetime(2026, 3, 1, 10))
+    costo_service.registrar_compra(producto, compra, Decimal('130'))
+    _movimiento(producto, usuario, 'venta', '-15', datetime(2026, 3, 5, 10))
+    compra = _movimiento(producto, usuario, 'compra', '5', datetime(2026, 3, 9, 10))
+    costo_service.registrar_compra(producto, compra, Decimal('121'))
+    # Una línea sin precio no cambia el promedio
+    compra = _movimiento(producto, usuario, 'compra', '2', datetime(2026, 3, 10, 10))
+    assert costo_service.registrar_compra(producto, compra, Decimal('0')) is None
+    db.session.commit()
+
+    # 10 x 100 + 10 x 130 -> 115; quedan 5: 5 x 115 + 5 x 121 -> 118
+    assert producto.costo_promedio == Decimal('118')
+    assert producto.precio_costo == Decimal('100')
+
+    # La valuación del inventario usa el costo promedio: 12 x 118
+    reporte = reporte_service.reporte_stock(empresa.id)
+    assert Decimal(str(reporte['valor_costo'])) == Decimal('1416')
+
+    db.session.execute(update(Producto).values(costo_promedio=None))
+    db.session.execute(update(MovimientoStock).values(costo_promedio=None))
+    db.session.commit()
+
+    assert costo_service.recalcular_costos(empresa.id, tamanio_lote=1) == 1
+    db.session.expire_all()
+    assert db.session.get(Producto, producto.id).costo_promedio == Decimal('118')
+    promedios = db.session.scalars(
+        select(MovimientoStock.costo_promedio)
+        .where(MovimientoStock.tipo == 'compra')
+        .order_by(MovimientoStock.created_at)
+    ).all()
+    assert promedios == [Decimal('115'), Decimal('118'), None]
+    # Sin cambios no hay nada que escribir
+    assert costo_service.recalcular_costos(empresa.id) == 0
+
+
+def test_compra_de_producto_sin_costo_toma_el_precio_de_la_compra(datos, empresa):
+    """Con stock pero sin costo cargado, el promedio es el precio de la compra."""
+    usuario, producto = datos
+    producto.precio_costo = Decimal('0')
+    db.session.commit()
+
+    compra = _movimiento(producto, usuario, 'compra', '10', datetime(2026, 3, 1, 10))
+    costo_service.registrar_compra(producto, compra, Decimal('100'))
+    db.session.commit()
+    assert producto.costo_promedio == Decimal('100')
+
+    # El recálculo parte del mismo costo inicial en cero y llega al mismo valor
+    db.session.execute(update(Producto).values(costo_promedio=None))
+    db.session.execute(update(MovimientoStock).values(costo_promedio=None))
+    db.session.commit()
+    assert costo_service.recalcular_costos(empresa.id) == 1
+    db.session.expire_all()
+    assert db.session.get(Producto, producto.id).costo_promedio == Decimal('100')
@@ -0,0 +1,108 @@
+"""Tests del pipeline de exportación en streaming."""
+
+import io
+from datetime import datetime
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from app.extensions import db
+from app.models import Cliente, Empresa, Usuario, Venta, VentaPago
+from app.services import exportacion_service
+from app.utils.exportacion import generar_csv, generar_xlsx, iterar_filas, proyectar
+
+
+def _crear_base():
+    empresa = Empresa(nombre='Empresa Export', activa=True, aprobada=True)
+    db.session.add(empresa)
+    db.session.flush()
+    usuario = Usuario(
+        email='export@ferrerp.test',
+        nombre='Usuario Export',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    cliente = Cliente(nombre='Cliente Export', activo=True, empresa_id=empresa.id)
+    db.session.add_all([usuario, cliente])
+    db.session.flush()
+    return empresa, usuario, cliente
+
+
+def test_generar_csv_formatea_valores_y_emite_por_bloques(monkeypatch):
+    from app.utils import exportacion
+
+    monkeypatch.setattr(exportacion, 'FILAS_POR_BLOQUE_CSV', 2)
+    filas = [[datetime(2026, 3, 1, 9, 30), Decimal('10.50'), None, True] for _ in range(3)]
+
+    bloques = list(generar_csv(['Fecha', 'Monto', 'Nota', 'Activo'], iter(filas)))
+
+    assert len(bloques) == 2
+    lineas = ''.join(bloques).splitlines()
+    assert lineas[0] == 'Fecha;Monto;Nota;Activo'
+    assert lineas[1] == '01/03/2026 09:30;10.50;;Sí'
+    assert len(lineas) == 4
+
+
+def test_generar_xlsx_produce_libro_legible():
+    contenido = b''.join(
+        generar_xlsx(['Nombre', 'Total'], iter([['A', Decimal('1.25')], ['B', 2]]), 'Prueba')
+    )
+
+    ws = load_workbook(io.BytesIO(contenido)).active
+    assert ws.title == 'Prueba'
+    assert [list(fila) for fila in ws.iter_rows(values_only=True)] == [
+        ['Nombre', 'Total'],
+        ['A', 1.25],
+        ['B', 2],
+    ]
+
+
+def test_exportacion_ventas_resuelve_cliente_y_pago_dividido(app):
+    empresa, usuario, cliente = _crear_base()
+    fecha = datetime(2026, 3, 10, 12, 0)
+    dividida = Venta(
+        numero=1,
+        fecha=fecha,
+        cliente_id=cliente.id,
+        usuario_id=usuario.id,
+        subtotal=Decimal('100.00'),
+        total=Decimal('100.00'),
+        forma_pago='dividido',
+        estado='completada',
+        empresa_id=empresa.id,
+    )
+    simple = Venta(
+        numero=2,
+        fecha=fecha,
+        usuario_id=usuario.id,
+        subtotal=Decimal('50.00'),
+        total=Decimal('50.00'),
+        forma_pago='qr',
+        estado='anulada',
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([dividida, simple])
+    db.session.flush()
+    db.session.add_all(
+        [
+            VentaPago(venta_id=dividida.id, forma_pago='efectivo', monto=Decimal('60.00')),
+            VentaPago(venta_id=dividida.id, forma_pago='transferencia', monto=Decimal('40.00')),
+        ]
+    )
+    dividida.registrar_resumen()
+    simple.registrar_resumen()
+    db.session.commit()
+
+    consulta, columnas = exportacion_service.ventas(
+        empresa.id, datetime(2026, 3, 1), datetime(2026, 3, 31, 23, 59)
+    )
+    filas = list(proyectar(iterar_filas(consulta), columnas))
+
+    assert [fila[0] for fila in filas] == ['2026-000001', '2026-000002']
+    assert filas[0][2] == 'Cliente Export'
+    assert sorted(filas[0][4].split(' + ')) == ['Efectivo', 'Transferencia']
+    assert filas[1][2] == 'Consumidor Final'
+    assert filas[1][4] == 'QR'
+    assert filas[1][8] == 'Anulada'
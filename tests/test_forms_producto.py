@@ -87,7 +87,7 @@ class TestProductoFormStockEntero:
         """Stock entero es válido para unidad de medida 'unidad'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='unidad',
@@ -101,7 +101,7 @@ class TestProductoFormStockEntero:
         """Stock entero es válido para unidad de medida 'par'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='par',
@@ -115,7 +115,7 @@ class TestProductoFormStockEntero:
         """Stock decimal es rechazado para unidad de medida 'unidad'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='unidad',
@@ -130,7 +130,7 @@ class TestProductoFormStockEntero:
         """Stock mínimo decimal es rechazado para unidad de medida 'unidad'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='unidad',
@@ -145,7 +145,7 @@ class TestProductoFormStockEntero:
         """Stock decimal es rechazado para unidad de medida 'par'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='par',
@@ -159,7 +159,7 @@ class TestProductoFormStockEntero:
         """Stock cero es válido para unidades enteras."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='unidad',
@@ -177,7 +177,7 @@ class TestProductoFormStockDecimal:
         """Stock decimal es válido para unidad de medida 'kilo'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='kilo',
@@ -191,7 +191,7 @@ class TestProductoFormStockDecimal:
         """Stock decimal es válido para unidad de medida 'metro'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='metro',
@@ -205,7 +205,7 @@ class TestProductoFormStockDecimal:
         """Stock decimal es válido para unidad de medida 'litro'."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='litro',
@@ -219,7 +219,7 @@ class TestProductoFormStockDecimal:
         """Stock entero también es válido para unidades decimales."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='kilo',
@@ -233,7 +233,7 @@ class TestProductoFormStockDecimal:
         """Stock negativo es rechazado sin importar la unidad de medida."""
         usuario = _crear_usuario(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = ProductoForm(
                     _datos_producto_base(
                         unidad_medida='kilo',
@@ -257,7 +257,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -271,7 +271,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa, unidad_medida='kilo')
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -285,7 +285,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -300,7 +300,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -315,7 +315,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa, unidad_medida='litro')
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -329,7 +329,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
@@ -344,7 +344,7 @@ class TestAjusteStockFormCantidad:
         usuario = _crear_usuario(empresa)
         producto = _crear_producto(empresa)
         with app.test_request_context():
-            with patch('app.models.mixins.current_user', usuario):
+            with patch('app.forms.producto_forms.current_user', usuario):
                 form = AjusteStockForm(
                     _datos_ajuste_base(
                         producto_id=str(producto.id),
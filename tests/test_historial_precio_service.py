@@ -0,0 +1,117 @@
+"""Tests de precios históricos (precio de un producto a una fecha)."""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import ActualizacionPrecio, LoteActualizacionPrecio, Producto, Usuario
+from app.services import historial_precio_service
+
+
+@pytest.fixture
+def producto(empresa):
+    usuario = Usuario(
+        email='historial@ferrerp.test',
+        nombre='Usuario Historial',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    producto = Producto(
+        codigo='H1',
+        nombre='Martillo',
+        precio_costo=Decimal('130'),
+        precio_venta=Decimal('200'),
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([usuario, producto])
+    db.session.flush()
+
+    # 100/150 -> (1 de marzo) 110/170 -> (1 de junio) 130/200
+    for fecha, costo, venta in (
+        (datetime(2026, 3, 1, 10), ('100', '110'), ('150', '170')),
+        (datetime(2026, 6, 1, 10), ('110', '130'), ('170', '200')),
+    ):
+        lote = LoteActualizacionPrecio(
+            empresa_id=empresa.id, usuario_id=usuario.id, fecha=fecha, cantidad_productos=1
+        )
+        db.session.add(lote)
+        db.session.add(
+            ActualizacionPrecio(
+                lote=lote,
+                producto_id=producto.id,
+                fecha=fecha,
+                precio_costo_anterior=Decimal(costo[0]),
+                precio_costo_nuevo=Decimal(costo[1]),
+                precio_venta_anterior=Decimal(venta[0]),
+                precio_venta_nuevo=Decimal(venta[1]),
+            )
+        )
+    db.session.commit()
+    return producto
+
+
+def test_precio_a_fecha_usa_el_ultimo_cambio_hasta_la_fecha(producto, empresa):
+    def _precio(fecha):
+        precio = historial_precio_service.precio_a_fecha(empresa.id, producto.id, fecha)
+        return precio.precio_costo, precio.precio_venta
+
+    assert _precio(date(2026, 1, 15)) == (Decimal('100'), Decimal('150'))
+    assert _precio(datetime(2026, 3, 1, 9)) == (Decimal('100'), Decimal('150'))
+    # Un date incluye todo el día
+    assert _precio(date(2026, 3, 1)) == (Decimal('110'), Decimal('170'))
+    assert _precio(date(2026, 5, 31)) == (Decimal('110'), Decimal('170'))
+    assert _precio(date(2026, 9, 1)) == (Decimal('130'), Decimal('200'))
+
+
+def test_precios_a_fecha_resuelve_muchos_pares_en_una_consulta(producto, empresa):
+    sin_historial = Producto(
+        codigo='S1',
+        nombre='Serrucho',
+        precio_costo=Decimal('40'),
+        precio_venta=Decimal('60'),
+        empresa_id=empresa.id,
+    )
+    db.session.add(sin_historial)
+    db.session.commit()
+
+    pares = [
+        (producto.id, date(2026, 2, 1)),
+        (producto.id, date(2026, 4, 1)),
+        (sin_historial.id, date(2026, 4, 1)),
+        (9999, date(2026, 4, 1)),
+    ]
+    precios = historial_precio_service.precios_a_fecha(empresa.id, pares)
+
+    assert precios[(producto.id, date(2026, 2, 1))].precio_venta == Decimal('150')
+    assert precios[(producto.id, date(2026, 4, 1))].precio_venta == Decimal('170')
+    assert precios[(sin_historial.id, date(2026, 4, 1))].precio_costo == Decimal('40')
+    assert (9999, date(2026, 4, 1)) not in precios
+
+
+def test_registrar_cambio_manual_solo_si_cambia_el_precio(producto):
+    assert (
+        historial_precio_service.registrar_cambio_manual(
+            producto, producto.precio_costo, producto.precio_venta, 1
+        )
+        is None
+    )
+
+    venta_anterior = producto.precio_venta
+    producto.precio_venta = Decimal('220')
+    usuario_id = producto.actualizaciones_precio.first().lote.usuario_id
+    lote = historial_precio_service.registrar_cambio_manual(
+        producto, producto.precio_costo, venta_anterior, usuario_id
+    )
+    db.session.commit()
+
+    assert lote.tipo == 'manual'
+    assert lote.actualizo_costo is False
+    ultima = producto.actualizaciones_precio.first()
+    assert (ultima.precio_venta_anterior, ultima.precio_venta_nuevo) == (
+        Decimal('200'),
+        Decimal('220'),
+    )
@@ -191,6 +191,16 @@ def test_htmx_busqueda_inventario_retorna_200(logged_client):
 # ─── Tests de contenido en respuestas HTMX ────────────────────────────
 
 
+@pytest.mark.parametrize('url', ['/ventas/historial', '/inventario/movimientos', '/caja/historial'])
+def test_htmx_historiales_retornan_partial(logged_client, url):
+    """Los historiales paginados por cursor devuelven solo la tabla a HTMX."""
+    resp = logged_client.get(url, headers=HTMX_HEADERS)
+    html = resp.data.decode()
+    assert resp.status_code == 200
+    assert '<table' in html
+    assert '<html' not in html
+
+
 def test_htmx_clientes_contiene_tabla(logged_client, empresa):
     """La respuesta HTMX de clientes debe contener estructura de tabla."""
     # Crear un cliente para que la tabla tenga contenido
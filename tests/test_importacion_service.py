@@ -0,0 +1,170 @@
+"""Tests de la importación masiva del catálogo."""
+
+import io
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import FileStorage
+
+from app.extensions import db
+from app.models import ImportacionCatalogo, MovimientoStock, Producto, Usuario
+from app.services import importacion_service
+
+
+@pytest.fixture
+def usuario(empresa):
+    usuario = Usuario(
+        email='importa@ferrerp.test',
+        nombre='Usuario Importación',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+@pytest.fixture(autouse=True)
+def carpeta_importaciones(app, tmp_path):
+    app.config['IMPORTACIONES_FOLDER'] = str(tmp_path)
+
+
+def _importar(usuario, ruta, tamanio_lote=importacion_service.TAMANIO_LOTE):
+    with open(ruta, 'rb') as archivo:
+        importacion = importacion_service.crear_importacion(
+            FileStorage(archivo, filename=ruta.name), usuario.empresa_id, usuario.id
+        )
+    return importacion_service.procesar_importacion(importacion.id, tamanio_lote=tamanio_lote)
+
+
+def _productos(empresa):
+    return {
+        p.codigo: p
+        for p in db.session.execute(
+            select(Producto).where(Producto.empresa_id == empresa.id)
+        ).scalars()
+    }
+
+
+def test_importa_csv_con_stock_inicial_y_errores(empresa, usuario, tmp_path):
+    ruta = tmp_path / 'catalogo.csv'
+    ruta.write_text(
+        'Código;Nombre;Precio;Costo;Stock;Unidad\n'
+        'T-8;Tarugo 8mm;1.234,50;800;10;unidad\n'
+        'C-1;Cable;abc;1;0;metro\n'
+        'S-1;;5;1;0;unidad\n'
+        'M-1;Martillo;9000;5000;;unidad\n',
+        encoding='utf-8',
+    )
+
+    importacion = _importar(usuario, ruta, tamanio_lote=2)
+
+    assert importacion.estado == 'completada'
+    assert (importacion.filas_total, importacion.filas_procesadas) == (4, 4)
+    assert (importacion.creados, importacion.actualizados, importacion.con_error) == (2, 0, 2)
+    assert [fila for fila, _ in importacion.lista_errores] == [3, 4]
+
+    productos = _productos(empresa)
+    assert set(productos) == {'T-8', 'M-1'}
+    assert productos['T-8'].precio_venta == Decimal('1234.50')
+    assert productos['T-8'].stock_actual == Decimal('10')
+
+    (movimiento,) = db.session.execute(select(MovimientoStock)).scalars()
+    assert movimiento.producto_id == productos['T-8'].id
+    assert movimiento.referencia_tipo == 'importacion'
+    assert movimiento.stock_posterior == Decimal('10')
+
+
+def test_reimportar_actualiza_solo_celdas_con_valor(empresa, usuario, tmp_path):
+    ruta = tmp_path / 'catalogo.csv'
+    ruta.write_text('codigo,nombre,precio,stock\nT-8,Tarugo 8mm,100,10\n', encoding='utf-8')
+    _importar(usuario, ruta)
+
+    ruta = tmp_path / 'precios.csv'
+    ruta.write_text('codigo,nombre,precio,stock\nT-8,,150,99\n', encoding='utf-8')
+    importacion = _importar(usuario, ruta)
+
+    assert (importacion.creados, importacion.actualizados) == (0, 1)
+    producto = _productos(empresa)['T-8']
+    assert producto.nombre == 'Tarugo 8mm'
+    assert producto.precio_venta == Decimal('150')
+    # El stock de productos existentes no se toca desde la importación
+    assert producto.stock_actual == Decimal('10')
+
+
+def test_importacion_fallida_se_reanuda(empresa, usuario, tmp_path, monkeypatch):
+    ruta = tmp_path / 'catalogo.csv'
+    ruta.write_text(
+        'codigo,nombre\n' + ''.join(f'P{i},Producto {i}\n' for i in range(5)),
+        encoding='utf-8',
+    )
+    procesar_lote = importacion_service._procesar_lote
+    lotes = []
+
+    def _falla_en_el_segundo_lote(importacion, lote):
+        lotes.append(lote)
+        if len(lotes) == 2:
+            raise RuntimeError('worker reiniciado')
+        procesar_lote(importacion, lote)
+
+    monkeypatch.setattr(importacion_service, '_procesar_lote', _falla_en_el_segundo_lote)
+    importacion = _importar(usuario, ruta, tamanio_lote=2)
+    assert importacion.estado == 'fallida'
+    assert importacion.filas_procesadas == 2
+    assert set(_productos(empresa)) == {'P0', 'P1'}
+
+    importacion = importacion_service.procesar_importacion(importacion.id, tamanio_lote=2)
+    assert importacion.estado == 'completada'
+    assert importacion.creados == 5
+    # Reanuda desde la fila 4 (P2), sin reprocesar lo confirmado
+    assert lotes[2][0][0] == 4
+    assert set(_productos(empresa)) == {f'P{i}' for i in range(5)}
+
+
+def test_importa_xlsx(empresa, usuario, tmp_path):
+    from openpyxl import Workbook
+
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(['Código', 'Nombre', 'Código de barras', 'Precio venta', 'IVA'])
+    hoja.append([1001, 'Llave térmica', 7790000000011, 2500.5, 10.5])
+    ruta = tmp_path / 'catalogo.xlsx'
+    libro.save(ruta)
+
+    importacion = _importar(usuario, ruta)
+
+    assert importacion.estado == 'completada'
+    producto = _productos(empresa)['1001']
+    assert producto.codigo_barras == '7790000000011'
+    assert producto.precio_venta == Decimal('2500.50')
+    assert producto.iva_porcentaje == Decimal('10.50')
+
+
+def test_archivo_sin_columna_codigo_se_rechaza(empresa, usuario, tmp_path):
+    ruta = tmp_path / 'catalogo.csv'
+    ruta.write_text('nombre,precio\nTarugo,1\n', encoding='utf-8')
+
+    with pytest.raises(ValueError, match='codigo'):
+        _importar(usuario, ruta)
+    assert ImportacionCatalogo.query.count() == 0
+    assert list(tmp_path.glob('*.csv')) == [ruta]
+
+
+def test_subida_de_importacion_supera_el_limite_general_con_csrf(app, client, csrf_token):
+    """La validación CSRF parsea el formulario con el límite de la importación."""
+    contenido = b'codigo,nombre\n' + b'X' * (app.config['MAX_CONTENT_LENGTH'] + 1024 * 1024)
+
+    def _subir(ruta):
+        return client.post(
+            ruta,
+            data={'csrf_token': csrf_token, 'archivo': (io.BytesIO(contenido), 'catalogo.csv')},
+            content_type='multipart/form-data',
+        )
+
+    # Pasa la validación CSRF y llega a la vista (que redirige al login)
+    assert _subir('/productos/importar').status_code == 302
+    # El resto de las vistas conserva el límite general
+    assert _subir('/productos/actualizacion-masiva/preview').status_code == 413
@@ -0,0 +1,159 @@
+"""Tests del libro IVA."""
+
+from datetime import datetime
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import (
+    Configuracion,
+    Empresa,
+    OrdenCompra,
+    OrdenCompraDetalle,
+    Producto,
+    Proveedor,
+    Usuario,
+    Venta,
+    VentaDetalle,
+)
+from app.services import iva_service
+from app.utils.exportacion import generar_csv
+
+
+def _crear_base():
+    empresa = Empresa(nombre='Empresa IVA', activa=True, aprobada=True)
+    db.session.add(empresa)
+    db.session.flush()
+    usuario = Usuario(
+        email='iva@ferrerp.test',
+        nombre='Usuario IVA',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    general = Producto(
+        codigo='IVA-21',
+        nombre='Cemento',
+        unidad_medida='unidad',
+        precio_costo=Decimal('100.00'),
+        precio_venta=Decimal('121.00'),
+        iva_porcentaje=Decimal('21'),
+        empresa_id=empresa.id,
+    )
+    reducido = Producto(
+        codigo='IVA-105',
+        nombre='Herramienta',
+        unidad_medida='unidad',
+        precio_costo=Decimal('200.00'),
+        precio_venta=Decimal('221.00'),
+        iva_porcentaje=Decimal('10.5'),
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([usuario, general, reducido])
+    db.session.flush()
+    return empresa, usuario, general, reducido
+
+
+def _crear_venta(
+    empresa, usuario, numero, lineas, fecha, descuento=Decimal('0'), estado='completada'
+):
+    subtotal = sum(importe for _, importe in lineas)
+    venta = Venta(
+        numero=numero,
+        fecha=fecha,
+        usuario_id=usuario.id,
+        subtotal=subtotal,
+        descuento_monto=descuento,
+        total=subtotal - descuento,
+        forma_pago='efectivo',
+        estado=estado,
+        empresa_id=empresa.id,
+    )
+    for producto, importe in lineas:
+        venta.detalles.append(
+            VentaDetalle(
+                producto_id=producto.id,
+                cantidad=Decimal('1'),
+                precio_unitario=importe,
+                iva_porcentaje=producto.iva_porcentaje,
+                subtotal=importe,
+            )
+        )
+    db.session.add(venta)
+    db.session.flush()
+    return venta
+
+
+def test_desglosar_con_y_sin_iva_incluido():
+    assert iva_service.desglosar(Decimal('121'), Decimal('21'), True) == (
+        Decimal('100.00'),
+        Decimal('21.00'),
+        Decimal('121.00'),
+    )
+    assert iva_service.desglosar(Decimal('100'), Decimal('10.5'), False) == (
+        Decimal('100.00'),
+        Decimal('10.50'),
+        Decimal('110.50'),
+    )
+
+
+def test_libro_iva_agrupa_ventas_y_compras_por_alicuota(app):
+    empresa, usuario, general, reducido = _crear_base()
+    Configuracion.set('precios_con_iva', True, 'boolean', empresa_id=empresa.id)
+    fecha = datetime(2026, 3, 10, 12, 0)
+    # Descuento general del 50% prorrateado entre las líneas
+    _crear_venta(
+        empresa,
+        usuario,
+        1,
+        [(general, Decimal('242.00')), (reducido, Decimal('442.00'))],
+        fecha,
+        descuento=Decimal('342.00'),
+    )
+    _crear_venta(empresa, usuario, 2, [(general, Decimal('121.00'))], fecha)
+    _crear_venta(empresa, usuario, 3, [(general, Decimal('999.00'))], fecha, estado='anulada')
+    _crear_venta(empresa, usuario, 4, [(general, Decimal('999.00'))], datetime(2026, 4, 1))
+
+    proveedor = Proveedor(nombre='Proveedor IVA', empresa_id=empresa.id)
+    db.session.add(proveedor)
+    db.session.flush()
+    orden = OrdenCompra(
+        numero=1,
+        fecha=fecha,
+        proveedor_id=proveedor.id,
+        usuario_id=usuario.id,
+        estado='recibida_parcial',
+        empresa_id=empresa.id,
+    )
+    orden.detalles.append(
+        OrdenCompraDetalle(
+            producto_id=general.id,
+            cantidad_pedida=Decimal('10'),
+            cantidad_recibida=Decimal('2'),
+            precio_unitario=Decimal('100.00'),
+        )
+    )
+    db.session.add(orden)
+    db.session.commit()
+
+    inicio, fin = iva_service.rango_del_mes('2026-03')
+    libro = iva_service.libro_iva(empresa.id, inicio, fin)
+
+    ventas = {fila['alicuota']: fila for fila in libro['ventas']['por_alicuota']}
+    assert ventas[Decimal('21')]['total'] == Decimal('242.00')
+    assert ventas[Decimal('21')]['neto'] == Decimal('200.00')
+    assert ventas[Decimal('10.5')]['total'] == Decimal('221.00')
+    assert ventas[Decimal('10.5')]['iva'] == Decimal('21.00')
+    assert libro['ventas']['iva'] == Decimal('63.00')
+
+    assert len(libro['compras']['por_alicuota']) == 1
+    assert libro['compras']['neto'] == Decimal('200.00')
+    assert libro['compras']['iva'] == Decimal('42.00')
+    assert libro['saldo'] == Decimal('21.00')
+
+    filas = list(iva_service.iterar_comprobantes(empresa.id, 'ventas', inicio, fin))
+    assert len(filas) == 3
+    assert filas[0][2] == 'Consumidor Final'
+    csv = ''.join(generar_csv(iva_service.COLUMNAS_EXPORTACION, filas))
+    assert csv.splitlines()[0].startswith('Fecha;Comprobante')
+    assert len(csv.splitlines()) == 4
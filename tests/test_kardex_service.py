@@ -0,0 +1,129 @@
+"""Tests del kardex de productos (saldo acumulado y valuación al costo)."""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import (
+    ActualizacionPrecio,
+    LoteActualizacionPrecio,
+    MovimientoStock,
+    Producto,
+    Usuario,
+)
+from app.services import kardex_service
+
+
+@pytest.fixture
+def producto(empresa):
+    """Stock 5 -> (+10 en enero) 15 -> (-4 en febrero) 11 -> (-1 en marzo) 10.
+
+    El costo pasa de 100 a 120 el 1 de febrero.
+    """
+    usuario = Usuario(
+        email='kardex@ferrerp.test',
+        nombre='Usuario Kardex',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    producto = Producto(
+        codigo='K1',
+        nombre='Tornillo',
+        precio_costo=Decimal('120'),
+        precio_venta=Decimal('200'),
+        stock_actual=Decimal('10'),
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([usuario, producto])
+    db.session.flush()
+
+    stock = Decimal('5')
+    for fecha, cantidad in (
+        (datetime(2026, 1, 10, 9), Decimal('10')),
+        (datetime(2026, 2, 3, 9), Decimal('-3')),
+        (datetime(2026, 2, 3, 18), Decimal('-1')),
+        (datetime(2026, 3, 15, 9), Decimal('-1')),
+    ):
+        db.session.add(
+            MovimientoStock(
+                producto_id=producto.id,
+                tipo='compra' if cantidad > 0 else 'venta',
+                cantidad=cantidad,
+                stock_anterior=stock,
+                stock_posterior=stock + cantidad,
+                usuario_id=usuario.id,
+                empresa_id=empresa.id,
+                created_at=fecha,
+            )
+        )
+        stock += cantidad
+
+    fecha = datetime(2026, 2, 1)
+    lote = LoteActualizacionPrecio(
+        empresa_id=empresa.id, usuario_id=usuario.id, fecha=fecha, cantidad_productos=1
+    )
+    db.session.add(lote)
+    db.session.add(
+        ActualizacionPrecio(
+            lote=lote,
+            producto_id=producto.id,
+            fecha=fecha,
+            precio_costo_anterior=Decimal('100'),
+            precio_costo_nuevo=Decimal('120'),
+            precio_venta_anterior=Decimal('200'),
+            precio_venta_nuevo=Decimal('200'),
+        )
+    )
+    db.session.commit()
+    return producto
+
+
+def test_saldo_inicial_sale_del_movimiento_mas_cercano(producto, empresa):
+    def _saldo(desde):
+        return Decimal(str(kardex_service.saldo_inicial(empresa.id, producto.id, desde)))
+
+    assert _saldo(date(2026, 1, 1)) == 5
+    assert _saldo(date(2026, 2, 4)) == 11
+    assert _saldo(date(2026, 6, 1)) == 10
+
+
+def test_kardex_acumula_saldos_y_valua_al_costo_de_cada_fecha(producto, empresa):
+    """El saldo corre sobre todo el rango aunque la página corte antes."""
+    reporte = kardex_service.kardex(
+        empresa.id, producto.id, date(2026, 1, 1), date(2026, 3, 31), limite=2
+    )
+
+    assert Decimal(str(reporte['saldo_inicial'])) == 5
+    assert Decimal(str(reporte['saldo_final'])) == 10
+    assert Decimal(str(reporte['entradas'])) == 10
+    assert Decimal(str(reporte['salidas'])) == 5
+    assert Decimal(str(reporte['valor_entradas'])) == 1000
+    assert Decimal(str(reporte['valor_salidas'])) == 600
+
+    periodos = [(p.periodo, Decimal(str(p.saldo))) for p in reporte['periodos']]
+    assert periodos == [('2026-01', 15), ('2026-02', 11), ('2026-03', 10)]
+
+    primera = reporte['movimientos']
+    assert [Decimal(str(m.saldo)) for m in primera] == [15, 12]
+    assert Decimal(str(primera[0].costo_unitario)) == 100
+    assert Decimal(str(primera[1].saldo_valorizado)) == 1440
+
+    segunda = kardex_service.kardex(
+        empresa.id,
+        producto.id,
+        date(2026, 1, 1),
+        date(2026, 3, 31),
+        despues=reporte['siguiente'],
+        limite=2,
+    )
+    assert [Decimal(str(m.saldo)) for m in segunda['movimientos']] == [11, 10]
+    assert segunda['siguiente'] is None
+
+    # Un rango posterior arranca del saldo acumulado hasta entonces
+    marzo = kardex_service.kardex(empresa.id, producto.id, date(2026, 3, 1), date(2026, 3, 31))
+    assert Decimal(str(marzo['saldo_inicial'])) == 11
+    assert [Decimal(str(m.saldo)) for m in marzo['movimientos']] == [10]
@@ -0,0 +1,111 @@
+"""Tests de los modelos de lectura (proyecciones para listados y selectores)."""
+
+from datetime import datetime
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Caja, Categoria, MovimientoCaja, Producto, Usuario, Venta
+from app.services import lectura_service
+
+
+def _crear_usuario(empresa):
+    usuario = Usuario(
+        email='admin@test.com',
+        nombre='Admin',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave123')
+    db.session.add(usuario)
+    db.session.flush()
+    return usuario
+
+
+def test_opciones_productos_solo_activos_ordenados(app, empresa):
+    for codigo, nombre, activo in (
+        ('B', 'Tornillo', True),
+        ('A', 'Clavo', True),
+        ('C', 'Viejo', False),
+    ):
+        db.session.add(
+            Producto(
+                codigo=codigo,
+                nombre=nombre,
+                precio_costo=Decimal('1'),
+                precio_venta=Decimal('2'),
+                activo=activo,
+                empresa_id=empresa.id,
+            )
+        )
+    db.session.commit()
+
+    opciones = lectura_service.opciones_productos(empresa.id)
+
+    assert [(o.codigo, o.nombre) for o in opciones] == [('A', 'Clavo'), ('B', 'Tornillo')]
+    assert set(opciones[0]._asdict()) == {'id', 'codigo', 'nombre', 'proveedor_id'}
+
+
+def test_opciones_subcategorias_con_nombre_completo(app, empresa):
+    padre = Categoria(nombre='Herramientas', empresa_id=empresa.id)
+    db.session.add(padre)
+    db.session.flush()
+    db.session.add(Categoria(nombre='Manuales', padre_id=padre.id, empresa_id=empresa.id))
+    db.session.commit()
+
+    assert [o.nombre for o in lectura_service.opciones_categorias(empresa.id)] == ['Herramientas']
+    subcategorias = lectura_service.opciones_categorias(empresa.id, subcategorias=True)
+    assert [o.nombre for o in subcategorias] == ['Herramientas > Manuales']
+
+
+def test_fila_venta_reutiliza_propiedades_del_modelo(app, empresa):
+    usuario = _crear_usuario(empresa)
+    db.session.add(
+        Venta(
+            numero=7,
+            fecha=datetime(2026, 5, 4, 10, 0),
+            total=Decimal('100.00'),
+            forma_pago='efectivo',
+            estado='completada',
+            usuario_id=usuario.id,
+            empresa_id=empresa.id,
+        )
+    )
+    db.session.commit()
+
+    fila = lectura_service.consulta_ventas(empresa.id).one()
+    venta = lectura_service.FilaVenta.desde_fila(fila)
+
+    assert venta.numero_completo == '2026-000007'
+    assert venta.es_anulable
+    assert venta.cliente_nombre is None
+    assert not hasattr(venta, '__dict__')
+
+
+def test_consulta_cajas_calcula_totales_en_efectivo(app, empresa):
+    usuario = _crear_usuario(empresa)
+    caja = Caja(usuario_apertura_id=usuario.id, monto_inicial=Decimal('100'), empresa_id=empresa.id)
+    db.session.add(caja)
+    db.session.flush()
+    for tipo, monto, forma_pago in (
+        ('ingreso', '50', 'efectivo'),
+        ('ingreso', '30', 'tarjeta_debito'),
+        ('egreso', '20', 'efectivo'),
+    ):
+        db.session.add(
+            MovimientoCaja(
+                caja_id=caja.id,
+                tipo=tipo,
+                concepto='venta' if tipo == 'ingreso' else 'gasto',
+                monto=Decimal(monto),
+                forma_pago=forma_pago,
+                usuario_id=usuario.id,
+            )
+        )
+    db.session.commit()
+
+    fila = lectura_service.FilaCaja.desde_fila(lectura_service.consulta_cajas(empresa.id).one())
+
+    assert fila.usuario_nombre == 'Admin'
+    assert fila.total_ingresos == caja.total_ingresos == Decimal('50')
+    assert fila.total_egresos == caja.total_egresos == Decimal('20')
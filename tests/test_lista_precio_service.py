@@ -0,0 +1,153 @@
+"""Tests de las listas de precios de proveedores."""
+
+import io
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import FileStorage
+
+from app.extensions import db
+from app.models import ActualizacionPrecio, Producto, Proveedor, Usuario
+from app.services import lista_precio_service
+
+
+@pytest.fixture
+def datos(app, empresa, tmp_path):
+    app.config['IMPORTACIONES_FOLDER'] = str(tmp_path)
+    usuario = Usuario(
+        email='listas@ferrerp.test',
+        nombre='Usuario Listas',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    proveedor = Proveedor(nombre='Distribuidora Sur', empresa_id=empresa.id)
+    otro = Proveedor(nombre='Otro', empresa_id=empresa.id)
+    db.session.add_all([usuario, proveedor, otro])
+    db.session.flush()
+
+    def _producto(codigo, costo, venta, proveedor_id=proveedor.id):
+        return Producto(
+            codigo=codigo,
+            nombre=f'Producto {codigo}',
+            precio_costo=Decimal(costo),
+            precio_venta=Decimal(venta),
+            proveedor_id=proveedor_id,
+            empresa_id=empresa.id,
+        )
+
+    db.session.add_all(
+        [
+            _producto('A', '100', '150'),
+            _producto('B', '200', '260'),
+            _producto('C', '50', '80'),
+            _producto('D', '0', '30'),
+            _producto('X', '10', '20', proveedor_id=otro.id),
+        ]
+    )
+    db.session.commit()
+    return usuario, proveedor
+
+
+def _cargar(datos, contenido, tmp_path):
+    usuario, proveedor = datos
+    ruta = tmp_path / 'lista.csv'
+    ruta.write_text(contenido, encoding='utf-8')
+    with open(ruta, 'rb') as archivo:
+        return lista_precio_service.cargar_lista(
+            FileStorage(archivo, filename='lista.csv'),
+            proveedor.id,
+            usuario.empresa_id,
+            usuario.id,
+        )
+
+
+def _precios(empresa):
+    return {
+        p.codigo: (p.precio_costo, p.precio_venta)
+        for p in db.session.execute(
+            select(Producto).where(Producto.empresa_id == empresa.id)
+        ).scalars()
+    }
+
+
+CONTENIDO = (
+    'Código;Descripción;Precio\n'
+    'A;Tornillo;120\n'  # sube 20%
+    'B;Tuerca;180\n'  # baja 10%
+    'C;Arandela;50\n'  # sin cambio
+    'D;Clavo;12\n'  # sin costo anterior
+    'X;De otro proveedor;99\n'
+    'Z;No existe;10\n'
+    'E;Sin precio;\n'
+)
+
+
+def test_resumen_calcula_diferencias_en_sql(datos, tmp_path):
+    lista = _cargar(datos, CONTENIDO, tmp_path)
+
+    assert lista.cantidad_items == 6
+    assert lista.lista_errores == [[8, 'precio_costo: es requerido']]
+    assert lista_precio_service.resumen(lista) == {
+        'items': 6,
+        'sin_producto': 2,
+        'sin_cambio': 1,
+        'cambios': 3,
+        'suben': 2,
+        'bajan': 1,
+        'sin_margen': 1,
+        'variacion_promedio': 5.0,
+    }
+
+    muestra = {fila.codigo: fila for fila in lista_precio_service.muestra(lista)}
+    assert set(muestra) == {'A', 'B', 'D'}
+    assert muestra['A'].venta_nueva == Decimal('180.00')
+    assert muestra['B'].variacion == Decimal('-10')
+    assert muestra['D'].variacion is None
+
+
+def test_aplicar_conserva_margen_y_audita(datos, empresa, tmp_path):
+    usuario, _ = datos
+    lista = _cargar(datos, CONTENIDO, tmp_path)
+
+    assert lista_precio_service.aplicar_lista(lista, usuario.id) == 3
+
+    precios = _precios(empresa)
+    assert precios['A'] == (Decimal('120.00'), Decimal('180.00'))
+    assert precios['B'] == (Decimal('180.00'), Decimal('234.00'))
+    assert precios['C'] == (Decimal('50.00'), Decimal('80.00'))
+    assert precios['D'] == (Decimal('12.00'), Decimal('30.00'))
+    assert precios['X'] == (Decimal('10.00'), Decimal('20.00'))
+
+    registros = {
+        r.producto.codigo: r for r in db.session.execute(select(ActualizacionPrecio)).scalars()
+    }
+    assert set(registros) == {'A', 'B', 'D'}
+    assert registros['A'].tipo == 'proveedor'
+    assert registros['A'].porcentaje == Decimal('20')
+    assert registros['B'].precio_venta_anterior == Decimal('260')
+    assert registros['D'].porcentaje is None
+    assert registros['A'].lote.cantidad_productos == 3
+
+    assert lista.estado == 'aplicada'
+    with pytest.raises(ValueError, match='ya fue aplicada'):
+        lista_precio_service.aplicar_lista(lista, usuario.id)
+
+
+def test_lista_sin_columna_de_precio_se_rechaza(datos, tmp_path):
+    with pytest.raises(ValueError, match='costo'):
+        _cargar(datos, 'codigo;descripcion\nA;Tornillo\n', tmp_path)
+    assert list(tmp_path.iterdir()) == [tmp_path / 'lista.csv']
+
+
+def test_subida_de_lista_supera_el_limite_general_con_csrf(app, client, csrf_token):
+    contenido = b'codigo;costo\n' + b'X' * (app.config['MAX_CONTENT_LENGTH'] + 1024 * 1024)
+    respuesta = client.post(
+        '/proveedores/1/lista-precios',
+        data={'csrf_token': csrf_token, 'archivo': (io.BytesIO(contenido), 'lista.csv')},
+        content_type='multipart/form-data',
+    )
+    # Pasa la validación CSRF y llega a la vista (que redirige al login)
+    assert respuesta.status_code == 302
@@ -1,7 +1,8 @@
+from datetime import datetime
 from decimal import Decimal
 
 from app.extensions import db
-from app.models import Cliente, Empresa
+from app.models import Cliente, Empresa, Usuario, Venta
 
 
 def test_cliente_credito_y_saldo(app):
@@ -31,3 +32,54 @@ def test_cliente_credito_y_saldo(app):
     saldo_anterior, saldo_nuevo = cliente.actualizar_saldo(Decimal('10.00'), 'pago')
     assert saldo_anterior == Decimal('50.00')
     assert saldo_nuevo == Decimal('40.00')
+
+
+def test_cliente_registrar_y_revertir_compra(app):
+    empresa = Empresa(nombre='Empresa Test', activa=True)
+    db.session.add(empresa)
+    db.session.flush()
+    usuario = Usuario(
+        email='compras@ferrerp.test',
+        nombre='Vendedor',
+        rol='vendedor',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    cliente = Cliente(nombre='Cliente Compras', activo=True, empresa_id=empresa.id)
+    db.session.add_all([usuario, cliente])
+    db.session.commit()
+
+    ventas = []
+    for numero, (fecha, total) in enumerate(
+        [(datetime(2026, 1, 10), Decimal('100.00')), (datetime(2026, 2, 5), Decimal('50.00'))],
+        start=1,
+    ):
+        venta = Venta(
+            numero=numero,
+            fecha=fecha,
+            cliente_id=cliente.id,
+            usuario_id=usuario.id,
+            subtotal=total,
+            total=total,
+            forma_pago='efectivo',
+            estado='completada',
+            empresa_id=empresa.id,
+        )
+        db.session.add(venta)
+        cliente.registrar_compra(total, fecha)
+        db.session.commit()
+        ventas.append(venta)
+
+    assert cliente.total_comprado == Decimal('150.00')
+    assert cliente.cantidad_compras == 2
+    assert cliente.fecha_ultima_compra == datetime(2026, 2, 5)
+    assert cliente.ticket_promedio == Decimal('75.00')
+
+    ventas[1].estado = 'anulada'
+    cliente.revertir_compra(ventas[1])
+    db.session.commit()
+
+    assert cliente.total_comprado == Decimal('100.00')
+    assert cliente.cantidad_compras == 1
+    assert cliente.fecha_ultima_compra == datetime(2026, 1, 10)
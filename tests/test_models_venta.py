@@ -2,7 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 
 from app.extensions import db
-from app.models import Empresa, Producto, Usuario, Venta, VentaDetalle
+from app.models import Cliente, Empresa, Producto, Usuario, Venta, VentaDetalle, VentaPago
 
 
 def _crear_empresa():
@@ -74,3 +74,46 @@ def test_venta_calcular_totales_y_props(app):
     assert venta.numero_completo == '2024-000001'
     assert venta.forma_pago_display == 'Efectivo'
     assert venta.estado_display == 'Completada'
+
+
+def test_venta_registrar_resumen_guarda_columnas_de_listado(app):
+    empresa = _crear_empresa()
+    usuario = _crear_usuario(empresa.id)
+    producto = _crear_producto(empresa.id)
+    cliente = Cliente(nombre='Juan Pérez', empresa_id=empresa.id)
+    db.session.add_all([usuario, producto, cliente])
+    db.session.commit()
+
+    venta = Venta(
+        numero=2,
+        usuario_id=usuario.id,
+        cliente_id=cliente.id,
+        total=Decimal('45.00'),
+        forma_pago='dividido',
+        estado='completada',
+        empresa_id=empresa.id,
+    )
+    venta.detalles.append(
+        VentaDetalle(
+            producto_id=producto.id,
+            cantidad=Decimal('3.000'),
+            precio_unitario=Decimal('15.00'),
+            subtotal=Decimal('45.00'),
+        )
+    )
+    db.session.add(venta)
+    db.session.flush()
+    db.session.add_all(
+        [
+            VentaPago(venta_id=venta.id, forma_pago='efectivo', monto=Decimal('20.00')),
+            VentaPago(venta_id=venta.id, forma_pago='qr', monto=Decimal('25.00')),
+        ]
+    )
+    db.session.flush()
+
+    venta.registrar_resumen()
+    db.session.commit()
+
+    assert venta.cliente_nombre == 'Juan Pérez'
+    assert venta.cantidad_items == Decimal('3.000')
+    assert sorted(venta.formas_pago_resumen.split(' + ')) == ['Efectivo', 'QR']
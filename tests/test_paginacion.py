@@ -0,0 +1,83 @@
+"""Tests de la paginación por clave (keyset)."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Usuario, Venta
+from app.utils.paginacion import codificar_cursor, decodificar_cursor, paginar_keyset
+
+
+def _crear_ventas(empresa, cantidad):
+    usuario = Usuario(
+        email='vendedor@test.com',
+        nombre='Vendedor',
+        rol='vendedor',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave123')
+    db.session.add(usuario)
+    db.session.flush()
+
+    base = datetime(2026, 3, 1, 10, 0)
+    for numero in range(1, cantidad + 1):
+        db.session.add(
+            Venta(
+                numero=numero,
+                # De a pares con la misma fecha para ejercitar el desempate por id
+                fecha=base + timedelta(hours=numero // 2),
+                total=Decimal('100.00'),
+                forma_pago='efectivo',
+                estado='completada',
+                usuario_id=usuario.id,
+                empresa_id=empresa.id,
+            )
+        )
+    db.session.commit()
+
+
+def _numeros(pagina):
+    return [venta.numero for venta in pagina]
+
+
+def test_cursor_ida_y_vuelta():
+    fecha = datetime(2026, 3, 1, 10, 30, 15)
+    assert decodificar_cursor(codificar_cursor(fecha, 42)) == (fecha, 42)
+    assert decodificar_cursor('no-es-un-cursor') is None
+    assert decodificar_cursor('') is None
+
+
+def test_paginar_keyset_avanza_y_retrocede(app, empresa):
+    _crear_ventas(empresa, 7)
+    query = Venta.query.filter_by(empresa_id=empresa.id)
+
+    primera = paginar_keyset(query, Venta.fecha, Venta.id, per_page=3, estimar=True)
+    assert _numeros(primera) == [7, 6, 5]
+    assert primera.total_estimado == 7
+    assert primera.has_next and not primera.has_prev
+
+    segunda = paginar_keyset(query, Venta.fecha, Venta.id, despues=primera.next_cursor, per_page=3)
+    assert _numeros(segunda) == [4, 3, 2]
+    assert segunda.has_next and segunda.has_prev
+
+    tercera = paginar_keyset(query, Venta.fecha, Venta.id, despues=segunda.next_cursor, per_page=3)
+    assert _numeros(tercera) == [1]
+    assert not tercera.has_next
+
+    anterior = paginar_keyset(query, Venta.fecha, Venta.id, antes=tercera.prev_cursor, per_page=3)
+    assert _numeros(anterior) == [4, 3, 2]
+    assert anterior.has_prev and anterior.has_next
+
+    inicio = paginar_keyset(query, Venta.fecha, Venta.id, antes=anterior.prev_cursor, per_page=3)
+    assert _numeros(inicio) == [7, 6, 5]
+    assert not inicio.has_prev
+
+
+def test_paginar_keyset_cursor_invalido_vuelve_al_inicio(app, empresa):
+    _crear_ventas(empresa, 2)
+    query = Venta.query.filter_by(empresa_id=empresa.id)
+
+    pagina = paginar_keyset(query, Venta.fecha, Venta.id, despues='basura', per_page=5)
+    assert _numeros(pagina) == [2, 1]
+    assert pagina.total_estimado is None
@@ -0,0 +1,300 @@
+"""Tests del servicio de reportes y su ejecutor de consultas."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import (
+    Cliente,
+    Empresa,
+    Producto,
+    Usuario,
+    Venta,
+    VentaDetalle,
+    VentaPago,
+    VersionDatos,
+)
+from app.services import reporte_service
+from app.utils.helpers import ahora_argentina
+
+
+def _crear_base():
+    empresa = Empresa(nombre='Empresa Reportes', activa=True, aprobada=True)
+    db.session.add(empresa)
+    db.session.flush()
+    usuario = Usuario(
+        email='reportes@ferrerp.test',
+        nombre='Usuario Reportes',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    producto = Producto(
+        codigo='REP-001',
+        nombre='Tornillo',
+        unidad_medida='unidad',
+        precio_costo=Decimal('5.00'),
+        precio_venta=Decimal('10.00'),
+        stock_actual=Decimal('1.000'),
+        stock_minimo=Decimal('5.000'),
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    db.session.add_all([usuario, producto])
+    db.session.flush()
+    return empresa, usuario, producto
+
+
+def _crear_venta(
+    empresa, usuario, producto, numero, fecha, total, forma_pago='efectivo', estado='completada'
+):
+    venta = Venta(
+        numero=numero,
+        fecha=fecha,
+        usuario_id=usuario.id,
+        subtotal=total,
+        total=total,
+        forma_pago=forma_pago,
+        estado=estado,
+        empresa_id=empresa.id,
+    )
+    venta.detalles.append(
+        VentaDetalle(
+            producto_id=producto.id,
+            cantidad=Decimal('1.000'),
+            precio_unitario=total,
+            subtotal=total,
+        )
+    )
+    db.session.add(venta)
+    db.session.flush()
+    db.session.add(VentaPago(venta_id=venta.id, forma_pago=forma_pago, monto=total))
+    db.session.flush()
+    return venta
+
+
+def test_ejecutar_consultas_retorna_resultados_por_nombre(app):
+    resultados = reporte_service.ejecutar_consultas(
+        {
+            'uno': lambda conn: conn.execute(db.select(db.literal(1))).scalar(),
+            'dos': lambda conn: conn.execute(db.select(db.literal(2))).scalar(),
+        }
+    )
+    assert resultados == {'uno': 1, 'dos': 2}
+
+
+def test_reporte_ventas_agrega_solo_completadas_del_rango(app):
+    empresa, usuario, producto = _crear_base()
+    hoy = datetime(2026, 5, 10, 12, 0)
+    _crear_venta(empresa, usuario, producto, 1, hoy, Decimal('100.00'))
+    _crear_venta(empresa, usuario, producto, 2, hoy, Decimal('50.00'), forma_pago='qr')
+    _crear_venta(empresa, usuario, producto, 3, hoy, Decimal('999.00'), estado='anulada')
+    _crear_venta(empresa, usuario, producto, 4, hoy - timedelta(days=60), Decimal('70.00'))
+    db.session.commit()
+
+    inicio, fin = reporte_service.rango_del_dia(hoy.date())
+    reporte = reporte_service.reporte_ventas(empresa.id, inicio, fin)
+
+    assert reporte['total_ventas'] == Decimal('150.00')
+    assert reporte['cantidad_ventas'] == 2
+    assert reporte['ticket_promedio'] == Decimal('75.00')
+    assert reporte['ventas_por_dia'] == [{'fecha': '2026-05-10', 'total': 150.0, 'cantidad': 2}]
+    formas = {f['forma_pago']: f['total'] for f in reporte['ventas_por_forma_pago']}
+    assert formas == {'efectivo': 100.0, 'qr': 50.0}
+    assert reporte['productos_mas_vendidos'][0]['nombre'] == 'Tornillo'
+    assert reporte['productos_mas_vendidos'][0]['cantidad'] == 2.0
+
+
+def test_resumen_dashboard(app):
+    empresa, usuario, producto = _crear_base()
+    hoy = datetime(2026, 5, 10, 12, 0)
+    _crear_venta(empresa, usuario, producto, 1, hoy, Decimal('100.00'))
+    _crear_venta(empresa, usuario, producto, 2, hoy - timedelta(days=1), Decimal('40.00'))
+    db.session.add(
+        Cliente(
+            nombre='Deudor',
+            saldo_cuenta_corriente=Decimal('30.00'),
+            limite_credito=Decimal('100.00'),
+            activo=True,
+            empresa_id=empresa.id,
+        )
+    )
+    db.session.commit()
+
+    resumen = reporte_service.resumen_dashboard(empresa.id, hoy.date())
+
+    assert resumen['ventas_hoy'] == Decimal('100.00')
+    assert resumen['operaciones_hoy'] == 1
+    assert resumen['ventas_ayer'] == Decimal('40.00')
+    assert resumen['productos_bajo_stock'] == 1
+    assert resumen['alertas'][0].nombre == 'Tornillo'
+    assert resumen['cuentas_por_cobrar'] == Decimal('30.00')
+    assert resumen['clientes_con_deuda'] == 1
+    assert len(resumen['ventas_diarias']) == 2
+
+
+def test_stock_bajo_cuenta_todos_y_lista_los_mas_criticos(app):
+    empresa, _, _ = _crear_base()
+    for i in range(6):
+        db.session.add(
+            Producto(
+                codigo=f'BAJO-{i}',
+                nombre=f'Bajo {i}',
+                stock_actual=Decimal(i + 1),
+                stock_minimo=Decimal('10'),
+                activo=i != 0,
+                empresa_id=empresa.id,
+            )
+        )
+    db.session.commit()
+
+    with db.engine.connect() as conn:
+        resultado = reporte_service.consulta_stock_bajo(conn, empresa.id, limite=3)
+
+    # 5 activos bajo mínimo más el Tornillo de la base; el inactivo no cuenta
+    assert resultado['cantidad'] == 6
+    assert [fila.nombre for fila in resultado['alertas']] == ['Tornillo', 'Bajo 1', 'Bajo 2']
+
+
+def test_reporte_historico_se_sirve_desde_cache_hasta_invalidar(app):
+    empresa, usuario, producto = _crear_base()
+    dia = datetime(2025, 3, 15, 10, 0)
+    _crear_venta(empresa, usuario, producto, 1, dia, Decimal('100.00'))
+    db.session.commit()
+
+    inicio, fin = reporte_service.rango_del_dia(dia.date())
+    assert reporte_service.reporte_ventas(empresa.id, inicio, fin)['total_ventas'] == Decimal(
+        '100.00'
+    )
+
+    # Escritura sin invalidar: el resultado cacheado no cambia
+    _crear_venta(empresa, usuario, producto, 2, dia, Decimal('40.00'))
+    db.session.commit()
+    assert reporte_service.reporte_ventas(empresa.id, inicio, fin)['total_ventas'] == Decimal(
+        '100.00'
+    )
+
+    reporte_service.invalidar_reportes(empresa.id, dia)
+    db.session.commit()
+    assert reporte_service.reporte_ventas(empresa.id, inicio, fin)['total_ventas'] == Decimal(
+        '140.00'
+    )
+
+
+def test_reporte_con_hoy_combina_historico_y_dia_actual(app):
+    empresa, usuario, producto = _crear_base()
+    ahora = ahora_argentina()
+    ayer = ahora - timedelta(days=1)
+    _crear_venta(empresa, usuario, producto, 1, ayer, Decimal('100.00'))
+    db.session.commit()
+
+    inicio, _ = reporte_service.rango_del_dia(ayer.date())
+    _, fin = reporte_service.rango_del_dia(ahora.date())
+    assert reporte_service.reporte_ventas(empresa.id, inicio, fin)['cantidad_ventas'] == 1
+
+    # Las ventas de hoy se reflejan sin invalidar nada
+    _crear_venta(empresa, usuario, producto, 2, ahora, Decimal('25.00'), forma_pago='qr')
+    db.session.commit()
+    reporte = reporte_service.reporte_ventas(empresa.id, inicio, fin)
+
+    assert reporte['total_ventas'] == Decimal('125.00')
+    assert reporte['cantidad_ventas'] == 2
+    assert [d['fecha'] for d in reporte['ventas_por_dia']] == [
+        str(ayer.date()),
+        str(ahora.date()),
+    ]
+    assert reporte['productos_mas_vendidos'][0]['total'] == 125.0
+    assert reporte['productos_mas_vendidos'][0]['cantidad'] == 2.0
+
+
+def test_invalidar_reportes_ignora_el_dia_actual(app):
+    empresa, _, _ = _crear_base()
+    reporte_service.invalidar_reportes(empresa.id, ahora_argentina())
+    assert VersionDatos.query.count() == 0
+
+    reporte_service.invalidar_reportes(empresa.id, datetime(2025, 3, 15))
+    reporte_service.invalidar_reportes(empresa.id, datetime(2025, 3, 20))
+    db.session.commit()
+    version = VersionDatos.query.one()
+    assert version.periodo.isoformat() == '2025-03-01'
+    assert version.version == 2
+
+
+def test_reporte_stock_totales_y_paginacion_por_clave(app):
+    empresa, _, producto = _crear_base()
+    for indice in range(4):
+        db.session.add(
+            Producto(
+                codigo=f'STK-{indice}',
+                nombre=f'Martillo {indice}',
+                unidad_medida='unidad',
+                precio_costo=Decimal('2.00'),
+                precio_venta=Decimal('3.00'),
+                stock_actual=Decimal('10.000'),
+                stock_minimo=Decimal('1.000'),
+                activo=True,
+                empresa_id=empresa.id,
+            )
+        )
+    db.session.commit()
+
+    reporte = reporte_service.reporte_stock(empresa.id, limite=2)
+    # Tornillo: 1 x 5 / 1 x 10; Martillos: 4 x (10 x 2) / 4 x (10 x 3)
+    assert Decimal(str(reporte['valor_costo'])) == Decimal('85')
+    assert Decimal(str(reporte['valor_venta'])) == Decimal('130')
+    assert reporte['cantidad_productos'] == 5
+    assert reporte['cantidad_bajo_minimo'] == 1
+    assert [p.nombre for p in reporte['productos']] == ['Martillo 0', 'Martillo 1']
+
+    nombres = []
+    despues_id = None
+    while True:
+        pagina = reporte_service.reporte_stock(empresa.id, despues_id=despues_id, limite=2)
+        nombres.extend(p.nombre for p in pagina['productos'])
+        despues_id = pagina['siguiente']
+        if despues_id is None:
+            break
+    assert nombres == ['Martillo 0', 'Martillo 1', 'Martillo 2', 'Martillo 3', 'Tornillo']
+
+    solo_bajo = reporte_service.reporte_stock(empresa.id, solo_bajo_minimo=True)
+    assert [p.id for p in solo_bajo['productos']] == [producto.id]
+    assert solo_bajo['productos'][0].bajo_minimo
+    assert solo_bajo['cantidad_productos'] == 1
+
+
+def test_reporte_clientes_usa_estadisticas_mantenidas(app):
+    empresa, _, _ = _crear_base()
+    hoy = ahora_argentina().date()
+    frecuente = Cliente(
+        nombre='Frecuente',
+        total_comprado=Decimal('900.00'),
+        cantidad_compras=3,
+        fecha_ultima_compra=datetime.combine(hoy, datetime.min.time()),
+        saldo_cuenta_corriente=Decimal('50.00'),
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    ocasional = Cliente(
+        nombre='Ocasional',
+        total_comprado=Decimal('100.00'),
+        cantidad_compras=1,
+        fecha_ultima_compra=datetime.combine(hoy - timedelta(days=60), datetime.min.time()),
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    nuevo = Cliente(nombre='Nuevo', activo=True, empresa_id=empresa.id)
+    db.session.add_all([frecuente, ocasional, nuevo])
+    db.session.commit()
+
+    reporte = reporte_service.reporte_clientes(empresa.id, hoy)
+
+    assert [c.nombre for c in reporte['top_clientes']] == ['Frecuente', 'Ocasional']
+    assert [c.nombre for c in reporte['clientes_deudores']] == ['Frecuente']
+    assert reporte['total_deudas'] == Decimal('50.00')
+    assert reporte['segmentos'] == {
+        'activos': 1,
+        'en_riesgo': 1,
+        'inactivos': 0,
+        'sin_compras': 1,
+    }
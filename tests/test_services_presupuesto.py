@@ -269,3 +269,38 @@ def test_convertir_a_venta_credito_insuficiente(app):
             caja_id=caja.id,
             empresa_id=empresa.id,
         )
+
+
+def test_convertir_a_venta_actualiza_estadisticas_cliente(app):
+    empresa = _crear_empresa()
+    usuario = _crear_usuario(empresa.id)
+    producto = _crear_producto('PRD-EST', empresa.id, stock_actual='5.000', precio='10.00')
+    cliente = _crear_cliente(empresa.id)
+    db.session.add_all([usuario, producto, cliente])
+    db.session.commit()
+
+    caja = _crear_caja(usuario.id, empresa.id)
+    db.session.add(caja)
+    db.session.commit()
+
+    items = [
+        {'producto_id': producto.id, 'cantidad': Decimal('2.000'), 'precio_unitario': Decimal('10.00')},
+    ]
+    presupuesto = crear_presupuesto(
+        items, usuario_id=usuario.id, empresa_id=empresa.id, cliente_id=cliente.id
+    )
+    presupuesto.estado = 'aceptado'
+    db.session.commit()
+
+    venta = convertir_a_venta(
+        presupuesto,
+        usuario_id=usuario.id,
+        forma_pago='efectivo',
+        caja_id=caja.id,
+        empresa_id=empresa.id,
+    )
+
+    db.session.refresh(cliente)
+    assert cliente.total_comprado == venta.total
+    assert cliente.cantidad_compras == 1
+    assert cliente.fecha_ultima_compra == venta.fecha
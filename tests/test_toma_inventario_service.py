@@ -0,0 +1,193 @@
+"""Tests de la toma de inventario (conteo físico y ajuste masivo)."""
+
+import io
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from werkzeug.datastructures import FileStorage
+
+from app.extensions import db
+from app.models import MovimientoStock, Producto, TomaInventario, Usuario
+from app.services import toma_inventario_service
+
+
+@pytest.fixture
+def datos(app, empresa, tmp_path):
+    app.config['IMPORTACIONES_FOLDER'] = str(tmp_path)
+    usuario = Usuario(
+        email='tomas@ferrerp.test',
+        nombre='Usuario Tomas',
+        rol='administrador',
+        activo=True,
+        empresa_id=empresa.id,
+    )
+    usuario.set_password('clave')
+    db.session.add(usuario)
+
+    def _producto(codigo, stock, costo='10', **extra):
+        return Producto(
+            codigo=codigo,
+            nombre=f'Producto {codigo}',
+            precio_costo=Decimal(costo),
+            precio_venta=Decimal('20'),
+            stock_actual=Decimal(stock),
+            empresa_id=empresa.id,
+            **extra,
+        )
+
+    db.session.add_all(
+        [
+            _producto('A', '10'),
+            _producto('B', '5', costo='100'),
+            _producto('C', '8'),
+            _producto('D', '2', codigo_barras='7790001'),
+        ]
+    )
+    db.session.commit()
+    toma = toma_inventario_service.crear_toma(empresa.id, usuario.id, 'Inventario anual')
+    return usuario, toma
+
+
+def _cargar(toma, contenido, tmp_path):
+    ruta = tmp_path / 'conteo.csv'
+    ruta.write_text(contenido, encoding='utf-8')
+    with open(ruta, 'rb') as archivo:
+        return toma_inventario_service.cargar_conteos(
+            toma, FileStorage(archivo, filename='conteo.csv')
+        )
+
+
+def _stock(empresa):
+    return {
+        p.codigo: p.stock_actual
+        for p in db.session.execute(
+            select(Producto).where(Producto.empresa_id == empresa.id)
+        ).scalars()
+    }
+
+
+def test_carga_escaneo_y_resumen(datos, empresa, tmp_path):
+    """El archivo reemplaza conteos, el escaneo suma y el resumen sale en SQL."""
+    _, toma = datos
+
+    registrados = _cargar(toma, 'codigo;cantidad\nA;12\nB;3\nC;8\nZ;4\nA;x\n', tmp_path)
+    toma_inventario_service.escanear(toma, '7790001')
+    tarjeta, contado = toma_inventario_service.escanear(toma, 'D', Decimal('2'))
+
+    assert registrados == 3
+    assert tarjeta['codigo'] == 'D'
+    assert contado == 3
+    assert toma.con_error == 2
+    assert {fila for fila, _ in toma.lista_errores} == {5, 6}
+
+    resumen = toma_inventario_service.resumen(toma)
+    assert resumen['contados'] == 4
+    assert resumen['con_diferencia'] == 3
+    assert (resumen['sobrantes'], resumen['faltantes']) == (2, 1)
+    assert resumen['unidades_sobrantes'] == 3  # A +2, D +1
+    assert resumen['unidades_faltantes'] == 2  # B -2
+    assert resumen['valor_neto'] == Decimal('30') - Decimal('200')
+
+    muestra = toma_inventario_service.muestra(toma)
+    assert [fila.codigo for fila in muestra] == ['B', 'A', 'D']
+
+    # Un nuevo archivo reemplaza el conteo del producto
+    _cargar(toma, 'codigo;cantidad\nB;5\n', tmp_path)
+    assert toma_inventario_service.resumen(toma)['con_diferencia'] == 2
+
+
+def test_aplicar_por_lotes_conserva_movimientos_durante_el_conteo(datos, empresa, tmp_path):
+    """La diferencia se suma al stock vigente, con un movimiento por producto."""
+    usuario, toma = datos
+    _cargar(toma, 'codigo;cantidad\nA;12\nB;3\nC;8\nD;0\n', tmp_path)
+
+    # Venta de A durante el conteo: 10 -> 7 (y D se vende por completo)
+    for codigo, stock in (('A', '7'), ('D', '0')):
+        producto = Producto.query.filter_by(codigo=codigo).one()
+        producto.stock_actual = Decimal(stock)
+    db.session.commit()
+    assert toma_inventario_service.resumen(toma)['movidos'] == 2
+
+    ajustados = toma_inventario_service.aplicar_toma(toma, usuario.id, tamanio_lote=2)
+
+    assert ajustados == 2  # D ya estaba en 0: no hay nada que ajustar
+    assert toma.estado == 'aplicada'
+    stock = _stock(empresa)
+    assert stock['A'] == Decimal('9')  # 7 + (12 - 10)
+    assert stock['B'] == Decimal('3')
+    assert stock['C'] == Decimal('8')
+    assert stock['D'] == Decimal('0')
+
+    movimientos = {
+        m.producto.codigo: m
+        for m in MovimientoStock.query.filter_by(
+            referencia_tipo='toma_inventario', referencia_id=toma.id
+        )
+    }
+    assert set(movimientos) == {'A', 'B'}
+    assert movimientos['A'].tipo == 'ajuste_positivo'
+    assert (movimientos['A'].stock_anterior, movimientos['A'].stock_posterior) == (7, 9)
+    assert movimientos['B'].tipo == 'ajuste_negativo'
+    assert movimientos['B'].cantidad == Decimal('-2')
+
+    with pytest.raises(ValueError):
+        toma_inventario_service.aplicar_toma(toma, usuario.id)
+    with pytest.raises(ValueError):
+        toma_inventario_service.escanear(toma, 'A')
+
+
+def test_reanuda_aplicacion_interrumpida(datos, empresa, tmp_path, monkeypatch):
+    """Una aplicación interrumpida conserva los lotes confirmados y se reanuda."""
+    usuario, toma = datos
+    _cargar(toma, 'codigo;cantidad\nA;11\nB;6\nC;9\n', tmp_path)
+
+    aplicar_lote = toma_inventario_service._aplicar_lote
+    llamadas = []
+
+    def _falla_en_el_segundo(*args):
+        llamadas.append(args)
+        if len(llamadas) == 2:
+            raise RuntimeError('corte')
+        return aplicar_lote(*args)
+
+    monkeypatch.setattr(toma_inventario_service, '_aplicar_lote', _falla_en_el_segundo)
+    with pytest.raises(ValueError):
+        toma_inventario_service.aplicar_toma(toma, usuario.id, tamanio_lote=1)
+
+    db.session.refresh(toma)
+    assert toma.estado == 'aplicando'
+    assert toma.productos_ajustados == 1
+    assert _stock(empresa)['A'] == Decimal('11')
+    assert _stock(empresa)['B'] == Decimal('5')
+
+    monkeypatch.setattr(toma_inventario_service, '_aplicar_lote', aplicar_lote)
+    assert toma_inventario_service.aplicar_toma(toma, usuario.id, tamanio_lote=1) == 3
+    assert _stock(empresa) == {
+        'A': Decimal('11'),
+        'B': Decimal('6'),
+        'C': Decimal('9'),
+        'D': Decimal('2'),
+    }
+    assert MovimientoStock.query.filter_by(referencia_tipo='toma_inventario').count() == 3
+
+
+def test_una_sola_toma_abierta_por_empresa(datos, empresa):
+    usuario, toma = datos
+    with pytest.raises(ValueError):
+        toma_inventario_service.crear_toma(empresa.id, usuario.id)
+
+    toma_inventario_service.descartar_toma(toma)
+    nueva = toma_inventario_service.crear_toma(empresa.id, usuario.id)
+    assert db.session.get(TomaInventario, nueva.id).estado == 'abierta'
+
+
+def test_subida_de_conteo_supera_el_limite_general_con_csrf(app, client, csrf_token):
+    contenido = b'codigo,cantidad\n' + b'X' * (app.config['MAX_CONTENT_LENGTH'] + 1024 * 1024)
+    respuesta = client.post(
+        '/inventario/tomas/1/cargar',
+        data={'csrf_token': csrf_token, 'archivo': (io.BytesIO(contenido), 'conteo.csv')},
+        content_type='multipart/form-data',
+    )
+    # Pasa la validación CSRF y llega a la vista (que redirige al login)
+    assert respuesta.status_code == 302